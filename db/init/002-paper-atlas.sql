@@ -5,6 +5,12 @@
 -- projections side-by-side ("pacmap_pl_v1", "pacmap_v1", "umap_v2", ...)
 -- without conflict. The index on (projection, x, y) supports viewport
 -- range queries (WHERE projection = ... AND x BETWEEN ... AND y BETWEEN ...).
+--
+-- LIST-partitioned on projection, one partition per projection, created by
+-- `oversight projections`: a full refit COPYs into a staging table and
+-- swaps it in with DETACH/ATTACH PARTITION (see projections.py) instead of
+-- upserting every row through the shared index. Keep in sync with
+-- PARTITIONED_TABLE_DDL there, which converts pre-partitioning databases.
 CREATE TABLE IF NOT EXISTS paper_projection_2d (
     paper_id    varchar      NOT NULL REFERENCES paper(paper_id) ON DELETE CASCADE,
     projection  varchar      NOT NULL,
@@ -12,7 +18,7 @@ CREATE TABLE IF NOT EXISTS paper_projection_2d (
     y           real         NOT NULL,
     created_at  timestamp    NOT NULL DEFAULT CURRENT_TIMESTAMP,
     PRIMARY KEY (paper_id, projection)
-);
+) PARTITION BY LIST (projection);
 
 CREATE INDEX IF NOT EXISTS paper_projection_2d_proj_xy_idx
     ON paper_projection_2d (projection, x, y);
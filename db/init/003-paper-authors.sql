@@ -0,0 +1,11 @@
+-- Authors and institutions parsed once at ingest (Paper.__init__ runs
+-- extract_authors over the raw document) so search / neighbors / detail
+-- responses can be hydrated without shipping the full `document` JSONB.
+--
+-- NULL means "ingested before these columns existed"; result queries fall
+-- back to parsing the document for those rows until
+-- `oversight backfill-authors` fills them in (it also adds the columns on
+-- databases created before this file, since db/init only runs once).
+ALTER TABLE IF EXISTS paper
+    ADD COLUMN IF NOT EXISTS authors text[],
+    ADD COLUMN IF NOT EXISTS institutions text[];
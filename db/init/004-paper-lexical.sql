@@ -0,0 +1,37 @@
+-- Lexical lookup over title, parsed authors and institutions, for the
+-- /api/suggest autocomplete (title / author search that never calls the
+-- embedding model).
+--
+--   lexical                      tsvector ('simple' config: no stemming,
+--                                so prefixes of names and title words
+--                                match as typed), GIN-indexed; every typed
+--                                word must occur, the last one as a prefix
+--   paper_suggest_text(...)      title + authors + institutions as one
+--                                string, GiST trigram-indexed so
+--                                `ORDER BY ... <<-> q` walks the index in
+--                                word-similarity order (ranking, and the
+--                                fuzzy fallback for typos)
+--
+-- db/init only runs on fresh volumes; `oversight lexical-index` applies the
+-- same DDL to existing databases. Keep in sync with LEXICAL_INDEX_DDL in
+-- PaperDatabase.py.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- array_to_string is only STABLE, so wrap it in an IMMUTABLE function that
+-- generated columns and expression indexes are allowed to use. text[] has
+-- a fixed output format, so the result really does not change.
+CREATE OR REPLACE FUNCTION paper_suggest_text(title text, authors text[], institutions text[])
+    RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    RETURN coalesce(title, '') || ' ' || coalesce(array_to_string(authors, ' '), '')
+        || ' ' || coalesce(array_to_string(institutions, ' '), '');
+
+ALTER TABLE IF EXISTS paper
+    ADD COLUMN IF NOT EXISTS lexical tsvector GENERATED ALWAYS AS (
+        to_tsvector('simple'::regconfig, paper_suggest_text(title, authors, institutions))
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS paper_lexical_idx ON paper USING gin (lexical);
+
+CREATE INDEX IF NOT EXISTS paper_suggest_trgm_idx
+    ON paper USING gist (paper_suggest_text(title, authors, institutions) gist_trgm_ops);
@@ -0,0 +1,34 @@
+-- Background jobs (arXiv sync, email digest, atlas projections) queued by
+-- POST /api/sync and /api/digest (or `oversight jobs submit`) and run by
+-- `oversight worker`, which claims queued rows with FOR UPDATE SKIP LOCKED.
+--
+-- The partial unique index is the single-flight guarantee: at most one
+-- queued-or-running job per kind, so a second POST /api/sync while one is
+-- pending gets the existing job back instead of starting an overlapping
+-- sync. progress_* are fed from the job's tqdm loops; heartbeat_at lets a
+-- worker fail jobs whose worker died mid-run.
+--
+-- db/init only runs on fresh volumes; the worker also applies this DDL on
+-- startup. Keep in sync with JOBS_DDL in jobs.py.
+CREATE TABLE IF NOT EXISTS job (
+    id              bigserial    PRIMARY KEY,
+    kind            varchar      NOT NULL,
+    status          varchar      NOT NULL DEFAULT 'queued'
+                    CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+    params          jsonb        NOT NULL DEFAULT '{}',
+    progress_label  text,
+    progress_done   bigint,
+    progress_total  bigint,
+    error           text,
+    worker          text,
+    created_at      timestamptz  NOT NULL DEFAULT now(),
+    started_at      timestamptz,
+    heartbeat_at    timestamptz,
+    finished_at     timestamptz
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS job_active_kind_idx
+    ON job (kind) WHERE status IN ('queued', 'running');
+
+CREATE INDEX IF NOT EXISTS job_queued_idx
+    ON job (id) WHERE status = 'queued';
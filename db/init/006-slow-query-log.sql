@@ -0,0 +1,28 @@
+-- Plans of read queries that ran over their OVERSIGHT_SLOW_QUERY_MS
+-- threshold. The API's capture thread writes them: it replays the
+-- statement under EXPLAIN (ANALYZE, BUFFERS) after the session settings the
+-- query ran with (`settings`, e.g. SET hnsw.ef_search), so an HNSW scan
+-- that has silently become a sequential one shows up here with its plan.
+-- `params` is redacted (numbers kept, everything else reduced to its type
+-- and length); quoted literals are scrubbed from `plan`. `error` is set
+-- instead of `plan` when the replay failed or hit its statement_timeout.
+--
+-- Read it with `oversight slow-queries`.
+--
+-- db/init only runs on fresh volumes; the capture thread also applies this
+-- DDL. Keep in sync with SLOW_QUERY_LOG_DDL in slow_queries.py.
+CREATE TABLE IF NOT EXISTS slow_query_log (
+    id              bigserial         PRIMARY KEY,
+    name            varchar           NOT NULL,
+    duration_ms     double precision  NOT NULL,
+    threshold_ms    double precision  NOT NULL,
+    query           text              NOT NULL,
+    params          jsonb             NOT NULL DEFAULT '[]',
+    settings        text[]            NOT NULL DEFAULT '{}',
+    plan            text,
+    error           text,
+    captured_at     timestamptz       NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS slow_query_log_name_idx
+    ON slow_query_log (name, captured_at DESC);
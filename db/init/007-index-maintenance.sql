@@ -0,0 +1,10 @@
+-- Extensions behind `oversight index`: pg_prewarm loads the HNSW indexes
+-- into shared buffers (`oversight index prewarm`; with pg_prewarm in
+-- shared_preload_libraries, see docker-compose.db.yml, its autoprewarm
+-- worker also restores the buffers after every restart), pg_buffercache
+-- shows how much of each index is resident (`oversight index status`).
+--
+-- db/init only runs on fresh volumes; `oversight index` also creates them.
+-- Keep in sync with INDEX_EXTENSIONS_DDL in vector_indexes.py.
+CREATE EXTENSION IF NOT EXISTS pg_prewarm;
+CREATE EXTENSION IF NOT EXISTS pg_buffercache;
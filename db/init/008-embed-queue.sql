@@ -0,0 +1,32 @@
+-- Papers waiting to be embedded, one row per paper and embedding model.
+-- Ingestion inserts a row (and NOTIFYs oversight_embed) whenever a paper is
+-- new or its abstract changed; `oversight embed-queue work`, sync and
+-- consume claim ready rows in batches with FOR UPDATE SKIP LOCKED, write the
+-- vectors and delete the rows. text_hash (md5 of the abstract) keeps a
+-- vector of an outdated abstract from being stored or completing the row.
+-- A failed batch goes back to ready with available_at pushed out by an
+-- exponential backoff, and isn't claimed before then.
+--
+-- db/init only runs on fresh volumes; ingestion and the embedders also
+-- apply this DDL, seeding the queue from existing unembedded papers the
+-- first time. Keep in sync with EMBED_QUEUE_DDL in embed_queue.py.
+CREATE TABLE IF NOT EXISTS embed_queue (
+    paper_id     varchar      NOT NULL REFERENCES paper(paper_id) ON DELETE CASCADE,
+    model        varchar      NOT NULL,
+    text_hash    text         NOT NULL,
+    priority     smallint     NOT NULL DEFAULT 0,
+    state        varchar      NOT NULL DEFAULT 'ready'
+                 CHECK (state IN ('ready', 'claimed', 'failed')),
+    attempts     integer      NOT NULL DEFAULT 0,
+    last_error   text,
+    claimed_by   text,
+    enqueued_at  timestamptz  NOT NULL DEFAULT now(),
+    available_at timestamptz  NOT NULL DEFAULT now(),
+    claimed_at   timestamptz,
+    PRIMARY KEY (paper_id, model)
+);
+
+CREATE INDEX IF NOT EXISTS embed_queue_ready_idx
+    ON embed_queue (model, priority DESC, enqueued_at) WHERE state = 'ready';
+CREATE INDEX IF NOT EXISTS embed_queue_claimed_idx
+    ON embed_queue (claimed_at) WHERE state = 'claimed';
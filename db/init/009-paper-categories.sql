@@ -0,0 +1,15 @@
+-- arXiv categories (OAI-PMH setSpecs such as 'cs:cs:LG') as an array on
+-- the paper row, written by the same statement as the rest of the paper
+-- instead of a delete-and-reinsert of per-category rows. The GIN index
+-- serves `categories && ARRAY[...]` filters: /api/search's "categories"
+-- and the embed queue's seeding of arXiv papers in the embedded categories.
+-- Conference papers leave it NULL.
+--
+-- db/init only runs on fresh volumes; `oversight paper-categories` (and
+-- the first sync or consume) applies the same DDL to existing databases,
+-- copying over the old arxiv_paper_categories rows. Keep in sync with
+-- CATEGORIES_COLUMN_DDL / CATEGORIES_INDEX_DDL in PaperDatabase.py.
+ALTER TABLE IF EXISTS paper
+    ADD COLUMN IF NOT EXISTS categories text[];
+
+CREATE INDEX IF NOT EXISTS paper_categories_idx ON paper USING gin (categories);
@@ -77,6 +77,10 @@ export default function HomePage() {
   const lastRequestIdRef = useRef<number>(0);
   const [error, setError] = useState<string | null>(null);
   const [results, setResults] = useState<Paper[]>([]);
+  // Continuation token from /api/search; null once the last page is in.
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const loadMoreRef = useRef<HTMLDivElement>(null);
   const [submittedQuery, setSubmittedQuery] = useState<string | null>(null);
   const [searchDuration, setSearchDuration] = useState<number | null>(null);
 
@@ -125,6 +129,7 @@ export default function HomePage() {
     setError(null);
     setLoading(true);
     setResults([]);
+    setNextCursor(null);
     setSearchDuration(null);
     setSubmittedQuery(query);
     setText(query);
@@ -152,6 +157,7 @@ export default function HomePage() {
       if (lastRequestIdRef.current !== reqId) return;
       setSearchDuration((performance.now() - startTime) / 1000);
       setResults(data.results || []);
+      setNextCursor(data.next_cursor ?? null);
     } catch (err: any) {
       setError(err.message || String(err));
     } finally {
@@ -159,6 +165,46 @@ export default function HomePage() {
     }
   }
 
+  // Infinite scroll: fetch the page after `nextCursor`. The cursor carries
+  // the query and filters, so later pages don't re-embed or re-send the
+  // results already on screen.
+  async function loadMore() {
+    if (!nextCursor || loadingMore || loading) return;
+    const reqId = lastRequestIdRef.current;
+    setLoadingMore(true);
+    try {
+      const resp = await fetch(`/api/search`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json", "Cache-Control": "no-store" },
+        cache: "no-store",
+        body: JSON.stringify({ cursor: nextCursor }),
+      });
+      const data = await resp.json();
+      if (!resp.ok) throw new Error(data?.error || `Request failed: ${resp.status}`);
+      if (lastRequestIdRef.current !== reqId) return;
+      setResults((prev) => {
+        const seen = new Set(prev.map((p) => p.paper_id));
+        return [...prev, ...(data.results || []).filter((p: Paper) => !seen.has(p.paper_id))];
+      });
+      setNextCursor(data.next_cursor ?? null);
+    } catch (err: any) {
+      setError(err.message || String(err));
+      setNextCursor(null);
+    } finally {
+      setLoadingMore(false);
+    }
+  }
+
+  useEffect(() => {
+    const el = loadMoreRef.current;
+    if (!el || !nextCursor) return;
+    const observer = new IntersectionObserver((entries) => {
+      if (entries.some((e) => e.isIntersecting)) loadMore();
+    });
+    observer.observe(el);
+    return () => observer.disconnect();
+  }, [nextCursor, loadingMore, loading]);
+
   function onSubmit(e: React.FormEvent) {
     e.preventDefault();
     if (text.trim() && !loading) doSearch(text);
@@ -603,6 +649,19 @@ export default function HomePage() {
               </div>
             ))}
 
+            {/* Infinite-scroll sentinel: loads the next page when scrolled into view */}
+            {nextCursor && results.length > 0 && (
+              <div ref={loadMoreRef} className="flex justify-start">
+                {loadingMore && (
+                  <div className="rounded-2xl rounded-bl-sm bg-[#111111] px-4 py-3 flex items-center gap-[3px]">
+                    <span className="typing-dot" style={{ animationDelay: '0ms' }} />
+                    <span className="typing-dot" style={{ animationDelay: '150ms' }} />
+                    <span className="typing-dot" style={{ animationDelay: '300ms' }} />
+                  </div>
+                )}
+              </div>
+            )}
+
             {/* No results message */}
             {results.length === 0 && !loading && submittedQuery && (
               <div className="flex justify-start">
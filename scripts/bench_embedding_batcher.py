@@ -0,0 +1,126 @@
+"""Synthetic load benchmark for query-embedding micro-batching.
+
+Fires search-query embeddings at a fixed open-loop rate (Poisson arrivals)
+for a fixed duration, drawing texts from a Zipf distribution over a pool
+of queries so popular ones repeat the way real search traffic does. Runs
+two modes against the deterministic ``fake/hash-3072`` model, whose every
+provider call sleeps ``--latency-ms`` regardless of batch size:
+
+  direct   one ``embed_query`` per request (what /api/search did before)
+  batched  requests go through EmbeddingBatcher
+
+and reports p50/p99 latency, provider calls per second and texts per call.
+
+    uv run python scripts/bench_embedding_batcher.py [--rate 200] \\
+        [--window-ms 8] [--max-batch 32]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+
+def _zipf_texts(n: int, pool: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(pool)]
+    return [f"query {i}" for i in rng.choices(range(pool), weights, k=n)]
+
+
+async def _run(mode: str, args: argparse.Namespace) -> dict[str, float]:
+    from oversight.EmbeddingBatcher import EmbeddingBatcher
+    from oversight.EmbeddingModel import EmbeddingModel
+
+    os.environ["OVERSIGHT_FAKE_EMBEDDING_LATENCY_MS"] = str(args.latency_ms)
+    model = EmbeddingModel("fake/hash-3072")
+    n = int(args.rate * args.duration)
+    texts = _zipf_texts(n, args.pool, args.seed)
+    rng = random.Random(args.seed)
+
+    calls = 0
+    # Big enough that direct mode never queues behind its own threads.
+    executor = ThreadPoolExecutor(max_workers=512)
+    batcher = (
+        EmbeddingBatcher(model, window_ms=args.window_ms, max_batch=args.max_batch)
+        if mode == "batched"
+        else None
+    )
+    loop = asyncio.get_running_loop()
+    latencies: list[float] = []
+
+    def direct(text: str) -> list[float]:
+        nonlocal calls
+        calls += 1
+        return model.embed_query(text)
+
+    async def one(text: str) -> None:
+        t0 = time.perf_counter()
+        if batcher is not None:
+            await batcher.aembed_query(text)
+        else:
+            await loop.run_in_executor(executor, direct, text)
+        latencies.append(time.perf_counter() - t0)
+
+    tasks = []
+    t_start = time.perf_counter()
+    for text in texts:
+        tasks.append(asyncio.create_task(one(text)))
+        await asyncio.sleep(rng.expovariate(args.rate))
+    await asyncio.gather(*tasks)
+    wall = time.perf_counter() - t_start
+
+    if batcher is not None:
+        batcher.close()
+        calls = batcher.stats.provider_calls
+    executor.shutdown()
+
+    latencies.sort()
+    return {
+        "requests": n,
+        "p50_ms": latencies[n // 2] * 1000,
+        "p99_ms": latencies[int(n * 0.99)] * 1000,
+        "calls_per_s": calls / wall,
+        "texts_per_call": n / calls,
+        "deduplicated": batcher.stats.deduplicated if batcher is not None else 0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=200.0, help="requests/s")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--window-ms", type=float, default=8.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--pool", type=int, default=2000, help="distinct queries")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"{args.rate:.0f} req/s for {args.duration:.0f}s, provider latency "
+        f"{args.latency_ms:.0f}ms, window {args.window_ms:.0f}ms, "
+        f"max batch {args.max_batch}"
+    )
+    print(
+        f"{'mode':<8} {'p50 ms':>8} {'p99 ms':>8} {'calls/s':>8} "
+        f"{'texts/call':>11} {'deduped':>8}"
+    )
+    for mode in ("direct", "batched"):
+        r = asyncio.run(_run(mode, args))
+        print(
+            f"{mode:<8} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+            f"{r['calls_per_s']:>8.1f} {r['texts_per_call']:>11.1f} "
+            f"{r['deduplicated']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
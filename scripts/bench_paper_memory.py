@@ -0,0 +1,158 @@
+"""Memory / throughput benchmark for holding a sync batch of Papers.
+
+Builds a realistic batch of synthetic arXivRaw OAI-PMH records (default
+100k) and turns each into a Paper two ways, each in a fresh subprocess so
+peak RSS is measured in isolation:
+
+  eager  what sync did before Paper was slotted: keep the fully parsed
+         xmltodict document on every Paper and parse authors up front.
+  lazy   SickleWrapper.parse_record's default: keep scalar fields plus the
+         raw XML, re-parse the document (and parse authors) on access.
+
+For each mode it reports peak RSS while the batch is held, build
+throughput, and the throughput of an ingest-shaped second pass that
+touches ``document`` and ``authors`` once per paper (what
+PaperDatabase.insert_paper does).
+
+    uv run python scripts/bench_paper_memory.py [--n 100000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+WORDS = (
+    "learning model language neural graph program type system inference "
+    "distributed memory compiler optimisation agent policy reward proof "
+    "verification transformer attention kernel scheduling latency storage"
+).split()
+CATEGORIES = ["cs:cs:AI", "cs:cs:CL", "cs:cs:LG", "cs:cs:PL", "cs:cs:DC"]
+
+
+def _text(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n_words))
+
+
+def synthetic_records(n: int, seed: int = 0) -> Iterator[str]:
+    """Yield arXivRaw records shaped like real OAI-PMH responses.
+
+    A generator so the eager mode doesn't also pay for holding every raw
+    record, matching sickle's lazy iteration during a real sync.
+    """
+    rng = random.Random(seed)
+    start = date(2025, 1, 1)
+    for i in range(n):
+        paper_id = f"25{i // 100000:02d}.{i % 100000:05d}"
+        day = (start + timedelta(days=rng.randrange(365))).isoformat()
+        authors = ", ".join(
+            f"{_text(rng, 1).title()} {_text(rng, 1).title()}"
+            for _ in range(rng.randint(2, 9))
+        )
+        specs = "".join(
+            f"<setSpec>{c}</setSpec>" for c in rng.sample(CATEGORIES, rng.randint(1, 3))
+        )
+        versions = "".join(
+            f'<version version="v{v}"><date>Mon, {v} Jan 2025 00:00:00 GMT</date>'
+            f"<size>{rng.randint(100, 9000)}kb</size></version>"
+            for v in range(1, rng.randint(1, 4) + 1)
+        )
+        yield (
+            f"<record><header><identifier>oai:arXiv.org:{paper_id}</identifier>"
+            f"<datestamp>{day}</datestamp>{specs}</header><metadata>"
+            f'<arXivRaw xmlns="http://arxiv.org/OAI/arXivRaw/">'
+            f"<id>{paper_id}</id><submitter>{_text(rng, 2).title()}</submitter>"
+            f"{versions}<title>{_text(rng, 10)}</title><authors>{authors}</authors>"
+            f"<categories>cs.LG cs.AI</categories><comments>{_text(rng, 8)}</comments>"
+            f"<license>http://creativecommons.org/licenses/by/4.0/</license>"
+            f"<abstract>{_text(rng, 180)}</abstract></arXivRaw></metadata></record>"
+        )
+
+
+def _rss_mb(field: str) -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_mode(mode: str, n: int) -> dict[str, float]:
+    from oversight.Paper import Paper
+    from oversight.SickleWrapper import SickleWrapper
+
+    wrapper = SickleWrapper("", "arXivRaw", "cs:cs", "%Y-%m-%d")
+    gc.collect()
+    rss_before = _rss_mb("VmRSS")
+
+    t0 = time.perf_counter()
+    papers: list[Paper] = []
+    for raw in synthetic_records(n):
+        paper = wrapper.parse_record(raw, lazy=mode == "lazy")
+        if mode == "eager":
+            _ = paper.authors
+        papers.append(paper)
+    build_s = time.perf_counter() - t0
+    gc.collect()
+    held_mb = _rss_mb("VmRSS") - rss_before
+
+    t0 = time.perf_counter()
+    for paper in papers:
+        _ = paper.document
+        _ = paper.authors
+    ingest_s = time.perf_counter() - t0
+
+    return {
+        "n": n,
+        "held_mb": held_mb,
+        "peak_rss_mb": _rss_mb("VmHWM"),
+        "build_per_s": n / build_s,
+        "ingest_pass_per_s": n / ingest_s,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--mode", choices=["eager", "lazy"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode is not None:
+        print(json.dumps(run_mode(args.mode, args.n)))
+        return
+
+    results = {}
+    for mode in ("eager", "lazy"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--n", str(args.n), "--mode", mode],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results[mode] = json.loads(out.strip().splitlines()[-1])
+
+    print(f"{args.n:,} synthetic arXivRaw records")
+    print(
+        f"{'mode':<6} {'held MB':>9} {'peak RSS MB':>12} {'build/s':>9} {'ingest/s':>9}"
+    )
+    for mode, r in results.items():
+        print(
+            f"{mode:<6} {r['held_mb']:>9,.0f} {r['peak_rss_mb']:>12,.0f} "
+            f"{r['build_per_s']:>9,.0f} {r['ingest_pass_per_s']:>9,.0f}"
+        )
+    ratio = results["eager"]["held_mb"] / max(results["lazy"]["held_mb"], 1e-9)
+    print(f"lazy holds {ratio:.1f}x less memory for the batch")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@
 # Install oversight cron jobs:
 #   - daily sync at 7am
 #   - daily digest email at 9am
+#   - daily incremental atlas placement of newly synced papers at 8am
+#     (seconds; uses the model saved by the weekly full refit)
 #   - weekly PaCMAP projection refresh, Sunday 3am (heavy: ~30-60 min on
 #     the full corpus, runs offpeak to avoid clashing with sync)
 # Run with sudo.
@@ -13,6 +15,7 @@ sudo install -d -o "$USER_" "$REPO/data/logs"
 sudo tee /etc/cron.d/oversight >/dev/null <<EOF
 PATH=$UV_DIR:/usr/bin:/bin
 0 7 * * * $USER_ cd $REPO && make oversight/sync    >> $REPO/data/logs/sync.log    2>&1
+0 8 * * * $USER_ cd $REPO && make oversight/projections/incremental >> $REPO/data/logs/projections.log 2>&1
 0 9 * * * $USER_ cd $REPO && make oversight/digest  >> $REPO/data/logs/digest.log  2>&1
 0 3 * * 0 $USER_ cd $REPO && make oversight/projections >> $REPO/data/logs/projections.log 2>&1
 EOF
@@ -0,0 +1,217 @@
+"""Load test: Flask (threaded WSGI) vs the ASGI app at equal CPU.
+
+Starts each server in turn as a subprocess pinned (``taskset``) to the
+same CPU set, drives it with a fixed number of concurrent httpx clients
+for a fixed duration, and reports throughput, latency percentiles, errors,
+and the server's own CPU time per request (read from /proc, so the
+comparison is fair even when the client shares the machine).
+
+Search embeds the query with the deterministic ``fake/hash-3072`` model,
+which sleeps ``--latency-ms`` to stand in for the Gemini round-trip — that
+wait is where a thread-per-request server spends most of a search.
+``atlas_ndjson`` streams every point of ``--projection`` from a server-side
+cursor. Needs DATABASE_URL pointing at a database with pgvector >= 0.7
+(halfvec) and fake/hash-3072 vectors, such as one seeded by `oversight
+bench`, for the ``search`` and ``neighbors`` scenarios; ``detail`` runs
+anywhere.
+
+    uv run python scripts/load_test_api.py [--scenario search] \\
+        [--concurrency 64] [--duration 20] [--cpus 0]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import psycopg
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+QUERY_WORDS = (
+    "retrieval augmented generation program synthesis type inference "
+    "distributed consensus garbage collection graph neural network "
+    "speculative decoding compiler verification memory safety scheduling"
+).split()
+
+SERVERS = {
+    # Same Flask app the API image runs, minus the debug reloader.
+    "wsgi": "from oversight.flask_app import app; "
+    "app.run(host='127.0.0.1', port={port}, threaded=True)",
+    "asgi": "import uvicorn; "
+    "uvicorn.run('oversight.asgi_app:app', host='127.0.0.1', port={port}, "
+    "log_level='warning')",
+}
+
+
+def _cpu_seconds(pid: int) -> float:
+    fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+    # utime, stime are fields 14 and 15 (1-based) of the full line.
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _paper_ids(database_url: str, n: int = 1000) -> list[str]:
+    with psycopg.connect(database_url) as con:
+        rows = con.execute(
+            "SELECT paper_id FROM embedding ORDER BY random() LIMIT %s", [n]
+        ).fetchall()
+    return [r[0] for r in rows]
+
+
+def _request(
+    scenario: str, rng: random.Random, ids: list[str], projection: str
+) -> tuple[str, str, dict | None]:
+    if scenario == "search":
+        text = " ".join(rng.sample(QUERY_WORDS, 3))
+        return "POST", "/api/search", {"text": text, "limit": 10}
+    if scenario == "neighbors":
+        return "GET", f"/api/papers/{rng.choice(ids)}/neighbors?k=20", None
+    if scenario == "atlas_ndjson":
+        return "GET", f"/api/atlas?projection={projection}&format=ndjson", None
+    return "GET", f"/api/papers/{rng.choice(ids)}", None
+
+
+async def _drive(
+    base_url: str,
+    args: argparse.Namespace,
+    ids: list[str],
+    duration: float,
+) -> tuple[list[float], int]:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(seed: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            method, path, body = _request(args.scenario, rng, ids, args.projection)
+            t0 = time.perf_counter()
+            try:
+                r = await client.request(method, path, json=body)
+                ok = r.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - t0)
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=30
+    ) as client:
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    return latencies, errors
+
+
+def _wait_healthy(base_url: str, proc: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with {proc.returncode}")
+        try:
+            if httpx.get(base_url + "/api/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not become healthy")
+
+
+def run_server(kind: str, args: argparse.Namespace, ids: list[str]) -> dict[str, float]:
+    port = args.port
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(SRC),
+        "OVERSIGHT_EMBEDDING_MODEL": "fake/hash-3072",
+        "OVERSIGHT_FAKE_EMBEDDING_LATENCY_MS": str(args.latency_ms),
+    }
+    cmd = [
+        "taskset",
+        "-c",
+        args.cpus,
+        sys.executable,
+        "-c",
+        SERVERS[kind].format(port=port),
+    ]
+    proc = subprocess.Popen(
+        cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_healthy(base_url, proc)
+        # Warm-up: first-request imports, pool fill, embedder construction.
+        asyncio.run(_drive(base_url, args, ids, 2))
+        cpu0 = _cpu_seconds(proc.pid)
+        t0 = time.perf_counter()
+        latencies, errors = asyncio.run(_drive(base_url, args, ids, args.duration))
+        wall = time.perf_counter() - t0
+        cpu = _cpu_seconds(proc.pid) - cpu0
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    latencies.sort()
+    n = len(latencies)
+    return {
+        "rps": n / wall,
+        "p50_ms": latencies[n // 2] * 1000 if n else float("nan"),
+        "p99_ms": latencies[min(n - 1, int(n * 0.99))] * 1000 if n else float("nan"),
+        "errors": errors,
+        "cpu_ms_per_req": cpu / n * 1000 if n else float("nan"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenario",
+        choices=["search", "neighbors", "atlas_ndjson", "detail"],
+        default="search",
+    )
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--cpus", default="0", help="taskset CPU list for servers")
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument(
+        "--projection",
+        default="bench",
+        help="Projection streamed by atlas_ndjson (default: bench, as seeded "
+        "by `oversight bench`)",
+    )
+    args = parser.parse_args()
+
+    database_url = os.getenv("DATABASE_URL")
+    assert database_url is not None, "Database URL is not set"
+    ids = _paper_ids(database_url)
+
+    print(
+        f"{args.scenario}: concurrency={args.concurrency} duration={args.duration:.0f}s "
+        f"cpus={args.cpus} embed_latency={args.latency_ms:.0f}ms"
+    )
+    print(
+        f"{'server':<6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'CPU ms/req':>11}"
+    )
+    results = {}
+    for kind in SERVERS:
+        r = run_server(kind, args, ids)
+        results[kind] = r
+        print(
+            f"{kind:<6} {r['rps']:>8.1f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+            f"{r['errors']:>7} {r['cpu_ms_per_req']:>11.2f}"
+        )
+    ratio = results["asgi"]["rps"] / max(results["wsgi"]["rps"], 1e-9)
+    print(f"asgi serves {ratio:.1f}x the requests/s of wsgi on the same CPUs")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,14 @@ from __future__ import annotations
 from datetime import timedelta
 import argparse
 from typing import Any
-from tqdm import tqdm
 from .ResearchListener import ResearchListenerGroup, research_listener_group
 from .SickleWrapper import SickleWrapper
-from .PaperDatabase import PaperDatabase
+from .PaperDatabase import KnnSearch, PaperDatabase
 from .EmbeddingModel import EmbeddingModel
+from .embed_queue import PRIORITY_SYNC, embed_queued
 from .EmailSender import EmailSender
-from .utils import get_logger
-from .Paper import Paper
+from .utils import get_logger, tqdm
+from .Paper import Paper, PaperResult
 from .ResearchLLM import ResearchLLM
 
 # Database backup example
@@ -28,13 +28,13 @@ logger = get_logger()
 class ArXivRepository:
     def __init__(
         self,
-        embedding_model_name: str,
         research_llm_model_name: str,
+        embedding_model_name: str | None = None,
         overlap_timedelta: timedelta = timedelta(days=1),
     ) -> None:
         self.overlap_timedelta = overlap_timedelta
-        self.arxiv_db = PaperDatabase()
         self.embedding_model = EmbeddingModel(embedding_model_name)
+        self.arxiv_db = PaperDatabase(self.embedding_model.backend)
         self.research_llm = ResearchLLM(research_llm_model_name)
         self.sickle = SickleWrapper(
             base_url="https://oaipmh.arxiv.org/oai",
@@ -80,43 +80,22 @@ class ArXivRepository:
         for paper in tqdm(
             new_papers, desc="Inserting new and updated papers", total=len(new_papers)
         ):
-            updated_rows, new_rows, skipped_rows = self.arxiv_db.insert_paper(paper)
+            updated_rows, new_rows, skipped_rows = self.arxiv_db.insert_paper(
+                paper, priority=PRIORITY_SYNC
+            )
             updated_rows_total += updated_rows
             new_rows_total += new_rows
             skipped_rows_total += skipped_rows
-            self.arxiv_db.try_update_categories(paper)
 
         logger.info(
             f"Updated {updated_rows_total} rows, inserted {new_rows_total} rows, and skipped {skipped_rows_total} rows"
         )
 
     def _embed_missing_arxiv_papers(self) -> None:
-        papers_to_embed = self.arxiv_db.get_unembedded_arxiv_papers()
-        logger.info(f"Embedding {len(papers_to_embed)} papers")
-
-        paper_ids: list[str] = []
-        abstracts: list[str] = []
-        for paper_id, document in tqdm(
-            papers_to_embed, desc="Parsing papers", total=len(papers_to_embed)
-        ):
-            paper_ids.append(paper_id)
-            abstract = document["metadata"]["arXivRaw"]["abstract"]
-            abstracts.append(abstract)
-
-        for i, (embedding, paper_id) in tqdm(
-            enumerate(
-                zip(
-                    self.embedding_model.embed_documents_rate_limited(abstracts),
-                    paper_ids,
-                )
-            ),
-            desc="Embedding papers",
-            total=len(paper_ids),
-        ):
-            self.arxiv_db.update_embedding(paper_id, embedding)
-
-            if i % 100 == 0:
-                self.arxiv_db.commit()
+        # Commits the ingest, which also wakes any standing embedders to
+        # share the work.
+        self.arxiv_db.ensure_embedding_column()
+        embed_queued(self.arxiv_db._get_con(), self.embedding_model)
 
     def generate_digest_string(
         self,
@@ -147,53 +126,63 @@ class ArXivRepository:
         return output
 
     def _print_time_filtered_digest(
-        self, embedding: list[float], timedelta: timedelta | None, limit: int
+        self, rows: list[tuple[Any, ...]], timedelta: timedelta | None, limit: int
     ) -> None:
-        results = self.arxiv_db.time_filtered_k_nearest(
-            embedding, timedelta=timedelta, limit=limit
-        )
-        digest = self.generate_digest_string(
-            results,
-            include_time_since=True,
-            include_similarity=True,
-            include_date=False,
-            include_link=True,
-        )
         print(
             f"Showing top {limit} most similar papers from the last {timedelta.days if timedelta is not None else 'all time'}"
         )
-        print(digest)
+        for row in rows:
+            paper, similarity = PaperResult.from_row(row)
+            print(f"{paper}(similarity: {similarity:.4f})\n")
         print("\n")
 
     def print_time_filtered_digests(self, query: str) -> None:
         embedding = self.embedding_model.model.embed_query(query)
 
-        self._print_time_filtered_digest(embedding, timedelta(days=30), 10)
-        print("--------------------------------------------------------------------")
-        self._print_time_filtered_digest(embedding, timedelta(days=30 * 6), 15)
-        print("--------------------------------------------------------------------")
-        self._print_time_filtered_digest(embedding, timedelta(days=365), 20)
-        print("--------------------------------------------------------------------")
-        self._print_time_filtered_digest(embedding, None, 30)
+        windows: list[tuple[timedelta | None, int]] = [
+            (timedelta(days=30), 10),
+            (timedelta(days=30 * 6), 15),
+            (timedelta(days=365), 20),
+            (None, 30),
+        ]
+        # All four windows in one pipelined round-trip. Exact scans, as
+        # before batching: an HNSW pass post-filtered to a 30-day window can
+        # come back short, and a digest is run rarely enough to afford them.
+        results = self.arxiv_db.get_newest_papers_many(
+            [
+                KnnSearch(embedding, window, [], limit, exact=True)
+                for window, limit in windows
+            ]
+        )
+        for i, ((window, limit), rows) in enumerate(zip(windows, results)):
+            if i > 0:
+                print(
+                    "--------------------------------------------------------------------"
+                )
+            self._print_time_filtered_digest(rows, window, limit)
 
     def email_weekly_digest(
         self, research_listener_group: ResearchListenerGroup
     ) -> None:
-        paper_similarities: list[tuple[str, Paper, Any]] = []
-        for listener in research_listener_group.research_listeners:
-            embedding = self.embedding_model.model.embed_query(listener.text)
+        paper_similarities: list[tuple[str, PaperResult, Any]] = []
+        listeners = research_listener_group.research_listeners
+        # One provider call for every listener's query text.
+        embeddings = self.embedding_model.embed_queries(
+            [listener.text for listener in listeners]
+        )
+        for listener, embedding in zip(listeners, embeddings):
             rows = self.arxiv_db.generate_weekly_digest(
                 embedding, research_listener_group.num_papers
             )
             print(f"Found {len(rows)} papers for {listener.title}")
             for row in rows:
-                paper, similarity = Paper.from_database_row(row)
+                paper, similarity = PaperResult.from_row(row)
                 paper_similarities.append((listener.title, paper, similarity))
 
         # sort by ascending similarity
         paper_similarities.sort(key=lambda result: result[2])
         seen_titles: set[str] = set()
-        paper_similarities_unique: list[tuple[str, Paper, Any]] = []
+        paper_similarities_unique: list[tuple[str, PaperResult, Any]] = []
         for listener_title_name, paper, similarity in paper_similarities:
             if paper.title in seen_titles:
                 continue
@@ -213,7 +202,7 @@ class ArXivRepository:
         )
 
     def generate_weekly_digest_string(
-        self, paper_similarities: list[tuple[str, Paper, Any]]
+        self, paper_similarities: list[tuple[str, PaperResult, Any]]
     ) -> str:
         digest_string = ""
         for listener_title, paper, similarity in paper_similarities:
@@ -246,7 +235,6 @@ if __name__ == "__main__":
         exit(1)
 
     with ArXivRepository(
-        embedding_model_name="models/gemini-embedding-001",
         research_llm_model_name="google/gemini-2.5-flash",
         overlap_timedelta=timedelta(days=1),
     ) as repo:
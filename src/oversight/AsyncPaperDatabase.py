@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any
+
+import psycopg
+from psycopg import sql
+
+from . import metrics
+from .embedding_backends import EmbeddingBackend, configured_backend
+from .PaperDatabase import (
+    EMBEDDINGS_BY_IDS_SQL,
+    ITERATIVE_SCAN_SQL,
+    MUTUAL_NEIGHBORS_SQL,
+    NEIGHBORS_SQL,
+    PAPERS_BY_IDS_QUERY,
+    SAMPLE_PAIRS_SQL,
+    SEED_EMBEDDING_SQL,
+    SUGGEST_SQL,
+    KnnSearch,
+    composite_papers_params,
+    composite_papers_query,
+    composite_pool_size,
+    knn_search_statements,
+    merge_suggestions,
+    newest_papers_params,
+    newest_papers_query,
+    order_by_ids,
+    prefix_tsquery,
+    set_ef_search,
+)
+
+
+class AsyncPaperDatabase:
+    """Read-only async counterpart of PaperDatabase for the ASGI server.
+
+    Wraps one ``psycopg.AsyncConnection`` checked out of the app's pool
+    (already ``register_vector_async``-ed) and runs the same SQL as the
+    sync methods of the same name, so both servers return identical rows.
+    Writes stay on PaperDatabase.
+    """
+
+    def __init__(
+        self,
+        con: psycopg.AsyncConnection[tuple[Any, ...]],
+        backend: EmbeddingBackend | None = None,
+    ) -> None:
+        self.con = con
+        self.backend = backend if backend is not None else configured_backend()
+
+    @metrics.db_query("get_newest_papers")
+    async def get_newest_papers(
+        self,
+        embedding: list[float],
+        timedelta: timedelta,
+        filter_list: list[sql.Composable],
+        limit: int = 10,
+        ef_search: int = 40,
+        after: tuple[float, str] | None = None,
+    ) -> list[tuple[Any, ...]]:
+        """See PaperDatabase.get_newest_papers."""
+        # Pooled connections are autocommit; the explicit transaction is
+        # what scopes the SET LOCALs to this page (and every method below
+        # that sets ef_search opens one for the same reason).
+        async with self.con.transaction(), self.con.cursor() as cur:
+            await cur.execute(set_ef_search(ef_search))
+            if after is not None:
+                await cur.execute(ITERATIVE_SCAN_SQL)
+            await cur.execute(
+                newest_papers_query(self.backend, filter_list, after=after is not None),
+                newest_papers_params(embedding, timedelta, limit, after),
+            )
+            return await cur.fetchall()
+
+    @metrics.db_query("get_newest_papers_many", rows=metrics.nested_len)
+    async def get_newest_papers_many(
+        self, searches: list[KnnSearch]
+    ) -> list[list[tuple[Any, ...]]]:
+        """See PaperDatabase.get_newest_papers_many."""
+        cursors: list[psycopg.AsyncCursor[tuple[Any, ...]]] = []
+        async with self.con.transaction(), self.con.pipeline():
+            for query, params in knn_search_statements(self.backend, searches):
+                cur = self.con.cursor()
+                await cur.execute(query, params)
+                if params is not None:
+                    cursors.append(cur)
+        return [await cur.fetchall() for cur in cursors]
+
+    @metrics.db_query("get_embeddings")
+    async def get_embeddings(self, paper_ids: list[str]) -> dict[str, Any]:
+        """See PaperDatabase.get_embeddings."""
+        if not paper_ids:
+            return {}
+        async with self.con.cursor() as cur:
+            await cur.execute(self.backend.sql(EMBEDDINGS_BY_IDS_SQL), [paper_ids])
+            return dict(await cur.fetchall())
+
+    @metrics.db_query("get_composite_papers")
+    async def get_composite_papers(
+        self,
+        vectors: list[Any],
+        weights: list[float],
+        mode: str,
+        timedelta: timedelta | None,
+        filter_list: list[sql.Composable],
+        limit: int = 10,
+        ef_search: int = 40,
+        exclude: list[str] | None = None,
+    ) -> list[tuple[Any, ...]]:
+        """See PaperDatabase.get_composite_papers."""
+        n_vectors = 1 if mode == "centroid" else len(vectors)
+        async with self.con.transaction(), self.con.cursor() as cur:
+            await cur.execute(set_ef_search(max(ef_search, composite_pool_size(limit))))
+            await cur.execute(
+                composite_papers_query(self.backend, n_vectors, filter_list, mode),
+                composite_papers_params(
+                    vectors, weights, mode, timedelta, limit, exclude or []
+                ),
+            )
+            return await cur.fetchall()
+
+    @metrics.db_query("find_neighbors")
+    async def find_neighbors(
+        self,
+        paper_id: str,
+        k: int,
+        mutual: bool,
+        ef_search: int = 80,
+    ) -> list[tuple[str, float]]:
+        """See PaperDatabase.find_neighbors."""
+        async with self.con.transaction(), self.con.cursor() as cur:
+            await cur.execute(self.backend.sql(SEED_EMBEDDING_SQL), [paper_id])
+            row = await cur.fetchone()
+            if row is None:
+                return []
+            seed_emb = row[0]
+
+            await cur.execute(set_ef_search(ef_search))
+            if not mutual:
+                await cur.execute(
+                    self.backend.sql(NEIGHBORS_SQL), [seed_emb, seed_emb, k + 1]
+                )
+                rows = await cur.fetchall()
+                return [(pid, float(sim)) for pid, sim in rows if pid != paper_id][:k]
+
+            await cur.execute(
+                self.backend.sql(MUTUAL_NEIGHBORS_SQL),
+                [seed_emb, seed_emb, k + 1, paper_id, k + 1, paper_id, k],
+            )
+            return [(pid, float(sim)) for pid, sim in await cur.fetchall()]
+
+    @metrics.db_query("sample_pairwise_similarities")
+    async def sample_pairwise_similarities(self, n: int) -> list[float]:
+        if n <= 0:
+            return []
+        async with self.con.cursor() as cur:
+            await cur.execute(self.backend.sql(SAMPLE_PAIRS_SQL), [2 * n])
+            return [float(sim) for (sim,) in await cur.fetchall()]
+
+    @metrics.db_query("suggest")
+    async def suggest(self, text: str, limit: int = 8) -> list[tuple[Any, ...]]:
+        """See PaperDatabase.suggest."""
+        tsquery = prefix_tsquery(text)
+        if tsquery is None:
+            return []
+        async with self.con.cursor() as cur:
+            await cur.execute(
+                SUGGEST_SQL, {"q": text, "tsquery": tsquery, "limit": limit}
+            )
+            rows = await cur.fetchall()
+        return merge_suggestions(rows, limit)
+
+    @metrics.db_query("get_papers_by_ids")
+    async def get_papers_by_ids(self, paper_ids: list[str]) -> list[tuple[Any, ...]]:
+        if not paper_ids:
+            return []
+        async with self.con.cursor() as cur:
+            await cur.execute(PAPERS_BY_IDS_QUERY, [paper_ids])
+            rows = await cur.fetchall()
+        return order_by_ids(rows, paper_ids)
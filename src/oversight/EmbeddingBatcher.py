@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from . import metrics
+from .EmbeddingModel import EmbeddingModel
+
+
+@dataclass
+class BatcherStats:
+    requests: int = 0  # embed_query calls made against the batcher
+    deduplicated: int = 0  # ... answered by a text already queued or in flight
+    cache_hits: int = 0  # ... answered from the recent-vector cache
+    provider_calls: int = 0  # embed_queries calls made to the model
+    texts_embedded: int = 0  # distinct texts sent across those calls
+
+
+class EmbeddingBatcher:
+    """Coalesce concurrent query embeddings into batched provider calls.
+
+    Every ``/api/search`` used to make its own single-text ``embed_query``
+    round-trip. Requests now hand their text to this batcher, which waits
+    up to ``window_ms`` after the first text of a batch (or until
+    ``max_batch`` distinct texts are queued), sends them as one
+    ``EmbeddingModel.embed_queries`` call, and resolves each caller's
+    future with its vector. A text that is already queued or in flight is
+    not sent again: the new caller shares the existing future, and the
+    last ``cache_size`` vectors are kept (as float32, ~12 KB each) so
+    repeats — notably /api/search cursor pages, which carry their query
+    text rather than its vector — skip the provider entirely.
+
+    The collector runs on its own daemon thread and hands each batch to a
+    small executor, so up to ``max_inflight`` batches can be waiting on
+    the provider while the next one fills. When every slot is busy the
+    collector waits for one and then drains whatever arrived meanwhile
+    into the same batch, so batches grow with load instead of queueing
+    behind each other. Thread-based so one instance
+    serves both the Flask app (``embed_query`` blocks on the future) and
+    the ASGI app (``aembed_query`` awaits it).
+
+    Bound to an event ``loop``, as the ASGI app does, batches go out
+    through the model's native async ``aembed_queries`` as coroutines on
+    that loop instead of blocking an executor thread each, so
+    ``max_inflight`` only bounds concurrent provider calls. Don't call the
+    blocking ``embed_query`` from that loop's own thread.
+    """
+
+    def __init__(
+        self,
+        model: EmbeddingModel,
+        window_ms: float = 8.0,
+        max_batch: int = 32,
+        max_inflight: int = 4,
+        cache_size: int = 1024,
+        loop: asyncio.AbstractEventLoop | None = None,
+    ) -> None:
+        assert max_batch >= 1, "max_batch must be at least 1"
+        self.model = model
+        self.window_s = window_ms / 1000
+        self.max_batch = max_batch
+        self.stats = BatcherStats()
+        self._lock = threading.Lock()
+        # text -> future, for every text queued or in flight (dedup).
+        self._pending: dict[str, Future[np.ndarray]] = {}
+        self._cache_size = cache_size
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._queue: queue.Queue[str | None] = queue.Queue()
+        self._max_inflight = max_inflight
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        self._loop = loop
+        self._executor = (
+            None
+            if loop is not None
+            else ThreadPoolExecutor(
+                max_workers=max_inflight, thread_name_prefix="embed-batch"
+            )
+        )
+        self._collector = threading.Thread(
+            target=self._collect, name="embed-batcher", daemon=True
+        )
+        self._collector.start()
+
+    @classmethod
+    def from_env(
+        cls, model: EmbeddingModel, loop: asyncio.AbstractEventLoop | None = None
+    ) -> EmbeddingBatcher:
+        """Batcher tuned by OVERSIGHT_EMBED_BATCH_WINDOW_MS / _MAX / _INFLIGHT
+        and OVERSIGHT_EMBED_CACHE_SIZE."""
+        return cls(
+            model,
+            window_ms=float(os.getenv("OVERSIGHT_EMBED_BATCH_WINDOW_MS", "8")),
+            max_batch=int(os.getenv("OVERSIGHT_EMBED_BATCH_MAX", "32")),
+            max_inflight=int(os.getenv("OVERSIGHT_EMBED_BATCH_INFLIGHT", "4")),
+            cache_size=int(os.getenv("OVERSIGHT_EMBED_CACHE_SIZE", "1024")),
+            loop=loop,
+        )
+
+    def submit(self, text: str) -> Future[np.ndarray]:
+        with self._lock:
+            self.stats.requests += 1
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                self.stats.cache_hits += 1
+                done: Future[np.ndarray] = Future()
+                done.set_result(cached)
+                return done
+            future = self._pending.get(text)
+            if future is not None:
+                self.stats.deduplicated += 1
+                return future
+            future = Future()
+            self._pending[text] = future
+        self._queue.put(text)
+        return future
+
+    @metrics.timed("embed.query")
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.submit(text).result()
+
+    @metrics.timed("embed.query")
+    async def aembed_query(self, text: str) -> np.ndarray:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def close(self) -> None:
+        """Stop collecting and wait for the batches in flight. With a loop,
+        call it from another thread while that loop still runs."""
+        self._queue.put(None)
+        self._collector.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            return
+        for _ in range(self._max_inflight):
+            self._slots.acquire()
+
+    def _collect(self) -> None:
+        closing = False
+        while not closing:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            closing = self._fill(batch, deadline=time.monotonic() + self.window_s)
+            self._slots.acquire()
+            if not closing:
+                # Everything that queued while we waited for a slot rides along.
+                closing = self._fill(batch, deadline=None)
+            self._dispatch(batch)
+
+    def _fill(self, batch: list[str], deadline: float | None) -> bool:
+        """Move queued texts into ``batch`` until it is full, and until
+        ``deadline`` passes (or, with no deadline, the queue is empty).
+        Returns True once ``close()``'s sentinel has been taken.
+        """
+        while len(batch) < self.max_batch:
+            try:
+                if deadline is None:
+                    text = self._queue.get_nowait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    text = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if text is None:
+                return True
+            batch.append(text)
+        return False
+
+    def _dispatch(self, texts: list[str]) -> None:
+        """Send a batch, releasing its in-flight slot once it's resolved."""
+        if self._executor is not None:
+            self._executor.submit(self._embed_batch, texts)
+            return
+        assert self._loop is not None
+        call = asyncio.run_coroutine_threadsafe(self._aembed_batch(texts), self._loop)
+        call.add_done_callback(lambda _: self._slots.release())
+
+    def _embed_batch(self, texts: list[str]) -> None:
+        try:
+            self._count_call(texts)
+            try:
+                with metrics.span("embed.provider"):
+                    vectors = self.model.embed_queries(texts)
+            except Exception as e:  # noqa: BLE001 - handed to every waiter
+                self._fail(texts, e)
+                return
+            self._resolve(texts, vectors)
+        finally:
+            self._slots.release()
+
+    async def _aembed_batch(self, texts: list[str]) -> None:
+        self._count_call(texts)
+        try:
+            with metrics.span("embed.provider"):
+                vectors = await self.model.aembed_queries(texts)
+        except Exception as e:  # noqa: BLE001 - handed to every waiter
+            self._fail(texts, e)
+            return
+        self._resolve(texts, vectors)
+
+    def _count_call(self, texts: list[str]) -> None:
+        with self._lock:
+            self.stats.provider_calls += 1
+            self.stats.texts_embedded += len(texts)
+
+    def _fail(self, texts: list[str], e: BaseException) -> None:
+        # Release every waiter, not just the first, on a failed batch.
+        # Nothing else would see the error: this runs on the executor (or
+        # the loop), and a future left unresolved hangs its caller forever.
+        with self._lock:
+            futures = [self._pending.pop(t) for t in texts]
+        for future in futures:
+            future.set_exception(e)
+
+    def _resolve(self, texts: list[str], vectors: list[list[float]]) -> None:
+        if len(vectors) != len(texts):
+            self._fail(texts, AssertionError("provider returned a short batch"))
+            return
+        arrays = [np.asarray(v, dtype=np.float32) for v in vectors]
+        for array in arrays:
+            array.flags.writeable = False  # shared by every waiter and cache hit
+        with self._lock:
+            futures = [self._pending.pop(t) for t in texts]
+            for text, array in zip(texts, arrays, strict=True):
+                self._cache[text] = array
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        for future, array in zip(futures, arrays, strict=True):
+            future.set_result(array)
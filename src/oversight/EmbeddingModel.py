@@ -1,43 +1,138 @@
 from __future__ import annotations
 
 from typing import Any, Generator
+from langchain_core.embeddings import Embeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
+import asyncio
+import hashlib
 import time
 import os
 from dotenv import load_dotenv
-from math import floor
+from .embedding_backends import configured_model_name, get_backend
 from .utils import chunked_iterable
 
 
+class HashEmbeddings(Embeddings):
+    """Deterministic stand-in for a remote embedder, for tests and load tests.
+
+    Each text maps to a fixed unit vector seeded from its SHA-1, after
+    sleeping ``latency_s`` to mimic the network round-trip (a blocking
+    sleep for the sync methods, an ``asyncio.sleep`` for the async ones).
+    The vectors carry no meaning: only run pipelines with it against
+    throwaway databases.
+    """
+
+    def __init__(self, dim: int, latency_s: float) -> None:
+        self.dim = dim
+        self.latency_s = latency_s
+
+    def _vector(self, text: str) -> list[float]:
+        import numpy as np
+
+        seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "big")
+        v = np.random.default_rng(seed).standard_normal(self.dim, dtype=np.float32)
+        return (v / np.linalg.norm(v)).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        time.sleep(self.latency_s)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        time.sleep(self.latency_s)
+        return self._vector(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        await asyncio.sleep(self.latency_s)
+        return [self._vector(t) for t in texts]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        await asyncio.sleep(self.latency_s)
+        return self._vector(text)
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """A sentence-transformers model run locally on the CPU.
+
+    Vectors are L2-normalised like Gemini's, so cosine distances compare
+    the same way. Needs the optional ``local`` extra.
+    """
+
+    def __init__(self, model_id: str, batch_size: int) -> None:
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError(
+                "local embedding models need sentence-transformers: "
+                "pip install 'oversight[local]'"
+            ) from None
+        self.model = SentenceTransformer(model_id, device="cpu")
+        self.batch_size = batch_size
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors = self.model.encode(
+            texts, batch_size=self.batch_size, normalize_embeddings=True
+        )
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
 class EmbeddingModel:
-    def __init__(self, model_name: str) -> None:
+    def __init__(self, model_name: str | None = None) -> None:
+        """The model ``model_name`` (default: OVERSIGHT_EMBEDDING_MODEL); see
+        embedding_backends for the choices."""
         load_dotenv()
 
-        self.model_name = model_name
+        self.backend = get_backend(model_name or configured_model_name())
+        self.model_name = self.backend.name
         self.words_per_token = 0.75  # TODO: Make this more accurate
-        if model_name == "models/gemini-embedding-001":
+        self.max_tokens = self.backend.max_tokens
+        self.batch_size = self.backend.batch_size
+        self.max_requests_per_minute = self.backend.max_requests_per_minute
+
+        self.model: Embeddings
+        if self.backend.kind == "gemini":
             assert os.getenv("GOOGLE_API_KEY") is not None, (
                 "GOOGLE_API_KEY is not set in the .env file or environment variables"
             )
             embeddings_kwargs: dict[str, Any] = {
-                "model": model_name,
+                "model": self.model_name,
                 "api_key": os.getenv("GOOGLE_API_KEY"),
             }
             self.model = GoogleGenerativeAIEmbeddings(**embeddings_kwargs)
-
-            # https://cloud.google.com/vertex-ai/docs/quotas#model-region-quotas
-            # NOTE: can only do 1 text per request but this handled transparently by langchain
-            self.max_tokens = floor(2048 * 0.75)  # max abstract is 558 tokens
-            self.max_requests_per_minute = floor(
-                100_000 * 0.75
-            )  # 75% of the max requests per minute
-            # Takes around 25s to serve 1000 requests, so that's around 2000 rpm (way, way below the number that 100,000 threshold)
-            # So don't worry about sleeping, just go 1000 at a time
-            self.batch_size = 10
-
-            self.inter_batch_sleep_time = 60
+        elif self.backend.kind == "hash":
+            # Latency simulates the API round-trip.
+            latency_ms = float(os.getenv("OVERSIGHT_FAKE_EMBEDDING_LATENCY_MS", "80"))
+            self.model = HashEmbeddings(self.backend.dim, latency_ms / 1000)
         else:
-            raise ValueError(f"Model {model_name} not supported")
+            assert self.backend.model_id is not None
+            self.model = SentenceTransformerEmbeddings(
+                self.backend.model_id, self.batch_size
+            )
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.model.embed_query(text)
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Embed several search queries in one provider call.
+
+        Goes through ``embed_documents`` for the batch endpoint, but keeps
+        Gemini's RETRIEVAL_QUERY task type so each vector matches what
+        ``embed_query`` would have returned for that text.
+        """
+        if isinstance(self.model, GoogleGenerativeAIEmbeddings):
+            return self.model.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+        return self.model.embed_documents(texts)
+
+    async def aembed_queries(self, texts: list[str]) -> list[list[float]]:
+        """``embed_queries`` without blocking a thread: Gemini goes through
+        the google-genai async client, the hash model sleeps on the event
+        loop. Local models have no async path; langchain runs them in the
+        loop's default executor."""
+        if isinstance(self.model, GoogleGenerativeAIEmbeddings):
+            return await self.model.aembed_documents(texts, task_type="RETRIEVAL_QUERY")
+        return await self.model.aembed_documents(texts)
 
     def embed_documents_rate_limited(
         self, texts: list[str]
@@ -46,9 +141,6 @@ class EmbeddingModel:
             return
 
         assert self.model is not None, "You must load the model first"
-        assert self.model_name == "models/gemini-embedding-001", (
-            "Only gemini embeddings are supported for now"
-        )
 
         # Truncate any text that would exceed the model's token budget.
         # Some scraped abstracts (notably PACMPL 'SCICO Journal-first' papers
@@ -64,6 +156,12 @@ class EmbeddingModel:
             truncated_texts.append(text)
         texts = truncated_texts
 
+        # Gemini serves one text per request, so pace whole batches to stay
+        # under the model's requests-per-minute.
+        min_batch_s = 0.0
+        if self.max_requests_per_minute:
+            min_batch_s = 60 * self.batch_size / self.max_requests_per_minute
+
         # loop through the texts in batches of max_texts_per_request
         for texts_chunk in chunked_iterable(texts, self.batch_size):
             human_readable_time = time.strftime("%H:%M:%S", time.localtime())
@@ -86,6 +184,8 @@ class EmbeddingModel:
 
             time_end = time.time()
             time_diff = time_end - time_start
+            if time_diff < min_batch_s:
+                time.sleep(min_batch_s - time_diff)
             print(
                 f"Done embedding {len(texts_chunk)} texts in {time_diff:.2f} seconds."
             )
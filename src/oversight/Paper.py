@@ -1,16 +1,74 @@
 from __future__ import annotations
 
-from datetime import datetime
+import json
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import date, datetime
 from typing import Any
 
-from .AuthorExtractor import extract_authors
+from .AuthorExtractor import AuthorInfo, extract_authors
+
+
+def _describe(
+    title: str, paper_date: date, source: str | None, abstract: str, link: str | None
+) -> str:
+    day = paper_date.date() if isinstance(paper_date, datetime) else paper_date
+    time_since_date = datetime.now().date() - day
+    days_since_date = time_since_date.days
+
+    years_since_date = days_since_date // 365
+    months_since_date = (days_since_date % 365) // 30
+    days_since_date = days_since_date % 30
+
+    years_str = f"{years_since_date} years " if years_since_date > 0 else ""
+    months_str = f"{months_since_date} months " if months_since_date > 0 else ""
+    days_str = (
+        f"{days_since_date} days " if months_str == "" and years_str == "" else ""
+    )
+
+    time_since_date_str = f"{years_str}{months_str}{days_str}ago"
+
+    output = f"{title} ({time_since_date_str}, {source}) \n"
+    output += f"{abstract} \n"
+    output += f"{link} \n"
+
+    return output
 
 
 class Paper:
+    """One ingested paper.
+
+    Sync and bulk-ingest batches hold hundreds of thousands of these at
+    once, so the class is slotted and the two expensive parts are lazy:
+
+    - ``document`` may be given as a ``document_loader`` callable instead
+      of a dict (e.g. re-parsing the compact raw OAI XML). Loader-backed
+      documents are *not* cached — each access re-loads — so a batch only
+      ever holds one expanded document at a time; callers that need it
+      twice should keep a local reference.
+    - ``authors`` / ``institutions`` are parsed from the document on first
+      access and cached.
+    """
+
+    __slots__ = (
+        "_author_info",
+        "_document",
+        "_document_loader",
+        "abstract",
+        "categories",
+        "embedding_gemini_embedding_001",
+        "link",
+        "paper_date",
+        "paper_id",
+        "source",
+        "time_since_date_str",
+        "title",
+    )
+
     def __init__(
         self,
         paper_id: str,
-        document: dict[str, Any],
+        document: dict[str, Any] | None,
         paper_date: datetime,
         abstract: str,
         title: str,
@@ -19,15 +77,19 @@ class Paper:
         embedding_gemini_embedding_001: list[float] | None = None,
         link: str | None = None,
         time_since_date_str: str | None = None,
+        document_loader: Callable[[], dict[str, Any]] | None = None,
     ):
         assert title is not None
         assert abstract is not None
         assert paper_id is not None
         assert paper_date is not None
-        assert document is not None
+        assert (document is None) != (document_loader is None), (
+            "pass exactly one of document / document_loader"
+        )
 
         self.paper_id = paper_id
-        self.document = document
+        self._document = document
+        self._document_loader = document_loader
         self.paper_date = paper_date
         self.categories = categories
         self.embedding_gemini_embedding_001 = embedding_gemini_embedding_001
@@ -36,32 +98,37 @@ class Paper:
         self.time_since_date_str = time_since_date_str
         self.title = title
         self.source = source
+        self._author_info: AuthorInfo | None = None
 
-        author_info = extract_authors(document, source)
-        self.authors = author_info.authors
-        self.institutions = author_info.institutions
+    @property
+    def document(self) -> dict[str, Any]:
+        if self._document is not None:
+            return self._document
+        assert self._document_loader is not None
+        document = self._document_loader()
+        # Parse authors while the document is expanded anyway, so ingest
+        # (which needs both) loads it once rather than twice.
+        if self._author_info is None:
+            self._author_info = extract_authors(document, self.source)
+        return document
 
-    def __str__(self) -> str:
-        time_since_date = datetime.now().date() - self.paper_date.date()
-        days_since_date = time_since_date.days
+    @property
+    def authors(self) -> list[str]:
+        return self._parsed_authors().authors
 
-        years_since_date = days_since_date // 365
-        months_since_date = (days_since_date % 365) // 30
-        days_since_date = days_since_date % 30
-
-        years_str = f"{years_since_date} years " if years_since_date > 0 else ""
-        months_str = f"{months_since_date} months " if months_since_date > 0 else ""
-        days_str = (
-            f"{days_since_date} days " if months_str == "" and years_str == "" else ""
-        )
+    @property
+    def institutions(self) -> list[str]:
+        return self._parsed_authors().institutions
 
-        time_since_date_str = f"{years_str}{months_str}{days_str}ago"
+    def _parsed_authors(self) -> AuthorInfo:
+        if self._author_info is None:
+            self._author_info = extract_authors(self.document, self.source)
+        return self._author_info
 
-        output = f"{self.title} ({time_since_date_str}, {self.source}) \n"
-        output += f"{self.abstract} \n"
-        output += f"{self.link} \n"
-
-        return output
+    def __str__(self) -> str:
+        return _describe(
+            self.title, self.paper_date, self.source, self.abstract, self.link
+        )
 
     @staticmethod
     def date_format() -> str:
@@ -152,40 +219,85 @@ class Paper:
         )
 
     @staticmethod
-    def from_database_row(row: tuple[Any, ...]) -> tuple[Paper, Any]:
+    def remove_null_bytes(obj: Any) -> Any:
+        # Null bytes are rare: one json.dumps (in C) finds out whether a note
+        # has any before paying for the recursive copy. json escapes every
+        # NUL as \u0000; a false positive only costs the copy.
+        if isinstance(obj, (dict, list)) and "\\u0000" not in json.dumps(obj):
+            return obj
+        return Paper._strip_null_bytes(obj)
+
+    @staticmethod
+    def _strip_null_bytes(obj: Any) -> Any:
+        if isinstance(obj, str):
+            return obj.replace("\x00", "")
+        elif isinstance(obj, dict):
+            return {k: Paper._strip_null_bytes(v) for k, v in obj.items()}
+        elif isinstance(obj, list):
+            return [Paper._strip_null_bytes(v) for v in obj]
+        else:
+            return obj
+
+
+# Column list matching ``PaperResult.from_row``. ``document`` is only
+# shipped for rows ingested before authors/institutions had their own
+# columns (``oversight backfill-authors`` fills those in), so a search
+# never detoasts the raw JSONB otherwise.
+RESULT_COLUMNS = """
+    ps.paper_id, ps.title, ps.abstract, ps.source, ps.link, ps.update_date,
+    ps.authors, ps.institutions,
+    CASE WHEN ps.authors IS NULL THEN ps.document END AS legacy_document
+"""
+
+
+@dataclass(slots=True)
+class PaperResult:
+    """The slice of a paper that search / neighbors / detail responses need.
+
+    Hydrated from ``RESULT_COLUMNS`` instead of ``paper.*``: no raw
+    document, no embedding, and no per-row author extraction.
+    """
+
+    paper_id: str
+    title: str
+    abstract: str
+    source: str | None
+    link: str | None
+    paper_date: date
+    authors: list[str] = field(default_factory=list)
+    institutions: list[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return _describe(
+            self.title, self.paper_date, self.source, self.abstract, self.link
+        )
+
+    @staticmethod
+    def from_row(row: tuple[Any, ...]) -> tuple[PaperResult, Any]:
+        """Build from ``RESULT_COLUMNS`` plus a trailing similarity column."""
         (
-            uuid,
-            created_at,
             paper_id,
-            document,
-            update_date,
-            embedding_gemini_embedding_001,
-            source,
-            abstract,
             title,
+            abstract,
+            source,
             link,
+            update_date,
+            authors,
+            institutions,
+            legacy_document,
             similarity,
         ) = row
-
-        paper = Paper(
+        if authors is None:
+            author_info = extract_authors(legacy_document or {}, source)
+            authors, institutions = author_info.authors, author_info.institutions
+        paper = PaperResult(
             paper_id=paper_id,
-            document=document,
             title=title,
             abstract=abstract,
-            paper_date=update_date,
             source=source,
             link=link,
+            paper_date=update_date,
+            authors=authors,
+            institutions=institutions or [],
         )
-
         return paper, similarity
-
-    @staticmethod
-    def remove_null_bytes(obj: Any) -> Any:
-        if isinstance(obj, str):
-            return obj.replace("\x00", "")
-        elif isinstance(obj, dict):
-            return {k: Paper.remove_null_bytes(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [Paper.remove_null_bytes(v) for v in obj]
-        else:
-            return obj
@@ -1,24 +1,637 @@
 from __future__ import annotations
 
-from typing import Any
+import json
+from collections.abc import Iterable
+from typing import Any, NamedTuple
 
-from tqdm import tqdm
-from .Paper import Paper
+from .Paper import RESULT_COLUMNS, Paper
 from datetime import date, datetime, timedelta
 import psycopg
 from psycopg import sql
 from dotenv import load_dotenv
 from pgvector.psycopg import register_vector
 import os
+import re
 from psycopg.types.json import Jsonb
-from .utils import get_logger
+from . import embed_queue, metrics, slow_queries
+from .AuthorExtractor import extract_authors
+from .embedding_backends import EmbeddingBackend, configured_backend
+from .utils import get_logger, tqdm
 
 logger = get_logger()
 
 
+# Read-path SQL, kept at module level so AsyncPaperDatabase (the ASGI
+# server's counterpart of this class) runs exactly the same queries.
+# ``{vec_col}`` and ``{vec_type}`` are the embedding model's column and
+# halfvec type, filled in by EmbeddingBackend.sql.
+
+SEED_EMBEDDING_SQL = """
+    SELECT {vec_col}
+    FROM embedding
+    WHERE paper_id = %s
+      AND {vec_col} IS NOT NULL
+"""
+
+# Top-k kNN against the seed embedding, bound twice (distance + ORDER BY).
+NEIGHBORS_SQL = """
+    SELECT paper_id,
+           1 - ({vec_col} <=> %s::{vec_type}) AS sim
+    FROM embedding
+    WHERE {vec_col} IS NOT NULL
+    ORDER BY {vec_col} <=> %s::{vec_type}
+    LIMIT %s
+"""
+
+# Mutual-kNN: fetch the seed's top-(k+1) candidates, then for each
+# candidate run a top-(k+1) reverse kNN against the candidate's
+# embedding and keep only those that contain the seed. The CTE
+# materialises the candidate set so the inner subquery's ORDER BY
+# parameter (sn.nb_emb) is a fixed literal per row, allowing HNSW.
+MUTUAL_NEIGHBORS_SQL = """
+    WITH seed_neighbors AS (
+        SELECT paper_id AS nb_id,
+               {vec_col} AS nb_emb,
+               1 - ({vec_col} <=> %s::{vec_type}) AS sim
+        FROM embedding
+        WHERE {vec_col} IS NOT NULL
+        ORDER BY {vec_col} <=> %s::{vec_type}
+        LIMIT %s
+    )
+    SELECT sn.nb_id, sn.sim
+    FROM seed_neighbors sn
+    WHERE sn.nb_id != %s
+      AND EXISTS (
+          SELECT 1
+          FROM (
+              SELECT paper_id
+              FROM embedding
+              WHERE {vec_col} IS NOT NULL
+              ORDER BY {vec_col} <=> sn.nb_emb
+              LIMIT %s
+          ) rev
+          WHERE rev.paper_id = %s
+      )
+    ORDER BY sn.sim DESC
+    LIMIT %s
+"""
+
+SAMPLE_PAIRS_SQL = """
+    WITH sampled AS (
+        SELECT {vec_col} AS emb,
+               ROW_NUMBER() OVER () AS rn
+        FROM (
+            SELECT {vec_col}
+            FROM embedding
+            WHERE {vec_col} IS NOT NULL
+            ORDER BY random()
+            LIMIT %s
+        ) s
+    )
+    SELECT 1 - (a.emb <=> b.emb) AS sim
+    FROM sampled a
+    JOIN sampled b
+      ON b.rn = a.rn + 1
+    WHERE a.rn %% 2 = 1
+"""
+
+PAPERS_BY_IDS_QUERY = sql.SQL("""
+    SELECT {columns}, NULL AS similarity
+    FROM paper AS ps
+    WHERE ps.paper_id = ANY(%s)
+""").format(columns=sql.SQL(RESULT_COLUMNS))
+
+
+# LOCAL, like ITERATIVE_SCAN_SQL below: callers run it inside a
+# transaction, so it can't outlive the query on a shared or pooled
+# connection (and is a no-op outside one).
+def set_ef_search(ef_search: int) -> sql.Composed:
+    return sql.SQL("SET LOCAL hnsw.ef_search = {}").format(sql.Literal(ef_search))
+
+
+# Cursor pages walk the HNSW index past the previous page with a keyset
+# predicate; strict_order iterative scan (pgvector >= 0.8) keeps pulling
+# candidates until LIMIT rows survive it, in exact distance order. LOCAL,
+# so it ends with the page's transaction and never leaks to a pooled
+# connection's next query.
+ITERATIVE_SCAN_SQL = "SET LOCAL hnsw.iterative_scan = strict_order"
+PLAIN_SCAN_SQL = "SET LOCAL hnsw.iterative_scan = off"
+
+# Exact top-k: the same query with the HNSW index out of the planner's
+# reach, so it sorts every embedded paper in the window by distance. For
+# callers that must not miss a row (digests, tuning ground truth) and can
+# afford the scan.
+EXACT_SCAN_SQL = "SET LOCAL enable_indexscan = off"
+INDEX_SCAN_SQL = "SET LOCAL enable_indexscan TO DEFAULT"
+
+# Extra rows the index scan fetches beyond the page so the (distance,
+# paper_id) re-sort can cut the page cleanly through a run of equal
+# distances (exact-duplicate embeddings, e.g. a paper indexed both from
+# arXiv and from its venue). Runs longer than this at a page boundary can
+# still split arbitrarily.
+PAGE_TIE_MARGIN = 16
+
+
+def filters_sql(filter_list: list[sql.Composable]) -> sql.Composable:
+    """``AND (...)`` clause OR-ing ``filter_list`` together, or nothing."""
+    # Combine multiple filters with OR (union of sources), wrapped to preserve precedence
+    if not filter_list:
+        return sql.SQL("")
+    or_group = sql.SQL(" OR ").join(sql.SQL("({})").format(flt) for flt in filter_list)
+    return sql.SQL("AND ({})").format(or_group)
+
+
+def newest_papers_params(
+    embedding: Any,
+    window: timedelta | None,
+    limit: int,
+    after: tuple[float, str] | None = None,
+) -> dict[str, Any]:
+    if window is None:
+        window = timedelta(days=365 * 50)
+    oldest_time = (datetime.now() - window).strftime("%Y-%m-%d")
+    params: dict[str, Any] = {
+        "q": embedding,
+        "oldest": oldest_time,
+        "limit": limit,
+        "scan_limit": limit + PAGE_TIE_MARGIN,
+    }
+    if after is not None:
+        params["after_distance"], params["after_id"] = after
+    return params
+
+
+def newest_papers_query(
+    backend: EmbeddingBackend, filter_list: list[sql.Composable], after: bool = False
+) -> sql.Composed:
+    """Time-windowed kNN over ``filter_list`` (OR-ed together); binds
+    ``newest_papers_params``.
+
+    Pages come back ordered by ``(distance, paper_id)`` so the last row is
+    a well-defined keyset. With ``after`` only rows strictly past
+    ``(after_distance, after_id)`` are returned. The index scan itself can
+    only order by distance, hence the PAGE_TIE_MARGIN over-fetch.
+    """
+    filter_composed = filters_sql(filter_list)
+
+    keyset = sql.SQL("")
+    if after:
+        keyset = backend.sql("""
+              AND (emb.{vec_col} <=> %(q)s::{vec_type} > %(after_distance)s
+                   OR (emb.{vec_col} <=> %(q)s::{vec_type} = %(after_distance)s
+                       AND ps.paper_id > %(after_id)s))""")
+
+    return backend.sql(
+        """
+            SELECT * FROM (
+                SELECT {columns}, emb.{vec_col} <=> %(q)s::{vec_type} AS similarity
+                FROM paper AS ps
+                JOIN embedding AS emb
+                  ON emb.paper_id = ps.paper_id
+                WHERE ps.update_date > %(oldest)s::DATE
+                  AND emb.{vec_col} IS NOT NULL
+                {filter_str}{keyset}
+                ORDER BY similarity ASC
+                LIMIT %(scan_limit)s::INTEGER
+            ) AS page
+            ORDER BY similarity, paper_id
+            LIMIT %(limit)s::INTEGER
+        """,
+        columns=sql.SQL(RESULT_COLUMNS),
+        filter_str=filter_composed,
+        keyset=keyset,
+    )
+
+
+# Composite (multi-vector) search. Each query vector gets its own HNSW pass
+# for a candidate pool (plus one on their centroid); the union of the
+# pools is then rescored exactly against every vector and ranked by the
+# combined distance:
+#
+#   min       AND semantics: a paper ranks by its *worst* match, i.e. the
+#             largest of its distances (weights don't apply)
+#   mean      weighted mean of the distances
+#   centroid  distance to the normalised weighted mean of the vectors; a
+#             single vector, so a single pass
+#
+# Composite queries therefore cost N + 1 index scans plus one small exact
+# scan, rather than N full searches joined client-side.
+COMPOSITE_MODES = ("min", "mean", "centroid")
+
+# Candidates per vector: a few pages' worth, so a paper that is only
+# moderately close to each vector still makes it into some pool.
+COMPOSITE_POOL_FACTOR = 4
+MIN_COMPOSITE_POOL = 40
+
+EMBEDDINGS_BY_IDS_SQL = """
+    SELECT paper_id, {vec_col}
+    FROM embedding
+    WHERE paper_id = ANY(%s)
+      AND {vec_col} IS NOT NULL
+"""
+
+
+# arXiv categories (OAI setSpecs, e.g. "cs:cs:LG") on the paper row itself,
+# written by the same statement as the rest of the paper and GIN-indexed for
+# ``categories && ARRAY[...]`` filters. NULL for conference papers. Mirrors
+# db/init/009-paper-categories.sql, which only runs on fresh databases;
+# applied to existing ones by ``ensure_categories_column``, which first
+# copies over the categories of the arxiv_paper_categories table they
+# replace.
+CATEGORIES_COLUMN_DDL = "ALTER TABLE paper ADD COLUMN IF NOT EXISTS categories text[]"
+CATEGORIES_INDEX_DDL = (
+    "CREATE INDEX IF NOT EXISTS paper_categories_idx ON paper USING gin (categories)"
+)
+CATEGORIES_COLUMN_EXISTS_SQL = """
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'paper' AND column_name = 'categories'
+"""
+CATEGORIES_FROM_JOIN_TABLE_SQL = """
+    UPDATE paper AS ps
+    SET categories = pc.categories
+    FROM (
+        SELECT paper_id, array_agg(category ORDER BY category) AS categories
+        FROM arxiv_paper_categories
+        GROUP BY paper_id
+    ) AS pc
+    WHERE pc.paper_id = ps.paper_id
+"""
+
+
+def arxiv_category(code: str) -> str:
+    """The stored form of an arXiv category: ``"cs.LG"`` -> ``"cs:cs:LG"``
+    (the OAI-PMH setSpec sync harvests); stored forms pass through."""
+    if ":" in code or "." not in code:
+        return code
+    archive, sub = code.split(".", 1)
+    return f"{archive}:{archive}:{sub}"
+
+
+def categories_filter(categories: list[str]) -> sql.Composed:
+    """Papers in any of ``categories``; served by paper_categories_idx."""
+    return sql.SQL("ps.categories && {}::text[]").format(sql.Literal(categories))
+
+
+# Mirrors db/init/004-paper-lexical.sql, which only runs on fresh
+# databases; applied to existing ones by ``ensure_lexical_index``.
+LEXICAL_INDEX_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE OR REPLACE FUNCTION paper_suggest_text(title text, authors text[], institutions text[])
+        RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        RETURN coalesce(title, '') || ' ' || coalesce(array_to_string(authors, ' '), '')
+            || ' ' || coalesce(array_to_string(institutions, ' '), '')
+    """,
+    """
+    ALTER TABLE paper
+        ADD COLUMN IF NOT EXISTS lexical tsvector GENERATED ALWAYS AS (
+            to_tsvector('simple'::regconfig, paper_suggest_text(title, authors, institutions))
+        ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS paper_lexical_idx ON paper USING gin (lexical)",
+    """
+    CREATE INDEX IF NOT EXISTS paper_suggest_trgm_idx
+        ON paper USING gist (paper_suggest_text(title, authors, institutions) gist_trgm_ops)
+    """,
+]
+
+# Autocomplete: papers whose title/authors/institutions contain every typed
+# word (the last one as a prefix), ranked by trigram word similarity to the
+# whole input. Only when that finds fewer than ``limit`` papers (typos, half
+# a word in the middle) does the fuzzy branch run: a GiST KNN walk over the
+# trigram index. Neither branch touches embeddings.
+SUGGEST_SQL = """
+    WITH prefix AS (
+        SELECT ps.paper_id, ps.title, ps.authors, ps.source, ps.update_date,
+               'prefix' AS match,
+               %(q)s <<-> paper_suggest_text(ps.title, ps.authors, ps.institutions)
+                   AS distance
+        FROM paper AS ps
+        WHERE ps.lexical @@ to_tsquery('simple', %(tsquery)s)
+        ORDER BY distance
+        LIMIT %(limit)s
+    )
+    SELECT * FROM prefix
+    UNION ALL
+    (
+        SELECT ps.paper_id, ps.title, ps.authors, ps.source, ps.update_date,
+               'fuzzy' AS match,
+               %(q)s <<-> paper_suggest_text(ps.title, ps.authors, ps.institutions)
+                   AS distance
+        FROM paper AS ps
+        WHERE (SELECT count(*) FROM prefix) < %(limit)s
+          AND %(q)s <%% paper_suggest_text(ps.title, ps.authors, ps.institutions)
+        ORDER BY distance
+        LIMIT %(limit)s
+    )
+"""
+
+
+def prefix_tsquery(text: str) -> str | None:
+    """``'lamport & cloc:*'`` for ``"Lamport cloc"``, or None if ``text``
+    has no words. Only letters and digits survive, so the result is always
+    valid tsquery syntax."""
+    words = re.findall(r"[^\W_]+", text.lower())
+    if not words:
+        return None
+    return " & ".join([*words[:-1], f"{words[-1]}:*"])
+
+
+def merge_suggestions(rows: list[tuple[Any, ...]], limit: int) -> list[tuple[Any, ...]]:
+    """Prefix matches first, then fuzzy ones, each paper once."""
+    seen: set[str] = set()
+    merged: list[tuple[Any, ...]] = []
+    for row in rows:
+        if row[0] not in seen:
+            seen.add(row[0])
+            merged.append(row)
+    return merged[:limit]
+
+
+def composite_pool_size(limit: int) -> int:
+    return max(MIN_COMPOSITE_POOL, COMPOSITE_POOL_FACTOR * limit)
+
+
+def weighted_centroid(vectors: list[Any], weights: list[float]) -> Any:
+    """Unit-length weighted mean of ``vectors`` (lists, arrays or pgvector
+    Vector/HalfVector values), as a float32 ndarray."""
+    import numpy as np
+
+    stacked = np.stack(
+        [
+            np.asarray(v.to_numpy() if hasattr(v, "to_numpy") else v, np.float32)
+            for v in vectors
+        ]
+    )
+    centroid = np.asarray(weights, np.float32) @ stacked
+    return centroid / np.linalg.norm(centroid)
+
+
+def composite_papers_query(
+    backend: EmbeddingBackend,
+    n_vectors: int,
+    filter_list: list[sql.Composable],
+    mode: str,
+) -> sql.Composed:
+    """Composite search over ``n_vectors`` query vectors (one, for
+    ``centroid``); binds ``composite_papers_params``."""
+    filter_composed = filters_sql(filter_list)
+    vectors = [
+        sql.SQL("{}::{}").format(sql.Placeholder(f"v{i}"), backend.vector_type)
+        for i in range(n_vectors)
+    ]
+    # Papers that match every vector moderately tend to sit near the
+    # centroid rather than in any one vector's top pool, so min and mean
+    # also draw candidates from a pass on the centroid.
+    pool_vectors = vectors
+    if mode != "centroid":
+        pool_vectors = [*vectors, backend.sql("%(centroid)s::{vec_type}")]
+    pools = sql.SQL("\n                UNION\n").join(
+        backend.sql(
+            """
+                (SELECT emb.paper_id
+                 FROM paper AS ps
+                 JOIN embedding AS emb
+                   ON emb.paper_id = ps.paper_id
+                 WHERE ps.update_date > %(oldest)s::DATE
+                   AND emb.{vec_col} IS NOT NULL
+                 {filter_str}
+                 ORDER BY emb.{vec_col} <=> {v}
+                 LIMIT %(pool)s::INTEGER)""",
+            filter_str=filter_composed,
+            v=v,
+        )
+        for v in pool_vectors
+    )
+    distances = [backend.sql("(emb.{vec_col} <=> {v})", v=v) for v in vectors]
+    if mode == "min":
+        combined = sql.SQL("GREATEST({})").format(sql.SQL(", ").join(distances))
+    elif mode == "mean":
+        combined = sql.SQL(" + ").join(
+            sql.SQL("{} * {}::float8").format(sql.Placeholder(f"w{i}"), d)
+            for i, d in enumerate(distances)
+        )
+    else:
+        assert n_vectors == 1, "centroid searches take the one centroid vector"
+        combined = distances[0]
+
+    return sql.SQL("""
+            SELECT {columns}, {combined} AS similarity
+            FROM ({pools}
+            ) AS candidate
+            JOIN paper AS ps
+              ON ps.paper_id = candidate.paper_id
+            JOIN embedding AS emb
+              ON emb.paper_id = ps.paper_id
+            WHERE ps.paper_id <> ALL(%(exclude)s)
+            ORDER BY similarity, ps.paper_id
+            LIMIT %(limit)s::INTEGER
+        """).format(columns=sql.SQL(RESULT_COLUMNS), combined=combined, pools=pools)
+
+
+def composite_papers_params(
+    vectors: list[Any],
+    weights: list[float],
+    mode: str,
+    window: timedelta | None,
+    limit: int,
+    exclude: list[str],
+) -> dict[str, Any]:
+    if window is None:
+        window = timedelta(days=365 * 50)
+    params: dict[str, Any] = {
+        "oldest": (datetime.now() - window).strftime("%Y-%m-%d"),
+        "pool": composite_pool_size(limit),
+        "limit": limit,
+        "exclude": exclude,
+    }
+    centroid = weighted_centroid(vectors, weights)
+    if mode == "centroid":
+        vectors = [centroid]
+    else:
+        params["centroid"] = centroid
+    total = sum(weights)
+    for i, v in enumerate(vectors):
+        params[f"v{i}"] = v
+        if mode == "mean":
+            params[f"w{i}"] = weights[i] / total
+    return params
+
+
+class KnnSearch(NamedTuple):
+    """One search of a ``get_newest_papers_many`` batch; the fields are
+    ``get_newest_papers``'s arguments, plus ``exact`` to bypass the HNSW
+    index (see EXACT_SCAN_SQL)."""
+
+    embedding: Any
+    timedelta: timedelta | None
+    filter_list: list[sql.Composable]
+    limit: int = 10
+    ef_search: int = 40
+    after: tuple[float, str] | None = None
+    exact: bool = False
+
+
+def knn_search_statements(
+    backend: EmbeddingBackend, searches: list[KnnSearch]
+) -> list[tuple[sql.Composable | str, dict[str, Any] | None]]:
+    """The statements ``get_newest_papers_many`` pipelines, in order; the
+    ones with params are the searches themselves.
+
+    All settings are SET LOCAL and last for the whole transaction, so
+    each search re-sets ef_search, while iterative_scan and the exact scan
+    are only touched when a search needs them, and switched back for the
+    searches after it.
+    """
+    statements: list[tuple[sql.Composable | str, dict[str, Any] | None]] = []
+    iterative = exact = False
+    for s in searches:
+        if s.exact != exact:
+            exact = s.exact
+            statements.append((EXACT_SCAN_SQL if exact else INDEX_SCAN_SQL, None))
+        statements.append((set_ef_search(s.ef_search), None))
+        if (s.after is not None) != iterative:
+            iterative = s.after is not None
+            statements.append(
+                (ITERATIVE_SCAN_SQL if iterative else PLAIN_SCAN_SQL, None)
+            )
+        statements.append(
+            (
+                newest_papers_query(backend, s.filter_list, after=s.after is not None),
+                newest_papers_params(s.embedding, s.timedelta, s.limit, s.after),
+            )
+        )
+    return statements
+
+
+def order_by_ids(
+    rows: list[tuple[Any, ...]], paper_ids: list[str]
+) -> list[tuple[Any, ...]]:
+    """Reorder ``PAPERS_BY_IDS_QUERY`` rows to match the requested ids."""
+    by_id = {r[0]: r for r in rows}  # paper_id is the 1st column
+    return [by_id[pid] for pid in paper_ids if pid in by_id]
+
+
+# A model's column and its HNSW index, for models whose vectors the
+# database hasn't stored before (see embedding_backends.py). Gemini's
+# column predates db/init and already has its index.
+EMBEDDING_COLUMN_DDL = (
+    "ALTER TABLE embedding ADD COLUMN IF NOT EXISTS {vec_col} {vec_type}"
+)
+EMBEDDING_INDEX_DDL = """
+    CREATE INDEX IF NOT EXISTS {vec_index} ON embedding
+    USING hnsw ({vec_col} halfvec_cosine_ops)
+"""
+EMBEDDING_COLUMN_EXISTS_SQL = """
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'embedding' AND column_name = %s
+"""
+
+
+class PaperRow(NamedTuple):
+    """One paper as ``insert_papers`` writes it. ``document`` is already
+    JSON text, so the parsers (in parallel, see ingest.py) pay for
+    serialising it rather than the single writer."""
+
+    paper_id: str
+    document: str
+    abstract: str
+    title: str
+    source: str
+    update_date: date
+    link: str
+    authors: list[str]
+    institutions: list[str]
+    categories: list[str] | None
+
+    @classmethod
+    def from_paper(cls, paper: Paper) -> PaperRow:
+        return cls(
+            paper.paper_id,
+            json.dumps(paper.document),
+            paper.abstract,
+            paper.title,
+            paper.source or "",
+            paper.paper_date.date(),
+            paper.link or "",
+            paper.authors,
+            paper.institutions,
+            sorted(paper.categories) if paper.categories else None,
+        )
+
+
+# Bulk ingest (``insert_papers``): a batch is COPYed into a per-session
+# staging table and merged with the same rules as ``insert_paper`` — newer
+# records update, unknown ones insert, the rest only refresh categories —
+# in three set-based statements rather than two round-trips per paper.
+PAPER_INCOMING_DDL = """
+    CREATE TEMP TABLE IF NOT EXISTS paper_incoming (
+        paper_id varchar PRIMARY KEY,
+        document jsonb NOT NULL,
+        abstract text NOT NULL,
+        title text NOT NULL,
+        source varchar NOT NULL,
+        update_date date NOT NULL,
+        link text NOT NULL,
+        authors text[],
+        institutions text[],
+        categories text[]
+    )
+"""
+PAPER_INCOMING_COPY_SQL = """
+    COPY paper_incoming (paper_id, document, abstract, title, source,
+                         update_date, link, authors, institutions, categories)
+    FROM STDIN
+"""
+UPDATE_NEWER_PAPERS_SQL = """
+    UPDATE paper AS ps
+    SET document = i.document,
+        abstract = i.abstract,
+        title = i.title,
+        source = i.source,
+        update_date = i.update_date,
+        link = i.link,
+        authors = i.authors,
+        institutions = i.institutions,
+        categories = i.categories
+    FROM paper_incoming AS i
+    WHERE ps.paper_id = i.paper_id
+      AND ps.update_date < i.update_date
+    RETURNING ps.paper_id
+"""
+# Runs after UPDATE_NEWER_PAPERS_SQL in the same transaction, so the papers
+# it updated conflict with identical categories and are left alone. Returns
+# the categories a re-listed paper had before (NULL for inserted ones): both
+# CTEs see the table as it was when the statement started.
+INSERT_NEW_PAPERS_SQL = """
+    WITH old AS (
+        SELECT ps.paper_id, ps.categories
+        FROM paper AS ps
+        JOIN paper_incoming AS i ON i.paper_id = ps.paper_id
+    ), upserted AS (
+        INSERT INTO paper (paper_id, document, abstract, title, source,
+                           update_date, link, authors, institutions, categories)
+        SELECT paper_id, document, abstract, title, source,
+               update_date, link, authors, institutions, categories
+        FROM paper_incoming
+        ON CONFLICT (paper_id) DO UPDATE
+        SET categories = EXCLUDED.categories
+        WHERE paper.categories IS DISTINCT FROM EXCLUDED.categories
+        RETURNING paper_id, xmax = 0 AS inserted
+    )
+    SELECT u.paper_id, u.inserted, old.categories
+    FROM upserted AS u
+    LEFT JOIN old ON old.paper_id = u.paper_id
+"""
+
+
 class PaperDatabase:
-    def __init__(self) -> None:
+    def __init__(self, backend: EmbeddingBackend | None = None) -> None:
+        """Queries embeddings of ``backend``'s model (default: the one
+        OVERSIGHT_EMBEDDING_MODEL selects)."""
         load_dotenv()
+        self.backend = backend if backend is not None else configured_backend()
         self.arxiv_embed_categories = [
             "cs:cs:AI",
             "cs:cs:CL",
@@ -29,21 +642,27 @@ class PaperDatabase:
         ]
         self.con: psycopg.Connection[tuple[Any, ...]] | None = None
         self.date_format = "%Y-%m-%d"
+        self._ingest_schema_ready = False
 
     def __enter__(self) -> PaperDatabase:
         database_url = os.getenv("DATABASE_URL")
         assert database_url is not None, "Database URL is not set"
         self.con = psycopg.connect(database_url)
         register_vector(self.con)
+        slow_queries.instrument(self.con)
         return self
 
     @classmethod
-    def from_connection(cls, con: psycopg.Connection[tuple[Any, ...]]) -> PaperDatabase:
+    def from_connection(
+        cls,
+        con: psycopg.Connection[tuple[Any, ...]],
+        backend: EmbeddingBackend | None = None,
+    ) -> PaperDatabase:
         """Build a ``PaperDatabase`` around an existing pgvector-registered
         connection. The caller owns the connection's lifecycle (no commit /
         close happens via this object).
         """
-        instance = cls()
+        instance = cls(backend)
         instance.con = con
         return instance
 
@@ -69,11 +688,20 @@ class PaperDatabase:
         )
         return self.con
 
-    def insert_paper(self, paper: Paper) -> tuple[int, int, int]:
+    def insert_paper(
+        self, paper: Paper, priority: int = embed_queue.PRIORITY_CONSUME
+    ) -> tuple[int, int, int]:
+        """Insert ``paper``, or update it if this record is newer, and queue
+        it for embedding (see embed_queue.py) if either happened. An older
+        or identical record still brings its categories up to date."""
+        self._ensure_ingest_schema()
+        # Loader-backed documents are re-parsed on every access; load once.
+        document = Jsonb(paper.document)
+        categories = sorted(paper.categories) if paper.categories else None
         with self._get_con().cursor() as cur:
             to_insert = [
                 paper.paper_id,
-                Jsonb(paper.document),
+                document,
                 paper.abstract,
                 paper.title,
                 paper.source,
@@ -113,17 +741,23 @@ class PaperDatabase:
                     title = %s,
                     source = %s,
                     update_date = %s,
-                    link = %s
+                    link = %s,
+                    authors = %s,
+                    institutions = %s,
+                    categories = %s
                 WHERE paper_id = %s::VARCHAR
                   AND update_date < %s::DATE
                 """,
                 [
-                    Jsonb(paper.document),
+                    document,
                     paper.abstract,
                     paper.title,
                     paper.source,
                     paper.paper_date.strftime(self.date_format),
                     paper.link,
+                    paper.authors,
+                    paper.institutions,
+                    categories,
                     paper.paper_id,
                     paper.paper_date.strftime(self.date_format),
                 ],
@@ -132,27 +766,59 @@ class PaperDatabase:
             new_rows = 0
             skipped_rows = 0
             if updated_rows == 0:
-                # If no update happened, try to insert (noop if already exists with newer/same date)
-                new_rows = cur.execute(
+                # If no update happened, try to insert; a paper that already
+                # exists with a newer/same date only has its categories
+                # refreshed (arXiv re-lists papers under new categories
+                # without a new version), returning the ones it had
+                row = cur.execute(
                     """
-                    INSERT INTO paper (paper_id, document, abstract, title, source, update_date, link)
-                    VALUES (%s, %s::jsonb, %s, %s, %s, %s, %s)
-                    ON CONFLICT (paper_id) DO NOTHING;
+                    WITH old AS (
+                        SELECT categories FROM paper WHERE paper_id = %s::VARCHAR
+                    )
+                    INSERT INTO paper (paper_id, document, abstract, title, source, update_date, link, authors, institutions, categories)
+                    VALUES (%s, %s::jsonb, %s, %s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (paper_id) DO UPDATE
+                    SET categories = EXCLUDED.categories
+                    WHERE paper.categories IS DISTINCT FROM EXCLUDED.categories
+                    RETURNING xmax = 0 AS inserted, (SELECT categories FROM old);
                     """,
-                    to_insert,
-                ).rowcount
+                    [
+                        paper.paper_id,
+                        *to_insert,
+                        paper.authors,
+                        paper.institutions,
+                        categories,
+                    ],
+                ).fetchone()
+                new_rows = int(row is not None and row[0])
+                if (
+                    row is not None
+                    and not row[0]
+                    and self.recategorized_for_embedding(paper, row[1])
+                ):
+                    embed_queue.enqueue_unembedded(
+                        self._get_con(),
+                        [(paper.paper_id, paper.abstract)],
+                        embed_queue.queued_backends(self.backend),
+                        priority,
+                    )
             else:
-                # Paper content changed; reset embedding for this paper so it gets re-embedded
+                # Paper content changed; drop its vectors in every model's
+                # space (a shadow model's too) so it gets re-embedded
                 cur.execute(
-                    """
-                    UPDATE embedding
-                    SET embedding_gemini_embedding_001 = NULL
-                    WHERE paper_id = %s::VARCHAR
-                    """,
+                    "DELETE FROM embedding WHERE paper_id = %s::VARCHAR",
                     [paper.paper_id],
                 )
 
             skipped_rows = 1 - (updated_rows + new_rows)
+            if skipped_rows == 0 and self.should_embed(paper):
+                embed_queue.enqueue(
+                    self._get_con(),
+                    paper.paper_id,
+                    paper.abstract,
+                    embed_queue.queued_models(self.backend),
+                    priority,
+                )
 
             assert new_rows + updated_rows + skipped_rows == 1, (
                 f"Updated {updated_rows} rows, inserted {new_rows} rows, and skipped {skipped_rows} rows for paper {paper.paper_id}"
@@ -160,6 +826,62 @@ class PaperDatabase:
 
             return updated_rows, new_rows, skipped_rows
 
+    def insert_papers(
+        self, rows: list[PaperRow], priority: int = embed_queue.PRIORITY_CONSUME
+    ) -> tuple[int, int, int]:
+        """``insert_paper`` for a batch: upsert ``rows`` and queue the ones
+        that changed for embedding, in the caller's transaction. A paper
+        listed twice keeps its newest record and the other counts as
+        skipped. Returns (updated, new, skipped)."""
+        self._ensure_ingest_schema()
+        newest: dict[str, PaperRow] = {}
+        for row in rows:
+            seen = newest.get(row.paper_id)
+            if seen is None or seen.update_date < row.update_date:
+                newest[row.paper_id] = row
+
+        con = self._get_con()
+        with con.cursor() as cur:
+            cur.execute(PAPER_INCOMING_DDL)
+            with cur.copy(PAPER_INCOMING_COPY_SQL) as copy:
+                for row in newest.values():
+                    copy.write_row(row)
+            updated = [r[0] for r in cur.execute(UPDATE_NEWER_PAPERS_SQL)]
+            if updated:
+                # Their content changed; drop their vectors in every model's
+                # space so they get re-embedded (as insert_paper does)
+                cur.execute("DELETE FROM embedding WHERE paper_id = ANY(%s)", [updated])
+            inserted, recategorized = [], []
+            for paper_id, is_new, old_categories in cur.execute(INSERT_NEW_PAPERS_SQL):
+                if is_new:
+                    inserted.append(paper_id)
+                elif self.recategorized_for_embedding(newest[paper_id], old_categories):
+                    recategorized.append(newest[paper_id])
+            # Empty it for the next batch, which may share this transaction
+            cur.execute("TRUNCATE paper_incoming")
+
+        changed = [newest[pid] for pid in updated + inserted]
+        embed_queue.enqueue_many(
+            con,
+            [(row.paper_id, row.abstract) for row in changed if self.should_embed(row)],
+            embed_queue.queued_models(self.backend),
+            priority,
+        )
+        # Still counted as skipped: only their categories changed
+        embed_queue.enqueue_unembedded(
+            con,
+            [(row.paper_id, row.abstract) for row in recategorized],
+            embed_queue.queued_backends(self.backend),
+            priority,
+        )
+        return len(updated), len(inserted), len(rows) - len(changed)
+
+    def _ensure_ingest_schema(self) -> None:
+        if not self._ingest_schema_ready:
+            self.ensure_categories_column()
+            embed_queue.ensure_schema(self._get_con())
+            self._ingest_schema_ready = True
+
     def is_updated(self, paper: Paper) -> bool:
         with self._get_con().cursor() as cur:
             return (
@@ -192,82 +914,40 @@ class PaperDatabase:
             assert row is not None, "No papers in database"
             return row[0]
 
-    def try_update_categories(self, paper: Paper) -> bool:
-        with self._get_con().cursor() as cur:
-            stored_categories = cur.execute(
-                """
-                SELECT category FROM arxiv_paper_categories
-                WHERE paper_id = %s::VARCHAR
-            """,
-                [paper.paper_id],
-            ).fetchall()
-            stored_categories_set = {c[0] for c in stored_categories}
-
-            if stored_categories_set == paper.categories:
-                return False
-
-            # Delete the existing categories
-            cur.execute(
-                """
-                DELETE FROM arxiv_paper_categories
-                WHERE paper_id = %s::VARCHAR
-            """,
-                [paper.paper_id],
-            )
-
-            # Add the new categories
-            assert paper.categories is not None
-            bulk_insertions = []
-            for category in paper.categories:
-                bulk_insertions.append((paper.paper_id, category))
-            cur.executemany(
-                """
-                INSERT INTO arxiv_paper_categories (paper_id, category)
-                VALUES (%s, %s)
-            """,
-                bulk_insertions,
-            )
-
-        return True
-
-    def get_unembedded_arxiv_papers(self) -> list[tuple[Any, ...]]:
-        query = sql.SQL("""
-                SELECT DISTINCT ps.paper_id, ps.document
-                FROM paper AS ps
-                JOIN arxiv_paper_categories AS pc
-                  ON ps.paper_id = pc.paper_id
-                LEFT JOIN embedding AS se
-                  ON se.paper_id = ps.paper_id
-                WHERE se.embedding_gemini_embedding_001 IS NULL
-                  AND pc.category IN ({categories})
-            """).format(
-            categories=sql.SQL(",").join(
-                sql.Literal(c) for c in self.arxiv_embed_categories
-            )
+    def should_embed(self, paper: Paper | PaperRow) -> bool:
+        """Conference papers are all embedded; arXiv ones only in
+        ``arxiv_embed_categories``."""
+        if paper.source != "arxiv":
+            return True
+        return self._in_embed_categories(paper.categories)
+
+    def recategorized_for_embedding(
+        self, paper: Paper | PaperRow, old_categories: list[str] | None
+    ) -> bool:
+        """Whether arXiv re-listing ``paper`` under its categories, without
+        a new version, moved it into ``arxiv_embed_categories`` from
+        ``old_categories``. Ingestion queues such a paper for embedding if
+        it has no vector yet, as it does new and updated ones."""
+        return (
+            paper.source == "arxiv"
+            and self._in_embed_categories(paper.categories)
+            and not self._in_embed_categories(old_categories)
         )
-        with self._get_con().cursor() as cur:
-            return cur.execute(query).fetchall()
 
-    def get_unembedded_conference_papers(self) -> list[tuple[Any, ...]]:
-        with self._get_con().cursor() as cur:
-            return cur.execute("""
-                SELECT DISTINCT ps.paper_id, ps.abstract
-                FROM paper AS ps
-                LEFT JOIN embedding AS emb
-                  ON emb.paper_id = ps.paper_id
-                WHERE emb.embedding_gemini_embedding_001 IS NULL
-                  AND ps.source != 'arxiv'
-            """).fetchall()
+    def _in_embed_categories(self, categories: Iterable[str] | None) -> bool:
+        return not set(self.arxiv_embed_categories).isdisjoint(categories or ())
 
     def update_embedding(self, paper_id: str, embedding: list[float]) -> None:
         with self._get_con().cursor() as cur:
             cur.execute(
-                """
-                INSERT INTO embedding (paper_id, embedding_gemini_embedding_001)
-                VALUES (%s::VARCHAR, %s::halfvec(3072))
-                ON CONFLICT (paper_id) DO UPDATE
-                SET embedding_gemini_embedding_001 = EXCLUDED.embedding_gemini_embedding_001
-                """,
+                self.backend.sql(
+                    """
+                    INSERT INTO embedding (paper_id, {vec_col})
+                    VALUES (%s::VARCHAR, %s::{vec_type})
+                    ON CONFLICT (paper_id) DO UPDATE
+                    SET {vec_col} = EXCLUDED.{vec_col}
+                    """
+                ),
                 [paper_id, embedding],
             )
 
@@ -286,10 +966,9 @@ class PaperDatabase:
         self, embedding: list[float], limit: int = 10
     ) -> list[tuple[Any, ...]]:
         last_day = datetime.now() - timedelta(days=7)
-        with self._get_con().cursor() as cur:
-            rows = cur.execute(
-                """
-                SELECT ps.*, emb.embedding_gemini_embedding_001 <=> %s::halfvec(3072) AS similarity
+        query = self.backend.sql(
+            """
+                SELECT {columns}, emb.{vec_col} <=> %s::{vec_type} AS similarity
                 FROM paper AS ps
                 LEFT JOIN embedding AS emb
                   ON emb.paper_id = ps.paper_id
@@ -297,8 +976,10 @@ class PaperDatabase:
                 ORDER BY similarity ASC
                 LIMIT %s
             """,
-                [embedding, last_day, limit],
-            ).fetchall()
+            columns=sql.SQL(RESULT_COLUMNS),
+        )
+        with self._get_con().cursor() as cur:
+            rows = cur.execute(query, [embedding, last_day, limit]).fetchall()
 
         return rows
 
@@ -313,15 +994,18 @@ class PaperDatabase:
         else:
             time_filter = sql.SQL("")
 
-        query = sql.SQL("""
-                SELECT ps.document, emb.embedding_gemini_embedding_001 <=> %s::halfvec(3072) AS similarity
+        query = self.backend.sql(
+            """
+                SELECT ps.document, emb.{vec_col} <=> %s::{vec_type} AS similarity
                 FROM paper AS ps
                 LEFT JOIN embedding AS emb
                   ON emb.paper_id = ps.paper_id
                 {time_filter}
                 ORDER BY similarity ASC
                 LIMIT %s::INTEGER
-            """).format(time_filter=time_filter)
+            """,
+            time_filter=time_filter,
+        )
         with self._get_con().cursor() as cur:
             return cur.execute(query, [embedding, limit]).fetchall()
 
@@ -334,22 +1018,24 @@ class PaperDatabase:
 
         oldest_time = (datetime.now() - timedelta).strftime("%Y-%m-%d")
 
-        with self._get_con().cursor() as cur:
-            return cur.execute(
-                """
-                SELECT ps.*, emb.embedding_gemini_embedding_001 <=> %s::halfvec(3072) AS similarity
+        query = self.backend.sql(
+            """
+                SELECT {columns}, emb.{vec_col} <=> %s::{vec_type} AS similarity
                 FROM paper AS ps
                 JOIN embedding AS emb
                   ON emb.paper_id = ps.paper_id
                 WHERE ps.update_date > %s::DATE
                   AND ps.source != 'arxiv'
-                  AND emb.embedding_gemini_embedding_001 IS NOT NULL
+                  AND emb.{vec_col} IS NOT NULL
                 ORDER BY similarity ASC
                 LIMIT %s::INTEGER
             """,
-                [embedding, oldest_time, limit],
-            ).fetchall()
+            columns=sql.SQL(RESULT_COLUMNS),
+        )
+        with self._get_con().cursor() as cur:
+            return cur.execute(query, [embedding, oldest_time, limit]).fetchall()
 
+    @metrics.db_query("get_newest_papers")
     def get_newest_papers(
         self,
         embedding: list[float],
@@ -357,37 +1043,78 @@ class PaperDatabase:
         filter_list: list[sql.Composable],
         limit: int = 10,
         ef_search: int = 40,
+        after: tuple[float, str] | None = None,
     ) -> list[tuple[Any, ...]]:
-        if timedelta is None:
-            timedelta = timedelta(days=365 * 50)
-
-        oldest_time = (datetime.now() - timedelta).strftime("%Y-%m-%d")
-
-        # Combine multiple filters with OR (union of sources), wrapped to preserve precedence
-        if filter_list:
-            or_group = sql.SQL(" OR ").join(
-                sql.SQL("({})").format(flt) for flt in filter_list
-            )
-            filter_composed = sql.SQL("AND ({})").format(or_group)
-        else:
-            filter_composed = sql.SQL("")
+        """Nearest papers to ``embedding`` in the window, or, with ``after``
+        (a previous page's last ``(distance, paper_id)``), the next page.
+        """
+        con = self._get_con()
+        with con.transaction(), con.cursor() as cur:
+            cur.execute(set_ef_search(ef_search))
+            if after is not None:
+                cur.execute(ITERATIVE_SCAN_SQL)
+            return cur.execute(
+                newest_papers_query(self.backend, filter_list, after=after is not None),
+                newest_papers_params(embedding, timedelta, limit, after),
+            ).fetchall()
 
-        query = sql.SQL("""
-                SELECT ps.*, emb.embedding_gemini_embedding_001 <=> %s::halfvec(3072) AS similarity
-                FROM paper AS ps
-                JOIN embedding AS emb
-                  ON emb.paper_id = ps.paper_id
-                WHERE ps.update_date > %s::DATE
-                  AND emb.embedding_gemini_embedding_001 IS NOT NULL
-                {filter_str}
-                ORDER BY similarity ASC
-                LIMIT %s::INTEGER
-            """).format(filter_str=filter_composed)
+    @metrics.db_query("get_newest_papers_many", rows=metrics.nested_len)
+    def get_newest_papers_many(
+        self, searches: list[KnnSearch]
+    ) -> list[list[tuple[Any, ...]]]:
+        """Run several ``get_newest_papers`` searches in one round-trip.
+
+        The statements go out in pipeline mode, so the server runs the
+        searches back to back while the results stream home, instead of
+        one network round-trip (and one SET) per search. Each search keeps
+        its own filters, window, limit and HNSW settings; the rows come
+        back grouped in the order of ``searches``.
+        """
+        con = self._get_con()
+        cursors: list[psycopg.Cursor[tuple[Any, ...]]] = []
+        with con.transaction(), con.pipeline():
+            for query, params in knn_search_statements(self.backend, searches):
+                cur = con.cursor()
+                cur.execute(query, params)
+                if params is not None:
+                    cursors.append(cur)
+        return [cur.fetchall() for cur in cursors]
+
+    @metrics.db_query("get_embeddings")
+    def get_embeddings(self, paper_ids: list[str]) -> dict[str, Any]:
+        """Stored embeddings of ``paper_ids``; unembedded ids are left out."""
+        if not paper_ids:
+            return {}
         with self._get_con().cursor() as cur:
-            cur.execute(
-                sql.SQL("SET hnsw.ef_search = {}").format(sql.Literal(ef_search))
-            )
-            return cur.execute(query, [embedding, oldest_time, limit]).fetchall()
+            query = self.backend.sql(EMBEDDINGS_BY_IDS_SQL)
+            return dict(cur.execute(query, [paper_ids]).fetchall())
+
+    @metrics.db_query("get_composite_papers")
+    def get_composite_papers(
+        self,
+        vectors: list[Any],
+        weights: list[float],
+        mode: str,
+        timedelta: timedelta | None,
+        filter_list: list[sql.Composable],
+        limit: int = 10,
+        ef_search: int = 40,
+        exclude: list[str] | None = None,
+    ) -> list[tuple[Any, ...]]:
+        """Papers closest to several vectors at once, by ``mode`` (see
+        COMPOSITE_MODES). Rows end in the combined distance, and never
+        include the ``exclude`` ids (typically the seed papers)."""
+        n_vectors = 1 if mode == "centroid" else len(vectors)
+        con = self._get_con()
+        with con.transaction(), con.cursor() as cur:
+            # The index scan returns at most ef_search rows per pass.
+            cur.execute(set_ef_search(max(ef_search, composite_pool_size(limit))))
+            return cur.execute(
+                composite_papers_query(self.backend, n_vectors, filter_list, mode),
+                composite_papers_params(
+                    vectors, weights, mode, timedelta, limit, exclude or []
+                ),
+            ).fetchall()
 
     def latest_conference_dates(self) -> dict[str, date]:
         """Return the most recent paper date for each non-arxiv source."""
@@ -444,6 +1171,7 @@ class PaperDatabase:
         result["total"] = sum(result.values())
         return result
 
+    @metrics.db_query("find_neighbors")
     def find_neighbors(
         self,
         paper_id: str,
@@ -467,139 +1195,182 @@ class PaperDatabase:
         candidate's embedding flows into the inner ORDER BY as a literal so HNSW
         is used for each reverse lookup.
         """
-        with self._get_con().cursor() as cur:
+        con = self._get_con()
+        with con.transaction(), con.cursor() as cur:
             # Step 1: fetch the seed embedding.
             row = cur.execute(
-                """
-                SELECT embedding_gemini_embedding_001
-                FROM embedding
-                WHERE paper_id = %s
-                  AND embedding_gemini_embedding_001 IS NOT NULL
-                """,
-                [paper_id],
+                self.backend.sql(SEED_EMBEDDING_SQL), [paper_id]
             ).fetchone()
             if row is None:
                 return []
             seed_emb = row[0]
 
-            cur.execute(
-                sql.SQL("SET hnsw.ef_search = {}").format(sql.Literal(ef_search))
-            )
+            cur.execute(set_ef_search(ef_search))
 
             # Step 2: top-k kNN against the seed embedding. Over-fetch by 1 so we
             # can drop the seed itself.
             if not mutual:
                 rows = cur.execute(
-                    """
-                    SELECT paper_id,
-                           1 - (embedding_gemini_embedding_001 <=> %s::halfvec) AS sim
-                    FROM embedding
-                    WHERE embedding_gemini_embedding_001 IS NOT NULL
-                    ORDER BY embedding_gemini_embedding_001 <=> %s::halfvec
-                    LIMIT %s
-                    """,
-                    [seed_emb, seed_emb, k + 1],
+                    self.backend.sql(NEIGHBORS_SQL), [seed_emb, seed_emb, k + 1]
                 ).fetchall()
                 return [(pid, float(sim)) for pid, sim in rows if pid != paper_id][:k]
 
-            # Mutual-kNN: fetch the seed's top-(k+1) candidates, then for each
-            # candidate run a top-(k+1) reverse kNN against the candidate's
-            # embedding and keep only those that contain the seed. The CTE
-            # materialises the candidate set so the inner subquery's ORDER BY
-            # parameter (sn.nb_emb) is a fixed literal per row, allowing HNSW.
+            # Mutual-kNN: see MUTUAL_NEIGHBORS_SQL.
             rows = cur.execute(
-                """
-                WITH seed_neighbors AS (
-                    SELECT paper_id AS nb_id,
-                           embedding_gemini_embedding_001 AS nb_emb,
-                           1 - (embedding_gemini_embedding_001 <=> %s::halfvec) AS sim
-                    FROM embedding
-                    WHERE embedding_gemini_embedding_001 IS NOT NULL
-                    ORDER BY embedding_gemini_embedding_001 <=> %s::halfvec
-                    LIMIT %s
-                )
-                SELECT sn.nb_id, sn.sim
-                FROM seed_neighbors sn
-                WHERE sn.nb_id != %s
-                  AND EXISTS (
-                      SELECT 1
-                      FROM (
-                          SELECT paper_id
-                          FROM embedding
-                          WHERE embedding_gemini_embedding_001 IS NOT NULL
-                          ORDER BY embedding_gemini_embedding_001 <=> sn.nb_emb
-                          LIMIT %s
-                      ) rev
-                      WHERE rev.paper_id = %s
-                  )
-                ORDER BY sn.sim DESC
-                LIMIT %s
-                """,
+                self.backend.sql(MUTUAL_NEIGHBORS_SQL),
                 [seed_emb, seed_emb, k + 1, paper_id, k + 1, paper_id, k],
             ).fetchall()
             return [(pid, float(sim)) for pid, sim in rows]
 
+    @metrics.db_query("sample_pairwise_similarities")
     def sample_pairwise_similarities(self, n: int) -> list[float]:
         """Sample ``n`` random pairs of distinct embedded papers and return
         the cosine similarity for each pair.
 
         Used to anchor the similarity-graph threshold slider in corpus-level
-        percentiles. Cosine similarity here is ``1 - (e1 <=> e2)`` because the
-        ``embedding_gemini_embedding_001`` column uses ``halfvec_cosine_ops``.
+        percentiles. Cosine similarity here is ``1 - (e1 <=> e2)`` because
+        embedding columns use ``halfvec_cosine_ops``.
 
         Implementation: pull ``2*n`` random embeddings in one shot via
         ``ORDER BY random()`` (acceptable at our corpus size — ~470K rows;
         the whole call is ~hundreds of ms and is invoked once per process).
         Pair them up in SQL with ``ROW_NUMBER`` and compute the cosine in
-        Postgres so we never serialise 3072-dim halfvecs to Python.
+        Postgres so we never serialise the halfvecs to Python.
         """
         if n <= 0:
             return []
         with self._get_con().cursor() as cur:
-            rows = cur.execute(
-                """
-                WITH sampled AS (
-                    SELECT embedding_gemini_embedding_001 AS emb,
-                           ROW_NUMBER() OVER () AS rn
-                    FROM (
-                        SELECT embedding_gemini_embedding_001
-                        FROM embedding
-                        WHERE embedding_gemini_embedding_001 IS NOT NULL
-                        ORDER BY random()
-                        LIMIT %s
-                    ) s
-                )
-                SELECT 1 - (a.emb <=> b.emb) AS sim
-                FROM sampled a
-                JOIN sampled b
-                  ON b.rn = a.rn + 1
-                WHERE a.rn %% 2 = 1
-                """,
-                [2 * n],
-            ).fetchall()
+            rows = cur.execute(self.backend.sql(SAMPLE_PAIRS_SQL), [2 * n]).fetchall()
         return [float(sim) for (sim,) in rows]
 
+    @metrics.db_query("get_papers_by_ids")
     def get_papers_by_ids(self, paper_ids: list[str]) -> list[tuple[Any, ...]]:
-        """Fetch full paper rows for the given ``paper_ids`` in one round-trip.
+        """Fetch result rows for the given ``paper_ids`` in one round-trip.
 
-        Returns rows in the same column order as ``paper.*`` followed by ``NULL``
-        as the trailing similarity slot, so callers can hand the result directly
-        to ``Paper.from_database_row``. The output order matches ``paper_ids``.
+        Returns ``RESULT_COLUMNS`` followed by ``NULL`` as the trailing
+        similarity slot, so callers can hand the result directly to
+        ``PaperResult.from_row``. The output order matches ``paper_ids``.
         """
         if not paper_ids:
             return []
+        with self._get_con().cursor() as cur:
+            rows = cur.execute(PAPERS_BY_IDS_QUERY, [paper_ids]).fetchall()
+        # Preserve the order requested by the caller.
+        return order_by_ids(rows, paper_ids)
+
+    @metrics.db_query("suggest")
+    def suggest(self, text: str, limit: int = 8) -> list[tuple[Any, ...]]:
+        """Autocomplete rows ``(paper_id, title, authors, source,
+        update_date, match, distance)`` for a partially typed title or
+        author name; see SUGGEST_SQL."""
+        tsquery = prefix_tsquery(text)
+        if tsquery is None:
+            return []
         with self._get_con().cursor() as cur:
             rows = cur.execute(
-                """
-                SELECT ps.*, NULL AS similarity
-                FROM paper AS ps
-                WHERE ps.paper_id = ANY(%s)
-                """,
-                [paper_ids],
+                SUGGEST_SQL, {"q": text, "tsquery": tsquery, "limit": limit}
             ).fetchall()
-        # Preserve the order requested by the caller.
-        by_id = {r[2]: r for r in rows}  # paper_id is the 3rd column
-        return [by_id[pid] for pid in paper_ids if pid in by_id]
+        return merge_suggestions(rows, limit)
+
+    def ensure_lexical_index(self) -> None:
+        """Add the /api/suggest column and indexes to an existing database.
+
+        The generated column rewrites ``paper`` once and the index builds
+        scan it; all of it is a no-op when already applied.
+        """
+        con = self._get_con()
+        with con.cursor() as cur:
+            for statement in LEXICAL_INDEX_DDL:
+                cur.execute(statement)
+        con.commit()
+
+    def ensure_categories_column(self) -> None:
+        """Add the ``categories`` column and its GIN index to an existing
+        database, filled from arxiv_paper_categories where that exists; a
+        catalog lookup once applied."""
+        con = self._get_con()
+        with con.cursor() as cur:
+            if cur.execute(CATEGORIES_COLUMN_EXISTS_SQL).fetchone():
+                return
+            cur.execute(CATEGORIES_COLUMN_DDL)
+            row = cur.execute(
+                "SELECT to_regclass('arxiv_paper_categories') IS NOT NULL"
+            ).fetchone()
+            if row[0]:
+                filled = cur.execute(CATEGORIES_FROM_JOIN_TABLE_SQL).rowcount
+                logger.info(f"Copied categories of {filled} papers")
+            cur.execute(CATEGORIES_INDEX_DDL)
+        con.commit()
+
+    def ensure_embedding_column(self, index: bool = True) -> None:
+        """Add this model's embedding column and (unless not ``index``) its
+        HNSW index if the database has never stored its vectors; a catalog
+        lookup otherwise."""
+        con = self._get_con()
+        with con.cursor() as cur:
+            exists = cur.execute(
+                EMBEDDING_COLUMN_EXISTS_SQL, [self.backend.column]
+            ).fetchone()
+            if exists:
+                return
+            cur.execute(self.backend.sql(EMBEDDING_COLUMN_DDL))
+            if index:
+                cur.execute(self.backend.sql(EMBEDDING_INDEX_DDL))
+        con.commit()
+
+    def backfill_authors(self, batch_size: int = 5000) -> int:
+        """Parse authors/institutions for rows ingested before those columns
+        existed, committing after each batch so progress survives a restart.
+
+        Adds the columns first if needed (db/init only runs on fresh
+        volumes). Returns the number of rows filled in.
+        """
+        con = self._get_con()
+        with con.cursor() as cur:
+            cur.execute(
+                """
+                ALTER TABLE paper
+                    ADD COLUMN IF NOT EXISTS authors text[],
+                    ADD COLUMN IF NOT EXISTS institutions text[]
+                """
+            )
+            con.commit()
+            row = cur.execute(
+                "SELECT COUNT(*) FROM paper WHERE authors IS NULL"
+            ).fetchone()
+            remaining = row[0] if row is not None else 0
+
+        filled = 0
+        with tqdm(total=remaining, desc="Backfilling authors") as progress:
+            while True:
+                with con.cursor() as cur:
+                    rows = cur.execute(
+                        """
+                        SELECT paper_id, document, source
+                        FROM paper
+                        WHERE authors IS NULL
+                        LIMIT %s
+                        """,
+                        [batch_size],
+                    ).fetchall()
+                    if not rows:
+                        break
+                    updates = []
+                    for paper_id, document, source in rows:
+                        info = extract_authors(document or {}, source)
+                        updates.append((info.authors, info.institutions, paper_id))
+                    cur.executemany(
+                        """
+                        UPDATE paper
+                        SET authors = %s, institutions = %s
+                        WHERE paper_id = %s
+                        """,
+                        updates,
+                    )
+                con.commit()
+                filled += len(rows)
+                progress.update(len(rows))
+        return filled
 
     def commit(self) -> None:
         if self.con is not None:
@@ -619,15 +1390,18 @@ class PaperDatabase:
         else:
             filter_composed = sql.SQL("")
 
-        query = sql.SQL("""
-                SELECT ps.update_date, (emb.embedding_gemini_embedding_001 <=> %s::halfvec(3072)) < %s AS is_similar
+        query = self.backend.sql(
+            """
+                SELECT ps.update_date, (emb.{vec_col} <=> %s::{vec_type}) < %s AS is_similar
                 FROM paper AS ps
                 JOIN embedding AS emb
                   ON emb.paper_id = ps.paper_id
-                WHERE emb.embedding_gemini_embedding_001 IS NOT NULL
+                WHERE emb.{vec_col} IS NOT NULL
                   {filter_str}
                 ORDER BY update_date ASC
-            """).format(filter_str=filter_composed)
+            """,
+            filter_str=filter_composed,
+        )
         with self._get_con().cursor() as cur:
             rows = cur.execute(query, [embedding, similarity_threshold]).fetchall()
 
@@ -636,5 +1410,4 @@ class PaperDatabase:
 
 if __name__ == "__main__":
     with PaperDatabase() as db:
-        # papers = db.get_unembedded_conference_papers()
         db.summarise_current_conferences()
@@ -2,20 +2,33 @@ from __future__ import annotations
 
 import json
 import os
-from tqdm import tqdm
 from datetime import timedelta
+from typing import NamedTuple
 from psycopg import sql
 
-from .PaperDatabase import PaperDatabase
-from .Paper import Paper
+from .PaperDatabase import KnnSearch, PaperDatabase, categories_filter
+from .Paper import Paper, PaperResult
 from .EmbeddingModel import EmbeddingModel
+from .embed_queue import embed_queued
 from .ResearchLLM import ResearchLLM
+from .utils import tqdm
+
+
+class SearchQuery(NamedTuple):
+    """One search for ``PaperRepository.search_many``; the fields mirror
+    ``get_newest_related_papers``'s arguments."""
+
+    text: str
+    timedelta: timedelta | None
+    filter_list: list[sql.Composable] | None = None
+    limit: int = 10
+    ef_search: int = 40
 
 
 class PaperRepository:
-    def __init__(self, embedding_model_name: str) -> None:
-        self.db = PaperDatabase()
+    def __init__(self, embedding_model_name: str | None = None) -> None:
         self.embedding_model = EmbeddingModel(embedding_model_name)
+        self.db = PaperDatabase(self.embedding_model.backend)
 
     def __enter__(self) -> PaperRepository:
         self.db.__enter__()
@@ -70,31 +83,9 @@ class PaperRepository:
             self.add_openreview_papers(os.path.join(path, filename), api_version)
 
     def embed_missing_conference_papers(self) -> None:
-        papers_to_embed = self.db.get_unembedded_conference_papers()
-        print(f"Embedding {len(papers_to_embed)} papers")
-
-        paper_ids: list[str] = []
-        abstracts: list[str] = []
-        for paper_id, abstract in papers_to_embed:
-            paper_ids.append(paper_id)
-            abstracts.append(abstract)
-            if abstract is None or abstract == "":
-                breakpoint()
-
-        for i, (embedding, paper_id) in tqdm(
-            enumerate(
-                zip(
-                    self.embedding_model.embed_documents_rate_limited(abstracts),
-                    paper_ids,
-                )
-            ),
-            desc="Embedding papers",
-            total=len(paper_ids),
-        ):
-            self.db.update_embedding(paper_id, embedding)
-
-            if i % 10 == 0:
-                self.db._get_con().commit()
+        """Embed the papers ingestion queued (see embed_queue.py)."""
+        self.db.ensure_embedding_column()
+        embed_queued(self.db._get_con(), self.embedding_model)
 
     def get_newest_related_papers(
         self,
@@ -103,25 +94,96 @@ class PaperRepository:
         filter_list: list[sql.Composable] | None = None,
         limit: int = 10,
         ef_search: int = 40,
-    ) -> list[Paper]:
+    ) -> list[PaperResult]:
         embedding = self.embedding_model.model.embed_query(text)
         paper_rows = self.db.get_newest_papers(
             embedding, timedelta, filter_list or [], limit, ef_search=ef_search
         )
-        papers: list[Paper] = []
+        papers: list[PaperResult] = []
         for paper_row in paper_rows:
-            paper, similarity = Paper.from_database_row(paper_row)
+            paper, similarity = PaperResult.from_row(paper_row)
             papers.append(paper)
         return papers
 
+    def search_many(self, queries: list[SearchQuery]) -> list[list[PaperResult]]:
+        """Run several searches at once, grouped per query in input order.
+
+        All query texts go to the embedding provider in a single batch
+        (each distinct text once) and the kNN queries share one pipelined
+        round-trip, so N searches cost about as much as one.
+        """
+        if not queries:
+            return []
+        texts = list(dict.fromkeys(q.text for q in queries))
+        vectors = dict(zip(texts, self.embedding_model.embed_queries(texts)))
+        rows_per_query = self.db.get_newest_papers_many(
+            [
+                KnnSearch(
+                    vectors[q.text],
+                    q.timedelta,
+                    q.filter_list or [],
+                    q.limit,
+                    ef_search=q.ef_search,
+                )
+                for q in queries
+            ]
+        )
+        return [
+            [PaperResult.from_row(row)[0] for row in rows] for rows in rows_per_query
+        ]
+
+    def get_composite_related_papers(
+        self,
+        texts: list[tuple[str, float]],
+        paper_ids: list[tuple[str, float]],
+        mode: str,
+        timedelta: timedelta | None,
+        filter_list: list[sql.Composable] | None = None,
+        limit: int = 10,
+        ef_search: int = 40,
+    ) -> list[tuple[PaperResult, float]]:
+        """Papers related to several ``(text, weight)`` queries and/or
+        ``(paper_id, weight)`` seeds at once, e.g. "graph neural networks"
+        AND "compilers" with ``mode="min"``. See PaperDatabase.COMPOSITE_MODES.
+
+        Returns ``[(PaperResult, similarity), ...]``, best first, where
+        similarity is one minus the combined distance. Seed papers are
+        left out of the results.
+        """
+        seeds = self.db.get_embeddings([pid for pid, _ in paper_ids])
+        missing = [pid for pid, _ in paper_ids if pid not in seeds]
+        if missing:
+            raise ValueError(f"papers without an embedding: {', '.join(missing)}")
+
+        vectors = (
+            self.embedding_model.embed_queries([t for t, _ in texts]) if texts else []
+        )
+        vectors += [seeds[pid] for pid, _ in paper_ids]
+        weights = [w for _, w in texts] + [w for _, w in paper_ids]
+        rows = self.db.get_composite_papers(
+            vectors,
+            weights,
+            mode,
+            timedelta,
+            filter_list or [],
+            limit,
+            ef_search=ef_search,
+            exclude=[pid for pid, _ in paper_ids],
+        )
+        results: list[tuple[PaperResult, float]] = []
+        for row in rows:
+            paper, distance = PaperResult.from_row(row)
+            results.append((paper, 1 - float(distance)))
+        return results
+
     def get_neighbors(
         self,
         paper_id: str,
         k: int,
         mutual: bool = False,
         ef_search: int = 80,
-    ) -> list[tuple[Paper, float]]:
-        """Return the kNN of ``paper_id`` as ``[(Paper, similarity), ...]``.
+    ) -> list[tuple[PaperResult, float]]:
+        """Return the kNN of ``paper_id`` as ``[(PaperResult, similarity), ...]``.
 
         Hydrates each neighbor via a single bulk fetch from the ``paper`` table,
         preserving the similarity ordering returned by ``find_neighbors``.
@@ -134,20 +196,20 @@ class PaperRepository:
 
         sim_by_id = {pid: sim for pid, sim in neighbors}
         rows = self.db.get_papers_by_ids([pid for pid, _ in neighbors])
-        results: list[tuple[Paper, float]] = []
+        results: list[tuple[PaperResult, float]] = []
         for row in rows:
-            paper, _ = Paper.from_database_row(row)
+            paper, _ = PaperResult.from_row(row)
             results.append((paper, sim_by_id[paper.paper_id]))
         # Restore the similarity-sorted order (descending).
         results.sort(key=lambda pair: pair[1], reverse=True)
         return results
 
-    def get_paper(self, paper_id: str) -> Paper | None:
-        """Fetch a single Paper by id, or ``None`` if it isn't in the DB."""
+    def get_paper(self, paper_id: str) -> PaperResult | None:
+        """Fetch a single paper by id, or ``None`` if it isn't in the DB."""
         rows = self.db.get_papers_by_ids([paper_id])
         if not rows:
             return None
-        paper, _ = Paper.from_database_row(rows[0])
+        paper, _ = PaperResult.from_row(rows[0])
         return paper
 
     def compute_similarity_over_time(
@@ -173,7 +235,21 @@ class PaperRepository:
         return dates, cumulative_similarities, cumulative_similarities_weighted
 
     @staticmethod
-    def build_filter_sql(sources: list[str]) -> sql.Composed:
+    def build_filter_sql(
+        sources: list[str], categories: list[str] | None = None
+    ) -> sql.Composed:
+        """Papers from any of ``sources``; with ``categories``, arXiv papers
+        only count if they're in one of them."""
+        if categories and "arxiv" in sources:
+            arxiv = sql.SQL("(ps.source = 'arxiv' AND {})").format(
+                categories_filter(categories)
+            )
+            others = [s for s in sources if s != "arxiv"]
+            if not others:
+                return arxiv
+            return sql.SQL("({} OR {})").format(
+                PaperRepository.build_filter_sql(others), arxiv
+            )
         if len(sources) == 1:
             return sql.SQL("ps.source = {}").format(sql.Literal(sources[0]))
         return sql.SQL("ps.source IN ({})").format(
@@ -182,7 +258,7 @@ class PaperRepository:
 
 
 if __name__ == "__main__":
-    # with PaperRepository(embedding_model_name="models/gemini-embedding-001") as repo:
+    # with PaperRepository() as repo:
     #     repo.add_scraped_papers_from_dir("data/vldb")
     #     repo.embed...
 
@@ -202,15 +278,26 @@ if __name__ == "__main__":
     else:
         abstract = "Recent advancements in large language models have spurred interest in inference-time scaling techniques to balance efficiency and performance. In this work, we analyze and integrate several search strategies—including beam search, Monte Carlo Tree Search (MCTS), and alternative approaches—to enhance the inference process. Our key contribution lies in a unified framework that dynamically selects optimal search techniques based on model characteristics and contextual constraints. Extensive experimentation on established benchmarks demonstrates significant improvements in both speed and output accuracy compared to standard search methods. We discuss theoretical underpinnings, implementation challenges, and potential avenues for future research in scalable inference algorithms via evaluation."
 
-    with PaperRepository(embedding_model_name="models/gemini-embedding-001") as repo:
+    with PaperRepository() as repo:
         ai_conference_filter = repo.build_filter_sql(["ICML", "NeurIPS", "ICLR"])
         arxiv_filter = repo.build_filter_sql(["arxiv"])
         systems_filter = repo.build_filter_sql(
             ["OSDI", "SOSP", "ASPLOS", "ATC", "NSDI", "MLSys", "EuroSys"]
         )
 
-        papers = repo.get_newest_related_papers(
-            abstract, timedelta(days=365 * 5), [repo.build_filter_sql(["VLDB"])]
+        vldb_filter = repo.build_filter_sql(["VLDB"])
+
+        window = timedelta(days=365 * 5)
+        filters = {
+            "AI": ai_conference_filter,
+            "arXiv": arxiv_filter,
+            "Systems": systems_filter,
+            "VLDB": vldb_filter,
+        }
+        results = repo.search_many(
+            [SearchQuery(abstract, window, [flt]) for flt in filters.values()]
         )
-        for paper in papers:
-            print(paper)
+        for name, papers in zip(filters, results):
+            print(f"== {name} ==")
+            for paper in papers:
+                print(paper)
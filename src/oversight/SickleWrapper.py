@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 from datetime import datetime
-from tqdm import tqdm
+from functools import partial
+from typing import Any
 from sickle import Sickle
 import xmltodict
 from .Paper import Paper
+from .utils import tqdm
 
 
 class SickleWrapper:
@@ -30,33 +32,46 @@ class SickleWrapper:
 
         new_papers: list[Paper] = []
         for new_record in tqdm(records, desc="Parsing potentially new papers"):
-            document = xmltodict.parse(new_record.raw)["record"]
-            paper_id: str = document["metadata"]["arXivRaw"]["id"]
-            revision_submission_date = datetime.strptime(
-                document["header"]["datestamp"], self.date_format
-            )
-            link = f"https://arxiv.org/abs/{paper_id}"
-
-            categories = document["header"]["setSpec"]
-            if isinstance(categories, str):
-                categories_set: set[str] = {categories}
-            else:
-                assert isinstance(categories, list), (
-                    f"Categories is not a list: {categories}"
-                )
-                categories_set = {str(c) for c in categories}
-
-            paper = Paper(
-                paper_id=paper_id,
-                document=document,
-                abstract=document["metadata"]["arXivRaw"]["abstract"],
-                title=document["metadata"]["arXivRaw"]["title"],
-                source="arxiv",
-                link=link,
-                paper_date=revision_submission_date,
-                categories=categories_set,
+            new_papers.append(self.parse_record(new_record.raw))
+
+        return new_papers
+
+    def parse_record(self, raw: str, lazy: bool = True) -> Paper:
+        """Build a Paper from one raw OAI-PMH arXivRaw record.
+
+        With ``lazy`` only the scalar fields are kept; the parsed document
+        is dropped and re-parsed from ``raw`` on demand, since a sync batch
+        can hold 100k+ papers and the expanded xmltodict tree is several
+        times the size of the XML it came from.
+        """
+        document = _parse_record(raw)
+        paper_id: str = document["metadata"]["arXivRaw"]["id"]
+        revision_submission_date = datetime.strptime(
+            document["header"]["datestamp"], self.date_format
+        )
+        link = f"https://arxiv.org/abs/{paper_id}"
+
+        categories = document["header"]["setSpec"]
+        if isinstance(categories, str):
+            categories_set: set[str] = {categories}
+        else:
+            assert isinstance(categories, list), (
+                f"Categories is not a list: {categories}"
             )
+            categories_set = {str(c) for c in categories}
 
-            new_papers.append(paper)
+        return Paper(
+            paper_id=paper_id,
+            document=None if lazy else document,
+            document_loader=partial(_parse_record, raw) if lazy else None,
+            abstract=document["metadata"]["arXivRaw"]["abstract"],
+            title=document["metadata"]["arXivRaw"]["title"],
+            source="arxiv",
+            link=link,
+            paper_date=revision_submission_date,
+            categories=categories_set,
+        )
 
-        return new_papers
+
+def _parse_record(raw: str) -> dict[str, Any]:
+    return xmltodict.parse(raw)["record"]
@@ -0,0 +1,677 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any
+
+from . import metrics
+from .embedding_backends import (
+    EmbeddingBackend,
+    configured_model_name,
+    configured_shadow_model_name,
+)
+from .embedding_spaces import SearchSpaces, SpaceUnavailable
+from .hnsw_tuning import tuned_ef_search
+from .jobs import Job
+from .Paper import PaperResult
+from .PaperDatabase import COMPOSITE_MODES, arxiv_category
+from .search_cursor import InvalidCursor, SearchCursor, decode_cursor, encode_cursor
+
+# Request parsing, serialisation and SQL shared by the WSGI app
+# (flask_app.py) and the ASGI app (asgi_app.py), so both servers expose
+# the same routes with the same validation and response shapes. Nothing
+# in here touches a framework request object or a connection.
+
+# Every valid `source` value the search API recognises. The frontend
+# groups these visually (AI / Systems / PL) but the backend doesn't
+# care about the grouping — a flat list is all the filter needs.
+KNOWN_CONFERENCES: list[str] = [
+    "ICML",
+    "NeurIPS",
+    "ICLR",
+    "OSDI",
+    "SOSP",
+    "ASPLOS",
+    "ATC",
+    "NSDI",
+    "MLSys",
+    "EuroSys",
+    "VLDB",
+    "POPL",
+    "PLDI",
+    "ICFP",
+    "OOPSLA",
+    "ESOP",
+    "ECOOP",
+    "CC",
+    "Haskell",
+]
+KNOWN_SOURCES: list[str] = ["arxiv", *KNOWN_CONFERENCES]
+
+# Most arXiv categories a search may filter on; each one is an element of
+# the ``&&`` array the GIN index is probed with.
+MAX_CATEGORIES = 20
+
+
+def embedding_model_name() -> str:
+    """Query embedder used by /api/search (OVERSIGHT_EMBEDDING_MODEL) until
+    a shadow model takes over (see embedding_spaces.py).
+
+    Load tests and the bench swap in the deterministic ``fake/hash`` model
+    (see embedding_backends.py) instead of calling Gemini.
+    """
+    return configured_model_name()
+
+
+class BadRequest(ValueError):
+    """A request parameter failed validation; maps to a 400 response."""
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+        self.message = message
+
+    def payload(self) -> tuple[dict[str, str], int]:
+        return {"error": self.message}, 400
+
+
+@dataclass(frozen=True)
+class SearchParams:
+    text: str
+    time_window_days: int
+    limit: int
+    ef_search: int
+    sources: list[str]
+    # Last (distance, paper_id) of the previous page, from a cursor.
+    after: tuple[float, str] | None = None
+    # The embedding space to search; None: whichever one search serves.
+    model: str | None = None
+    # arXiv categories (stored form, "cs:cs:LG") the arXiv results must be
+    # in at least one of; empty: no category filter.
+    categories: list[str] = field(default_factory=list)
+
+
+def search_body_from_args(args: Mapping[str, str]) -> dict[str, Any]:
+    """The JSON body equivalent of a ``GET /api/search`` query string."""
+    return {
+        "text": args.get("text", ""),
+        "time_window_days": args.get("time_window_days"),
+        "cursor": args.get("cursor"),
+        "categories": [c for c in args.get("categories", "").split(",") if c],
+        "sources": {
+            src: args.get(src, "false").lower() == "true" for src in KNOWN_SOURCES
+        },
+    }
+
+
+def parse_search(body: Mapping[str, Any]) -> SearchParams:
+    if body.get("cursor"):
+        return _params_from_cursor(body["cursor"])
+
+    query_text_raw: Any = body.get("text", "")
+    if not isinstance(query_text_raw, str):
+        raise BadRequest("text must be a string")
+    query_text: str = query_text_raw.strip()
+    if not query_text:
+        raise BadRequest("text is required")
+
+    time_window_days, limit, ef_search, sources, categories = _parse_search_options(
+        body
+    )
+    return SearchParams(
+        text=query_text,
+        time_window_days=time_window_days,
+        limit=limit,
+        ef_search=ef_search,
+        sources=sources,
+        model=_parse_model(body),
+        categories=categories,
+    )
+
+
+def _parse_model(body: Mapping[str, Any]) -> str | None:
+    model = body.get("model")
+    if model is not None and not isinstance(model, str):
+        raise BadRequest("model must be a string")
+    return model or None
+
+
+def search_backend(spaces: SearchSpaces, model: str | None) -> EmbeddingBackend:
+    """The embedding space a search pinned to ``model`` runs in (None:
+    the one search serves); call ``spaces.check`` first when it's due."""
+    try:
+        return spaces.backend(model)
+    except SpaceUnavailable as e:
+        raise BadRequest(str(e)) from None
+
+
+def batch_backend(spaces: SearchSpaces, batch: list[SearchParams]) -> EmbeddingBackend:
+    """The one space every search in ``batch`` runs in; they share a
+    connection and a pipelined statement list."""
+    backends = {search_backend(spaces, params.model) for params in batch}
+    if len(backends) > 1:
+        raise BadRequest("all queries in a batch must use the same model")
+    return backends.pop()
+
+
+def _parse_categories(body: Mapping[str, Any]) -> list[str]:
+    raw = body.get("categories") or []
+    if not isinstance(raw, list) or not all(
+        isinstance(c, str) and c.strip() for c in raw
+    ):
+        raise BadRequest("categories must be a list of arXiv categories")
+    if len(raw) > MAX_CATEGORIES:
+        raise BadRequest(f"at most {MAX_CATEGORIES} categories")
+    return sorted({arxiv_category(c.strip()) for c in raw})
+
+
+def _parse_search_options(
+    body: Mapping[str, Any],
+) -> tuple[int, int, int, list[str], list[str]]:
+    """``(time_window_days, limit, ef_search, sources, categories)``, common
+    to every search body.
+
+    Categories only narrow arXiv papers, so they need the arxiv source:
+    with no sources picked they select arXiv alone.
+    """
+    time_window_days = body.get("time_window_days")
+    try:
+        # Default to "all time" — anything older than the oldest paper in the
+        # corpus (POPL 1973). The frontend's slider exposes a finer scale; this
+        # default only kicks in for API clients that omit the field.
+        time_window_days_int = (
+            int(time_window_days) if time_window_days is not None else 36500
+        )
+    except (TypeError, ValueError):
+        raise BadRequest("time_window_days must be an integer") from None
+
+    limit = body.get("limit")
+    try:
+        limit_int = int(limit) if limit is not None else 10
+        limit_int = max(1, min(100, limit_int))
+    except (TypeError, ValueError):
+        raise BadRequest("limit must be an integer between 1 and 100") from None
+
+    categories = _parse_categories(body)
+    sources_flags: dict[str, bool] = body.get("sources") or {}
+    selected = [src for src in KNOWN_SOURCES if sources_flags.get(src, False)]
+    # If the caller didn't pick any sources, treat that as "I want everything"
+    # rather than "I want zero rows back".
+    if not selected:
+        selected = ["arxiv"] if categories else KNOWN_SOURCES
+    elif categories and "arxiv" not in selected:
+        raise BadRequest("categories filter arXiv papers; select the arxiv source")
+
+    ef_search = body.get("ef_search")
+    try:
+        # Unset: the tuned value for this filter's selectivity (see
+        # hnsw_tuning.py), or 50 without a tuning file.
+        ef_search_int = (
+            int(ef_search)
+            if ef_search is not None
+            else tuned_ef_search("search", 50, selected, time_window_days_int)
+        )
+        ef_search_int = max(10, min(500, ef_search_int))
+    except (TypeError, ValueError):
+        raise BadRequest("ef_search must be an integer between 10 and 500") from None
+    return time_window_days_int, limit_int, ef_search_int, selected, categories
+
+
+# Upper bound on searches per POST /api/search:batch. Every one of them is
+# an HNSW scan on the same connection, so this caps a request's DB time;
+# it also matches EmbeddingBatcher's default max_batch, so a whole batch's
+# texts fit in one provider call.
+MAX_BATCH_QUERIES = 32
+
+
+def parse_search_batch(body: Mapping[str, Any]) -> list[SearchParams]:
+    """``{"queries": [<search body>, ...]}`` -> one SearchParams per query.
+
+    Each entry takes exactly what ``POST /api/search`` does, cursor
+    included, so a batch can mix first pages with follow-up pages.
+    """
+    queries = body.get("queries")
+    if not isinstance(queries, list) or not queries:
+        raise BadRequest("queries must be a non-empty list")
+    if len(queries) > MAX_BATCH_QUERIES:
+        raise BadRequest(f"at most {MAX_BATCH_QUERIES} queries per batch")
+
+    parsed: list[SearchParams] = []
+    for i, query in enumerate(queries):
+        if not isinstance(query, Mapping):
+            raise BadRequest(f"queries[{i}] must be an object")
+        try:
+            parsed.append(parse_search(query))
+        except BadRequest as e:
+            raise BadRequest(f"queries[{i}]: {e.message}") from None
+    return parsed
+
+
+# Vectors a composite search may combine; each one costs an index pass.
+MAX_COMPOSITE_VECTORS = 8
+
+
+@dataclass(frozen=True)
+class CompositeParams:
+    """A ``POST /api/search:composite`` body: weighted texts and/or seed
+    papers, combined by ``mode`` (see PaperDatabase.COMPOSITE_MODES)."""
+
+    texts: list[tuple[str, float]]
+    paper_ids: list[tuple[str, float]]
+    mode: str
+    time_window_days: int
+    limit: int
+    ef_search: int
+    sources: list[str]
+    model: str | None = None
+    categories: list[str] = field(default_factory=list)
+
+    @property
+    def weights(self) -> list[float]:
+        """Texts' weights, then seeds', matching the vector order."""
+        return [w for _, w in self.texts] + [w for _, w in self.paper_ids]
+
+
+def _weighted_items(
+    body: Mapping[str, Any], field: str, key: str
+) -> list[tuple[str, float]]:
+    """``body[field]`` as ``(value, weight)``; entries are either bare
+    strings (weight 1) or ``{key: ..., "weight": ...}`` objects."""
+    raw = body.get(field) or []
+    if not isinstance(raw, list):
+        raise BadRequest(f"{field} must be a list")
+    items: list[tuple[str, float]] = []
+    for i, entry in enumerate(raw):
+        if isinstance(entry, str):
+            value, weight = entry, 1.0
+        elif isinstance(entry, Mapping):
+            value, weight = entry.get(key), entry.get("weight", 1.0)
+        else:
+            raise BadRequest(f"{field}[{i}] must be a string or an object")
+        if not isinstance(value, str) or not value.strip():
+            raise BadRequest(f"{field}[{i}].{key} must be a non-empty string")
+        try:
+            weight = float(weight)
+        except (TypeError, ValueError):
+            raise BadRequest(f"{field}[{i}].weight must be a number") from None
+        if not weight > 0:
+            raise BadRequest(f"{field}[{i}].weight must be positive")
+        items.append((value.strip(), weight))
+    return items
+
+
+def parse_composite_search(body: Mapping[str, Any]) -> CompositeParams:
+    texts = _weighted_items(body, "texts", "text")
+    paper_ids = _weighted_items(body, "papers", "paper_id")
+    if not texts and not paper_ids:
+        raise BadRequest("texts or papers is required")
+    if len(texts) + len(paper_ids) > MAX_COMPOSITE_VECTORS:
+        raise BadRequest(f"at most {MAX_COMPOSITE_VECTORS} texts and papers")
+
+    mode = body.get("mode", "min")
+    if mode not in COMPOSITE_MODES:
+        raise BadRequest(f"mode must be one of {', '.join(COMPOSITE_MODES)}")
+
+    time_window_days, limit, ef_search, sources, categories = _parse_search_options(
+        body
+    )
+    return CompositeParams(
+        texts=texts,
+        paper_ids=paper_ids,
+        mode=mode,
+        time_window_days=time_window_days,
+        limit=limit,
+        ef_search=ef_search,
+        sources=sources,
+        model=_parse_model(body),
+        categories=categories,
+    )
+
+
+def composite_vectors(
+    params: CompositeParams, text_vectors: list[Any], seeds: Mapping[str, Any]
+) -> list[Any]:
+    """The query vectors in ``params.weights`` order; ``seeds`` are the
+    seed papers' stored embeddings (``get_embeddings``)."""
+    missing = [pid for pid, _ in params.paper_ids if pid not in seeds]
+    if missing:
+        raise BadRequest(f"papers without an embedding: {', '.join(missing)}")
+    return [*text_vectors, *(seeds[pid] for pid, _ in params.paper_ids)]
+
+
+@metrics.timed("serialize.composite")
+def composite_results(rows: list[tuple[Any, ...]]) -> list[dict[str, Any]]:
+    """Serialize ``get_composite_papers`` rows with their combined similarity."""
+    results = []
+    for row in rows:
+        paper, distance = PaperResult.from_row(row)
+        results.append(serialize_paper(paper, 1 - float(distance)))
+    return results
+
+
+def _params_from_cursor(token: Any) -> SearchParams:
+    """Resume a search from a ``next_cursor``; every other field is ignored."""
+    if not isinstance(token, str):
+        raise BadRequest("cursor must be a string")
+    try:
+        cursor = decode_cursor(token)
+    except InvalidCursor as e:
+        raise BadRequest(str(e)) from None
+    # Later pages stay in the space the first one came from: another model
+    # would put the keyset distances on another scale.
+    if cursor.model not in (embedding_model_name(), configured_shadow_model_name()):
+        raise BadRequest("cursor is invalid or expired")
+    return SearchParams(
+        text=cursor.text,
+        time_window_days=cursor.time_window_days,
+        limit=cursor.limit,
+        ef_search=cursor.ef_search,
+        sources=cursor.sources,
+        after=(cursor.after_distance, cursor.after_id),
+        model=cursor.model,
+        categories=cursor.categories,
+    )
+
+
+def next_search_cursor(params: SearchParams, rows: list[tuple[Any, ...]]) -> str | None:
+    """Token for the page after ``rows``, or None when this page is the last.
+
+    ``rows`` are raw ``get_newest_papers`` rows: paper_id first, distance
+    last. ``params.model`` is the space they came from (None: the primary).
+    """
+    if len(rows) < params.limit:
+        return None
+    return encode_cursor(
+        SearchCursor(
+            text=params.text,
+            model=params.model or embedding_model_name(),
+            sources=params.sources,
+            time_window_days=params.time_window_days,
+            limit=params.limit,
+            ef_search=params.ef_search,
+            after_distance=float(rows[-1][-1]),
+            after_id=rows[-1][0],
+            categories=params.categories,
+        )
+    )
+
+
+@metrics.timed("serialize.search")
+def search_page(params: SearchParams, rows: list[tuple[Any, ...]]) -> dict[str, Any]:
+    """Response body for one search: its results and the next page's cursor."""
+    return {
+        "results": [serialize_paper(PaperResult.from_row(row)[0]) for row in rows],
+        "next_cursor": next_search_cursor(params, rows),
+    }
+
+
+def parse_neighbors_args(args: Mapping[str, str]) -> tuple[int, bool]:
+    """``(k, mutual)`` for ``/api/papers/<id>/neighbors``."""
+    k_raw = args.get("k", "20")
+    try:
+        k = int(k_raw)
+    except (TypeError, ValueError):
+        raise BadRequest("k must be an integer") from None
+    if k < 1 or k > 50:
+        raise BadRequest("k must be between 1 and 50")
+
+    mutual_raw = args.get("mutual", "false").strip().lower()
+    if mutual_raw not in {"true", "false", "1", "0", "yes", "no"}:
+        raise BadRequest("mutual must be a boolean")
+    return k, mutual_raw in {"true", "1", "yes"}
+
+
+# Longest /api/suggest input considered; autocomplete input past this is
+# a paste, and trigram matching cost grows with its length.
+MAX_SUGGEST_CHARS = 200
+
+
+def parse_suggest_args(args: Mapping[str, str]) -> tuple[str, int]:
+    """``(q, limit)`` for ``/api/suggest``; an empty ``q`` is allowed (no
+    suggestions) since autocomplete fires on every keystroke."""
+    q = args.get("q", "").strip()[:MAX_SUGGEST_CHARS]
+    try:
+        limit = int(args.get("limit", "8"))
+    except (TypeError, ValueError):
+        raise BadRequest("limit must be an integer") from None
+    if limit < 1 or limit > 20:
+        raise BadRequest("limit must be between 1 and 20")
+    return q, limit
+
+
+def serialize_suggestion(row: tuple[Any, ...]) -> dict[str, Any]:
+    """One ``PaperDatabase.suggest`` row for JSON responses."""
+    paper_id, title, authors, source, update_date, match, _distance = row
+    return {
+        "paper_id": paper_id,
+        "title": title,
+        "authors": (authors or [])[:3],
+        "source": source,
+        "year": update_date.year if update_date is not None else None,
+        "match": match,
+    }
+
+
+def serialize_paper(
+    paper: PaperResult, similarity: float | None = None
+) -> dict[str, Any]:
+    """Serialize a paper result row for JSON responses."""
+    out: dict[str, Any] = {
+        "paper_id": paper.paper_id,
+        "title": paper.title,
+        "abstract": paper.abstract,
+        "source": paper.source,
+        "link": paper.link,
+        "authors": paper.authors,
+        "institutions": paper.institutions,
+        "paper_date": paper.paper_date.isoformat()
+        if hasattr(paper.paper_date, "isoformat")
+        else str(paper.paper_date),
+    }
+    if similarity is not None:
+        out["similarity"] = similarity
+    return out
+
+
+def job_accepted(job: Job, created: bool) -> tuple[dict[str, Any], dict[str, str]]:
+    """202 body and headers for a queued (or already active) job."""
+    url = f"/api/jobs/{job.id}"
+    return {"job": job.to_dict(), "created": created, "url": url}, {"Location": url}
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Linear-interpolation percentile on an already-sorted list.
+
+    ``pct`` is in [0, 100]. Mirrors numpy's default ("linear") method so
+    results match what a casual reader would expect, without pulling numpy
+    into the request path.
+    """
+    n = len(sorted_values)
+    assert n > 0, "cannot compute percentile of empty list"
+    if n == 1:
+        return float(sorted_values[0])
+    rank = (pct / 100.0) * (n - 1)
+    lo = int(rank)
+    hi = min(lo + 1, n - 1)
+    frac = rank - lo
+    return float(sorted_values[lo] * (1 - frac) + sorted_values[hi] * frac)
+
+
+def similarity_percentiles(sims: list[float]) -> dict[str, float]:
+    """Reduce sampled pairwise similarities to the percentile dict served by
+    ``/api/embeddings/similarity_distribution``. Sorts ``sims`` in place.
+    """
+    if not sims:
+        return {
+            "p50": 0.0,
+            "p90": 0.0,
+            "p95": 0.0,
+            "p99": 0.0,
+            "p99_5": 0.0,
+            "p99_9": 0.0,
+        }
+    sims.sort()
+    return {
+        "p50": percentile(sims, 50),
+        "p90": percentile(sims, 90),
+        "p95": percentile(sims, 95),
+        "p99": percentile(sims, 99),
+        "p99_5": percentile(sims, 99.5),
+        "p99_9": percentile(sims, 99.9),
+    }
+
+
+def next_conference_dates(
+    latest: dict[str, date],
+) -> dict[str, dict[str, Any]]:
+    """Project the next conference date for each source.
+
+    Keeps adding one year to the last known date until the projected date
+    is in the future (or today).  Returns a dict keyed by source name with
+    ``date`` (ISO string) and ``passed`` (bool).
+    """
+    today = date.today()
+    result: dict[str, dict[str, Any]] = {}
+    for source, last_date in latest.items():
+        next_date = last_date.replace(year=last_date.year + 1)
+        while next_date < today:
+            next_date = next_date.replace(year=next_date.year + 1)
+        result[source] = {
+            "date": next_date.isoformat(),
+            "passed": False,
+        }
+    return result
+
+
+Viewport = tuple[float, float, float, float]
+
+
+@dataclass(frozen=True)
+class AtlasParams:
+    projection: str
+    fmt: str
+    limit: int
+    viewport: Viewport | None
+
+
+def parse_atlas_args(args: Mapping[str, str]) -> AtlasParams:
+    projection = args.get("projection", "").strip()
+    if not projection:
+        raise BadRequest("projection is required")
+
+    fmt = args.get("format", "json").strip().lower()
+    if fmt not in ("json", "ndjson"):
+        raise BadRequest("format must be 'json' or 'ndjson'")
+
+    limit_raw = args.get("limit", "1000000")
+    try:
+        limit = int(limit_raw)
+    except (TypeError, ValueError):
+        raise BadRequest("limit must be an integer") from None
+    if limit < 1 or limit > 1_000_000:
+        raise BadRequest("limit must be between 1 and 1_000_000")
+
+    viewport_raw = args.get("viewport")
+    viewport: Viewport | None = None
+    if viewport_raw:
+        parts = viewport_raw.split(",")
+        if len(parts) != 4:
+            raise BadRequest("viewport must be xmin,ymin,xmax,ymax")
+        try:
+            xmin, ymin, xmax, ymax = (float(p) for p in parts)
+        except ValueError:
+            raise BadRequest("viewport values must be floats") from None
+        viewport = (xmin, ymin, xmax, ymax)
+
+    return AtlasParams(projection=projection, fmt=fmt, limit=limit, viewport=viewport)
+
+
+# /api/atlas queries. The JSON path orders by paper_id so a future
+# cursor-style pagination layer has a deterministic ordering to slice on;
+# the streaming variants drop ORDER BY because sorting forces PG to buffer
+# the entire result before emitting the first row.
+ATLAS_POINTS_SQL = """
+    SELECT pp.paper_id, p.title, p.source, pp.x, pp.y
+    FROM paper_projection_2d AS pp
+    JOIN paper AS p ON p.paper_id = pp.paper_id
+    WHERE pp.projection = %s
+    ORDER BY pp.paper_id
+    LIMIT %s
+"""
+ATLAS_POINTS_VIEWPORT_SQL = """
+    SELECT pp.paper_id, p.title, p.source, pp.x, pp.y
+    FROM paper_projection_2d AS pp
+    JOIN paper AS p ON p.paper_id = pp.paper_id
+    WHERE pp.projection = %s
+      AND pp.x BETWEEN %s AND %s
+      AND pp.y BETWEEN %s AND %s
+    ORDER BY pp.paper_id
+    LIMIT %s
+"""
+ATLAS_STREAM_SQL = """
+    SELECT pp.paper_id, p.title, p.source, pp.x, pp.y
+    FROM paper_projection_2d AS pp
+    JOIN paper AS p ON p.paper_id = pp.paper_id
+    WHERE pp.projection = %s
+    LIMIT %s
+"""
+ATLAS_STREAM_VIEWPORT_SQL = """
+    SELECT pp.paper_id, p.title, p.source, pp.x, pp.y
+    FROM paper_projection_2d AS pp
+    JOIN paper AS p ON p.paper_id = pp.paper_id
+    WHERE pp.projection = %s
+      AND pp.x BETWEEN %s AND %s
+      AND pp.y BETWEEN %s AND %s
+    LIMIT %s
+"""
+ATLAS_BBOX_SQL = """
+    SELECT COUNT(*), MIN(x), MAX(x), MIN(y), MAX(y)
+    FROM paper_projection_2d
+    WHERE projection = %s
+"""
+ATLAS_BBOX_VIEWPORT_SQL = """
+    SELECT COUNT(*), MIN(x), MAX(x), MIN(y), MAX(y)
+    FROM paper_projection_2d
+    WHERE projection = %s
+      AND x BETWEEN %s AND %s
+      AND y BETWEEN %s AND %s
+"""
+
+
+def atlas_query(params: AtlasParams, stream: bool = False) -> tuple[str, list[Any]]:
+    """The points query for ``params`` and its bind parameters."""
+    if params.viewport is None:
+        query = ATLAS_STREAM_SQL if stream else ATLAS_POINTS_SQL
+        return query, [params.projection, params.limit]
+    xmin, ymin, xmax, ymax = params.viewport
+    query = ATLAS_STREAM_VIEWPORT_SQL if stream else ATLAS_POINTS_VIEWPORT_SQL
+    return query, [params.projection, xmin, xmax, ymin, ymax, params.limit]
+
+
+def atlas_bbox_query(params: AtlasParams) -> tuple[str, list[Any]]:
+    """The NDJSON header aggregate for ``params`` and its bind parameters."""
+    if params.viewport is None:
+        return ATLAS_BBOX_SQL, [params.projection]
+    xmin, ymin, xmax, ymax = params.viewport
+    return ATLAS_BBOX_VIEWPORT_SQL, [params.projection, xmin, xmax, ymin, ymax]
+
+
+def atlas_header(projection: str, agg: tuple[Any, ...] | None) -> dict[str, Any]:
+    """NDJSON header line from an ``ATLAS_BBOX*`` row."""
+    total = int(agg[0]) if agg is not None else 0
+    if agg is not None and agg[1] is not None:
+        bbox = [float(agg[1]), float(agg[3]), float(agg[2]), float(agg[4])]
+    else:
+        bbox = [0.0, 0.0, 0.0, 0.0]
+    return {"projection": projection, "total": total, "bbox": bbox}
+
+
+def atlas_point(row: tuple[Any, ...]) -> dict[str, Any]:
+    pid, title, source, x, y = row
+    return {
+        "paper_id": pid,
+        "title": title,
+        "source": source,
+        "x": float(x),
+        "y": float(y),
+    }
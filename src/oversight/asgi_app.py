@@ -0,0 +1,520 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import json
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import Any
+
+import psycopg
+from dotenv import load_dotenv
+from pgvector.psycopg import register_vector_async
+from psycopg_pool import AsyncConnectionPool
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.http import parse_accept_header, parse_etags, quote_etag
+
+from . import atlas_snapshot, jobs, metrics, slow_queries
+from .api_common import (
+    AtlasParams,
+    BadRequest,
+    atlas_bbox_query,
+    atlas_header,
+    atlas_point,
+    atlas_query,
+    batch_backend,
+    composite_results,
+    composite_vectors,
+    job_accepted,
+    next_conference_dates,
+    parse_atlas_args,
+    parse_composite_search,
+    parse_neighbors_args,
+    parse_search,
+    parse_search_batch,
+    parse_suggest_args,
+    search_backend,
+    search_body_from_args,
+    search_page,
+    serialize_paper,
+    serialize_suggestion,
+    similarity_percentiles,
+)
+from .AsyncPaperDatabase import AsyncPaperDatabase
+from .embedding_backends import EmbeddingBackend
+from .embedding_snapshot import EmbeddingSnapshot
+from .embedding_spaces import SearchSpaces
+from .EmbeddingBatcher import EmbeddingBatcher
+from .EmbeddingModel import EmbeddingModel
+from .hnsw_tuning import tuned_ef_search
+from .Paper import PaperResult
+from .PaperDatabase import KnnSearch
+from .PaperRepository import PaperRepository
+from .utils import get_logger
+
+# ASGI serving mode: the same /api routes as flask_app, served by uvicorn
+# (`oversight serve --asgi`). Where the WSGI app pins one OS thread per
+# in-flight request — most of a search is spent waiting on the Gemini
+# embedding call and then on Postgres — here both waits are awaited on one
+# event loop: queries go through an AsyncConnectionPool and the query
+# embedding through an EmbeddingBatcher bound to the loop, whose batches
+# await the provider's async client. Blocking work that has no
+# async path (inventory, queueing jobs, snapshot sampling) runs in
+# Starlette's threadpool so it never stalls the loop.
+
+load_dotenv()
+logger = get_logger()
+
+# Rows per fetchmany() on the NDJSON server-side cursor; each batch is
+# sent as one chunk rather than one ASGI message per point.
+NDJSON_BATCH_ROWS = 5000
+_similarity_distribution_sample_size = 10_000
+
+
+async def _configure_connection(con: psycopg.AsyncConnection[Any]) -> None:
+    await register_vector_async(con)
+    await slow_queries.instrument_async(con)
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette) -> AsyncIterator[None]:
+    database_url = os.getenv("DATABASE_URL")
+    assert database_url is not None, "Database URL is not set"
+    pool = AsyncConnectionPool(
+        database_url,
+        min_size=int(os.getenv("OVERSIGHT_ASGI_POOL_MIN", "2")),
+        max_size=int(os.getenv("OVERSIGHT_ASGI_POOL_MAX", "10")),
+        kwargs={"autocommit": True},
+        configure=_configure_connection,
+        open=False,
+    )
+    await pool.open()
+    app.state.pool = pool
+    app.state.database_url = database_url
+    app.state.spaces = SearchSpaces(database_url)
+    # One per model, built on first search so the server still starts (and
+    # serves the atlas/neighbors routes) without GOOGLE_API_KEY.
+    app.state.embedders = {}
+    app.state.similarity_lock = asyncio.Lock()
+    app.state.similarity_cache = None
+    try:
+        yield
+    finally:
+        await pool.close()
+        for embedder in app.state.embedders.values():
+            await run_in_threadpool(embedder.close)
+
+
+def _embedder(app: Starlette, backend: EmbeddingBackend) -> EmbeddingBatcher:
+    embedder = app.state.embedders.get(backend.name)
+    if embedder is None:
+        # Bound to the app's loop: batches are awaited on it natively
+        embedder = EmbeddingBatcher.from_env(
+            EmbeddingModel(backend.name), loop=asyncio.get_running_loop()
+        )
+        app.state.embedders[backend.name] = embedder
+        prefix = "oversight_embed"
+        if backend != app.state.spaces.primary:
+            prefix += "_shadow"
+        metrics.REGISTRY.export_counters(prefix, embedder.stats)
+    return embedder
+
+
+async def _search_spaces(app: Starlette) -> SearchSpaces:
+    """The app's SearchSpaces, after the shadow coverage check if due."""
+    spaces: SearchSpaces = app.state.spaces
+    if spaces.check_due():
+        await run_in_threadpool(spaces.check)
+    return spaces
+
+
+async def health(request: Request) -> JSONResponse:
+    return JSONResponse({"status": "ok"})
+
+
+async def prometheus_metrics(request: Request) -> Response:
+    """See flask_app.prometheus_metrics."""
+    if not metrics.ENABLED:
+        return JSONResponse(
+            {"error": "metrics are disabled; set OVERSIGHT_METRICS=1"}, status_code=404
+        )
+    return Response(
+        metrics.REGISTRY.render(), headers={"Content-Type": metrics.CONTENT_TYPE}
+    )
+
+
+async def search(request: Request) -> JSONResponse:
+    body: dict[str, Any] = {}
+    if request.method == "POST":
+        try:
+            body = await request.json() or {}
+        except ValueError:
+            body = {}
+    # Support query params for GET as well
+    if request.method == "GET" and not body:
+        body = search_body_from_args(request.query_params)
+    params = parse_search(body)
+    backend = search_backend(await _search_spaces(request.app), params.model)
+    params = dataclasses.replace(params, model=backend.name)
+
+    embedding = await _embedder(request.app, backend).aembed_query(params.text)
+    async with request.app.state.pool.connection() as con:
+        rows = await AsyncPaperDatabase(con, backend).get_newest_papers(
+            embedding,
+            timedelta(days=params.time_window_days),
+            [PaperRepository.build_filter_sql(params.sources, params.categories)],
+            limit=params.limit,
+            ef_search=params.ef_search,
+            after=params.after,
+        )
+
+    return JSONResponse(search_page(params, rows))
+
+
+async def search_batch(request: Request) -> JSONResponse:
+    """See flask_app.search_batch."""
+    try:
+        body = await request.json() or {}
+    except ValueError:
+        body = {}
+    batch = parse_search_batch(body)
+    backend = batch_backend(await _search_spaces(request.app), batch)
+    batch = [dataclasses.replace(params, model=backend.name) for params in batch]
+
+    embedder = _embedder(request.app, backend)
+    embeddings = await asyncio.gather(
+        *(embedder.aembed_query(params.text) for params in batch)
+    )
+    async with request.app.state.pool.connection() as con:
+        rows_per_query = await AsyncPaperDatabase(con, backend).get_newest_papers_many(
+            [
+                KnnSearch(
+                    embedding,
+                    timedelta(days=params.time_window_days),
+                    [
+                        PaperRepository.build_filter_sql(
+                            params.sources, params.categories
+                        )
+                    ],
+                    limit=params.limit,
+                    ef_search=params.ef_search,
+                    after=params.after,
+                )
+                for params, embedding in zip(batch, embeddings)
+            ]
+        )
+
+    return JSONResponse(
+        {
+            "searches": [
+                search_page(params, rows) for params, rows in zip(batch, rows_per_query)
+            ]
+        }
+    )
+
+
+async def search_composite(request: Request) -> JSONResponse:
+    """See flask_app.search_composite."""
+    try:
+        body = await request.json() or {}
+    except ValueError:
+        body = {}
+    params = parse_composite_search(body)
+    backend = search_backend(await _search_spaces(request.app), params.model)
+
+    embedder = _embedder(request.app, backend)
+    text_vectors = await asyncio.gather(
+        *(embedder.aembed_query(text) for text, _ in params.texts)
+    )
+    seed_ids = [pid for pid, _ in params.paper_ids]
+    async with request.app.state.pool.connection() as con:
+        db = AsyncPaperDatabase(con, backend)
+        vectors = composite_vectors(
+            params, list(text_vectors), await db.get_embeddings(seed_ids)
+        )
+        rows = await db.get_composite_papers(
+            vectors,
+            params.weights,
+            params.mode,
+            timedelta(days=params.time_window_days),
+            [PaperRepository.build_filter_sql(params.sources, params.categories)],
+            limit=params.limit,
+            ef_search=params.ef_search,
+            exclude=seed_ids,
+        )
+
+    return JSONResponse({"results": composite_results(rows)})
+
+
+async def suggest(request: Request) -> JSONResponse:
+    """See flask_app.suggest."""
+    q, limit = parse_suggest_args(request.query_params)
+    rows: list[tuple[Any, ...]] = []
+    if q:
+        async with request.app.state.pool.connection() as con:
+            rows = await AsyncPaperDatabase(con).suggest(q, limit)
+    return JSONResponse({"suggestions": [serialize_suggestion(row) for row in rows]})
+
+
+async def paper_neighbors(request: Request) -> JSONResponse:
+    """See flask_app.paper_neighbors."""
+    paper_id: str = request.path_params["paper_id"]
+    k, mutual = parse_neighbors_args(request.query_params)
+
+    async with request.app.state.pool.connection() as con:
+        db = AsyncPaperDatabase(con)
+        neighbor_pairs = await db.find_neighbors(
+            paper_id, k=k, mutual=mutual, ef_search=tuned_ef_search("neighbors", 80)
+        )
+        rows = await db.get_papers_by_ids(
+            [paper_id] + [pid for pid, _ in neighbor_pairs]
+        )
+
+    by_id = {row[0]: row for row in rows}
+    if paper_id not in by_id:
+        return JSONResponse({"error": f"paper {paper_id!r} not found"}, status_code=404)
+
+    seed_paper, _ = PaperResult.from_row(by_id[paper_id])
+    neighbors_out = [
+        serialize_paper(PaperResult.from_row(by_id[pid])[0], similarity=sim)
+        for pid, sim in neighbor_pairs
+        if pid in by_id  # very rare: paper deleted between the two queries
+    ]
+    return JSONResponse(
+        {"seed": serialize_paper(seed_paper), "neighbors": neighbors_out}
+    )
+
+
+async def paper_detail(request: Request) -> JSONResponse:
+    """See flask_app.paper_detail."""
+    paper_id: str = request.path_params["paper_id"]
+    async with request.app.state.pool.connection() as con:
+        rows = await AsyncPaperDatabase(con).get_papers_by_ids([paper_id])
+
+    if not rows:
+        return JSONResponse({"error": f"paper {paper_id!r} not found"}, status_code=404)
+
+    paper, _ = PaperResult.from_row(rows[0])
+    return JSONResponse(serialize_paper(paper))
+
+
+async def atlas(request: Request) -> Response:
+    """See flask_app.atlas for the parameters and response shapes."""
+    params = parse_atlas_args(request.query_params)
+
+    if params.viewport is None:
+        snapshot = atlas_snapshot.load_current_snapshot(params.projection)
+        if snapshot is not None and params.limit >= snapshot.count:
+            return _atlas_snapshot_response(request, snapshot, params.fmt)
+
+    if params.fmt == "ndjson":
+        return StreamingResponse(
+            _atlas_ndjson(request.app.state.database_url, params),
+            media_type="application/x-ndjson",
+        )
+
+    query, query_params = atlas_query(params)
+    async with request.app.state.pool.connection() as con:
+        with metrics.span("db.atlas"):
+            cur = await con.execute(query, query_params)
+            rows = await cur.fetchall()
+    metrics.count_rows("db.atlas", len(rows))
+
+    with metrics.span("serialize.atlas"):
+        points = [atlas_point(row) for row in rows]
+    return JSONResponse(
+        {"projection": params.projection, "count": len(points), "points": points}
+    )
+
+
+def _atlas_snapshot_response(
+    request: Request, snapshot: atlas_snapshot.AtlasSnapshot, fmt: str
+) -> Response:
+    """Send a precompressed snapshot file, or 304 if the client's copy is current."""
+    encoding = atlas_snapshot.pick_encoding(
+        parse_accept_header(request.headers.get("accept-encoding"))
+    )
+    etag = snapshot.etag(encoding)
+    headers = {
+        "ETag": quote_etag(etag),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if parse_etags(request.headers.get("if-none-match")).contains(etag):
+        return Response(status_code=304, headers=headers)
+
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return FileResponse(
+        snapshot.path_for(fmt, encoding),
+        media_type="application/x-ndjson" if fmt == "ndjson" else "application/json",
+        headers=headers,
+    )
+
+
+async def _atlas_ndjson(database_url: str, params: AtlasParams) -> AsyncIterator[bytes]:
+    """Stream atlas points as NDJSON.
+
+    Like the Flask version this opens its own connection rather than
+    borrowing from the pool: the named cursor pins the connection for the
+    whole response, and a handful of slow clients would otherwise drain
+    the pool for every other route.
+    """
+    async with await psycopg.AsyncConnection.connect(database_url) as con:
+        async with con.cursor() as cur:
+            await cur.execute(*atlas_bbox_query(params))
+            agg = await cur.fetchone()
+        yield (json.dumps(atlas_header(params.projection, agg)) + "\n").encode("utf-8")
+
+        async with con.cursor(name="atlas_stream") as cur:
+            await cur.execute(*atlas_query(params, stream=True))
+            while rows := await cur.fetchmany(NDJSON_BATCH_ROWS):
+                yield "".join(
+                    json.dumps(atlas_point(row)) + "\n" for row in rows
+                ).encode("utf-8")
+
+
+async def _compute_similarity_distribution(
+    app: Starlette, sample_size: int
+) -> dict[str, float]:
+    snapshot = await run_in_threadpool(EmbeddingSnapshot.open)
+    if snapshot is not None and snapshot.rows >= 2:
+        sims = await run_in_threadpool(
+            snapshot.sample_pairwise_similarities, sample_size
+        )
+    else:
+        async with app.state.pool.connection() as con:
+            sims = await AsyncPaperDatabase(con).sample_pairwise_similarities(
+                sample_size
+            )
+    return similarity_percentiles(sims)
+
+
+async def embeddings_similarity_distribution(request: Request) -> JSONResponse:
+    """See flask_app.embeddings_similarity_distribution."""
+    refresh_raw = request.query_params.get("refresh", "0").strip().lower()
+    refresh = refresh_raw in {"1", "true", "yes"}
+
+    state = request.app.state
+    async with state.similarity_lock:
+        if refresh or state.similarity_cache is None:
+            state.similarity_cache = await _compute_similarity_distribution(
+                request.app, _similarity_distribution_sample_size
+            )
+        payload = dict(state.similarity_cache)
+    return JSONResponse(payload)
+
+
+def _inventory() -> dict[str, Any]:
+    from .PaperDatabase import PaperDatabase
+
+    with PaperDatabase() as db:
+        conferences = db.summarise_current_conferences()
+        counts = db.count_papers_by_source()
+        latest = db.latest_conference_dates()
+    return {
+        "conferences": conferences,
+        "counts": counts,
+        "next_dates": next_conference_dates(latest),
+    }
+
+
+async def inventory(request: Request) -> JSONResponse:
+    return JSONResponse(await run_in_threadpool(_inventory))
+
+
+def _enqueue_job(database_url: str, kind: str) -> tuple[jobs.Job, bool]:
+    with psycopg.connect(database_url, autocommit=True) as con:
+        return jobs.enqueue(con, kind)
+
+
+async def _job_accepted_response(request: Request, kind: str) -> JSONResponse:
+    job, created = await run_in_threadpool(
+        _enqueue_job, request.app.state.database_url, kind
+    )
+    body, headers = job_accepted(job, created)
+    return JSONResponse(body, status_code=202, headers=headers)
+
+
+async def sync(request: Request) -> JSONResponse:
+    """See flask_app.sync."""
+    return await _job_accepted_response(request, "sync")
+
+
+async def digest(request: Request) -> JSONResponse:
+    """See flask_app.digest."""
+    return await _job_accepted_response(request, "digest")
+
+
+async def job_status(request: Request) -> JSONResponse:
+    job_id: int = request.path_params["job_id"]
+    async with request.app.state.pool.connection() as con:
+        cur = await con.execute(jobs.JOB_BY_ID_SQL, [job_id])
+        row = await cur.fetchone()
+    if row is None:
+        return JSONResponse({"error": f"job {job_id} not found"}, status_code=404)
+    return JSONResponse(jobs.Job(*row).to_dict())
+
+
+async def bad_request(request: Request, exc: Exception) -> JSONResponse:
+    assert isinstance(exc, BadRequest)
+    body, status = exc.payload()
+    return JSONResponse(body, status_code=status)
+
+
+routes = [
+    Route("/api/health", health, methods=["GET"]),
+    Route("/api/metrics", prometheus_metrics, methods=["GET"]),
+    Route("/api/search", search, methods=["GET", "POST"]),
+    Route("/api/search:batch", search_batch, methods=["POST"]),
+    Route("/api/search:composite", search_composite, methods=["POST"]),
+    Route("/api/suggest", suggest, methods=["GET"]),
+    # Registered before the detail route: {paper_id:path} would otherwise
+    # swallow the /neighbors suffix.
+    Route("/api/papers/{paper_id:path}/neighbors", paper_neighbors, methods=["GET"]),
+    Route("/api/papers/{paper_id:path}", paper_detail, methods=["GET"]),
+    Route("/api/atlas", atlas, methods=["GET"]),
+    Route(
+        "/api/embeddings/similarity_distribution",
+        embeddings_similarity_distribution,
+        methods=["GET"],
+    ),
+    Route("/api/inventory", inventory, methods=["GET"]),
+    Route("/api/sync", sync, methods=["POST"]),
+    Route("/api/digest", digest, methods=["POST"]),
+    Route("/api/jobs/{job_id:int}", job_status, methods=["GET"]),
+]
+
+# Allow local Next.js dev server by default; can be customized with CORS_ORIGINS
+cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
+
+app = Starlette(
+    routes=routes,
+    lifespan=lifespan,
+    exception_handlers={BadRequest: bad_request},
+    middleware=[
+        # First, so it's the outermost layer and its latency covers CORS too.
+        *([Middleware(metrics.ASGIMetricsMiddleware)] if metrics.ENABLED else []),
+        Middleware(
+            CORSMiddleware,
+            allow_origins=cors_origins,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        ),
+    ],
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    port = int(os.getenv("FLASK_PORT", "5001"))
+    uvicorn.run(app, host="0.0.0.0", port=port)
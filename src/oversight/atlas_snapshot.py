@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import re
+import shutil
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import psycopg
+
+# Precompressed, immutable copies of the /api/atlas payload, one set per
+# projection version. Layout:
+#
+#   <OVERSIGHT_ATLAS_SNAPSHOT_DIR>/<projection>/
+#       current.json                       manifest (atomically replaced)
+#       <version>.json{,.gz,.br}           {"projection", "count", "points"}
+#       <version>.ndjson{,.gz,.br}         header line + one point per line
+#
+# A version is the projection's created_at, so rerunning
+# `oversight projections` produces a new set of files and new ETags
+# while the previous set keeps serving in-flight responses.
+DEFAULT_SNAPSHOT_DIR = "data/atlas_snapshots"
+MANIFEST_NAME = "current.json"
+FORMATS = ("json", "ndjson")
+# Content-Encoding -> file suffix, in server preference order.
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+# Snapshots are written once per projection run and served many times, so
+# pay for the slowest/smallest settings.
+BROTLI_QUALITY = 11
+GZIP_LEVEL = 9
+
+# Projection names end up in filesystem paths; anything outside this set
+# never gets a snapshot and falls back to the DB query path.
+_SAFE_PROJECTION = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+@dataclass(frozen=True)
+class AtlasSnapshot:
+    projection: str
+    version: str
+    created_at: str
+    count: int
+    bbox: list[float]
+    directory: Path
+
+    def etag(self, encoding: str | None = None) -> str:
+        """Unquoted strong ETag of the ``encoding`` variant; werkzeug adds
+        the quotes. Each encoding is a different representation (RFC 9110
+        8.8.3), so a cache revalidating its gzip copy can't be told its br
+        bytes are still current."""
+        return f"{self.projection}-{self.version}-{encoding or 'identity'}"
+
+    def path_for(self, fmt: str, encoding: str | None = None) -> Path:
+        suffix = ENCODINGS[encoding] if encoding is not None else ""
+        return self.directory / f"{self.version}.{fmt}{suffix}"
+
+
+def snapshot_root() -> Path:
+    return Path(os.getenv("OVERSIGHT_ATLAS_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR))
+
+
+def is_snapshot_name(projection: str) -> bool:
+    return bool(_SAFE_PROJECTION.match(projection)) and projection not in {".", ".."}
+
+
+def _version_from_created_at(created_at: datetime) -> str:
+    return created_at.strftime("%Y%m%dT%H%M%S%f")
+
+
+_manifest_cache_lock = threading.Lock()
+_manifest_cache: dict[Path, tuple[float, AtlasSnapshot]] = {}
+
+
+def load_current_snapshot(projection: str) -> AtlasSnapshot | None:
+    """Return the current snapshot for ``projection``, or ``None``.
+
+    The manifest is re-read only when its mtime changes, so the per-request
+    cost on the hot path is one ``stat``. A manifest pointing at files that
+    have since been removed is treated as missing.
+    """
+    if not is_snapshot_name(projection):
+        return None
+    manifest_path = snapshot_root() / projection / MANIFEST_NAME
+    try:
+        mtime = manifest_path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+    with _manifest_cache_lock:
+        cached = _manifest_cache.get(manifest_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
+    snapshot = AtlasSnapshot(
+        projection=manifest["projection"],
+        version=manifest["version"],
+        created_at=manifest["created_at"],
+        count=int(manifest["count"]),
+        bbox=[float(v) for v in manifest["bbox"]],
+        directory=manifest_path.parent,
+    )
+    if not all(snapshot.path_for(fmt).exists() for fmt in FORMATS):
+        return None
+
+    with _manifest_cache_lock:
+        _manifest_cache[manifest_path] = (mtime, snapshot)
+    return snapshot
+
+
+def _point_json(pid: str, title: str, source: str | None, x: float, y: float) -> str:
+    # Same shape (and key order) as the live /api/atlas point dicts.
+    return json.dumps(
+        {
+            "paper_id": pid,
+            "title": title,
+            "source": source,
+            "x": float(x),
+            "y": float(y),
+        }
+    )
+
+
+def _compress(path: Path) -> None:
+    import brotli
+
+    with (
+        open(path, "rb") as src,
+        gzip.open(f"{path}.gz.tmp", "wb", compresslevel=GZIP_LEVEL) as dst,
+    ):
+        shutil.copyfileobj(src, dst, length=1 << 20)
+    os.replace(f"{path}.gz.tmp", f"{path}.gz")
+
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    with open(path, "rb") as src, open(f"{path}.br.tmp", "wb") as dst:
+        while chunk := src.read(1 << 20):
+            dst.write(compressor.process(chunk))
+        dst.write(compressor.finish())
+    os.replace(f"{path}.br.tmp", f"{path}.br")
+
+
+def write_atlas_snapshot(database_url: str, projection: str) -> AtlasSnapshot | None:
+    """Materialise the full ``/api/atlas`` payload for ``projection`` to disk.
+
+    Reads the projection in a single REPEATABLE READ transaction so the
+    header aggregates (count, bbox, created_at) agree with the streamed
+    rows, writes plain / gzip / brotli variants of both the JSON and NDJSON
+    responses, then flips ``current.json`` to the new version. Older
+    versions except the one being replaced are pruned.
+
+    Returns ``None`` (and writes nothing) if the projection has no rows or
+    its name isn't filesystem-safe.
+    """
+    if not is_snapshot_name(projection):
+        print(f"[atlas-snapshot] skipping unsafe projection name {projection!r}")
+        return None
+
+    directory = snapshot_root() / projection
+    directory.mkdir(parents=True, exist_ok=True)
+
+    with psycopg.connect(database_url) as con:
+        con.isolation_level = psycopg.IsolationLevel.REPEATABLE_READ
+        with con.cursor() as cur:
+            agg = cur.execute(
+                """
+                SELECT COUNT(*), MIN(x), MAX(x), MIN(y), MAX(y), MAX(created_at)
+                FROM paper_projection_2d
+                WHERE projection = %s
+                """,
+                [projection],
+            ).fetchone()
+        if agg is None or not agg[0]:
+            print(f"[atlas-snapshot] projection {projection!r} is empty; skipping")
+            return None
+
+        count = int(agg[0])
+        bbox = [float(agg[1]), float(agg[3]), float(agg[2]), float(agg[4])]
+        created_at: datetime = agg[5]
+        version = _version_from_created_at(created_at)
+        snapshot = AtlasSnapshot(
+            projection=projection,
+            version=version,
+            created_at=created_at.isoformat(),
+            count=count,
+            bbox=bbox,
+            directory=directory,
+        )
+
+        json_tmp = Path(f"{snapshot.path_for('json')}.tmp")
+        ndjson_tmp = Path(f"{snapshot.path_for('ndjson')}.tmp")
+        with (
+            open(json_tmp, "w") as json_f,
+            open(ndjson_tmp, "w") as ndjson_f,
+            con.cursor(name="atlas_snapshot") as cur,
+        ):
+            # ORDER BY paper_id to match the live JSON path; unlike the
+            # NDJSON endpoint nobody is waiting on the first row here.
+            cur.itersize = 5000
+            cur.execute(
+                """
+                SELECT pp.paper_id, p.title, p.source, pp.x, pp.y
+                FROM paper_projection_2d AS pp
+                JOIN paper AS p ON p.paper_id = pp.paper_id
+                WHERE pp.projection = %s
+                ORDER BY pp.paper_id
+                """,
+                [projection],
+            )
+            json_f.write(
+                f'{{"projection": {json.dumps(projection)}, '
+                f'"count": {count}, "points": ['
+            )
+            ndjson_f.write(
+                json.dumps({"projection": projection, "total": count, "bbox": bbox})
+                + "\n"
+            )
+            written = 0
+            for row in cur:
+                line = _point_json(*row)
+                if written:
+                    json_f.write(", ")
+                json_f.write(line)
+                ndjson_f.write(line + "\n")
+                written += 1
+            json_f.write("]}")
+        # The JOIN can only drop rows if a paper was deleted mid-read, which
+        # REPEATABLE READ rules out; keep the header honest regardless.
+        assert written == count, f"wrote {written} points but header says {count}"
+
+    for fmt, tmp in (("json", json_tmp), ("ndjson", ndjson_tmp)):
+        final = snapshot.path_for(fmt)
+        os.replace(tmp, final)
+        _compress(final)
+
+    manifest_path = directory / MANIFEST_NAME
+    previous = load_current_snapshot(projection)
+    with open(f"{manifest_path}.tmp", "w") as f:
+        json.dump(
+            {
+                "projection": projection,
+                "version": version,
+                "created_at": snapshot.created_at,
+                "count": count,
+                "bbox": bbox,
+            },
+            f,
+        )
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    keep = {version} | ({previous.version} if previous is not None else set())
+    for path in directory.iterdir():
+        file_version = path.name.split(".", 1)[0]
+        if path.name != MANIFEST_NAME and file_version not in keep:
+            path.unlink()
+
+    print(
+        f"[atlas-snapshot] wrote projection={projection!r} version={version} "
+        f"points={count:,} to {directory}",
+        flush=True,
+    )
+    return snapshot
+
+
+def pick_encoding(accept_encodings: Any) -> str | None:
+    """Pick the best precompressed variant the client accepts.
+
+    ``accept_encodings`` is werkzeug's ``request.accept_encodings``. Index by
+    name rather than ``in`` so an explicit ``br;q=0`` counts as a refusal.
+    """
+    for encoding in ENCODINGS:
+        if accept_encodings[encoding] > 0:
+            return encoding
+    return None
@@ -0,0 +1,602 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import psycopg
+
+from .embedding_backends import EmbeddingBackend, get_backend
+
+# `oversight bench`: a reproducible latency benchmark for the API.
+#
+# 1. Seed: fills a dedicated Postgres database with a synthetic corpus of
+#    --papers papers. Sources and dates follow the real corpus's shape: an
+#    arXiv majority with recent dates, plus conference papers on their
+#    yearly conference dates. Embeddings are clustered random unit
+#    vectors, so HNSW sees neighbourhoods rather than uniform noise. Every
+#    paper gets an atlas point. Everything derives from --seed, and
+#    reseeding is skipped when the corpus on disk already matches.
+# 2. Run: starts the API (Flask or ASGI) as a subprocess against that
+#    database, with a deterministic fake/hash-<dim> query embedder in
+#    place of Gemini. Each scenario is driven at each --concurrency level
+#    for a fixed number of requests.
+# 3. Report: p50/p95/p99 latency, throughput and errors per
+#    (scenario, concurrency) as JSON (--out). With --baseline, the run is
+#    compared against a stored run and exits non-zero on regressions.
+#
+# Refuses to seed a database that holds papers it didn't create, so it
+# can't be pointed at production by accident. Needs pgvector >= 0.7
+# (halfvec), like the API itself. Uses httpx, which the langchain
+# dependencies already pull in (as does scripts/load_test_api.py).
+
+RESULTS_VERSION = 1
+PAPER_PREFIX = "bench/"
+# Stands in for Gemini: same dimension, in its own column (which the seed
+# adds and indexes).
+DEFAULT_MODEL = "fake/hash-3072"
+PROJECTION = "bench"
+# Papers per synthetic topic cluster.
+CLUSTER_SIZE = 400
+# Fixed rather than today's date so a given --seed always produces the same
+# corpus.
+CORPUS_END = date(2025, 12, 31)
+SEED_CHUNK = 2000
+
+SCENARIOS = (
+    "search",
+    "neighbors",
+    "neighbors_mutual",
+    "atlas_json",
+    "atlas_ndjson",
+    "detail",
+    "similarity_distribution",
+)
+
+# Same as scripts/load_test_api.py: the Flask app minus the debug reloader,
+# and uvicorn with one worker.
+SERVERS = {
+    "flask": "from oversight.flask_app import app; "
+    "app.run(host='127.0.0.1', port={port}, threaded=True)",
+    "asgi": "import uvicorn; "
+    "uvicorn.run('oversight.asgi_app:app', host='127.0.0.1', port={port}, "
+    "log_level='warning')",
+}
+
+# Rough share of each source in the real corpus.
+SOURCE_WEIGHTS = {
+    "arxiv": 70.0,
+    "NeurIPS": 6.0,
+    "ICML": 5.0,
+    "ICLR": 5.0,
+    "VLDB": 2.0,
+    "OSDI": 1.0,
+    "SOSP": 1.0,
+    "ASPLOS": 1.0,
+    "EuroSys": 1.0,
+    "NSDI": 1.0,
+    "MLSys": 1.0,
+    "ATC": 1.0,
+    "POPL": 1.5,
+    "PLDI": 1.5,
+    "ICFP": 1.0,
+    "OOPSLA": 1.0,
+}
+
+WORDS = (
+    "adaptive", "attention", "batching", "bounded", "cache", "causal", "compiler",
+    "concurrent", "consensus", "contrastive", "decoding", "distributed",
+    "efficient", "embedding", "fault", "federated", "gradient", "graph", "hardware",
+    "incremental", "inference", "kernel", "language", "latency", "learning",
+    "memory", "model", "network", "neural", "optimization", "parallel", "program",
+    "quantized", "query", "reasoning", "recursive", "retrieval", "robust",
+    "runtime", "scalable", "scheduling", "search", "semantic", "serverless",
+    "sparse", "speculative", "storage", "streaming", "synthesis", "transformer",
+    "type", "verification"
+)  # fmt: skip
+
+# Schema the API reads, for a fresh bench database. Production's paper and
+# embedding tables predate db/init; this mirrors them, and the bench
+# applies db/init's atlas table itself (see _ensure_schema).
+SCHEMA_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS vector",
+    """
+    CREATE TABLE IF NOT EXISTS paper (
+        uuid          uuid       DEFAULT gen_random_uuid(),
+        created_at    timestamp  DEFAULT now(),
+        paper_id      varchar    PRIMARY KEY,
+        document      jsonb,
+        update_date   date,
+        source        varchar,
+        abstract      text,
+        title         text,
+        link          text,
+        authors       text[],
+        institutions  text[]
+    )
+    """,
+    # One vector column per model, added by _ensure_schema.
+    """
+    CREATE TABLE IF NOT EXISTS embedding (
+        paper_id  varchar PRIMARY KEY REFERENCES paper (paper_id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS bench_corpus (
+        papers  integer  NOT NULL,
+        seed    integer  NOT NULL
+    )
+    """,
+    # Corpora seeded before models were pluggable were fake/hash-3072.
+    f"""
+    ALTER TABLE bench_corpus
+    ADD COLUMN IF NOT EXISTS model varchar NOT NULL DEFAULT '{DEFAULT_MODEL}'
+    """,
+]
+
+
+# --- corpus -------------------------------------------------------------------
+
+
+@dataclass
+class SyntheticPaper:
+    paper_id: str
+    title: str
+    abstract: str
+    source: str
+    link: str
+    update_date: date
+    authors: list[str]
+    institutions: list[str]
+
+
+def synthetic_papers(n: int, seed: int) -> list[SyntheticPaper]:
+    """The metadata of an ``n``-paper corpus; same ``seed``, same papers."""
+    rng = random.Random(seed)
+    sources = rng.choices(list(SOURCE_WEIGHTS), list(SOURCE_WEIGHTS.values()), k=n)
+    papers = []
+    for i, source in enumerate(sources):
+        if source == "arxiv":
+            # Mostly the last couple of years, with a long tail.
+            age_days = min(int(rng.expovariate(1 / 500)), 15 * 365)
+            update_date = CORPUS_END - timedelta(days=age_days)
+        else:
+            # One conference date per year, newer years more likely.
+            year = CORPUS_END.year - min(int(rng.expovariate(1 / 4)), 30)
+            month = 1 + sum(map(ord, source)) % 12
+            update_date = date(year, month, 15)
+        papers.append(
+            SyntheticPaper(
+                paper_id=f"{PAPER_PREFIX}{i:07d}",
+                title=" ".join(rng.choices(WORDS, k=rng.randint(4, 12))).capitalize(),
+                abstract=" ".join(rng.choices(WORDS, k=rng.randint(80, 220))),
+                source=source,
+                link=f"https://example.org/{PAPER_PREFIX}{i:07d}",
+                update_date=update_date,
+                authors=[
+                    f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}"
+                    for _ in range(rng.randint(1, 8))
+                ],
+                institutions=[
+                    f"University of {rng.choice(WORDS).title()}"
+                    for _ in range(rng.randint(0, 3))
+                ],
+            )
+        )
+    return papers
+
+
+def synthetic_embeddings(
+    n: int, seed: int, start: int, stop: int, dim: int
+) -> np.ndarray:
+    """``dim``-d unit vectors ``start:stop`` of the corpus, as float16.
+
+    Each paper is its cluster's centre plus noise, renormalised. Rows are
+    generated from per-row seeds, so any slice is reproducible on its own.
+    """
+    n_clusters = max(1, n // CLUSTER_SIZE)
+    centres = np.random.default_rng(seed).standard_normal((n_clusters, dim))
+    centres /= np.linalg.norm(centres, axis=1, keepdims=True)
+    out = np.empty((stop - start, dim), dtype=np.float32)
+    for row, i in enumerate(range(start, stop)):
+        rng = np.random.default_rng((seed, i))
+        v = centres[rng.integers(n_clusters)] + 0.03 * rng.standard_normal(dim)
+        out[row] = v / np.linalg.norm(v)
+    return out.astype(np.float16)
+
+
+def _ensure_schema(con: psycopg.Connection[Any], backend: EmbeddingBackend) -> None:
+    from .PaperDatabase import EMBEDDING_COLUMN_DDL
+    from .projections import PARTITIONED_TABLE_DDL, TABLE
+
+    for statement in SCHEMA_DDL:
+        con.execute(statement)
+    con.execute(backend.sql(EMBEDDING_COLUMN_DDL))
+    if con.execute("SELECT to_regclass(%s)", [TABLE]).fetchone()[0] is None:
+        con.execute(PARTITIONED_TABLE_DDL)
+        con.execute(f"CREATE INDEX {TABLE}_proj_xy_idx ON {TABLE} (projection, x, y)")
+
+
+def seed_corpus(
+    database_url: str,
+    n: int,
+    seed: int,
+    model: str = DEFAULT_MODEL,
+    force: bool = False,
+) -> bool:
+    """Load the ``n``-paper corpus, with vectors for ``model``'s column,
+    into ``database_url``.
+
+    Returns False (and does nothing) when that corpus is already there,
+    unless ``force``.
+    """
+    from pgvector.psycopg import HalfVector, register_vector
+
+    from .PaperDatabase import EMBEDDING_INDEX_DDL
+    from .projections import swap_projection
+
+    backend = get_backend(model)
+    with psycopg.connect(database_url, autocommit=True) as con:
+        _ensure_schema(con, backend)
+        register_vector(con)
+        foreign = con.execute(
+            "SELECT count(*) FROM paper WHERE paper_id NOT LIKE %s",
+            [PAPER_PREFIX + "%"],
+        ).fetchone()[0]
+        if foreign:
+            raise SystemExit(
+                f"Refusing to seed: the database has {foreign} papers that "
+                "`oversight bench` didn't create. Point --database-url at a "
+                "dedicated database."
+            )
+        if (
+            not force
+            and con.execute(
+                "SELECT 1 FROM bench_corpus WHERE papers = %s AND seed = %s"
+                " AND model = %s",
+                [n, seed, model],
+            ).fetchone()
+            # fake/hash-3072 corpora used to fill Gemini's column instead
+            and con.execute(
+                backend.sql(
+                    "SELECT 1 FROM embedding WHERE {vec_col} IS NOT NULL LIMIT 1"
+                )
+            ).fetchone()
+        ):
+            return False
+
+        print(f"[bench] seeding {n:,} papers (seed {seed})...", flush=True)
+        papers = synthetic_papers(n, seed)
+        with con.transaction():
+            con.execute("DELETE FROM bench_corpus")
+            con.execute(backend.sql("DROP INDEX IF EXISTS {vec_index}"))
+            con.execute("DELETE FROM paper")  # cascades to embedding / atlas
+            with con.cursor().copy(
+                """
+                COPY paper (paper_id, title, abstract, source, link,
+                            update_date, authors, institutions)
+                FROM STDIN
+                """
+            ) as copy:
+                for p in papers:
+                    copy.write_row(
+                        (p.paper_id, p.title, p.abstract, p.source, p.link,
+                         p.update_date, p.authors, p.institutions)
+                    )  # fmt: skip
+            with con.cursor().copy(
+                backend.sql("COPY embedding (paper_id, {vec_col}) FROM STDIN")
+            ) as copy:
+                for start in range(0, n, SEED_CHUNK):
+                    stop = min(start + SEED_CHUNK, n)
+                    vectors = synthetic_embeddings(n, seed, start, stop, backend.dim)
+                    for p, v in zip(papers[start:stop], vectors, strict=True):
+                        copy.write_row((p.paper_id, HalfVector(v)))
+            con.execute(
+                "INSERT INTO bench_corpus VALUES (%s, %s, %s)", [n, seed, model]
+            )
+        print("[bench] building the HNSW index...", flush=True)
+        con.execute(backend.sql(EMBEDDING_INDEX_DDL))
+        con.execute("ANALYZE paper")
+        con.execute("ANALYZE embedding")
+
+    coords = np.random.default_rng((seed, n)).uniform(-50, 50, size=(n, 2))
+    swap_projection(database_url, PROJECTION, [p.paper_id for p in papers], coords)
+    return True
+
+
+# --- load ---------------------------------------------------------------------
+
+
+def _request(
+    scenario: str, rng: random.Random, ids: list[str]
+) -> tuple[str, str, dict[str, Any] | None]:
+    if scenario == "search":
+        body: dict[str, Any] = {"text": " ".join(rng.sample(WORDS, 3)), "limit": 10}
+        if rng.random() < 0.3:
+            body["sources"] = {"arxiv": True}
+        return "POST", "/api/search", body
+    if scenario == "neighbors":
+        return "GET", f"/api/papers/{rng.choice(ids)}/neighbors?k=20", None
+    if scenario == "neighbors_mutual":
+        return "GET", f"/api/papers/{rng.choice(ids)}/neighbors?k=20&mutual=true", None
+    if scenario == "atlas_json":
+        return "GET", f"/api/atlas?projection={PROJECTION}", None
+    if scenario == "atlas_ndjson":
+        return "GET", f"/api/atlas?projection={PROJECTION}&format=ndjson", None
+    if scenario == "detail":
+        return "GET", f"/api/papers/{rng.choice(ids)}", None
+    if scenario == "similarity_distribution":
+        return "GET", "/api/embeddings/similarity_distribution", None
+    raise ValueError(f"unknown scenario {scenario!r}")
+
+
+async def _drive(
+    base_url: str,
+    scenario: str,
+    ids: list[str],
+    concurrency: int,
+    n_requests: int,
+    seed: int,
+) -> tuple[list[float], int, float]:
+    """Send ``n_requests`` over ``concurrency`` connections; returns
+    (latencies of the successful ones, error count, wall seconds)."""
+    import httpx
+
+    latencies: list[float] = []
+    errors = 0
+    remaining = n_requests
+
+    async def worker(i: int) -> None:
+        nonlocal errors, remaining
+        rng = random.Random(seed * 1_000_003 + i)
+        while remaining > 0:
+            remaining -= 1
+            method, path, body = _request(scenario, rng, ids)
+            t0 = time.perf_counter()
+            try:
+                # Read the whole body: NDJSON is only done at its last line.
+                r = await client.request(method, path, json=body)
+                ok = r.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - t0)
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=60
+    ) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        wall = time.perf_counter() - t0
+    return latencies, errors, wall
+
+
+def percentile(sorted_values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile of an already sorted list (None if empty)."""
+    if not sorted_values:
+        return None
+    idx = round(pct / 100 * (len(sorted_values) - 1))
+    return round(sorted_values[idx], 3)
+
+
+def summarize(
+    scenario: str, concurrency: int, latencies: list[float], errors: int, wall: float
+) -> dict[str, Any]:
+    ms = sorted(x * 1000 for x in latencies)
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(ms) + errors,
+        "errors": errors,
+        "p50_ms": percentile(ms, 50),
+        "p95_ms": percentile(ms, 95),
+        "p99_ms": percentile(ms, 99),
+        "throughput_rps": round(len(ms) / wall, 2) if wall > 0 else 0.0,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_healthy(base_url: str, proc: subprocess.Popen[bytes], timeout: float) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"API server exited with {proc.returncode}")
+        try:
+            if httpx.get(base_url + "/api/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("API server did not become healthy")
+
+
+@dataclass
+class BenchConfig:
+    papers: int
+    seed: int
+    server: str
+    concurrency: list[int]
+    requests: int
+    warmup: int
+    scenarios: list[str]
+    embed_latency_ms: float
+    model: str = DEFAULT_MODEL
+
+
+def run_bench(database_url: str, config: BenchConfig) -> dict[str, Any]:
+    """Start the API against ``database_url`` and drive every scenario at
+    every concurrency level; returns the results document."""
+    with psycopg.connect(database_url) as con:
+        ids = [
+            row[0]
+            for row in con.execute(
+                "SELECT paper_id FROM embedding ORDER BY paper_id"
+            ).fetchall()
+        ]
+        versions = con.execute(
+            """
+            SELECT current_setting('server_version'),
+                   (SELECT extversion FROM pg_extension WHERE extname = 'vector')
+            """
+        ).fetchone()
+    assert ids, "no embedded papers; seed the corpus first"
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory(prefix="oversight-bench-") as empty_dir:
+        env = {
+            **os.environ,
+            "DATABASE_URL": database_url,
+            "PYTHONPATH": os.pathsep.join(
+                [
+                    str(Path(__file__).resolve().parent.parent),
+                    os.getenv("PYTHONPATH", ""),
+                ]
+            ),
+            "OVERSIGHT_EMBEDDING_MODEL": config.model,
+            "OVERSIGHT_FAKE_EMBEDDING_LATENCY_MS": str(config.embed_latency_ms),
+            # No snapshots: atlas and similarity sampling go to Postgres.
+            "OVERSIGHT_ATLAS_SNAPSHOT_DIR": empty_dir,
+            "OVERSIGHT_EMBEDDING_SNAPSHOT_DIR": empty_dir,
+        }
+        proc = subprocess.Popen(
+            [sys.executable, "-c", SERVERS[config.server].format(port=port)],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        results = []
+        try:
+            _wait_healthy(base_url, proc, timeout=60)
+            for scenario in config.scenarios:
+                # First-request imports, pool fill, embedder construction.
+                asyncio.run(_drive(base_url, scenario, ids, 1, config.warmup, 0))
+                for concurrency in config.concurrency:
+                    latencies, errors, wall = asyncio.run(
+                        _drive(
+                            base_url,
+                            scenario,
+                            ids,
+                            concurrency,
+                            config.requests,
+                            config.seed,
+                        )
+                    )
+                    summary = summarize(scenario, concurrency, latencies, errors, wall)
+                    print(_format_row(summary), flush=True)
+                    results.append(summary)
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    return {
+        "version": RESULTS_VERSION,
+        "config": asdict(config),
+        "environment": {
+            "postgres": versions[0],
+            "pgvector": versions[1],
+            "python": sys.version.split()[0],
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def _format_row(r: dict[str, Any]) -> str:
+    def ms(key: str) -> str:
+        return "-" if r[key] is None else f"{r[key]:.1f}"
+
+    return (
+        f"{r['scenario']:<24} c={r['concurrency']:<4} "
+        f"p50 {ms('p50_ms'):>8}  p95 {ms('p95_ms'):>8}  p99 {ms('p99_ms'):>8} ms  "
+        f"{r['throughput_rps']:>8.1f} req/s  errors {r['errors']}"
+    )
+
+
+# --- comparison ---------------------------------------------------------------
+
+
+def compare_results(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    tolerance: float = 0.25,
+    min_delta_ms: float = 2.0,
+) -> list[str]:
+    """Regressions of ``current`` against ``baseline``, as readable lines.
+
+    A (scenario, concurrency) pair regresses when its p95 grows by more
+    than ``tolerance`` (and by at least ``min_delta_ms``, so sub-millisecond
+    jitter on fast endpoints doesn't count), when its throughput drops by
+    more than ``tolerance``, or when it starts returning errors. Pairs
+    missing from either run are skipped.
+    """
+    for key in ("papers", "seed", "server", "model"):
+        # Runs from before --model existed used the default.
+        was = baseline["config"].get(key, DEFAULT_MODEL)
+        now = current["config"].get(key, DEFAULT_MODEL)
+        if was != now:
+            raise ValueError(
+                f"baseline was run with {key}={was!r}, "
+                f"this run with {key}={now!r}; not comparable"
+            )
+    before = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        b = before.get((r["scenario"], r["concurrency"]))
+        if b is None:
+            continue
+        where = f"{r['scenario']} c={r['concurrency']}"
+        if (
+            r["p95_ms"] is not None
+            and b["p95_ms"] is not None
+            and r["p95_ms"] > b["p95_ms"] * (1 + tolerance)
+            and r["p95_ms"] - b["p95_ms"] >= min_delta_ms
+        ):
+            regressions.append(
+                f"{where}: p95 {b['p95_ms']:.1f} -> {r['p95_ms']:.1f} ms "
+                f"(+{(r['p95_ms'] / b['p95_ms'] - 1) * 100:.0f}%)"
+            )
+        if r["throughput_rps"] < b["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{where}: throughput {b['throughput_rps']:.1f} -> "
+                f"{r['throughput_rps']:.1f} req/s"
+            )
+        if r["errors"] and not b["errors"]:
+            regressions.append(f"{where}: {r['errors']} errors (baseline had none)")
+    return regressions
+
+
+def load_results(path: str) -> dict[str, Any]:
+    with open(path) as f:
+        results = json.load(f)
+    if results.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path}: unsupported bench results version")
+    return results
+
+
+def write_results(path: str, results: dict[str, Any]) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
@@ -9,13 +9,21 @@ from psycopg import sql
 
 
 def cmd_search(args: argparse.Namespace) -> None:
+    from .PaperDatabase import arxiv_category
     from .PaperRepository import PaperRepository
 
     sources = [s.strip() for s in args.sources.split(",")] if args.sources else []
+    categories = (
+        [arxiv_category(c.strip()) for c in args.categories.split(",")]
+        if args.categories
+        else []
+    )
+    if categories and not sources:
+        sources = ["arxiv"]
 
-    with PaperRepository(embedding_model_name="models/gemini-embedding-001") as repo:
+    with PaperRepository() as repo:
         filters: list[sql.Composable] = (
-            [repo.build_filter_sql(sources)] if sources else []
+            [repo.build_filter_sql(sources, categories)] if sources else []
         )
         papers = repo.get_newest_related_papers(
             args.query,
@@ -32,7 +40,6 @@ def cmd_sync(args: argparse.Namespace) -> None:
     from .ArXivRepository import ArXivRepository
 
     with ArXivRepository(
-        embedding_model_name="models/gemini-embedding-001",
         research_llm_model_name="google/gemini-2.5-flash",
     ) as repo:
         repo.sync()
@@ -43,7 +50,6 @@ def cmd_digest(args: argparse.Namespace) -> None:
     from .ResearchListener import research_listener_group
 
     with ArXivRepository(
-        embedding_model_name="models/gemini-embedding-001",
         research_llm_model_name="google/gemini-2.5-flash",
     ) as repo:
         if not args.no_sync:
@@ -52,9 +58,26 @@ def cmd_digest(args: argparse.Namespace) -> None:
 
 
 def cmd_serve(args: argparse.Namespace) -> None:
+    port = args.port or int(os.getenv("FLASK_PORT", "5001"))
+    if args.asgi:
+        # Each worker process would sign search cursors with its own random
+        # key, so next-page requests landing on another worker would fail
+        assert args.workers <= 1 or os.getenv("OVERSIGHT_CURSOR_SECRET"), (
+            "--workers > 1 needs OVERSIGHT_CURSOR_SECRET set (see search_cursor.py)"
+        )
+        import uvicorn
+
+        uvicorn.run(
+            "oversight.asgi_app:app",
+            host="0.0.0.0",
+            port=port,
+            workers=args.workers,
+            reload=args.debug,
+        )
+        return
+
     from .flask_app import app
 
-    port = args.port or int(os.getenv("FLASK_PORT", "5001"))
     app.run(host="0.0.0.0", port=port, debug=args.debug)
 
 
@@ -63,50 +86,25 @@ def cmd_consume(args: argparse.Namespace) -> None:
         _consume_dry_run(args)
         return
 
+    from .ingest import consume
     from .PaperRepository import PaperRepository
 
-    is_dir = os.path.isdir(args.path)
-
-    with PaperRepository(embedding_model_name="models/gemini-embedding-001") as repo:
-        if args.format == "scraped":
-            if is_dir:
-                repo.add_scraped_papers_from_dir(args.path)
-            else:
-                repo.add_scraped_papers(args.path)
-        else:
-            api_version = 1 if args.format == "openreview-api-v1" else 2
-            if is_dir:
-                for filename in os.listdir(args.path):
-                    repo.add_openreview_papers(
-                        os.path.join(args.path, filename), api_version
-                    )
-            else:
-                repo.add_openreview_papers(args.path, api_version)
+    database_url = os.getenv("DATABASE_URL")
+    assert database_url is not None, "DATABASE_URL is not set"
+    consume(database_url, args.path, args.format, args.jobs, args.batch_size)
 
+    with PaperRepository() as repo:
         repo.embed_missing_conference_papers()
 
 
 def _consume_dry_run(args: argparse.Namespace) -> None:
-    import json
-
-    from .Paper import Paper
-
-    if os.path.isdir(args.path):
-        paths = [os.path.join(args.path, f) for f in sorted(os.listdir(args.path))]
-    else:
-        paths = [args.path]
+    from .ingest import iter_json_array, json_files, parse_paper
 
     total = 0
-    for path in paths:
-        with open(path, "r") as f:
-            items = json.load(f)
-        print(f"\n=== {path} ({len(items)} papers) ===")
-        for item in items:
-            if args.format == "scraped":
-                paper = Paper.from_scraped_json(item)
-            else:
-                api_version = 1 if args.format == "openreview-api-v1" else 2
-                paper = Paper.from_openreview_json(item, api_version)
+    for path in json_files(args.path):
+        print(f"\n=== {path} ===")
+        for item in iter_json_array(path):
+            paper = parse_paper(item, args.format)
             title = paper.title if len(paper.title) <= 80 else paper.title[:77] + "..."
             print(
                 f"  [{paper.source}] {paper.paper_date.date()} {paper.paper_id}  "
@@ -135,9 +133,38 @@ def cmd_projections(args: argparse.Namespace) -> None:
          from raw 3072-d; the variance loss is negligible after L2
          normalize).
       4. PaCMAP → 2 dimensions with init="pca".
-      5. Upsert (paper_id, projection, x, y) into paper_projection_2d
-         under a single transaction so a crash mid-load doesn't leave
-         the projection half-overwritten.
+      5. COPY (paper_id, projection, x, y) into a staging table, index
+         it, and swap it in as the projection's partition of
+         paper_projection_2d in one short transaction, so /api/atlas
+         never sees a half-loaded projection.
+      6. Persist the fitted PCA and the 2-D layout (projections.py's
+         ProjectionModel) for later --incremental runs.
+      7. Write the precompressed /api/atlas snapshot for the new
+         projection version (see atlas_snapshot.py).
+
+    With --streaming, steps 1-3 run out of core: rows are normalised a
+    chunk at a time into a scratch file (optionally float16) and PCA is
+    fitted with IncrementalPCA over chunks, so peak RSS tracks
+    --chunk-size instead of the corpus. Every stage reports its wall time
+    and peak RSS either way.
+
+    With --from-snapshot, step 1 reads the on-disk embedding snapshot
+    written by `oversight snapshot` instead of querying Postgres.
+
+    With one or more --spec NAME[=SRC1,SRC2], several projections are
+    built from a single embedding load: steps 1-2 run once for the union
+    of their sources, then each projection's steps 3-7 run in its own
+    worker process (--jobs, default one per spec) that maps the shared
+    embedding file read-only. Workers always fit PCA out of core over
+    --chunk-size chunks of that file, as with --streaming, so running them
+    side by side doesn't multiply the corpus in memory. Each projection's
+    upsert is still its own transaction, so they flip independently.
+
+    With --incremental, steps 1-6 are replaced by placing only the
+    embedded papers missing from the projection: PCA transform with the
+    persisted model, then a kNN-weighted position from already-placed
+    neighbors. That takes seconds, so it runs daily after sync; the full
+    refit stays on the weekly cron.
 
     The previous CSV intermediate (and the plotting + nearest-neighbour
     sanity-check from the original script) are dropped — the CLI is the
@@ -145,183 +172,427 @@ def cmd_projections(args: argparse.Namespace) -> None:
     """
     import time
 
-    import numpy as np
-    import pacmap
-    import psycopg
-    from pgvector.psycopg import register_vector
-    from sklearn.decomposition import PCA
+    from .embedding_snapshot import EmbeddingSnapshot
+    from .projections import (
+        PCA_COMPONENTS,
+        ProjectionSpec,
+        build_projection,
+        build_projections,
+        place_unprojected,
+    )
 
     database_url = os.getenv("DATABASE_URL")
     assert database_url is not None, "DATABASE_URL is not set"
+    assert args.chunk_size >= PCA_COMPONENTS, (
+        f"--chunk-size must be at least {PCA_COMPONENTS} (the PCA components)"
+    )
 
-    DIM = 3072
-    ITERSIZE = 5000
-
-    # Cast halfvec -> vector so pgvector-python decodes into np.float32
-    # ndarray. The optional source filter mirrors the script's behaviour
-    # (none by default = full corpus); two literal SQL strings rather
-    # than an f-string so the query stays LiteralString-typed.
-    count_sql_all = """
-        SELECT count(*)
-        FROM paper p
-        JOIN embedding e ON e.paper_id = p.paper_id
-        WHERE e.embedding_gemini_embedding_001 IS NOT NULL
-    """
-    count_sql_sources = """
-        SELECT count(*)
-        FROM paper p
-        JOIN embedding e ON e.paper_id = p.paper_id
-        WHERE e.embedding_gemini_embedding_001 IS NOT NULL
-          AND p.source = ANY(%s)
-    """
-    stream_sql_all = """
-        SELECT p.paper_id,
-               e.embedding_gemini_embedding_001::vector AS emb
-        FROM paper p
-        JOIN embedding e ON e.paper_id = p.paper_id
-        WHERE e.embedding_gemini_embedding_001 IS NOT NULL
-    """
-    stream_sql_sources = """
-        SELECT p.paper_id,
-               e.embedding_gemini_embedding_001::vector AS emb
-        FROM paper p
-        JOIN embedding e ON e.paper_id = p.paper_id
-        WHERE e.embedding_gemini_embedding_001 IS NOT NULL
-          AND p.source = ANY(%s)
-    """
     if args.sources:
         sources = [s.strip() for s in args.sources.split(",") if s.strip()]
-        source_params: list = [sources]
     else:
-        source_params = []
+        sources = []
 
     t_total = time.time()
-    print(f"[projections] connecting to DB (projection={args.name!r})...", flush=True)
-    con = psycopg.connect(database_url)
-    register_vector(con)
-
-    with con.cursor() as cur:
-        if args.sources:
-            cur.execute(count_sql_sources, source_params)
-        else:
-            cur.execute(count_sql_all)
-        row = cur.fetchone()
-        n_rows = int(row[0]) if row is not None else 0
-    print(f"[projections] rows to fetch: {n_rows}", flush=True)
-
-    if n_rows == 0:
-        print("[projections] no embeddings; nothing to project.")
-        con.close()
-        return
-
-    # Pre-allocate float32 (N, 3072). For 524k rows this is ~6.4 GB.
-    X = np.empty((n_rows, DIM), dtype=np.float32)
-    paper_ids: list[str] = [""] * n_rows
-
-    print("[projections] streaming embeddings...", flush=True)
-    t_db = time.time()
-    with con.cursor(name="proj_stream") as cur:
-        cur.itersize = ITERSIZE
-        if args.sources:
-            cur.execute(stream_sql_sources, source_params)
-        else:
-            cur.execute(stream_sql_all)
-        i = 0
-        for pid, emb in cur:
-            paper_ids[i] = pid
-            X[i] = emb
-            i += 1
-            if i % 50000 == 0:
-                elapsed = time.time() - t_db
-                rate = i / max(elapsed, 1e-6)
-                eta = (n_rows - i) / max(rate, 1e-6)
-                print(
-                    f"  streamed {i}/{n_rows} rate={rate:.0f}/s "
-                    f"elapsed={elapsed:.1f}s eta={eta:.0f}s",
-                    flush=True,
-                )
-    db_time = time.time() - t_db
-    assert i == n_rows, f"streamed {i} but expected {n_rows}"
-    print(f"[projections] DB stream done in {db_time:.1f}s", flush=True)
-    con.close()
-
-    # L2 normalize in place to avoid a 6 GB copy at full-corpus scale.
-    print("[projections] L2-normalising in place...", flush=True)
-    norms = np.linalg.norm(X, axis=1, keepdims=True)
-    zero_mask = (norms == 0).flatten()
-    if zero_mask.any():
+    if args.spec:
+        assert not args.incremental, "--spec can't be combined with --incremental"
+        specs = [ProjectionSpec.parse(raw) for raw in args.spec]
+        snapshot = None
+        if args.from_snapshot:
+            snapshot = EmbeddingSnapshot.open()
+            assert snapshot is not None, (
+                "No embedding snapshot found; run `oversight snapshot` first"
+            )
+        results = build_projections(
+            database_url,
+            specs,
+            dtype=args.dtype,
+            chunk_size=args.chunk_size,
+            scratch_dir=args.scratch_dir,
+            snapshot=snapshot,
+            jobs=args.jobs,
+            write_snapshots=not args.no_snapshot,
+        )
+        summary = " ".join(f"{name}={n:,}" for name, n in results.items())
         print(
-            f"  WARNING: {zero_mask.sum()} zero-norm rows; setting to 1.",
+            f"[projections] done in {time.time() - t_total:.1f}s total ({summary}).",
             flush=True,
         )
-        norms[zero_mask] = 1.0
-    np.divide(X, norms, out=X)
-    del norms
-
-    # PCA → 50 then PaCMAP → 2. PaCMAP from 50-d is much faster than from
-    # raw 3072-d and PCA explains nearly all the variance after L2 norm.
-    print("[projections] PCA→50...", flush=True)
-    t_pca = time.time()
-    pca = PCA(n_components=50, random_state=42)
-    X50 = pca.fit_transform(X)
+        return
+
+    if args.incremental:
+        if sources:
+            print(
+                "[projections] --sources is ignored with --incremental; the "
+                "filter saved with the fitted model is used instead.",
+                flush=True,
+            )
+        n_rows = place_unprojected(database_url, args.name, k=args.k)
+    else:
+        snapshot = None
+        if args.from_snapshot:
+            snapshot = EmbeddingSnapshot.open()
+            assert snapshot is not None, (
+                "No embedding snapshot found; run `oversight snapshot` first"
+            )
+        n_rows = build_projection(
+            database_url,
+            args.name,
+            sources,
+            streaming=args.streaming,
+            dtype=args.dtype,
+            chunk_size=args.chunk_size,
+            scratch_dir=args.scratch_dir,
+            snapshot=snapshot,
+        )
+
+    if n_rows and not args.no_snapshot:
+        from .atlas_snapshot import write_atlas_snapshot
+
+        print("[projections] writing atlas snapshot...", flush=True)
+        t_snap = time.time()
+        write_atlas_snapshot(database_url, args.name)
+        print(f"[projections] snapshot done in {time.time() - t_snap:.1f}s", flush=True)
+
     print(
-        f"[projections] PCA done in {time.time() - t_pca:.1f}s "
-        f"(explained_variance_ratio_sum={pca.explained_variance_ratio_.sum():.4f})",
+        f"[projections] done in {time.time() - t_total:.1f}s total "
+        f"(projection={args.name!r} rows={n_rows:,}).",
         flush=True,
     )
-    del X
 
-    print("[projections] PaCMAP→2...", flush=True)
-    t_pm = time.time()
-    reducer = pacmap.PaCMAP(
-        n_components=2,
-        n_neighbors=None,
-        MN_ratio=0.5,
-        FP_ratio=2.0,
-        random_state=42,
-        verbose=True,
+
+def cmd_snapshot(args: argparse.Namespace) -> None:
+    from .embedding_snapshot import update_snapshot
+
+    database_url = os.getenv("DATABASE_URL")
+    assert database_url is not None, "DATABASE_URL is not set"
+    update_snapshot(database_url, full=args.full)
+
+
+def cmd_atlas_snapshot(args: argparse.Namespace) -> None:
+    from .atlas_snapshot import write_atlas_snapshot
+
+    database_url = os.getenv("DATABASE_URL")
+    assert database_url is not None, "DATABASE_URL is not set"
+    write_atlas_snapshot(database_url, args.name)
+
+
+def cmd_backfill_authors(args: argparse.Namespace) -> None:
+    from .PaperDatabase import PaperDatabase
+
+    with PaperDatabase() as db:
+        filled = db.backfill_authors(batch_size=args.batch_size)
+    print(f"Backfilled authors/institutions for {filled} papers.")
+
+
+def cmd_lexical_index(args: argparse.Namespace) -> None:
+    from .PaperDatabase import PaperDatabase
+
+    with PaperDatabase() as db:
+        db.ensure_lexical_index()
+    print("Lexical index for /api/suggest is in place.")
+
+
+def cmd_paper_categories(args: argparse.Namespace) -> None:
+    from .PaperDatabase import PaperDatabase
+
+    with PaperDatabase() as db:
+        db.ensure_categories_column()
+    print("paper.categories and its GIN index are in place.")
+
+
+def cmd_slow_queries(args: argparse.Namespace) -> None:
+    import json
+
+    import psycopg
+
+    from .slow_queries import RECENT_SQL, SLOW_QUERY_LOG_DDL
+
+    database_url = os.getenv("DATABASE_URL")
+    assert database_url is not None, "DATABASE_URL is not set"
+    with psycopg.connect(database_url, autocommit=True) as con:
+        for statement in SLOW_QUERY_LOG_DDL:
+            con.execute(statement)
+        rows = con.execute(
+            RECENT_SQL, {"name": args.name, "limit": args.limit}
+        ).fetchall()
+    if not rows:
+        print("No slow queries recorded.")
+    for (
+        name,
+        duration_ms,
+        threshold_ms,
+        query,
+        params,
+        settings,
+        plan,
+        error,
+        at,
+    ) in rows:
+        print(
+            f"=== {at:%Y-%m-%d %H:%M:%S} {name}: {duration_ms:.0f} ms "
+            f"(threshold {threshold_ms:.0f} ms)"
+        )
+        for setting in settings:
+            print(setting)
+        print(query.strip())
+        print(f"params: {json.dumps(params)}")
+        print(plan if plan is not None else f"EXPLAIN failed: {error}")
+        print()
+
+
+def cmd_bench(args: argparse.Namespace) -> None:
+    from .bench import (
+        SCENARIOS,
+        BenchConfig,
+        compare_results,
+        load_results,
+        run_bench,
+        seed_corpus,
+        write_results,
     )
-    X2 = reducer.fit_transform(X50, init="pca")
-    print(f"[projections] PaCMAP done in {time.time() - t_pm:.1f}s", flush=True)
-    del X50
+    from .embedding_backends import get_backend
 
-    print(
-        f"[projections] upserting {n_rows} coords into projection={args.name!r}...",
-        flush=True,
+    database_url = args.database_url or os.getenv("OVERSIGHT_BENCH_DATABASE_URL")
+    assert database_url is not None, (
+        "pass --database-url or set OVERSIGHT_BENCH_DATABASE_URL "
+        "(a dedicated database; the bench replaces its papers)"
+    )
+    scenarios = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = sorted(set(scenarios) - set(SCENARIOS))
+    assert not unknown, f"unknown scenarios {unknown}; choose from {SCENARIOS}"
+    assert get_backend(args.model).kind != "gemini", (
+        "the bench embeds queries locally; use fake/hash-<dim> or local/<name>"
+    )
+    config = BenchConfig(
+        papers=args.papers,
+        seed=args.seed,
+        server=args.server,
+        concurrency=[int(c) for c in args.concurrency.split(",")],
+        requests=args.requests,
+        warmup=args.warmup,
+        scenarios=scenarios,
+        embed_latency_ms=args.embed_latency_ms,
+        model=args.model,
+    )
+    # Load the baseline first, so a bad path fails before the long run.
+    baseline = load_results(args.baseline) if args.baseline else None
+
+    if not args.no_seed:
+        seed_corpus(
+            database_url, config.papers, config.seed, config.model, force=args.reseed
+        )
+    results = run_bench(database_url, config)
+    if args.out:
+        write_results(args.out, results)
+        print(f"Wrote {args.out}")
+
+    if baseline is not None:
+        regressions = compare_results(baseline, results, tolerance=args.tolerance)
+        if regressions:
+            raise SystemExit(
+                f"{len(regressions)} regressions against {args.baseline}:\n  "
+                + "\n  ".join(regressions)
+            )
+        print(f"No regressions against {args.baseline}.")
+
+
+def cmd_embeddings(args: argparse.Namespace) -> None:
+    import psycopg
+
+    from .embedding_backends import configured_backend, configured_shadow_backend
+    from .embedding_spaces import coverage, migrate
+
+    database_url = os.getenv("DATABASE_URL")
+    assert database_url is not None, "DATABASE_URL is not set"
+    primary = configured_backend()
+    shadow = configured_shadow_backend()
+    if shadow is None:
+        raise SystemExit(
+            f"Serving {primary.name}; set OVERSIGHT_SHADOW_EMBEDDING_MODEL "
+            "to migrate to another model."
+        )
+    if args.embeddings_command == "backfill":
+        covered = migrate(database_url, args.batch_size, args.max_per_minute)
+    else:
+        with psycopg.connect(database_url) as con:
+            covered = coverage(con, primary, shadow)
+    print(f"Primary: {primary.name}")
+    print(f"Shadow:  {covered}")
+    if covered.complete:
+        print("Search serves the shadow model from each API process's next check.")
+
+
+def cmd_tune_hnsw(args: argparse.Namespace) -> None:
+    from .hnsw_tuning import (
+        DEFAULT_EF_SEARCH,
+        TuneConfig,
+        tune,
+        tuning_path,
+        write_tuning,
+    )
+
+    database_url = os.getenv("DATABASE_URL")
+    assert database_url is not None, "DATABASE_URL is not set"
+    ef_search = (
+        tuple(int(ef) for ef in args.ef_search.split(","))
+        if args.ef_search
+        else DEFAULT_EF_SEARCH
+    )
+    index_params = (
+        tuple(
+            (int(m), int(efc))
+            for m, _, efc in (p.partition(":") for p in args.index_params.split(","))
+        )
+        if args.index_params
+        else ()
+    )
+    config = TuneConfig(
+        queries=args.queries,
+        k=args.k,
+        target_recall=args.target_recall,
+        ef_search=ef_search,
+        index_params=index_params,
+        exact=args.exact,
+        seed=args.seed,
     )
+    doc = tune(database_url, config)
+
+    for endpoint, bands in doc["endpoints"].items():
+        print(f"{endpoint}:")
+        for band in bands:
+            print(
+                f"  selectivity >= {band['min_selectivity']:<8} ef_search "
+                f"{band['ef_search']:<4} ({band['scenario']}: recall "
+                f"{band['recall']}, p50 {band['p50_ms']} ms)"
+            )
+    if index_params:
+        print(f"Recommended index: {doc['recommended_index']} (live: {doc['index']})")
+    if args.dry_run:
+        return
+    path = args.out or str(tuning_path())
+    write_tuning(path, doc)
+    print(f"Wrote {path}; API processes pick it up on restart.")
+
+
+def cmd_index(args: argparse.Namespace) -> None:
+    import psycopg
+
+    from . import vector_indexes
+    from .embedding_backends import configured_backend
+
+    database_url = os.getenv("DATABASE_URL")
+    assert database_url is not None, "DATABASE_URL is not set"
+    if args.index_command == "status":
+        with psycopg.connect(database_url, autocommit=True) as con:
+            vector_indexes.ensure_extensions(con)
+            status = vector_indexes.status(con)
+        print(status.report())
+        if args.check and not status.fits_shared_buffers:
+            raise SystemExit(1)
+    elif args.index_command == "prewarm":
+        for index, blocks in vector_indexes.prewarm(database_url):
+            print(f"{index.name}: {blocks} blocks loaded")
+    else:
+        name = args.name
+        if name is None:
+            backend = configured_backend()
+            with psycopg.connect(database_url) as con:
+                index = vector_indexes.index_for(con, backend)
+            assert index is not None, f"No valid HNSW index on {backend.column}"
+            name = index.name
+        m, ef_construction = args.m, args.ef_construction
+        if args.tuned:
+            import json
+
+            from .hnsw_tuning import tuning_path
+
+            with open(tuning_path()) as f:
+                recommended = json.load(f).get("recommended_index")
+            assert recommended, (
+                f"{tuning_path()} has no recommended index; run "
+                "`oversight tune-hnsw --index-params ...` first"
+            )
+            m, ef_construction = recommended["m"], recommended["ef_construction"]
+        index = vector_indexes.rebuild(
+            database_url,
+            name,
+            m=m,
+            ef_construction=ef_construction,
+            maintenance_work_mem_mb=args.maintenance_work_mem,
+            parallel_workers=args.parallel_workers,
+        )
+        print(
+            f"Rebuilt {index.name}: m={index.m} "
+            f"ef_construction={index.ef_construction}, "
+            f"{index.size / 2**20:.1f} MB"
+        )
+
+
+def cmd_worker(args: argparse.Namespace) -> None:
+    from .jobs import run_worker
+
+    database_url = os.getenv("DATABASE_URL")
+    assert database_url is not None, "DATABASE_URL is not set"
+    run_worker(database_url, once=args.once, poll_s=args.poll_interval)
+
+
+def cmd_embed_queue(args: argparse.Namespace) -> None:
+    import psycopg
+
+    from . import embed_queue
+
+    database_url = os.getenv("DATABASE_URL")
+    assert database_url is not None, "DATABASE_URL is not set"
+    if args.queue_command == "work":
+        embed_queue.run_embedder(
+            database_url,
+            once=args.once,
+            poll_s=args.poll_interval,
+            batch_size=args.batch_size,
+        )
+        return
     with psycopg.connect(database_url) as con:
-        # autocommit=False so a crash mid-load doesn't leave the
-        # projection half-overwritten — the table flips atomically.
-        con.autocommit = False
-        with con.cursor() as cur:
-            batch_size = 5000
-            for i in range(0, n_rows, batch_size):
-                end = min(i + batch_size, n_rows)
-                rows = [
-                    (paper_ids[j], args.name, float(X2[j, 0]), float(X2[j, 1]))
-                    for j in range(i, end)
-                ]
-                cur.executemany(
-                    """
-                    INSERT INTO paper_projection_2d (paper_id, projection, x, y)
-                    VALUES (%s, %s, %s, %s)
-                    ON CONFLICT (paper_id, projection)
-                    DO UPDATE SET
-                        x = EXCLUDED.x,
-                        y = EXCLUDED.y,
-                        created_at = CURRENT_TIMESTAMP
-                    """,
-                    rows,
+        embed_queue.ensure_schema(con)
+        if args.queue_command == "seed":
+            from .embedding_backends import get_backend
+            from .PaperDatabase import PaperDatabase
+
+            db = PaperDatabase.from_connection(con)
+            for model in embed_queue.queued_models(db.backend):
+                queued = embed_queue.seed(
+                    con, get_backend(model), db.arxiv_embed_categories
                 )
-                if (i // batch_size) % 4 == 0:
-                    print(f"  ...upserted {end:,}/{n_rows:,}")
-        con.commit()
+                print(f"{model}: queued {queued} unembedded papers")
+        elif args.queue_command == "retry":
+            print(f"Re-queued {embed_queue.retry_failed(con)} failed papers")
+        else:
+            states = embed_queue.status(con)
+            for state in states:
+                print(state)
+            if not states:
+                print("Queue empty: every eligible paper is embedded")
 
-    print(
-        f"[projections] done in {time.time() - t_total:.1f}s total "
-        f"(projection={args.name!r} rows={n_rows:,}).",
-        flush=True,
-    )
+
+def cmd_jobs(args: argparse.Namespace) -> None:
+    import json
+
+    import psycopg
+
+    from . import jobs
+
+    database_url = os.getenv("DATABASE_URL")
+    assert database_url is not None, "DATABASE_URL is not set"
+    with psycopg.connect(database_url, autocommit=True) as con:
+        if args.jobs_command == "submit":
+            params = json.loads(args.params) if args.params else {}
+            job, created = jobs.enqueue(con, args.kind, params)
+            verb = "Queued" if created else "Already active:"
+            print(f"{verb} {job.kind} job {job.id} ({job.status})")
+            return
+        job = jobs.get_job(con, args.job_id)
+    if job is None:
+        raise SystemExit(f"No job {args.job_id}")
+    print(json.dumps(job.to_dict(), indent=2))
 
 
 def cmd_inventory(args: argparse.Namespace) -> None:
@@ -353,6 +624,11 @@ def main() -> None:
         "--sources",
         help="Comma-separated sources to filter (e.g. arxiv,ICML,NeurIPS)",
     )
+    sp_search.add_argument(
+        "--categories",
+        help="Comma-separated arXiv categories the arXiv results must be in "
+        "(e.g. cs.LG,cs.PL); implies --sources arxiv when that's not given",
+    )
     sp_search.add_argument(
         "--days", type=int, default=365 * 5, help="Time window in days (default: 1825)"
     )
@@ -378,6 +654,17 @@ def main() -> None:
     sp_serve.add_argument(
         "--debug", action="store_true", help="Enable Flask debug mode"
     )
+    sp_serve.add_argument(
+        "--asgi",
+        action="store_true",
+        help="Serve the async app (asgi_app) under uvicorn instead of Flask",
+    )
+    sp_serve.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="uvicorn worker processes with --asgi (default: 1)",
+    )
     sp_serve.set_defaults(func=cmd_serve)
 
     # oversight consume
@@ -385,7 +672,7 @@ def main() -> None:
         "consume", help="Load papers from a JSON file (or directory) into the database"
     )
     sp_consume.add_argument(
-        "path", help="Path to a JSON file or directory of JSON files"
+        "path", help="Path to a JSON file or a directory tree of JSON files"
     )
     sp_consume.add_argument(
         "--format",
@@ -398,6 +685,17 @@ def main() -> None:
         action="store_true",
         help="Parse and print what would be inserted without writing to the database",
     )
+    sp_consume.add_argument(
+        "--jobs",
+        type=int,
+        help="Parser worker processes (default: one per core)",
+    )
+    sp_consume.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Papers per database write and commit (default: 1000)",
+    )
     sp_consume.set_defaults(func=cmd_consume)
 
     # oversight projections
@@ -415,8 +713,416 @@ def main() -> None:
         help="Optional comma-separated source filter (e.g. ICFP,POPL,PLDI for a "
         "PL-only projection). Defaults to all sources.",
     )
+    sp_projections.add_argument(
+        "--spec",
+        action="append",
+        metavar="NAME[=SRC1,SRC2]",
+        help="Build this projection (optionally source-filtered) alongside the "
+        "other --spec's from one shared embedding load. Repeatable; overrides "
+        "--name/--sources.",
+    )
+    sp_projections.add_argument(
+        "--jobs",
+        type=int,
+        help="Worker processes for --spec builds (default: one per spec)",
+    )
+    sp_projections.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only place papers missing from the projection, using the model "
+        "saved by the last full run",
+    )
+    sp_projections.add_argument(
+        "--k",
+        type=int,
+        default=10,
+        help="Neighbors used to position each paper with --incremental (default: 10)",
+    )
+    sp_projections.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Keep raw embeddings in an on-disk scratch file and fit PCA "
+        "incrementally, so memory scales with --chunk-size",
+    )
+    sp_projections.add_argument(
+        "--dtype",
+        choices=["float32", "float16"],
+        default="float32",
+        help="Scratch-file dtype with --streaming or --spec (default: float32)",
+    )
+    sp_projections.add_argument(
+        "--chunk-size",
+        type=int,
+        default=20_000,
+        help="Rows per normalise/PCA chunk with --streaming, at least 50 "
+        "(default: 20000)",
+    )
+    sp_projections.add_argument(
+        "--scratch-dir",
+        help="Directory for the --streaming scratch file (default: system temp)",
+    )
+    sp_projections.add_argument(
+        "--from-snapshot",
+        action="store_true",
+        help="Read embeddings from the on-disk snapshot (`oversight snapshot`) "
+        "instead of Postgres",
+    )
+    sp_projections.add_argument(
+        "--no-snapshot",
+        action="store_true",
+        help="Skip writing the precompressed /api/atlas snapshot afterwards",
+    )
     sp_projections.set_defaults(func=cmd_projections)
 
+    # oversight snapshot
+    sp_snapshot = subparsers.add_parser(
+        "snapshot",
+        help="Append newly embedded papers to the on-disk embedding snapshot",
+    )
+    sp_snapshot.add_argument(
+        "--full",
+        action="store_true",
+        help="Rebuild from scratch (picks up re-embedded papers)",
+    )
+    sp_snapshot.set_defaults(func=cmd_snapshot)
+
+    # oversight atlas-snapshot
+    sp_atlas_snapshot = subparsers.add_parser(
+        "atlas-snapshot",
+        help="(Re)write the precompressed /api/atlas snapshot for a projection",
+    )
+    sp_atlas_snapshot.add_argument(
+        "--name",
+        default="pacmap_v1",
+        help="Projection name in paper_projection_2d (default: pacmap_v1)",
+    )
+    sp_atlas_snapshot.set_defaults(func=cmd_atlas_snapshot)
+
+    # oversight backfill-authors
+    sp_backfill_authors = subparsers.add_parser(
+        "backfill-authors",
+        help="Parse and store authors/institutions for papers ingested before "
+        "those columns existed",
+    )
+    sp_backfill_authors.add_argument(
+        "--batch-size",
+        type=int,
+        default=5000,
+        help="Rows parsed and committed per batch (default: 5000)",
+    )
+    sp_backfill_authors.set_defaults(func=cmd_backfill_authors)
+
+    # oversight lexical-index
+    sp_lexical_index = subparsers.add_parser(
+        "lexical-index",
+        help="Add the title/author autocomplete index (pg_trgm + tsvector) "
+        "to a database created before it existed",
+    )
+    sp_lexical_index.set_defaults(func=cmd_lexical_index)
+
+    # oversight paper-categories
+    sp_paper_categories = subparsers.add_parser(
+        "paper-categories",
+        help="Move arXiv categories onto paper.categories (GIN-indexed) in a "
+        "database created before the column existed",
+    )
+    sp_paper_categories.set_defaults(func=cmd_paper_categories)
+
+    # oversight slow-queries
+    sp_slow_queries = subparsers.add_parser(
+        "slow-queries",
+        help="Show the captured plans of queries over OVERSIGHT_SLOW_QUERY_MS",
+    )
+    sp_slow_queries.add_argument("--name", help="Only this query, e.g. find_neighbors")
+    sp_slow_queries.add_argument(
+        "--limit", type=int, default=10, help="Most recent N captures (default: 10)"
+    )
+    sp_slow_queries.set_defaults(func=cmd_slow_queries)
+
+    # oversight bench
+    sp_bench = subparsers.add_parser(
+        "bench",
+        help="Seed a synthetic corpus and measure API latency/throughput per "
+        "endpoint, optionally against a stored baseline",
+    )
+    sp_bench.add_argument(
+        "--database-url",
+        help="Dedicated database to seed and serve from "
+        "(default: $OVERSIGHT_BENCH_DATABASE_URL)",
+    )
+    sp_bench.add_argument(
+        "--papers", type=int, default=10_000, help="Corpus size (default: 10000)"
+    )
+    sp_bench.add_argument(
+        "--seed", type=int, default=0, help="Corpus and request RNG seed (default: 0)"
+    )
+    sp_bench_seeding = sp_bench.add_mutually_exclusive_group()
+    sp_bench_seeding.add_argument(
+        "--no-seed", action="store_true", help="Use the database as it is"
+    )
+    sp_bench_seeding.add_argument(
+        "--reseed",
+        action="store_true",
+        help="Reload the corpus even if the same --papers/--seed/--model is "
+        "already there",
+    )
+    sp_bench.add_argument("--server", choices=["flask", "asgi"], default="asgi")
+    sp_bench.add_argument(
+        "--concurrency",
+        default="1,8,32",
+        help="Comma-separated concurrency levels (default: 1,8,32)",
+    )
+    sp_bench.add_argument(
+        "--requests",
+        type=int,
+        default=200,
+        help="Requests per scenario and concurrency level (default: 200)",
+    )
+    sp_bench.add_argument(
+        "--warmup",
+        type=int,
+        default=10,
+        help="Unmeasured requests before each scenario (default: 10)",
+    )
+    sp_bench.add_argument(
+        "--scenarios", help="Comma-separated subset of scenarios (default: all)"
+    )
+    sp_bench.add_argument(
+        "--embed-latency-ms",
+        type=float,
+        default=0.0,
+        help="Simulated query-embedding latency of the stub embedder (default: 0)",
+    )
+    sp_bench.add_argument(
+        "--model",
+        default="fake/hash-3072",
+        help="Embedding model for the corpus and queries: fake/hash-<dim> or "
+        "local/<name> (default: fake/hash-3072, Gemini's dimension)",
+    )
+    sp_bench.add_argument("--out", help="Write the results JSON here")
+    sp_bench.add_argument(
+        "--baseline",
+        help="Results JSON of an earlier run; exit non-zero on regressions against it",
+    )
+    sp_bench.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed relative p95 increase / throughput drop (default: 0.25)",
+    )
+    sp_bench.set_defaults(func=cmd_bench)
+
+    # oversight embeddings status|backfill
+    sp_embeddings = subparsers.add_parser(
+        "embeddings",
+        help="Migrate to the OVERSIGHT_SHADOW_EMBEDDING_MODEL embedding model "
+        "without downtime",
+    )
+    embeddings_sub = sp_embeddings.add_subparsers(
+        dest="embeddings_command", required=True
+    )
+    embeddings_sub.add_parser(
+        "status", help="Show how much of the corpus the shadow model has embedded"
+    )
+    sp_embeddings_backfill = embeddings_sub.add_parser(
+        "backfill",
+        help="Embed the papers the shadow model is missing, then build its "
+        "HNSW index; resumes where an interrupted run stopped",
+    )
+    sp_embeddings_backfill.add_argument(
+        "--batch-size",
+        type=int,
+        default=500,
+        help="Papers embedded and committed per batch (default: 500)",
+    )
+    sp_embeddings_backfill.add_argument(
+        "--max-per-minute",
+        type=float,
+        help="Cap on papers embedded per minute, below the model's own rate "
+        "limit (default: no cap)",
+    )
+    sp_embeddings.set_defaults(func=cmd_embeddings)
+
+    # oversight index status|rebuild|prewarm
+    sp_index = subparsers.add_parser(
+        "index",
+        help="Rebuild, prewarm and check the memory residency of the HNSW "
+        "indexes on embedding",
+    )
+    index_sub = sp_index.add_subparsers(dest="index_command", required=True)
+    sp_index_status = index_sub.add_parser(
+        "status",
+        help="Show each HNSW index's size and share in shared buffers against "
+        "the server's buffer memory",
+    )
+    sp_index_status.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit non-zero once the indexes no longer fit in shared_buffers",
+    )
+    sp_index_rebuild = index_sub.add_parser(
+        "rebuild",
+        help="Rebuild an HNSW index concurrently, with memory for the whole "
+        "graph and parallel workers",
+    )
+    sp_index_rebuild.add_argument(
+        "name",
+        nargs="?",
+        help="Index to rebuild (default: the configured model's)",
+    )
+    sp_index_rebuild.add_argument(
+        "--m", type=int, help="New m (default: keep the index's)"
+    )
+    sp_index_rebuild.add_argument(
+        "--ef-construction",
+        type=int,
+        help="New ef_construction (default: keep the index's)",
+    )
+    sp_index_rebuild.add_argument(
+        "--tuned",
+        action="store_true",
+        help="Take m and ef_construction from the recommendation in the "
+        "`oversight tune-hnsw` file",
+    )
+    sp_index_rebuild.add_argument(
+        "--maintenance-work-mem",
+        type=int,
+        metavar="MB",
+        help="Build memory (default: sized to the graph, at most 8192)",
+    )
+    sp_index_rebuild.add_argument(
+        "--parallel-workers",
+        type=int,
+        help="Parallel build workers (default: the server's max_parallel_workers)",
+    )
+    index_sub.add_parser(
+        "prewarm", help="Load every HNSW index into shared buffers (pg_prewarm)"
+    )
+    sp_index.set_defaults(func=cmd_index)
+
+    # oversight tune-hnsw
+    sp_tune = subparsers.add_parser(
+        "tune-hnsw",
+        help="Measure HNSW recall@k against latency and pick ef_search "
+        "defaults per endpoint and filter selectivity",
+    )
+    sp_tune.add_argument(
+        "--queries",
+        type=int,
+        default=200,
+        help="Stored paper vectors sampled as queries (default: 200)",
+    )
+    sp_tune.add_argument(
+        "--k", type=int, default=10, help="Results per query (default: 10)"
+    )
+    sp_tune.add_argument(
+        "--target-recall",
+        type=float,
+        default=0.95,
+        help="Recall@k the recommended ef_search has to reach (default: 0.95)",
+    )
+    sp_tune.add_argument(
+        "--ef-search",
+        help="Comma-separated ef_search values to sweep "
+        "(default: 10,20,40,60,80,120,160,240,320,500)",
+    )
+    sp_tune.add_argument(
+        "--index-params",
+        help="Comma-separated m:ef_construction pairs to build and sweep on a "
+        "copy of the embeddings, e.g. 16:64,24:128 (default: only the live index)",
+    )
+    sp_tune.add_argument(
+        "--exact",
+        choices=["sql", "snapshot"],
+        default="sql",
+        help="Compute the exact top-k with a sequential scan, or from the "
+        "embedding snapshot (default: sql)",
+    )
+    sp_tune.add_argument(
+        "--seed", type=int, default=0, help="Query sample seed (default: 0)"
+    )
+    sp_tune.add_argument(
+        "--out",
+        help="Where to write the tuning file (default: "
+        "$OVERSIGHT_HNSW_TUNING_FILE or data/hnsw_tuning.json)",
+    )
+    sp_tune.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the recommendations without writing the tuning file",
+    )
+    sp_tune.set_defaults(func=cmd_tune_hnsw)
+
+    # oversight worker
+    sp_worker = subparsers.add_parser(
+        "worker",
+        help="Run queued background jobs (sync, digest, projections, backfill)",
+    )
+    sp_worker.add_argument(
+        "--once",
+        action="store_true",
+        help="Exit once the queue is empty instead of waiting for more jobs",
+    )
+    sp_worker.add_argument(
+        "--poll-interval",
+        type=float,
+        default=10.0,
+        help="Seconds between queue checks when no NOTIFY arrives (default: 10)",
+    )
+    sp_worker.set_defaults(func=cmd_worker)
+
+    # oversight embed-queue status|seed|retry|work
+    sp_queue = subparsers.add_parser(
+        "embed-queue", help="Inspect or work the queue of papers to embed"
+    )
+    queue_sub = sp_queue.add_subparsers(dest="queue_command", required=True)
+    queue_sub.add_parser("status", help="Show queued papers per model and state")
+    queue_sub.add_parser(
+        "seed",
+        help="Queue every eligible paper that has no vector yet (a full scan; "
+        "only needed if papers were written around the queue)",
+    )
+    queue_sub.add_parser("retry", help="Re-queue papers that failed to embed")
+    sp_queue_work = queue_sub.add_parser(
+        "work",
+        help="Embed queued papers as ingestion commits them; run several for "
+        "throughput",
+    )
+    sp_queue_work.add_argument(
+        "--once",
+        action="store_true",
+        help="Exit once the queue is empty instead of waiting for more papers",
+    )
+    sp_queue_work.add_argument(
+        "--poll-interval",
+        type=float,
+        default=10.0,
+        help="Seconds between queue checks when no NOTIFY arrives (default: 10)",
+    )
+    sp_queue_work.add_argument(
+        "--batch-size",
+        type=int,
+        default=100,
+        help="Papers claimed and embedded per batch (default: 100)",
+    )
+    sp_queue.set_defaults(func=cmd_embed_queue)
+
+    # oversight jobs submit|status
+    sp_jobs = subparsers.add_parser("jobs", help="Queue or inspect background jobs")
+    jobs_sub = sp_jobs.add_subparsers(dest="jobs_command", required=True)
+    sp_jobs_submit = jobs_sub.add_parser("submit", help="Queue a job")
+    sp_jobs_submit.add_argument(
+        "kind", choices=["sync", "digest", "projections", "backfill"]
+    )
+    sp_jobs_submit.add_argument(
+        "--params",
+        help='JSON job parameters, e.g. \'{"name": "pacmap_v1", "incremental": true}\' '
+        "for projections",
+    )
+    sp_jobs_status = jobs_sub.add_parser("status", help="Show a job's progress")
+    sp_jobs_status.add_argument("job_id", type=int)
+    sp_jobs.set_defaults(func=cmd_jobs)
+
     # oversight inventory
     sp_inventory = subparsers.add_parser(
         "inventory", help="Show paper counts and conferences"
@@ -0,0 +1,556 @@
+from __future__ import annotations
+
+import os
+import socket
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import psycopg
+
+from .embedding_backends import (
+    EmbeddingBackend,
+    configured_backend,
+    configured_shadow_backend,
+)
+from .utils import get_logger, tqdm
+
+# Embedding work queue. Ingestion (sync, consume) enqueues one row per paper
+# and embedding model whenever a paper is new or its abstract changed, in
+# the same transaction as the paper itself, and NOTIFYs on commit.
+# Embedders claim batches of rows with FOR UPDATE SKIP LOCKED, embed them
+# outside any transaction, then write the vectors and delete the rows:
+#
+#   `oversight embed-queue work`  waits on the NOTIFY, so a paper becomes
+#                                 searchable seconds after its ingest
+#                                 commits; run several for throughput
+#   sync / consume                drain what they enqueued before returning,
+#                                 so nothing is left behind without a
+#                                 standing embedder
+#
+# This replaces finding unembedded papers with a LEFT JOIN against
+# `embedding`: a scan of the whole corpus that returned every match before
+# the first embedding call. The partial index on ready rows keeps a claim
+# an index range scan however large the backlog.
+#
+# text_hash is md5 of the abstract at enqueue time. A vector is only
+# written while the paper's abstract still hashes the same, and only the
+# queue row with that hash is deleted, so a paper updated while a worker
+# embedded its old abstract stays queued for the new one.
+
+logger = get_logger()
+
+NOTIFY_CHANNEL = "oversight_embed"
+
+# Claim order: highest first, then oldest. Sync's fresh arXiv papers jump
+# ahead of a conference dump, which jumps ahead of the seeded backlog.
+PRIORITY_SYNC = 10
+PRIORITY_CONSUME = 0
+PRIORITY_BACKLOG = -10
+
+# Papers claimed, embedded and committed per batch.
+CLAIM_BATCH = 100
+
+# A claim older than this is assumed to belong to a dead worker and is
+# handed out again; a row that failed this many times is parked as failed
+# until `oversight embed-queue retry`.
+STALE_AFTER_S = 15 * 60.0
+MAX_ATTEMPTS = 5
+
+# A failed batch isn't claimable again until available_at: BACKOFF_S after
+# its first failure, doubling with each attempt up to BACKOFF_MAX_S, so a
+# provider outage or a paper it rejects doesn't burn every attempt within
+# seconds (and a drain doesn't spin on it).
+BACKOFF_S = 30.0
+BACKOFF_MAX_S = 30 * 60.0
+
+# Mirrors db/init/008-embed-queue.sql, which only runs on fresh databases.
+EMBED_QUEUE_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS embed_queue (
+        paper_id     varchar      NOT NULL REFERENCES paper(paper_id) ON DELETE CASCADE,
+        model        varchar      NOT NULL,
+        text_hash    text         NOT NULL,
+        priority     smallint     NOT NULL DEFAULT 0,
+        state        varchar      NOT NULL DEFAULT 'ready'
+                     CHECK (state IN ('ready', 'claimed', 'failed')),
+        attempts     integer      NOT NULL DEFAULT 0,
+        last_error   text,
+        claimed_by   text,
+        enqueued_at  timestamptz  NOT NULL DEFAULT now(),
+        available_at timestamptz  NOT NULL DEFAULT now(),
+        claimed_at   timestamptz,
+        PRIMARY KEY (paper_id, model)
+    )
+    """,
+    # Queues created before the retry backoff
+    """
+    ALTER TABLE embed_queue
+        ADD COLUMN IF NOT EXISTS available_at timestamptz NOT NULL DEFAULT now()
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS embed_queue_ready_idx
+        ON embed_queue (model, priority DESC, enqueued_at) WHERE state = 'ready'
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS embed_queue_claimed_idx
+        ON embed_queue (claimed_at) WHERE state = 'claimed'
+    """,
+]
+
+TABLE_EXISTS_SQL = "SELECT to_regclass('embed_queue') IS NOT NULL"
+
+# The newest column EMBED_QUEUE_DDL adds: once it's there, the DDL has
+# nothing left to do.
+SCHEMA_CURRENT_SQL = """
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'embed_queue' AND column_name = 'available_at'
+"""
+
+# One row per paper in %(paper_ids)s/%(texts)s and model in %(models)s;
+# re-enqueueing a queued paper (its abstract changed again) resets the row
+# to ready with the new hash.
+ENQUEUE_SQL = """
+    INSERT INTO embed_queue (paper_id, model, text_hash, priority)
+    SELECT p.paper_id, m, md5(p.text), %(priority)s
+    FROM unnest(%(paper_ids)s::varchar[], %(texts)s::text[]) AS p(paper_id, text)
+    CROSS JOIN unnest(%(models)s::varchar[]) AS m
+    ON CONFLICT (paper_id, model) DO UPDATE
+    SET text_hash = EXCLUDED.text_hash,
+        priority = EXCLUDED.priority,
+        state = 'ready',
+        attempts = 0,
+        last_error = NULL,
+        claimed_by = NULL,
+        claimed_at = NULL,
+        enqueued_at = now(),
+        available_at = now()
+"""
+
+# {vec_col}: the model's column. Queues the papers in %(paper_ids)s/%(texts)s
+# that have no vector in it and aren't queued yet, for ingestion's
+# re-listed papers that moved into the embedded categories.
+ENQUEUE_UNEMBEDDED_SQL = """
+    INSERT INTO embed_queue (paper_id, model, text_hash, priority)
+    SELECT p.paper_id, %(model)s, md5(p.text), %(priority)s
+    FROM unnest(%(paper_ids)s::varchar[], %(texts)s::text[]) AS p(paper_id, text)
+    LEFT JOIN embedding AS emb
+      ON emb.paper_id = p.paper_id
+    WHERE emb.{vec_col} IS NULL
+    ON CONFLICT (paper_id, model) DO NOTHING
+"""
+
+# {vec_col}: the model's column. Papers eligible for embedding that have no
+# vector in it and aren't queued yet; the one full scan, for databases that
+# predate the queue and for `oversight embed-queue seed`.
+SEED_SQL = """
+    INSERT INTO embed_queue (paper_id, model, text_hash, priority)
+    SELECT ps.paper_id, %(model)s, md5(ps.abstract), %(priority)s
+    FROM paper AS ps
+    LEFT JOIN embedding AS emb
+      ON emb.paper_id = ps.paper_id
+    WHERE emb.{vec_col} IS NULL
+      AND ps.abstract <> ''
+      AND (ps.source <> 'arxiv' OR ps.categories && %(categories)s::text[])
+    ON CONFLICT (paper_id, model) DO NOTHING
+"""
+
+CLAIM_SQL = """
+    WITH claimed AS (
+        UPDATE embed_queue AS q
+        SET state = 'claimed', claimed_by = %(worker)s, claimed_at = now(),
+            attempts = q.attempts + 1
+        WHERE (q.paper_id, q.model) IN (
+            SELECT paper_id, model FROM embed_queue
+            WHERE model = %(model)s AND state = 'ready' AND available_at <= now()
+            ORDER BY priority DESC, enqueued_at
+            LIMIT %(limit)s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING q.paper_id, q.text_hash
+    )
+    SELECT c.paper_id, c.text_hash, ps.abstract
+    FROM claimed AS c
+    JOIN paper AS ps ON ps.paper_id = c.paper_id
+"""
+
+# {vec_col} / {vec_type}: the model's. Skipped when the abstract changed
+# since the claim; the re-enqueued row covers the new one.
+COMPLETE_SQL = """
+    INSERT INTO embedding (paper_id, {vec_col})
+    SELECT ps.paper_id, %(vector)s::{vec_type}
+    FROM paper AS ps
+    WHERE ps.paper_id = %(paper_id)s AND md5(ps.abstract) = %(text_hash)s
+    ON CONFLICT (paper_id) DO UPDATE
+    SET {vec_col} = EXCLUDED.{vec_col}
+"""
+
+DELETE_DONE_SQL = """
+    DELETE FROM embed_queue AS q
+    USING unnest(%(paper_ids)s::varchar[], %(hashes)s::text[]) AS d(paper_id, text_hash)
+    WHERE q.model = %(model)s
+      AND q.paper_id = d.paper_id
+      AND q.text_hash = d.text_hash
+      AND q.state = 'claimed'
+"""
+
+FAIL_SQL = """
+    UPDATE embed_queue
+    SET state = CASE WHEN attempts >= %(max_attempts)s THEN 'failed' ELSE 'ready' END,
+        last_error = %(error)s, claimed_by = NULL, claimed_at = NULL,
+        available_at = now() + make_interval(
+            secs => least(%(backoff_s)s * 2 ^ (attempts - 1), %(backoff_max_s)s)
+        )
+    WHERE model = %(model)s AND paper_id = ANY(%(paper_ids)s) AND state = 'claimed'
+"""
+
+RELEASE_STALE_SQL = """
+    UPDATE embed_queue
+    SET state = 'ready', claimed_by = NULL, claimed_at = NULL, available_at = now()
+    WHERE state = 'claimed'
+      AND claimed_at < now() - make_interval(secs => %s)
+    RETURNING paper_id
+"""
+
+RETRY_FAILED_SQL = """
+    UPDATE embed_queue
+    SET state = 'ready', attempts = 0, last_error = NULL, enqueued_at = now(),
+        available_at = now()
+    WHERE state = 'failed'
+"""
+
+STATUS_SQL = """
+    SELECT model, state, count(*), min(enqueued_at), max(attempts)
+    FROM embed_queue
+    GROUP BY model, state
+    ORDER BY model, state
+"""
+
+READY_COUNT_SQL = """
+    SELECT count(*) FROM embed_queue
+    WHERE model = %s AND state = 'ready' AND available_at <= now()
+"""
+
+
+@dataclass(frozen=True)
+class QueueState:
+    """One row of ``oversight embed-queue status``."""
+
+    model: str
+    state: str
+    papers: int
+    oldest: Any
+    max_attempts: int
+
+    def __str__(self) -> str:
+        line = f"{self.model}: {self.papers:,} {self.state}"
+        if self.oldest is not None:
+            line += f", oldest enqueued {self.oldest:%Y-%m-%d %H:%M}"
+        if self.state == "failed":
+            line += f" after {self.max_attempts} attempts"
+        return line
+
+
+def queued_backends(
+    primary: EmbeddingBackend | None = None,
+) -> list[EmbeddingBackend]:
+    """The backends ingestion enqueues for: the primary and, during a
+    migration, the shadow (see embedding_spaces.py)."""
+    primary = primary if primary is not None else configured_backend()
+    shadow = configured_shadow_backend()
+    backends = [primary]
+    if shadow is not None and shadow.name != primary.name:
+        backends.append(shadow)
+    return backends
+
+
+def queued_models(primary: EmbeddingBackend | None = None) -> list[str]:
+    return [backend.name for backend in queued_backends(primary)]
+
+
+def enqueue(
+    con: psycopg.Connection[Any],
+    paper_id: str,
+    text: str,
+    models: Sequence[str],
+    priority: int = PRIORITY_CONSUME,
+) -> None:
+    """Queue ``paper_id`` for embedding ``text`` with every one of
+    ``models``. Runs in the caller's transaction: the rows, and the NOTIFY
+    that wakes the embedders, only take effect when it commits."""
+    enqueue_many(con, [(paper_id, text)], models, priority)
+
+
+def enqueue_many(
+    con: psycopg.Connection[Any],
+    papers: Sequence[tuple[str, str]],
+    models: Sequence[str],
+    priority: int = PRIORITY_CONSUME,
+) -> None:
+    """``enqueue`` for a batch of ``(paper_id, text)`` pairs, in one
+    statement."""
+    papers = [(paper_id, text) for paper_id, text in papers if text]
+    if not papers or not models:
+        return
+    con.execute(
+        ENQUEUE_SQL,
+        {
+            "paper_ids": [paper_id for paper_id, _ in papers],
+            "texts": [text for _, text in papers],
+            "priority": priority,
+            "models": list(models),
+        },
+    )
+    con.execute(f"NOTIFY {NOTIFY_CHANNEL}")
+
+
+def enqueue_unembedded(
+    con: psycopg.Connection[Any],
+    papers: Sequence[tuple[str, str]],
+    backends: Sequence[EmbeddingBackend],
+    priority: int = PRIORITY_CONSUME,
+) -> None:
+    """``enqueue_many``, skipping the papers that already have a vector in
+    a backend's column or are queued for it."""
+    from .PaperDatabase import EMBEDDING_COLUMN_EXISTS_SQL
+
+    papers = [(paper_id, text) for paper_id, text in papers if text]
+    if not papers:
+        return
+    for backend in backends:
+        if not con.execute(EMBEDDING_COLUMN_EXISTS_SQL, [backend.column]).fetchone():
+            # No vectors in this model's space yet
+            enqueue_many(con, papers, [backend.name], priority)
+            continue
+        con.execute(
+            backend.sql(ENQUEUE_UNEMBEDDED_SQL),
+            {
+                "paper_ids": [paper_id for paper_id, _ in papers],
+                "texts": [text for _, text in papers],
+                "priority": priority,
+                "model": backend.name,
+            },
+        )
+    con.execute(f"NOTIFY {NOTIFY_CHANNEL}")
+
+
+def seed(
+    con: psycopg.Connection[Any],
+    backend: EmbeddingBackend,
+    arxiv_categories: Sequence[str],
+    priority: int = PRIORITY_BACKLOG,
+) -> int:
+    """Queue every eligible paper missing a ``backend`` vector that isn't
+    queued already; returns how many. Commits."""
+    from .PaperDatabase import PaperDatabase
+
+    db = PaperDatabase.from_connection(con, backend)
+    db.ensure_embedding_column()
+    db.ensure_categories_column()
+    queued = con.execute(
+        backend.sql(SEED_SQL),
+        {
+            "model": backend.name,
+            "priority": priority,
+            "categories": list(arxiv_categories),
+        },
+    ).rowcount
+    con.execute(f"NOTIFY {NOTIFY_CHANNEL}")
+    con.commit()
+    return queued
+
+
+def ensure_schema(con: psycopg.Connection[Any]) -> None:
+    """Create or upgrade the queue if needed. A database that had papers
+    before the queue existed gets its unembedded ones seeded for the
+    primary model, once, in the same transaction.
+
+    A catalog lookup once applied. Only commits when it changed the
+    schema, so ingestion can call it mid-transaction."""
+    from .PaperDatabase import PaperDatabase
+
+    if con.execute(SCHEMA_CURRENT_SQL).fetchone():
+        return
+    existed = con.execute(TABLE_EXISTS_SQL).fetchone()[0]
+    for statement in EMBED_QUEUE_DDL:
+        con.execute(statement)
+    if not existed:
+        db = PaperDatabase.from_connection(con)
+        queued = seed(con, db.backend, db.arxiv_embed_categories)
+        if queued:
+            logger.info(f"Queued {queued} unembedded papers for {db.backend.name}")
+    con.commit()
+
+
+def status(con: psycopg.Connection[Any]) -> list[QueueState]:
+    return [QueueState(*row) for row in con.execute(STATUS_SQL).fetchall()]
+
+
+def retry_failed(con: psycopg.Connection[Any]) -> int:
+    """Put every failed row back in the queue; returns how many. Commits."""
+    retried = con.execute(RETRY_FAILED_SQL).rowcount
+    con.execute(f"NOTIFY {NOTIFY_CHANNEL}")
+    con.commit()
+    return retried
+
+
+def release_stale(con: psycopg.Connection[Any]) -> None:
+    for (paper_id,) in con.execute(RELEASE_STALE_SQL, [STALE_AFTER_S]).fetchall():
+        logger.warning(f"Re-queued {paper_id}: its embedder stopped responding")
+    con.commit()
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def embed_batch(
+    con: psycopg.Connection[Any],
+    model: Any,
+    batch_size: int = CLAIM_BATCH,
+    worker: str | None = None,
+) -> int:
+    """Claim up to ``batch_size`` of ``model``'s (an EmbeddingModel) queued
+    papers, embed them and store the vectors; returns how many were
+    claimed (0: nothing ready).
+
+    The claim commits before the provider is called, so no transaction
+    or row lock is held while it works and other embedders skip straight
+    past the batch. A provider error puts the batch back after a backoff,
+    up to MAX_ATTEMPTS claims per paper.
+    """
+    backend: EmbeddingBackend = model.backend
+    rows = con.execute(
+        CLAIM_SQL,
+        {"worker": worker or _worker_id(), "model": backend.name, "limit": batch_size},
+    ).fetchall()
+    con.commit()
+    if not rows:
+        return 0
+
+    paper_ids = [paper_id for paper_id, _, _ in rows]
+    try:
+        vectors = list(
+            model.embed_documents_rate_limited([abstract for _, _, abstract in rows])
+        )
+        with con.cursor() as cur:
+            cur.executemany(
+                backend.sql(COMPLETE_SQL),
+                [
+                    {"paper_id": paper_id, "text_hash": text_hash, "vector": vector}
+                    for (paper_id, text_hash, _), vector in zip(rows, vectors)
+                ],
+            )
+            cur.execute(
+                DELETE_DONE_SQL,
+                {
+                    "model": backend.name,
+                    "paper_ids": paper_ids,
+                    "hashes": [text_hash for _, text_hash, _ in rows],
+                },
+            )
+        con.commit()
+    except Exception as e:
+        con.rollback()
+        logger.exception(f"Embedding {len(rows)} papers with {backend.name} failed")
+        con.execute(
+            FAIL_SQL,
+            {
+                "max_attempts": MAX_ATTEMPTS,
+                "error": f"{type(e).__name__}: {e}",
+                "backoff_s": BACKOFF_S,
+                "backoff_max_s": BACKOFF_MAX_S,
+                "model": backend.name,
+                "paper_ids": paper_ids,
+            },
+        )
+        con.commit()
+    return len(rows)
+
+
+def drain(
+    con: psycopg.Connection[Any],
+    model: Any,
+    batch_size: int = CLAIM_BATCH,
+) -> int:
+    """Embed ``model``'s queued papers until none are ready; returns how
+    many were claimed. Other embedders can drain the same queue at the
+    same time."""
+    row = con.execute(READY_COUNT_SQL, [model.backend.name]).fetchone()
+    con.commit()
+    claimed = 0
+    worker = _worker_id()
+    with tqdm(total=row[0], desc=f"Embedding with {model.backend.name}") as progress:
+        while n := embed_batch(con, model, batch_size, worker):
+            claimed += n
+            progress.update(n)
+    return claimed
+
+
+def embed_queued(
+    con: psycopg.Connection[Any],
+    primary: Any | None = None,
+    batch_size: int = CLAIM_BATCH,
+) -> None:
+    """The pipelines' embedding step: drain the primary model's queue
+    (``primary``, an already loaded EmbeddingModel, or the configured
+    one) and then the shadow's, if any."""
+    from .EmbeddingModel import EmbeddingModel
+
+    ensure_schema(con)
+    models = [primary if primary is not None else EmbeddingModel()]
+    shadow = configured_shadow_backend()
+    if shadow is not None and shadow.name != models[0].backend.name:
+        models.append(EmbeddingModel(shadow.name))
+    for model in models:
+        claimed = drain(con, model, batch_size)
+        logger.info(f"Embedded {claimed} queued papers with {model.backend.name}")
+
+
+def run_embedder(
+    database_url: str,
+    once: bool = False,
+    poll_s: float = 10.0,
+    batch_size: int = CLAIM_BATCH,
+) -> None:
+    """Embed queued papers as they arrive, for the primary model and, during
+    a migration, the shadow, forever.
+
+    Wakes on the NOTIFY sent when ingestion commits and otherwise polls
+    every ``poll_s``. Each process paces itself to its model's rate limit,
+    so for a rate-limited provider more processes only help while the
+    limit is per key and they use different keys. With ``once``, exit when
+    the queue is empty.
+    """
+    from pgvector.psycopg import register_vector
+
+    from .EmbeddingModel import EmbeddingModel
+    from .PaperDatabase import PaperDatabase
+
+    worker = _worker_id()
+    listener = psycopg.connect(database_url, autocommit=True)
+    listener.execute(f"LISTEN {NOTIFY_CHANNEL}")
+    con = psycopg.connect(database_url)
+    register_vector(con)
+    try:
+        ensure_schema(con)
+        models = [EmbeddingModel(name) for name in queued_models()]
+        for model in models:
+            PaperDatabase.from_connection(con, model.backend).ensure_embedding_column()
+        logger.info(f"Embedder {worker} started for {', '.join(queued_models())}")
+        last_release = float("-inf")
+        while True:
+            if time.monotonic() - last_release >= STALE_AFTER_S / 4:
+                release_stale(con)
+                last_release = time.monotonic()
+            claimed = sum(embed_batch(con, m, batch_size, worker) for m in models)
+            if claimed:
+                continue
+            if once:
+                return
+            for _ in listener.notifies(timeout=poll_s, stop_after=1):
+                pass
+    finally:
+        con.close()
+        listener.close()
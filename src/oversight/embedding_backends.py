@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import functools
+import os
+import re
+from dataclasses import dataclass
+from typing import LiteralString
+
+from psycopg import sql
+
+# The embedding models oversight can run, and what the rest of the code
+# needs to know about each without loading it: vector dimension, the
+# ``embedding`` column its vectors live in, and how to pace document
+# embedding (texts per provider call, input budget, rate limit).
+#
+# OVERSIGHT_EMBEDDING_MODEL picks the model for every pipeline: sync,
+# consume, digest, search and the API servers. The default is Gemini:
+#
+#   models/gemini-embedding-001  Google API, 3072-d (needs GOOGLE_API_KEY)
+#   fake/hash-<dim>              deterministic SHA-1-seeded unit vectors,
+#                                no network, for tests and benchmarks;
+#                                fake/hash-3072 has Gemini's dimension but
+#                                its own column, so it can never overwrite
+#                                real vectors
+#   local/<name>                 sentence-transformers model on the CPU
+#                                (pip install 'oversight[local]'), one of
+#                                LOCAL_MODELS
+#
+# Vectors are stored as halfvec(dim) with a cosine HNSW index, one column
+# per model, so switching models never mixes vectors of different spaces.
+# PaperDatabase.ensure_embedding_column adds a model's column on first use.
+#
+# OVERSIGHT_SHADOW_EMBEDDING_MODEL names a second model to migrate to
+# without downtime; see embedding_spaces.py.
+
+DEFAULT_MODEL = "models/gemini-embedding-001"
+GEMINI_COLUMN = "embedding_gemini_embedding_001"
+
+# name -> (Hugging Face model id, dimension, max input tokens)
+LOCAL_MODELS = {
+    "all-MiniLM-L6-v2": ("sentence-transformers/all-MiniLM-L6-v2", 384, 256),
+    "bge-small-en-v1.5": ("BAAI/bge-small-en-v1.5", 384, 512),
+}
+
+
+@dataclass(frozen=True)
+class EmbeddingBackend:
+    """Static description of one embedding model (see EmbeddingModel for
+    the model itself)."""
+
+    name: str
+    kind: str  # "gemini", "hash" or "local"
+    dim: int
+    column: str
+    batch_size: int  # texts per provider call
+    max_tokens: int  # longer texts are clipped before embedding
+    max_requests_per_minute: int | None  # None: not rate limited
+    model_id: str | None = None  # the Hugging Face id of a local model
+
+    @property
+    def vector_type(self) -> sql.Composed:
+        return sql.SQL("halfvec({})").format(sql.Literal(self.dim))
+
+    @property
+    def index_name(self) -> str:
+        """The HNSW index oversight creates on ``column``."""
+        return f"{self.column}_hnsw_idx"
+
+    def sql(self, template: LiteralString, **parts: sql.Composable) -> sql.Composed:
+        """``template`` with ``{vec_col}`` (this model's column),
+        ``{vec_type}`` (its halfvec type) and ``{vec_index}`` (its HNSW
+        index) filled in, plus any ``parts``."""
+        if not parts:
+            return _format(template, self)
+        return sql.SQL(template).format(**self._names(), **parts)
+
+    def _names(self) -> dict[str, sql.Composable]:
+        return {
+            "vec_col": sql.Identifier(self.column),
+            "vec_type": self.vector_type,
+            "vec_index": sql.Identifier(self.index_name),
+        }
+
+
+@functools.cache
+def _format(template: LiteralString, backend: EmbeddingBackend) -> sql.Composed:
+    # Read-path SQL is formatted once per (query, model), not per request.
+    return sql.SQL(template).format(**backend._names())
+
+
+GEMINI = EmbeddingBackend(
+    name=DEFAULT_MODEL,
+    kind="gemini",
+    dim=3072,
+    column=GEMINI_COLUMN,
+    # One text per HTTP request under the hood (langchain fans the batch
+    # out); ~25s per 1000 texts, far below the quota.
+    batch_size=10,
+    max_tokens=int(2048 * 0.75),  # the longest abstract is 558 tokens
+    # https://cloud.google.com/vertex-ai/docs/quotas#model-region-quotas
+    max_requests_per_minute=int(100_000 * 0.75),
+)
+
+
+def _column_for(name: str) -> str:
+    return "embedding_" + re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+@functools.cache
+def get_backend(name: str) -> EmbeddingBackend:
+    if name == DEFAULT_MODEL:
+        return GEMINI
+    if m := re.fullmatch(r"fake/hash-(\d+)", name):
+        dim = int(m.group(1))
+        return EmbeddingBackend(
+            name=name,
+            kind="hash",
+            dim=dim,
+            column=_column_for(name),
+            batch_size=100,
+            max_tokens=GEMINI.max_tokens,
+            max_requests_per_minute=None,
+        )
+    if name.startswith("local/") and name.removeprefix("local/") in LOCAL_MODELS:
+        model_id, dim, max_tokens = LOCAL_MODELS[name.removeprefix("local/")]
+        return EmbeddingBackend(
+            name=name,
+            kind="local",
+            dim=dim,
+            column=_column_for(name.removeprefix("local/")),
+            batch_size=32,
+            max_tokens=max_tokens,
+            max_requests_per_minute=None,
+            model_id=model_id,
+        )
+    raise ValueError(f"Model {name} not supported")
+
+
+def configured_model_name() -> str:
+    return os.getenv("OVERSIGHT_EMBEDDING_MODEL", DEFAULT_MODEL)
+
+
+def configured_backend() -> EmbeddingBackend:
+    """The backend selected by OVERSIGHT_EMBEDDING_MODEL."""
+    return get_backend(configured_model_name())
+
+
+def configured_shadow_model_name() -> str | None:
+    return os.getenv("OVERSIGHT_SHADOW_EMBEDDING_MODEL") or None
+
+
+def configured_shadow_backend() -> EmbeddingBackend | None:
+    """The backend selected by OVERSIGHT_SHADOW_EMBEDDING_MODEL, if any."""
+    name = configured_shadow_model_name()
+    if name is None:
+        return None
+    shadow = get_backend(name)
+    if shadow.column == configured_backend().column:
+        raise ValueError(
+            f"shadow model {name} shares its column with {configured_model_name()}"
+        )
+    return shadow
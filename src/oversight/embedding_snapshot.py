@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import psycopg
+
+from .embedding_backends import configured_backend
+
+# Append-only, memory-mappable copy of every (paper_id, embedding) pair, so
+# offline jobs (projections, similarity sampling, kNN/clustering
+# experiments) read vectors from disk instead of each re-streaming ~3 GB
+# of halfvecs out of Postgres. Layout:
+#
+#   <OVERSIGHT_EMBEDDING_SNAPSHOT_DIR>/
+#       manifest.json     {"version", "rows", "dim", "dtype", "column", ...}
+#       embeddings.f16    raw little-endian float16, shape (rows, dim)
+#       paper_ids.txt     one paper_id per line, row-aligned
+#
+# Raw float16 rather than .npy because a .npy header bakes in the shape and
+# would have to be rewritten on every append. Only the manifest defines
+# what a reader sees: data is appended first, then the manifest is
+# atomically replaced, so readers mapping ``rows`` rows are never affected
+# by a concurrent append and a crashed append is truncated away next run.
+# The snapshot holds the configured model's column (OVERSIGHT_EMBEDDING_MODEL);
+# switching models rebuilds it.
+DEFAULT_SNAPSHOT_DIR = "data/embedding_snapshot"
+MANIFEST_NAME = "manifest.json"
+EMBEDDINGS_NAME = "embeddings.f16"
+IDS_NAME = "paper_ids.txt"
+DTYPE = np.dtype("<f2")
+WRITE_CHUNK = 10_000
+
+
+def snapshot_dir() -> Path:
+    return Path(os.getenv("OVERSIGHT_EMBEDDING_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR))
+
+
+class EmbeddingSnapshot:
+    """Read-only view of an embedding snapshot.
+
+    ``embeddings`` is a read-only ``np.memmap`` of shape ``(rows, dim)``
+    (float16), so opening a snapshot costs a manifest read and an mmap;
+    pages are faulted in from the page cache as rows are touched and shared
+    between every process that opens the same snapshot.
+    """
+
+    def __init__(self, directory: Path, manifest: dict[str, Any]) -> None:
+        self.directory = directory
+        self.version = int(manifest["version"])
+        self.rows = int(manifest["rows"])
+        self.dim = int(manifest["dim"])
+        self.column = str(manifest["column"])
+        self.embeddings: np.ndarray = (
+            np.memmap(
+                directory / EMBEDDINGS_NAME,
+                dtype=DTYPE,
+                mode="r",
+                shape=(self.rows, self.dim),
+            )
+            if self.rows
+            else np.empty((0, self.dim), dtype=DTYPE)
+        )
+        self._paper_ids: list[str] | None = None
+        self._index: dict[str, int] | None = None
+
+    @classmethod
+    def open(cls, directory: Path | None = None) -> EmbeddingSnapshot | None:
+        directory = directory if directory is not None else snapshot_dir()
+        manifest = _read_manifest(directory)
+        if manifest is None:
+            return None
+        return cls(directory, manifest)
+
+    @property
+    def embeddings_path(self) -> Path:
+        return self.directory / EMBEDDINGS_NAME
+
+    @property
+    def paper_ids(self) -> list[str]:
+        if self._paper_ids is None:
+            self._paper_ids = _read_ids(self.directory / IDS_NAME, self.rows)
+        return self._paper_ids
+
+    def index_of(self, paper_id: str) -> int | None:
+        if self._index is None:
+            self._index = {pid: i for i, pid in enumerate(self.paper_ids)}
+        return self._index.get(paper_id)
+
+    def vectors_for(self, paper_ids: list[str]) -> tuple[list[str], np.ndarray]:
+        """Return ``(found_ids, float32 rows)`` for the ids present in the snapshot."""
+        found = [(pid, i) for pid in paper_ids if (i := self.index_of(pid)) is not None]
+        rows = np.array([i for _, i in found], dtype=np.int64)
+        return [pid for pid, _ in found], self.embeddings[rows].astype(np.float32)
+
+    def sample_pairwise_similarities(
+        self, n: int, seed: int | None = None
+    ) -> list[float]:
+        """Cosine similarity of ``n`` random pairs of distinct rows.
+
+        Snapshot-backed twin of ``PaperDatabase.sample_pairwise_similarities``.
+        """
+        if n <= 0 or self.rows < 2:
+            return []
+        rng = np.random.default_rng(seed)
+        picks = rng.choice(self.rows, size=min(2 * n, self.rows), replace=False)
+        picks = picks[: len(picks) // 2 * 2]
+        order = np.argsort(picks)
+        vecs = np.empty((len(picks), self.dim), dtype=np.float32)
+        vecs[order] = self.embeddings[picks[order]]
+        vecs /= np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12)
+        sims = np.einsum("ij,ij->i", vecs[0::2], vecs[1::2])
+        return [float(s) for s in sims]
+
+
+def _read_manifest(directory: Path) -> dict[str, Any] | None:
+    try:
+        with open(directory / MANIFEST_NAME, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _read_ids(path: Path, rows: int) -> list[str]:
+    ids: list[str] = []
+    if rows == 0:
+        return ids
+    with open(path, "r") as f:
+        for line in f:
+            ids.append(line.rstrip("\n"))
+            if len(ids) == rows:
+                break
+    assert len(ids) == rows, f"{path} has {len(ids)} ids, manifest says {rows}"
+    return ids
+
+
+def _truncate_to_manifest(directory: Path, rows: int, dim: int) -> None:
+    """Drop bytes / lines past ``rows`` left behind by a crashed append."""
+    emb_path = directory / EMBEDDINGS_NAME
+    ids_path = directory / IDS_NAME
+    if emb_path.exists():
+        with open(emb_path, "r+b") as f:
+            f.truncate(rows * dim * DTYPE.itemsize)
+    if ids_path.exists():
+        ids = _read_ids(ids_path, rows)
+        with open(ids_path, "w") as f:
+            f.writelines(f"{pid}\n" for pid in ids)
+
+
+def _decode_halfvec(data: bytes) -> np.ndarray:
+    # halfvec binary send format: int16 dim, int16 unused, then dim
+    # big-endian float16 values.
+    return np.frombuffer(data, dtype=">f2", offset=4)
+
+
+def update_snapshot(database_url: str, full: bool = False) -> EmbeddingSnapshot:
+    """Append every embedded paper not yet in the snapshot (or rebuild it).
+
+    New rows are found by diffing the id index against ``embedding``, then
+    pulled with a single binary ``COPY ... TO STDOUT`` joined against a
+    temp table of those ids, decoding the halfvec wire format straight
+    into float16 without a per-row pgvector object.
+
+    Papers whose embedding was reset and recomputed keep their old vector
+    until a ``full`` rebuild (``oversight snapshot --full``).
+    """
+    backend = configured_backend()
+    dim = backend.dim
+    directory = snapshot_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = _read_manifest(directory)
+    if manifest is not None and manifest["column"] != backend.column:
+        print(
+            f"[snapshot] snapshot holds {manifest['column']}, the model stores "
+            f"{backend.column}; rebuilding",
+            flush=True,
+        )
+        full = True
+    if full or manifest is None:
+        # Drop the manifest first so readers fall back to the database
+        # rather than mapping a half-rebuilt file. Unlinking the data files
+        # leaves existing mappings of the old inodes intact.
+        version = int(manifest["version"]) if manifest is not None else 0
+        manifest = {"version": version, "rows": 0, "dim": dim, "column": backend.column}
+        for name in (MANIFEST_NAME, EMBEDDINGS_NAME, IDS_NAME):
+            (directory / name).unlink(missing_ok=True)
+    _truncate_to_manifest(directory, int(manifest["rows"]), int(manifest["dim"]))
+    known = set(_read_ids(directory / IDS_NAME, int(manifest["rows"])))
+
+    with psycopg.connect(database_url) as con:
+        with con.cursor() as cur:
+            embedded = cur.execute(
+                backend.sql(
+                    """
+                    SELECT paper_id FROM embedding
+                    WHERE {vec_col} IS NOT NULL
+                    """
+                )
+            ).fetchall()
+        new_ids = [pid for (pid,) in embedded if pid not in known]
+        del embedded
+        print(
+            f"[snapshot] {len(known):,} rows in snapshot v{manifest['version']}, "
+            f"{len(new_ids):,} to append",
+            flush=True,
+        )
+        if not new_ids:
+            return EmbeddingSnapshot(directory, manifest)
+
+        with con.cursor() as cur:
+            cur.execute("CREATE TEMP TABLE snapshot_new_ids (paper_id varchar)")
+            with cur.copy("COPY snapshot_new_ids (paper_id) FROM STDIN") as copy:
+                for pid in new_ids:
+                    copy.write_row((pid,))
+
+        appended = 0
+        with (
+            open(directory / EMBEDDINGS_NAME, "ab") as emb_f,
+            open(directory / IDS_NAME, "a") as ids_f,
+            con.cursor() as cur,
+            cur.copy(
+                backend.sql(
+                    """
+                    COPY (
+                        SELECT e.paper_id, e.{vec_col}
+                        FROM embedding e
+                        JOIN snapshot_new_ids n ON n.paper_id = e.paper_id
+                        WHERE e.{vec_col} IS NOT NULL
+                    ) TO STDOUT (FORMAT BINARY)
+                    """
+                )
+            ) as copy,
+        ):
+            # bytea gives the raw halfvec send bytes without needing
+            # pgvector's loaders registered on this connection.
+            copy.set_types(["varchar", "bytea"])
+            buf = np.empty((WRITE_CHUNK, dim), dtype=DTYPE)
+            ids_buf: list[str] = []
+            for pid, data in copy.rows():
+                vec = _decode_halfvec(data)
+                assert len(vec) == dim, f"{pid}: expected {dim} dims, got {len(vec)}"
+                buf[len(ids_buf)] = vec
+                ids_buf.append(pid)
+                if len(ids_buf) == WRITE_CHUNK:
+                    emb_f.write(buf.tobytes())
+                    ids_f.writelines(f"{p}\n" for p in ids_buf)
+                    appended += len(ids_buf)
+                    ids_buf = []
+            if ids_buf:
+                emb_f.write(buf[: len(ids_buf)].tobytes())
+                ids_f.writelines(f"{p}\n" for p in ids_buf)
+                appended += len(ids_buf)
+            emb_f.flush()
+            ids_f.flush()
+            os.fsync(emb_f.fileno())
+            os.fsync(ids_f.fileno())
+
+    manifest = {
+        "version": int(manifest["version"]) + 1,
+        "rows": int(manifest["rows"]) + appended,
+        "dim": dim,
+        "dtype": DTYPE.str,
+        "column": backend.column,
+        "updated_at": datetime.now().isoformat(),
+    }
+    manifest_path = directory / MANIFEST_NAME
+    with open(f"{manifest_path}.tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+    print(
+        f"[snapshot] appended {appended:,} rows -> v{manifest['version']} "
+        f"({manifest['rows']:,} rows) in {directory}",
+        flush=True,
+    )
+    return EmbeddingSnapshot(directory, manifest)
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import psycopg
+from psycopg import sql
+
+from .embedding_backends import (
+    EmbeddingBackend,
+    configured_backend,
+    configured_shadow_backend,
+)
+from .PaperDatabase import EMBEDDING_COLUMN_EXISTS_SQL, PaperDatabase
+from .utils import get_logger, tqdm
+from .vector_indexes import configure_build
+
+# Zero-downtime migration between embedding models. Every model's vectors
+# live in a column of their own (embedding_backends.py), so a new model's
+# space can be filled next to the one search is serving:
+#
+# 1. Set OVERSIGHT_SHADOW_EMBEDDING_MODEL to the new model everywhere.
+#    Ingestion then queues new papers for the shadow model too, and the
+#    embedders fill its column right after the primary's (embed_queue.py).
+# 2. `oversight embeddings backfill` (or a "backfill" job) embeds every
+#    older paper into the shadow column, in paper_id order, committing per
+#    batch and throttled by --max-per-minute, so it can run for hours next
+#    to live traffic and resume after an interruption. It then builds the
+#    shadow HNSW index with CREATE INDEX CONCURRENTLY.
+# 3. Every API process re-checks the shadow's coverage every
+#    OVERSIGHT_SHADOW_CHECK_S seconds. Once the shadow holds a vector for
+#    every paper the primary does and its index is valid, search flips to
+#    it. Requests can pin either space with "model" at any time, e.g. to
+#    compare results before the flip; a shadow that isn't complete yet is
+#    refused rather than served with holes.
+# 4. Make it permanent by moving the shadow model to
+#    OVERSIGHT_EMBEDDING_MODEL and unsetting the shadow. The old column can
+#    be dropped once nothing reads it.
+#
+# Coverage is derived from the columns themselves rather than tracked in a
+# table, so it can't drift from what search would actually find.
+
+logger = get_logger()
+
+# How often an API process re-checks the shadow's coverage until it flips.
+CHECK_INTERVAL_S = float(os.getenv("OVERSIGHT_SHADOW_CHECK_S", "60"))
+
+# Papers embedded and committed per backfill batch.
+BACKFILL_BATCH = 500
+
+# {vec_col}: the primary's column; {shadow_col}: the shadow's.
+COVERAGE_SQL = """
+    SELECT count({shadow_col}), count(*)
+    FROM embedding
+    WHERE {vec_col} IS NOT NULL
+"""
+
+# Keyset on paper_id, so each batch starts where the last one ended instead
+# of rescanning the rows it just filled.
+BACKFILL_BATCH_SQL = """
+    SELECT e.paper_id, p.abstract
+    FROM embedding AS e
+    JOIN paper AS p ON p.paper_id = e.paper_id
+    WHERE e.{vec_col} IS NOT NULL
+      AND e.{shadow_col} IS NULL
+      AND e.paper_id > %s
+    ORDER BY e.paper_id
+    LIMIT %s
+"""
+
+# {vec_col} / {vec_type}: the shadow's.
+BACKFILL_UPDATE_SQL = """
+    UPDATE embedding SET {vec_col} = %s::{vec_type}
+    WHERE paper_id = %s
+"""
+
+INDEX_VALID_SQL = "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)"
+
+# Unlike EMBEDDING_INDEX_DDL this doesn't block writes while it builds,
+# but can't run in a transaction.
+CONCURRENT_INDEX_DDL = """
+    CREATE INDEX CONCURRENTLY {vec_index} ON embedding
+    USING hnsw ({vec_col} halfvec_cosine_ops)
+"""
+
+
+class SpaceUnavailable(ValueError):
+    """A request pinned a model whose space can't be searched (yet)."""
+
+
+@dataclass(frozen=True)
+class Coverage:
+    """How much of the primary's space a shadow model has filled."""
+
+    model: str
+    embedded: int
+    total: int
+    index_valid: bool
+
+    @property
+    def missing(self) -> int:
+        return self.total - self.embedded
+
+    @property
+    def complete(self) -> bool:
+        """Searchable without holes: every vector there, index built."""
+        return self.missing == 0 and self.index_valid
+
+    def __str__(self) -> str:
+        percent = 100 * self.embedded / self.total if self.total else 100.0
+        index = "valid" if self.index_valid else "not built"
+        return (
+            f"{self.model}: {self.embedded:,} of {self.total:,} papers "
+            f"({percent:.1f}%), HNSW index {index}"
+        )
+
+
+def _index_valid(con: psycopg.Connection[Any], backend: EmbeddingBackend) -> bool:
+    row = con.execute(INDEX_VALID_SQL, [backend.index_name]).fetchone()
+    return row is not None and bool(row[0])
+
+
+def coverage(
+    con: psycopg.Connection[Any],
+    primary: EmbeddingBackend,
+    shadow: EmbeddingBackend,
+) -> Coverage:
+    if con.execute(EMBEDDING_COLUMN_EXISTS_SQL, [shadow.column]).fetchone() is None:
+        row = con.execute(
+            primary.sql("SELECT count(*) FROM embedding WHERE {vec_col} IS NOT NULL")
+        ).fetchone()
+        return Coverage(shadow.name, 0, row[0], False)
+    embedded, total = con.execute(
+        primary.sql(COVERAGE_SQL, shadow_col=sql.Identifier(shadow.column))
+    ).fetchone()
+    return Coverage(shadow.name, embedded, total, _index_valid(con, shadow))
+
+
+def backfill(
+    con: psycopg.Connection[Any],
+    primary: EmbeddingBackend,
+    shadow: EmbeddingBackend,
+    batch_size: int = BACKFILL_BATCH,
+    max_per_minute: float | None = None,
+) -> int:
+    """Embed into ``shadow``'s column every paper that has a ``primary``
+    vector but no ``shadow`` one; returns how many.
+
+    Commits after every batch, so an interrupted run loses at most one
+    batch and the next run carries on from there. ``max_per_minute`` caps
+    papers per minute on top of the model's own rate limit, to leave
+    provider quota and database headroom for live traffic.
+    """
+    from .EmbeddingModel import EmbeddingModel
+
+    # The index is built once at the end (build_index): cheaper than
+    # growing the graph row by row, and nothing searches the shadow yet.
+    PaperDatabase.from_connection(con, shadow).ensure_embedding_column(index=False)
+    remaining = coverage(con, primary, shadow).missing
+    con.commit()
+    if remaining == 0:
+        return 0
+
+    model = EmbeddingModel(shadow.name)
+    select = primary.sql(BACKFILL_BATCH_SQL, shadow_col=sql.Identifier(shadow.column))
+    update = shadow.sql(BACKFILL_UPDATE_SQL)
+    filled = 0
+    after = ""
+    with tqdm(total=remaining, desc=f"Backfilling {shadow.name}") as progress:
+        while True:
+            started = time.monotonic()
+            rows = con.execute(select, [after, batch_size]).fetchall()
+            # Don't sit idle in a transaction while the provider works.
+            con.commit()
+            if not rows:
+                break
+            vectors = model.embed_documents_rate_limited(
+                [abstract for _, abstract in rows]
+            )
+            with con.cursor() as cur:
+                cur.executemany(
+                    update,
+                    [(v, paper_id) for (paper_id, _), v in zip(rows, vectors)],
+                )
+            con.commit()
+            after = rows[-1][0]
+            filled += len(rows)
+            progress.update(len(rows))
+            if max_per_minute:
+                pause = 60 * len(rows) / max_per_minute - (time.monotonic() - started)
+                if pause > 0:
+                    time.sleep(pause)
+    return filled
+
+
+def build_index(database_url: str, backend: EmbeddingBackend) -> None:
+    """Build ``backend``'s HNSW index without blocking writes, with memory
+    for the whole graph and parallel workers (see vector_indexes.py).
+
+    An interrupted concurrent build leaves an invalid index behind; it's
+    dropped and rebuilt.
+    """
+    with psycopg.connect(database_url, autocommit=True) as con:
+        row = con.execute(INDEX_VALID_SQL, [backend.index_name]).fetchone()
+        if row is not None and row[0]:
+            return
+        if row is not None:
+            logger.warning(f"Dropping invalid index {backend.index_name}")
+            con.execute(backend.sql("DROP INDEX CONCURRENTLY {vec_index}"))
+        logger.info(f"Building {backend.index_name}")
+        configure_build(con, backend.column)
+        con.execute(backend.sql(CONCURRENT_INDEX_DDL))
+
+
+def migrate(
+    database_url: str,
+    batch_size: int = BACKFILL_BATCH,
+    max_per_minute: float | None = None,
+) -> Coverage:
+    """Backfill the configured shadow model and build its index; returns
+    the coverage afterwards."""
+    primary = configured_backend()
+    shadow = configured_shadow_backend()
+    assert shadow is not None, "OVERSIGHT_SHADOW_EMBEDDING_MODEL is not set"
+    with psycopg.connect(database_url) as con:
+        filled = backfill(con, primary, shadow, batch_size, max_per_minute)
+    logger.info(f"Embedded {filled} papers into {shadow.name}")
+    build_index(database_url, shadow)
+    with psycopg.connect(database_url) as con:
+        return coverage(con, primary, shadow)
+
+
+class SearchSpaces:
+    """The spaces an API process searches: the primary model's and, during
+    a migration, the shadow's.
+
+    ``serving`` is the primary until a check finds the shadow complete,
+    then the shadow for the rest of the process's life, so a paper that
+    is briefly missing its shadow vector mid-sync can't flip search back.
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        primary: EmbeddingBackend | None = None,
+        shadow: EmbeddingBackend | None = None,
+        check_interval_s: float = CHECK_INTERVAL_S,
+    ) -> None:
+        self.database_url = database_url
+        self.primary = primary if primary is not None else configured_backend()
+        self.shadow = shadow if shadow is not None else configured_shadow_backend()
+        self.check_interval_s = check_interval_s
+        self.shadow_ready = False
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    @property
+    def serving(self) -> EmbeddingBackend:
+        if self.shadow is not None and self.shadow_ready:
+            return self.shadow
+        return self.primary
+
+    def check_due(self) -> bool:
+        return (
+            self.shadow is not None
+            and not self.shadow_ready
+            and time.monotonic() - self._checked_at >= self.check_interval_s
+        )
+
+    def check(self) -> None:
+        """Re-check the shadow's coverage if due; blocks on one query."""
+        with self._lock:
+            if not self.check_due():
+                return
+            assert self.shadow is not None
+            self._checked_at = time.monotonic()
+            try:
+                with psycopg.connect(self.database_url, connect_timeout=5) as con:
+                    covered = coverage(con, self.primary, self.shadow)
+            except psycopg.Error as e:
+                logger.warning(f"Could not check {self.shadow.name} coverage: {e}")
+                return
+            if covered.complete:
+                logger.info(f"Search now serves {self.shadow.name} ({covered})")
+                self.shadow_ready = True
+
+    def backend(self, model: str | None = None) -> EmbeddingBackend:
+        """The space for a request pinning ``model`` (None: ``serving``)."""
+        if model is None:
+            return self.serving
+        if model == self.primary.name:
+            return self.primary
+        if self.shadow is not None and model == self.shadow.name:
+            if not self.shadow_ready:
+                raise SpaceUnavailable(f"model {model} is still being backfilled")
+            return self.shadow
+        raise SpaceUnavailable(f"model {model} is not available")
@@ -1,23 +1,54 @@
 from __future__ import annotations
 
-from datetime import date, timedelta
+import dataclasses
+from datetime import timedelta
 import json
 import os
 import threading
 from typing import Any
 
 import psycopg
-from flask import Flask, Response, request, stream_with_context
+from flask import Flask, Response, request, send_file, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 from pgvector.psycopg import register_vector
-from psycopg import sql
 
-from .Paper import Paper
-from .PaperDatabase import PaperDatabase
+from . import atlas_snapshot, jobs, metrics, slow_queries
+from .api_common import (
+    AtlasParams,
+    BadRequest,
+    atlas_bbox_query,
+    atlas_header,
+    atlas_point,
+    atlas_query,
+    batch_backend,
+    composite_results,
+    composite_vectors,
+    embedding_model_name,
+    job_accepted,
+    next_conference_dates,
+    parse_atlas_args,
+    parse_composite_search,
+    parse_neighbors_args,
+    parse_search,
+    parse_search_batch,
+    parse_suggest_args,
+    search_backend,
+    search_body_from_args,
+    search_page,
+    serialize_paper,
+    serialize_suggestion,
+    similarity_percentiles,
+)
+from .EmbeddingBatcher import EmbeddingBatcher
+from .EmbeddingModel import EmbeddingModel
+from .embedding_backends import EmbeddingBackend
+from .embedding_spaces import SearchSpaces
+from .embedding_snapshot import EmbeddingSnapshot
+from .hnsw_tuning import tuned_ef_search
+from .Paper import PaperResult
+from .PaperDatabase import KnnSearch, PaperDatabase
 from .PaperRepository import PaperRepository
-from .ArXivRepository import ArXivRepository
-from .ResearchListener import research_listener_group
 
 # Load environment variables early so repo/db can connect
 load_dotenv()
@@ -27,34 +58,21 @@ app = Flask(__name__)
 cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
 CORS(app, resources={r"/api/*": {"origins": cors_origins}})
 
+if metrics.ENABLED:
+    app.wsgi_app = metrics.WSGIMetricsMiddleware(app.wsgi_app)  # type: ignore[method-assign]
 
-# Every valid `source` value the search API recognises. The frontend
-# groups these visually (AI / Systems / PL) but the backend doesn't
-# care about the grouping — a flat list is all the filter needs.
-KNOWN_CONFERENCES: list[str] = [
-    "ICML",
-    "NeurIPS",
-    "ICLR",
-    "OSDI",
-    "SOSP",
-    "ASPLOS",
-    "ATC",
-    "NSDI",
-    "MLSys",
-    "EuroSys",
-    "VLDB",
-    "POPL",
-    "PLDI",
-    "ICFP",
-    "OOPSLA",
-    "ESOP",
-    "ECOOP",
-    "CC",
-    "Haskell",
-]
-KNOWN_SOURCES: list[str] = ["arxiv", *KNOWN_CONFERENCES]
+    @app.before_request
+    def _label_request_endpoint() -> None:
+        # Label by view function, not path: /api/papers/<id> is one series.
+        request.environ[metrics.ENDPOINT_ENVIRON_KEY] = request.endpoint or "unmatched"
 
 
+_query_batcher_lock = threading.Lock()
+_query_batchers: dict[str, EmbeddingBatcher] = {}
+
+_search_spaces_lock = threading.Lock()
+_search_spaces: SearchSpaces | None = None
+
 _neighbors_conn_lock = threading.Lock()
 _neighbors_conn: psycopg.Connection[tuple[Any, ...]] | None = None
 
@@ -80,23 +98,61 @@ def _get_neighbors_connection() -> psycopg.Connection[tuple[Any, ...]]:
         assert database_url is not None, "Database URL is not set"
         _neighbors_conn = psycopg.connect(database_url, autocommit=True)
         register_vector(_neighbors_conn)
+        slow_queries.instrument(_neighbors_conn)
     return _neighbors_conn
 
 
+def _get_query_batcher(backend: EmbeddingBackend) -> EmbeddingBatcher:
+    """Return the process-wide query-embedding batcher for ``backend``'s model.
+
+    Shared by every request thread so concurrent searches coalesce into
+    batched provider calls instead of one ``embed_query`` round-trip each.
+    """
+    with _query_batcher_lock:
+        batcher = _query_batchers.get(backend.name)
+        if batcher is None:
+            batcher = EmbeddingBatcher.from_env(EmbeddingModel(backend.name))
+            _query_batchers[backend.name] = batcher
+            prefix = "oversight_embed"
+            if backend.name != embedding_model_name():
+                prefix += "_shadow"
+            metrics.REGISTRY.export_counters(prefix, batcher.stats)
+        return batcher
+
+
+def _get_search_spaces() -> SearchSpaces:
+    """Return the process-wide SearchSpaces, after the shadow coverage
+    check if one is due (see embedding_spaces.py)."""
+    global _search_spaces
+    with _search_spaces_lock:
+        if _search_spaces is None:
+            database_url = os.getenv("DATABASE_URL")
+            assert database_url is not None, "Database URL is not set"
+            _search_spaces = SearchSpaces(database_url)
+    if _search_spaces.check_due():
+        _search_spaces.check()
+    return _search_spaces
+
+
+@app.errorhandler(BadRequest)
+def bad_request(e: BadRequest) -> tuple[dict[str, str], int]:
+    return e.payload()
+
+
 @app.get("/api/health")
 def health() -> tuple[dict[str, str], int]:
     return {"status": "ok"}, 200
 
 
-def _build_filters(
-    repo: PaperRepository, sources_flags: dict[str, bool]
-) -> list[sql.Composable]:
-    selected = [src for src in KNOWN_SOURCES if sources_flags.get(src, False)]
-    # If the caller didn't pick any sources, treat that as "I want everything"
-    # rather than "I want zero rows back".
-    if not selected:
-        selected = KNOWN_SOURCES
-    return [repo.build_filter_sql(selected)]
+@app.get("/api/metrics")
+def prometheus_metrics() -> Any:
+    """Request, span and counter metrics in Prometheus text format.
+
+    404 unless the process was started with OVERSIGHT_METRICS=1.
+    """
+    if not metrics.ENABLED:
+        return {"error": "metrics are disabled; set OVERSIGHT_METRICS=1"}, 404
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
 
 
 @app.post("/api/search")
@@ -105,98 +161,112 @@ def search() -> tuple[dict[str, Any], int]:
     body: dict[str, Any] = request.get_json(silent=True) or {}
     # Support query params for GET as well
     if request.method == "GET" and not body:
-        sources: dict[str, bool] = {
-            src: request.args.get(src, "false").lower() == "true"
-            for src in KNOWN_SOURCES
-        }
-        body = {
-            "text": request.args.get("text", ""),
-            "time_window_days": request.args.get("time_window_days"),
-            "sources": sources,
-        }
-
-    query_text_raw: Any = body.get("text", "")
-    assert isinstance(query_text_raw, str), "text must be a string"
-    query_text: str = query_text_raw.strip()
-    if not query_text:
-        return {"error": "text is required"}, 400
-
-    time_window_days = body.get("time_window_days")
-    try:
-        # Default to "all time" — anything older than the oldest paper in the
-        # corpus (POPL 1973). The frontend's slider exposes a finer scale; this
-        # default only kicks in for API clients that omit the field.
-        time_window_days_int = (
-            int(time_window_days) if time_window_days is not None else 36500
+        body = search_body_from_args(request.args)
+    params = parse_search(body)
+    backend = search_backend(_get_search_spaces(), params.model)
+    params = dataclasses.replace(params, model=backend.name)
+
+    embedding = _get_query_batcher(backend).embed_query(params.text)
+    with PaperDatabase(backend) as db:
+        rows = db.get_newest_papers(
+            embedding,
+            timedelta(days=params.time_window_days),
+            [PaperRepository.build_filter_sql(params.sources, params.categories)],
+            limit=params.limit,
+            ef_search=params.ef_search,
+            after=params.after,
         )
-    except Exception:
-        return {"error": "time_window_days must be an integer"}, 400
-
-    limit = body.get("limit")
-    try:
-        limit_int = int(limit) if limit is not None else 10
-        limit_int = max(1, min(100, limit_int))
-    except Exception:
-        return {"error": "limit must be an integer between 1 and 100"}, 400
-
-    ef_search = body.get("ef_search")
-    try:
-        ef_search_int = int(ef_search) if ef_search is not None else 50
-        ef_search_int = max(10, min(500, ef_search_int))
-    except Exception:
-        return {"error": "ef_search must be an integer between 10 and 500"}, 400
-
-    sources_flags: dict[str, bool] = body.get("sources") or {}
-
-    # Use repository in a context so connections are properly managed
-    with PaperRepository(embedding_model_name="models/gemini-embedding-001") as repo:
-        filters = _build_filters(repo, sources_flags)
-        papers = repo.get_newest_related_papers(
-            query_text,
-            timedelta(days=time_window_days_int),
-            filters,
-            limit=limit_int,
-            ef_search=ef_search_int,
+
+    return search_page(params, rows), 200
+
+
+@app.post("/api/search:batch")
+def search_batch() -> tuple[dict[str, Any], int]:
+    """Several searches in one request, answered in order as ``searches``.
+
+    The texts are submitted to the batcher together, so they go out as one
+    provider call, and the kNN queries run pipelined on one connection.
+    """
+    body: dict[str, Any] = request.get_json(silent=True) or {}
+    batch = parse_search_batch(body)
+    backend = batch_backend(_get_search_spaces(), batch)
+    batch = [dataclasses.replace(params, model=backend.name) for params in batch]
+
+    batcher = _get_query_batcher(backend)
+    futures = [batcher.submit(params.text) for params in batch]
+    with metrics.span("embed.query"):
+        embeddings = [future.result() for future in futures]
+    with PaperDatabase(backend) as db:
+        rows_per_query = db.get_newest_papers_many(
+            [
+                KnnSearch(
+                    embedding,
+                    timedelta(days=params.time_window_days),
+                    [
+                        PaperRepository.build_filter_sql(
+                            params.sources, params.categories
+                        )
+                    ],
+                    limit=params.limit,
+                    ef_search=params.ef_search,
+                    after=params.after,
+                )
+                for params, embedding in zip(batch, embeddings)
+            ]
         )
 
-    results = []
-    for p in papers:
-        results.append(
-            {
-                "paper_id": p.paper_id,
-                "title": p.title,
-                "abstract": p.abstract,
-                "source": p.source,
-                "link": p.link,
-                "authors": p.authors,
-                "institutions": p.institutions,
-                # paper_date is a datetime.date or datetime; convert to ISO string
-                "paper_date": p.paper_date.isoformat()
-                if hasattr(p.paper_date, "isoformat")
-                else str(p.paper_date),
-            }
+    return {
+        "searches": [
+            search_page(params, rows) for params, rows in zip(batch, rows_per_query)
+        ]
+    }, 200
+
+
+@app.post("/api/search:composite")
+def search_composite() -> tuple[dict[str, Any], int]:
+    """Papers matching several texts and/or seed papers at once (e.g. an
+    AND of two topics), scored in one pass; see parse_composite_search."""
+    body: dict[str, Any] = request.get_json(silent=True) or {}
+    params = parse_composite_search(body)
+    backend = search_backend(_get_search_spaces(), params.model)
+
+    batcher = _get_query_batcher(backend)
+    futures = [batcher.submit(text) for text, _ in params.texts]
+    seed_ids = [pid for pid, _ in params.paper_ids]
+    with metrics.span("embed.query"):
+        text_vectors = [future.result() for future in futures]
+    with PaperDatabase(backend) as db:
+        vectors = composite_vectors(params, text_vectors, db.get_embeddings(seed_ids))
+        rows = db.get_composite_papers(
+            vectors,
+            params.weights,
+            params.mode,
+            timedelta(days=params.time_window_days),
+            [PaperRepository.build_filter_sql(params.sources, params.categories)],
+            limit=params.limit,
+            ef_search=params.ef_search,
+            exclude=seed_ids,
         )
 
-    return {"results": results}, 200
+    return {"results": composite_results(rows)}, 200
+
 
+@app.get("/api/suggest")
+def suggest() -> tuple[dict[str, Any], int]:
+    """Title / author autocomplete from the lexical index; no embedding.
 
-def _serialize_paper(paper: Any, similarity: float | None = None) -> dict[str, Any]:
-    """Serialize a Paper object for JSON responses."""
-    out: dict[str, Any] = {
-        "paper_id": paper.paper_id,
-        "title": paper.title,
-        "abstract": paper.abstract,
-        "source": paper.source,
-        "link": paper.link,
-        "authors": paper.authors,
-        "institutions": paper.institutions,
-        "paper_date": paper.paper_date.isoformat()
-        if hasattr(paper.paper_date, "isoformat")
-        else str(paper.paper_date),
-    }
-    if similarity is not None:
-        out["similarity"] = similarity
-    return out
+    Query params:
+      q      the partially typed text
+      limit  int in [1, 20] (default 8)
+    """
+    q, limit = parse_suggest_args(request.args)
+    rows: list[tuple[Any, ...]] = []
+    if q:
+        # Per-keystroke traffic: reuse the shared connection like neighbors.
+        with _neighbors_conn_lock:
+            con = _get_neighbors_connection()
+            rows = PaperDatabase.from_connection(con).suggest(q, limit)
+    return {"suggestions": [serialize_suggestion(row) for row in rows]}, 200
 
 
 @app.get("/api/papers/<path:paper_id>/neighbors")
@@ -207,18 +277,7 @@ def paper_neighbors(paper_id: str) -> tuple[dict[str, Any], int]:
       k       int in [1, 50] (default 20)
       mutual  bool (default false). When true, restrict to mutual-kNN edges.
     """
-    k_raw = request.args.get("k", "20")
-    try:
-        k = int(k_raw)
-    except (TypeError, ValueError):
-        return {"error": "k must be an integer"}, 400
-    if k < 1 or k > 50:
-        return {"error": "k must be between 1 and 50"}, 400
-
-    mutual_raw = request.args.get("mutual", "false").strip().lower()
-    if mutual_raw not in {"true", "false", "1", "0", "yes", "no"}:
-        return {"error": "mutual must be a boolean"}, 400
-    mutual = mutual_raw in {"true", "1", "yes"}
+    k, mutual = parse_neighbors_args(request.args)
 
     # Skip the PaperRepository wrapper here: this endpoint does no embedding
     # work (the seed embedding is fetched from the DB), so loading the Google
@@ -227,24 +286,26 @@ def paper_neighbors(paper_id: str) -> tuple[dict[str, Any], int]:
     with _neighbors_conn_lock:
         con = _get_neighbors_connection()
         db = PaperDatabase.from_connection(con)
-        neighbor_pairs = db.find_neighbors(paper_id, k=k, mutual=mutual)
+        neighbor_pairs = db.find_neighbors(
+            paper_id, k=k, mutual=mutual, ef_search=tuned_ef_search("neighbors", 80)
+        )
         ids_to_fetch = [paper_id] + [pid for pid, _ in neighbor_pairs]
         rows = db.get_papers_by_ids(ids_to_fetch)
 
-    by_id = {row[2]: row for row in rows}
+    by_id = {row[0]: row for row in rows}
     if paper_id not in by_id:
         return {"error": f"paper {paper_id!r} not found"}, 404
 
-    seed_paper, _ = Paper.from_database_row(by_id[paper_id])
+    seed_paper, _ = PaperResult.from_row(by_id[paper_id])
     neighbors_out: list[dict[str, Any]] = []
     for pid, sim in neighbor_pairs:
         if pid not in by_id:
             continue  # very rare: paper deleted between the two queries
-        nb_paper, _ = Paper.from_database_row(by_id[pid])
-        neighbors_out.append(_serialize_paper(nb_paper, similarity=sim))
+        nb_paper, _ = PaperResult.from_row(by_id[pid])
+        neighbors_out.append(serialize_paper(nb_paper, similarity=sim))
 
     return {
-        "seed": _serialize_paper(seed_paper),
+        "seed": serialize_paper(seed_paper),
         "neighbors": neighbors_out,
     }, 200
 
@@ -267,52 +328,25 @@ def paper_detail(paper_id: str) -> tuple[dict[str, Any], int]:
     if not rows:
         return {"error": f"paper {paper_id!r} not found"}, 404
 
-    paper, _ = Paper.from_database_row(rows[0])
-    return _serialize_paper(paper), 200
+    paper, _ = PaperResult.from_row(rows[0])
+    return serialize_paper(paper), 200
 
 
-def _percentile(sorted_values: list[float], pct: float) -> float:
-    """Linear-interpolation percentile on an already-sorted list.
+def _compute_similarity_distribution(sample_size: int) -> dict[str, float]:
+    """Sample pairwise similarities and reduce them to a percentile dict.
 
-    ``pct`` is in [0, 100]. Mirrors numpy's default ("linear") method so
-    results match what a casual reader would expect, without pulling numpy
-    into the request path.
+    Samples from the on-disk embedding snapshot when one is present, which
+    avoids pulling 2*sample_size halfvecs through Postgres.
     """
-    n = len(sorted_values)
-    assert n > 0, "cannot compute percentile of empty list"
-    if n == 1:
-        return float(sorted_values[0])
-    rank = (pct / 100.0) * (n - 1)
-    lo = int(rank)
-    hi = min(lo + 1, n - 1)
-    frac = rank - lo
-    return float(sorted_values[lo] * (1 - frac) + sorted_values[hi] * frac)
-
-
-def _compute_similarity_distribution(sample_size: int) -> dict[str, float]:
-    """Sample pairwise similarities and reduce them to a percentile dict."""
-    with _neighbors_conn_lock:
-        con = _get_neighbors_connection()
-        db = PaperDatabase.from_connection(con)
-        sims = db.sample_pairwise_similarities(sample_size)
-    if not sims:
-        return {
-            "p50": 0.0,
-            "p90": 0.0,
-            "p95": 0.0,
-            "p99": 0.0,
-            "p99_5": 0.0,
-            "p99_9": 0.0,
-        }
-    sims.sort()
-    return {
-        "p50": _percentile(sims, 50),
-        "p90": _percentile(sims, 90),
-        "p95": _percentile(sims, 95),
-        "p99": _percentile(sims, 99),
-        "p99_5": _percentile(sims, 99.5),
-        "p99_9": _percentile(sims, 99.9),
-    }
+    snapshot = EmbeddingSnapshot.open()
+    if snapshot is not None and snapshot.rows >= 2:
+        sims = snapshot.sample_pairwise_similarities(sample_size)
+    else:
+        with _neighbors_conn_lock:
+            con = _get_neighbors_connection()
+            db = PaperDatabase.from_connection(con)
+            sims = db.sample_pairwise_similarities(sample_size)
+    return similarity_percentiles(sims)
 
 
 @app.get("/api/atlas")
@@ -340,95 +374,69 @@ def atlas() -> Any:
 
     The 1M cap leaves headroom over today's largest projection
     (pacmap_v1 at 524k) without exposing an unbounded SELECT.
+
+    Full-projection requests (no viewport, limit covering every point) are
+    served from the precompressed snapshot written by
+    ``oversight projections`` when one exists, with an ETag derived from the
+    projection's created_at so repeat visits revalidate to a 304.
     """
-    projection = request.args.get("projection", "").strip()
-    if not projection:
-        return {"error": "projection is required"}, 400
-
-    fmt = request.args.get("format", "json").strip().lower()
-    if fmt not in ("json", "ndjson"):
-        return {"error": "format must be 'json' or 'ndjson'"}, 400
-
-    limit_raw = request.args.get("limit", "1000000")
-    try:
-        limit = int(limit_raw)
-    except (TypeError, ValueError):
-        return {"error": "limit must be an integer"}, 400
-    if limit < 1 or limit > 1_000_000:
-        return {"error": "limit must be between 1 and 1_000_000"}, 400
-
-    viewport_raw = request.args.get("viewport")
-    viewport: tuple[float, float, float, float] | None = None
-    if viewport_raw:
-        parts = viewport_raw.split(",")
-        if len(parts) != 4:
-            return {"error": "viewport must be xmin,ymin,xmax,ymax"}, 400
-        try:
-            xmin, ymin, xmax, ymax = (float(p) for p in parts)
-        except ValueError:
-            return {"error": "viewport values must be floats"}, 400
-        viewport = (xmin, ymin, xmax, ymax)
-
-    if fmt == "ndjson":
-        return _atlas_ndjson(projection, viewport, limit)
+    params = parse_atlas_args(request.args)
+
+    if params.viewport is None:
+        snapshot = atlas_snapshot.load_current_snapshot(params.projection)
+        if snapshot is not None and params.limit >= snapshot.count:
+            return _atlas_snapshot_response(snapshot, params.fmt)
+
+    if params.fmt == "ndjson":
+        return _atlas_ndjson(params)
 
     # Reuse the neighbors connection: this endpoint is read-only and the
     # ~25ms connect + register_vector cost dominates at small payloads.
-    with _neighbors_conn_lock:
+    query, query_params = atlas_query(params)
+    with _neighbors_conn_lock, metrics.span("db.atlas"):
         con = _get_neighbors_connection()
         with con.cursor() as cur:
-            if viewport is not None:
-                rows = cur.execute(
-                    """
-                    SELECT pp.paper_id, p.title, p.source, pp.x, pp.y
-                    FROM paper_projection_2d AS pp
-                    JOIN paper AS p ON p.paper_id = pp.paper_id
-                    WHERE pp.projection = %s
-                      AND pp.x BETWEEN %s AND %s
-                      AND pp.y BETWEEN %s AND %s
-                    ORDER BY pp.paper_id
-                    LIMIT %s
-                    """,
-                    [
-                        projection,
-                        viewport[0],
-                        viewport[2],
-                        viewport[1],
-                        viewport[3],
-                        limit,
-                    ],
-                ).fetchall()
-            else:
-                rows = cur.execute(
-                    """
-                    SELECT pp.paper_id, p.title, p.source, pp.x, pp.y
-                    FROM paper_projection_2d AS pp
-                    JOIN paper AS p ON p.paper_id = pp.paper_id
-                    WHERE pp.projection = %s
-                    ORDER BY pp.paper_id
-                    LIMIT %s
-                    """,
-                    [projection, limit],
-                ).fetchall()
-
-    points = [
-        {
-            "paper_id": pid,
-            "title": title,
-            "source": source,
-            "x": float(x),
-            "y": float(y),
-        }
-        for (pid, title, source, x, y) in rows
-    ]
-    return {"projection": projection, "count": len(points), "points": points}, 200
-
-
-def _atlas_ndjson(
-    projection: str,
-    viewport: tuple[float, float, float, float] | None,
-    limit: int,
+            rows = cur.execute(query, query_params).fetchall()
+    metrics.count_rows("db.atlas", len(rows))
+
+    with metrics.span("serialize.atlas"):
+        points = [atlas_point(row) for row in rows]
+    return {
+        "projection": params.projection,
+        "count": len(points),
+        "points": points,
+    }, 200
+
+
+def _atlas_snapshot_response(
+    snapshot: atlas_snapshot.AtlasSnapshot, fmt: str
 ) -> Response:
+    """Send a precompressed snapshot file, or 304 if the client's copy is current.
+
+    ``no-cache`` makes browsers revalidate on every load; the revalidation
+    itself is a manifest ``stat`` plus a header compare, no DB work.
+    """
+    encoding = atlas_snapshot.pick_encoding(request.accept_encodings)
+    etag = snapshot.etag(encoding)
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        mimetype = "application/x-ndjson" if fmt == "ndjson" else "application/json"
+        resp = send_file(
+            snapshot.path_for(fmt, encoding),
+            mimetype=mimetype,
+            conditional=False,
+            etag=False,
+        )
+        if encoding is not None:
+            resp.headers["Content-Encoding"] = encoding
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["Vary"] = "Accept-Encoding"
+    return resp
+
+
+def _atlas_ndjson(params: AtlasParams) -> Response:
     """Stream atlas points as NDJSON.
 
     Uses a fresh psycopg connection (not the shared _neighbors_conn) plus a
@@ -448,99 +456,18 @@ def _atlas_ndjson(
             # cursor so the client gets total + bbox in <100ms, well before
             # the streaming SELECT starts emitting rows.
             with con.cursor() as cur:
-                if viewport is not None:
-                    cur.execute(
-                        """
-                        SELECT COUNT(*), MIN(x), MAX(x), MIN(y), MAX(y)
-                        FROM paper_projection_2d
-                        WHERE projection = %s
-                          AND x BETWEEN %s AND %s
-                          AND y BETWEEN %s AND %s
-                        """,
-                        [
-                            projection,
-                            viewport[0],
-                            viewport[2],
-                            viewport[1],
-                            viewport[3],
-                        ],
-                    )
-                else:
-                    cur.execute(
-                        """
-                        SELECT COUNT(*), MIN(x), MAX(x), MIN(y), MAX(y)
-                        FROM paper_projection_2d
-                        WHERE projection = %s
-                        """,
-                        [projection],
-                    )
-                agg = cur.fetchone()
-
-            total = int(agg[0]) if agg is not None else 0
-            if agg is not None and agg[1] is not None:
-                bbox = [
-                    float(agg[1]),
-                    float(agg[3]),
-                    float(agg[2]),
-                    float(agg[4]),
-                ]
-            else:
-                bbox = [0.0, 0.0, 0.0, 0.0]
-
-            header = {"projection": projection, "total": total, "bbox": bbox}
+                agg = cur.execute(*atlas_bbox_query(params)).fetchone()
+            header = atlas_header(params.projection, agg)
             yield (json.dumps(header) + "\n").encode("utf-8")
 
             # Named cursor → DECLARE ... CURSOR server-side, so PG streams
             # rows in batches of itersize rather than materializing the full
-            # result client-side. ORDER BY is intentionally dropped:
-            # sorting forces PG to buffer the entire result before emitting
-            # the first row, which is exactly what we're trying to avoid.
+            # result client-side.
             with con.cursor(name="atlas_stream") as cur:
                 cur.itersize = 5000
-                if viewport is not None:
-                    cur.execute(
-                        """
-                        SELECT pp.paper_id, p.title, p.source, pp.x, pp.y
-                        FROM paper_projection_2d AS pp
-                        JOIN paper AS p ON p.paper_id = pp.paper_id
-                        WHERE pp.projection = %s
-                          AND pp.x BETWEEN %s AND %s
-                          AND pp.y BETWEEN %s AND %s
-                        LIMIT %s
-                        """,
-                        [
-                            projection,
-                            viewport[0],
-                            viewport[2],
-                            viewport[1],
-                            viewport[3],
-                            limit,
-                        ],
-                    )
-                else:
-                    cur.execute(
-                        """
-                        SELECT pp.paper_id, p.title, p.source, pp.x, pp.y
-                        FROM paper_projection_2d AS pp
-                        JOIN paper AS p ON p.paper_id = pp.paper_id
-                        WHERE pp.projection = %s
-                        LIMIT %s
-                        """,
-                        [projection, limit],
-                    )
-                for pid, title, source, x, y in cur:
-                    yield (
-                        json.dumps(
-                            {
-                                "paper_id": pid,
-                                "title": title,
-                                "source": source,
-                                "x": float(x),
-                                "y": float(y),
-                            }
-                        )
-                        + "\n"
-                    ).encode("utf-8")
+                cur.execute(*atlas_query(params, stream=True))
+                for row in cur:
+                    yield (json.dumps(atlas_point(row)) + "\n").encode("utf-8")
 
     return Response(
         stream_with_context(generate()),
@@ -575,28 +502,6 @@ def embeddings_similarity_distribution() -> tuple[dict[str, Any], int]:
     return payload, 200
 
 
-def _next_conference_dates(
-    latest: dict[str, date],
-) -> dict[str, dict[str, Any]]:
-    """Project the next conference date for each source.
-
-    Keeps adding one year to the last known date until the projected date
-    is in the future (or today).  Returns a dict keyed by source name with
-    ``date`` (ISO string) and ``passed`` (bool).
-    """
-    today = date.today()
-    result: dict[str, dict[str, Any]] = {}
-    for source, last_date in latest.items():
-        next_date = last_date.replace(year=last_date.year + 1)
-        while next_date < today:
-            next_date = next_date.replace(year=next_date.year + 1)
-        result[source] = {
-            "date": next_date.isoformat(),
-            "passed": False,
-        }
-    return result
-
-
 @app.get("/api/inventory")
 def inventory() -> tuple[dict, int]:
     """Return a summary of conferences/years and paper counts in the database."""
@@ -608,56 +513,47 @@ def inventory() -> tuple[dict, int]:
     return {
         "conferences": conferences,
         "counts": counts,
-        "next_dates": _next_conference_dates(latest),
+        "next_dates": next_conference_dates(latest),
     }, 200
 
 
+def _enqueue_job(kind: str) -> tuple[dict[str, Any], int, dict[str, str]]:
+    database_url = os.getenv("DATABASE_URL")
+    assert database_url is not None, "Database URL is not set"
+    with psycopg.connect(database_url, autocommit=True) as con:
+        job, created = jobs.enqueue(con, kind)
+    body, headers = job_accepted(job, created)
+    return body, 202, headers
+
+
 @app.post("/api/sync")
-def sync() -> tuple[dict[str, str], int]:
+def sync() -> tuple[dict[str, Any], int, dict[str, str]]:
     """
-    Synchronize ArXiv repository by fetching new papers and embedding them.
-    This endpoint initializes an ArXivRepository and calls its sync method.
+    Queue an ArXiv sync (fetch new papers and embed them) for `oversight
+    worker` and return 202 straight away; poll the job's url for progress.
+    If a sync is already queued or running, that job is returned instead.
     """
-    try:
-        # Initialize ArXivRepository with same model configurations as used elsewhere
-        with ArXivRepository(
-            embedding_model_name="models/gemini-embedding-001",
-            research_llm_model_name="google/gemini-2.5-flash",
-        ) as arxiv_repo:
-            arxiv_repo.sync()
-
-        return {
-            "status": "success",
-            "message": "ArXiv repository sync completed successfully",
-        }, 200
-
-    except Exception as e:
-        # Log the error for debugging but return a safe error message
-        app.logger.error(f"Error during ArXiv sync: {str(e)}")
-        return {"status": "error", "message": f"Sync failed: {str(e)}"}, 500
+    return _enqueue_job("sync")
 
 
 @app.post("/api/digest")
-def digest() -> tuple[dict[str, str], int]:
+def digest() -> tuple[dict[str, Any], int, dict[str, str]]:
     """
-    Send email digest to research listener group without updating the repository.
-    This endpoint initializes an ArXivRepository and calls email_daily_digest method.
+    Queue the email digest to the research listener group (without syncing
+    the repository first); returns 202 like /api/sync.
     """
-    try:
-        # Initialize ArXivRepository with same model configurations as used elsewhere
-        with ArXivRepository(
-            embedding_model_name="models/gemini-embedding-001",
-            research_llm_model_name="google/gemini-2.5-flash",
-        ) as arxiv_repo:
-            # Send email digest without syncing (same as --digest --no-sync)
-            arxiv_repo.email_weekly_digest(research_listener_group)
-
-        return {"status": "success", "message": "Email digest sent successfully"}, 200
-
-    except Exception as e:
-        # Log the error for debugging but return a safe error message
-        app.logger.error(f"Error during digest email: {str(e)}")
-        return {"status": "error", "message": f"Digest email failed: {str(e)}"}, 500
+    return _enqueue_job("digest")
+
+
+@app.get("/api/jobs/<int:job_id>")
+def job_status(job_id: int) -> tuple[dict[str, Any], int]:
+    database_url = os.getenv("DATABASE_URL")
+    assert database_url is not None, "Database URL is not set"
+    with psycopg.connect(database_url, autocommit=True) as con:
+        job = jobs.get_job(con, job_id)
+    if job is None:
+        return {"error": f"job {job_id} not found"}, 404
+    return job.to_dict(), 200
 
 
 if __name__ == "__main__":
@@ -0,0 +1,683 @@
+from __future__ import annotations
+
+import functools
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import psycopg
+from psycopg import sql
+
+from .embedding_backends import EmbeddingBackend, configured_backend
+from .PaperDatabase import (
+    EXACT_SCAN_SQL,
+    NEIGHBORS_SQL,
+    newest_papers_params,
+    newest_papers_query,
+    set_ef_search,
+)
+from .utils import get_logger
+from .vector_indexes import DEFAULT_INDEX_PARAMS, index_for
+
+# `oversight tune-hnsw`: measures recall@k against latency for the HNSW
+# index and picks per-endpoint ef_search defaults from the curves.
+#
+# 1. Queries: a seeded sample of stored paper vectors. Each query's own
+#    paper is dropped from its results, exact and approximate alike.
+# 2. Scenarios: the neighbors query (unfiltered) and the search query
+#    under filters of decreasing selectivity (all sources, conferences,
+#    arXiv, the smallest conference, recent windows). HNSW filters after
+#    the index walk, so a selective filter needs a larger ef_search just
+#    to return k rows.
+# 3. Ground truth: the same endpoint SQL with index scans disabled (an
+#    exact scan), or, with --exact snapshot, numpy over a current
+#    embedding snapshot (much faster on a large corpus).
+# 4. Sweep: every ef_search on the live index, and optionally every
+#    m:ef_construction pair on an unlogged copy of the embeddings in the
+#    hnsw_tuning schema, run by the very same SQL through search_path.
+#
+# The result, written to OVERSIGHT_HNSW_TUNING_FILE, holds the curves and,
+# per endpoint, the smallest-latency ef_search reaching --target-recall for
+# each measured selectivity. The API looks up the band for a request's
+# estimated selectivity (see tuned_ef_search) whenever the caller doesn't
+# pass ef_search; without a tuning file it keeps the hand-picked defaults.
+
+logger = get_logger()
+
+TUNING_VERSION = 1
+DEFAULT_TUNING_FILE = "data/hnsw_tuning.json"
+DEFAULT_EF_SEARCH = (10, 20, 40, 60, 80, 120, 160, 240, 320, 500)
+TUNING_SCHEMA = "hnsw_tuning"
+# Snapshot rows scored per step by exact_from_snapshot.
+SNAPSHOT_CHUNK = 65536
+
+# Upper edges (days) of the age buckets in the stored corpus profile; the
+# last bucket is everything older.
+AGE_BUCKETS_DAYS = (7, 30, 90, 365, 1095, 3650)
+OLDEST_DAYS = 36500
+
+QUERY_SAMPLE_SQL = """
+    SELECT paper_id, {vec_col}
+    FROM embedding
+    WHERE {vec_col} IS NOT NULL
+    ORDER BY md5(paper_id || %s)
+    LIMIT %s
+"""
+
+# Embedded papers per source and age bucket. Papers without an
+# update_date never match a search, so they aren't counted either.
+CORPUS_PROFILE_SQL = """
+    SELECT p.source,
+           width_bucket(current_date - p.update_date, %s::int[]),
+           count(*)
+    FROM paper AS p
+    JOIN embedding AS e ON e.paper_id = p.paper_id
+    WHERE e.{vec_col} IS NOT NULL
+      AND p.update_date IS NOT NULL
+    GROUP BY 1, 2
+"""
+
+# A copy of the model's embeddings, for building test indexes without
+# touching the live one. Unlogged: it's dropped at the end anyway. With
+# hnsw_tuning first on the search_path the read queries join it against
+# the live paper table.
+COPY_EMBEDDINGS_DDL = [
+    "DROP SCHEMA IF EXISTS hnsw_tuning CASCADE",
+    "CREATE SCHEMA hnsw_tuning",
+    """
+    CREATE UNLOGGED TABLE hnsw_tuning.embedding AS
+    SELECT paper_id, {vec_col} FROM public.embedding WHERE {vec_col} IS NOT NULL
+    """,
+    "ALTER TABLE hnsw_tuning.embedding ADD PRIMARY KEY (paper_id)",
+]
+
+COPY_INDEX_DDL = """
+    CREATE INDEX hnsw_tuning_idx ON hnsw_tuning.embedding
+    USING hnsw ({vec_col} halfvec_cosine_ops)
+    WITH (m = {m}, ef_construction = {ef_construction})
+"""
+
+
+# --- runtime lookup -------------------------------------------------------
+
+
+def tuning_path() -> Path:
+    return Path(os.getenv("OVERSIGHT_HNSW_TUNING_FILE", DEFAULT_TUNING_FILE))
+
+
+@dataclass(frozen=True)
+class Tuning:
+    """The part of a tuning file the API reads."""
+
+    # endpoint -> [(min_selectivity, ef_search)], by descending selectivity
+    bands: dict[str, list[tuple[float, int]]]
+    total: int
+    # source -> embedded papers per AGE_BUCKETS_DAYS bucket
+    sources: dict[str, list[int]]
+
+    def selectivity(self, sources: list[str] | None, time_window_days: int) -> float:
+        """Estimated fraction of the corpus a search filter keeps, assuming
+        the corpus's age profile hasn't changed since tuning."""
+        if not self.total:
+            return 1.0
+        names = self.sources if sources is None else sources
+        kept = sum(
+            _within(self.sources[s], time_window_days)
+            for s in names
+            if s in self.sources
+        )
+        return kept / self.total
+
+    def ef_search(self, endpoint: str, selectivity: float) -> int | None:
+        bands = self.bands.get(endpoint)
+        if not bands:
+            return None
+        for min_selectivity, ef_search in bands:
+            if selectivity >= min_selectivity:
+                return ef_search
+        return bands[-1][1]
+
+
+def _within(counts: list[int], days: int) -> float:
+    """Papers younger than ``days`` out of one source's bucket counts,
+    interpolating linearly inside the bucket ``days`` falls in."""
+    kept = 0.0
+    lower = 0
+    for count, upper in zip(counts, (*AGE_BUCKETS_DAYS, OLDEST_DAYS)):
+        if days >= upper:
+            kept += count
+        elif days > lower:
+            kept += count * (days - lower) / (upper - lower)
+        lower = upper
+    return kept
+
+
+@functools.cache
+def _load_tuning(path: str) -> Tuning | None:
+    try:
+        with open(path) as f:
+            doc = json.load(f)
+    except FileNotFoundError:
+        return None
+    if doc.get("version") != TUNING_VERSION:
+        logger.warning(f"Ignoring {path}: tuning version {doc.get('version')}")
+        return None
+    return Tuning(
+        bands={
+            endpoint: [(b["min_selectivity"], b["ef_search"]) for b in bands]
+            for endpoint, bands in doc["endpoints"].items()
+        },
+        total=doc["corpus"]["total"],
+        sources=doc["corpus"]["sources"],
+    )
+
+
+def load_tuning() -> Tuning | None:
+    """The tuning file's defaults, read once per process."""
+    return _load_tuning(str(tuning_path()))
+
+
+def tuned_ef_search(
+    endpoint: str,
+    fallback: int,
+    sources: list[str] | None = None,
+    time_window_days: int = OLDEST_DAYS,
+) -> int:
+    """ef_search for ``endpoint`` under the given filter: the tuned value
+    for its selectivity, or ``fallback`` without a tuning file."""
+    tuning = load_tuning()
+    if tuning is None:
+        return fallback
+    ef_search = tuning.ef_search(
+        endpoint, tuning.selectivity(sources, time_window_days)
+    )
+    return ef_search if ef_search is not None else fallback
+
+
+# --- harness --------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    endpoint: str  # "search" or "neighbors"
+    sources: list[str] | None = None  # search only
+    time_window_days: int | None = None  # None: all time
+
+    def query(
+        self, backend: EmbeddingBackend, vector: Any, k: int
+    ) -> tuple[sql.Composed, Any]:
+        """The endpoint's SQL and parameters for the top ``k`` + 1 (the
+        query's own paper may come back first)."""
+        if self.endpoint == "neighbors":
+            return backend.sql(NEIGHBORS_SQL), [vector, vector, k + 1]
+        from .PaperRepository import PaperRepository
+
+        # The API always filters on sources, "all" included.
+        filters = [PaperRepository.build_filter_sql(self.sources or [])]
+        window = (
+            timedelta(days=self.time_window_days) if self.time_window_days else None
+        )
+        return (
+            newest_papers_query(backend, filters),
+            newest_papers_params(vector, window, k + 1),
+        )
+
+
+@dataclass
+class TuneConfig:
+    queries: int = 200
+    k: int = 10
+    target_recall: float = 0.95
+    ef_search: tuple[int, ...] = DEFAULT_EF_SEARCH
+    # (m, ef_construction) pairs to build on the hnsw_tuning copy
+    index_params: tuple[tuple[int, int], ...] = ()
+    exact: str = "sql"  # or "snapshot"
+    seed: int = 0
+
+
+def corpus_profile(
+    con: psycopg.Connection[Any], backend: EmbeddingBackend
+) -> dict[str, Any]:
+    """Embedded papers per source and age bucket, for Tuning.selectivity."""
+    sources: dict[str, list[int]] = {}
+    for source, bucket, count in con.execute(
+        backend.sql(CORPUS_PROFILE_SQL), [list(AGE_BUCKETS_DAYS)]
+    ).fetchall():
+        counts = sources.setdefault(source, [0] * (len(AGE_BUCKETS_DAYS) + 1))
+        counts[bucket] += count
+    return {
+        "total": sum(sum(c) for c in sources.values()),
+        "age_buckets_days": list(AGE_BUCKETS_DAYS),
+        "sources": sources,
+    }
+
+
+def default_scenarios(profile: dict[str, Any], k: int) -> list[Scenario]:
+    """Neighbors plus search filters from broad to narrow: all sources,
+    conferences, arXiv, the smallest conference with at least 20 * ``k``
+    papers (fewer makes for a noisy curve), the last year and month."""
+    counts = {source: sum(c) for source, c in profile["sources"].items()}
+    everything = sorted(counts)
+    conferences = [s for s in everything if s != "arxiv"]
+    scenarios = [
+        Scenario("neighbors", "neighbors"),
+        Scenario("all", "search", everything),
+        Scenario("last_365d", "search", everything, 365),
+        Scenario("last_30d", "search", everything, 30),
+    ]
+    if "arxiv" in counts and conferences:
+        scenarios.append(Scenario("arxiv", "search", ["arxiv"]))
+        scenarios.append(Scenario("conferences", "search", conferences))
+    large_enough = [s for s in conferences if counts[s] >= 20 * k]
+    if large_enough:
+        smallest = min(large_enough, key=lambda s: counts[s])
+        scenarios.append(Scenario(f"only_{smallest}", "search", [smallest]))
+    return scenarios
+
+
+def sample_queries(
+    con: psycopg.Connection[Any], backend: EmbeddingBackend, n: int, seed: int
+) -> list[tuple[str, Any]]:
+    return con.execute(backend.sql(QUERY_SAMPLE_SQL), [str(seed), n]).fetchall()
+
+
+def _top_k(rows: list[tuple[Any, ...]], query_id: str, k: int) -> list[str]:
+    return [row[0] for row in rows if row[0] != query_id][:k]
+
+
+def _run_query(
+    con: psycopg.Connection[Any],
+    backend: EmbeddingBackend,
+    scenario: Scenario,
+    query: tuple[str, Any],
+    k: int,
+    ef_search: int | None,
+) -> tuple[list[str], float]:
+    """``(top-k ids, seconds)``; ``ef_search=None`` runs the exact scan."""
+    statement, params = scenario.query(backend, query[1], k)
+    with con.transaction():
+        if ef_search is None:
+            con.execute(EXACT_SCAN_SQL)
+        else:
+            con.execute(set_ef_search(ef_search))
+        started = time.perf_counter()
+        rows = con.execute(statement, params).fetchall()
+        elapsed = time.perf_counter() - started
+    return _top_k(rows, query[0], k), elapsed
+
+
+def exact_from_sql(
+    con: psycopg.Connection[Any],
+    backend: EmbeddingBackend,
+    scenarios: list[Scenario],
+    queries: list[tuple[str, Any]],
+    k: int,
+) -> dict[str, list[list[str]]]:
+    """Scenario name -> exact top-k ids per query, by sequential scan."""
+    return {
+        s.name: [_run_query(con, backend, s, q, k, None)[0] for q in queries]
+        for s in scenarios
+    }
+
+
+def _as_array(vector: Any) -> Any:
+    import numpy as np
+
+    return np.asarray(
+        vector.to_numpy() if hasattr(vector, "to_numpy") else vector, np.float32
+    )
+
+
+def exact_from_snapshot(
+    con: psycopg.Connection[Any],
+    backend: EmbeddingBackend,
+    scenarios: list[Scenario],
+    queries: list[tuple[str, Any]],
+    k: int,
+) -> dict[str, list[list[str]]]:
+    """Like exact_from_sql, by brute force in numpy over the embedding
+    snapshot, which has to match the database (`oversight snapshot --full`).
+
+    Walks the snapshot in row chunks, keeping a running top-k per query
+    and scenario, so memory stays at one chunk whatever the corpus size.
+    """
+    import numpy as np
+
+    from .embedding_snapshot import EmbeddingSnapshot
+
+    snapshot = EmbeddingSnapshot.open()
+    assert snapshot is not None, (
+        "No embedding snapshot found; run `oversight snapshot` first"
+    )
+    assert snapshot.column == backend.column, (
+        f"The snapshot holds {snapshot.column}, not {backend.column}"
+    )
+    meta = {
+        pid: (source, day)
+        for pid, source, day in con.execute(
+            backend.sql(
+                """
+                SELECT p.paper_id, p.source, p.update_date
+                FROM paper AS p
+                JOIN embedding AS e ON e.paper_id = p.paper_id
+                WHERE e.{vec_col} IS NOT NULL
+                """
+            )
+        ).fetchall()
+    }
+    ids = snapshot.paper_ids
+    if len(ids) != len(meta) or any(pid not in meta for pid in ids):
+        raise SystemExit(
+            f"The snapshot has {len(ids)} papers, the database {len(meta)} "
+            "embedded ones; run `oversight snapshot --full` first."
+        )
+    sources = np.array([meta[pid][0] for pid in ids], dtype=object)
+    days = np.array([meta[pid][1] for pid in ids], dtype="datetime64[D]")
+    today = np.datetime64(date.today(), "D")
+    keep = {}
+    for s in scenarios:
+        mask = np.ones(len(ids), dtype=bool)
+        if s.sources is not None:
+            mask &= np.isin(sources, s.sources)
+        if s.time_window_days is not None:
+            mask &= days > today - np.timedelta64(s.time_window_days, "D")
+        keep[s.name] = mask
+
+    q = np.stack([_as_array(v) for _, v in queries])
+    q /= np.maximum(np.linalg.norm(q, axis=1, keepdims=True), 1e-12)
+    self_rows = np.array([snapshot.index_of(pid) for pid, _ in queries])
+    n = len(queries)
+    best = {s.name: np.full((n, 0), np.inf, np.float32) for s in scenarios}
+    best_rows = {s.name: np.zeros((n, 0), np.int64) for s in scenarios}
+    for start in range(0, len(ids), SNAPSHOT_CHUNK):
+        chunk = snapshot.embeddings[start : start + SNAPSHOT_CHUNK].astype(np.float32)
+        chunk /= np.maximum(np.linalg.norm(chunk, axis=1, keepdims=True), 1e-12)
+        distances = 1 - q @ chunk.T
+        rows = np.arange(start, start + len(chunk))
+        # Each query's own paper is never a result.
+        distances[rows[None, :] == self_rows[:, None]] = np.inf
+        for s in scenarios:
+            d = np.where(keep[s.name][rows], distances, np.inf)
+            d = np.concatenate([best[s.name], d], axis=1)
+            r = np.concatenate(
+                [best_rows[s.name], np.broadcast_to(rows, (n, len(rows)))], axis=1
+            )
+            top = np.argsort(d, axis=1, kind="stable")[:, :k]
+            best[s.name] = np.take_along_axis(d, top, axis=1)
+            best_rows[s.name] = np.take_along_axis(r, top, axis=1)
+    return {
+        s.name: [
+            [ids[i] for i, d in zip(r, dist) if np.isfinite(d)]
+            for r, dist in zip(best_rows[s.name], best[s.name])
+        ]
+        for s in scenarios
+    }
+
+
+def sweep(
+    con: psycopg.Connection[Any],
+    backend: EmbeddingBackend,
+    scenarios: list[Scenario],
+    selectivity: dict[str, float],
+    queries: list[tuple[str, Any]],
+    exact: dict[str, list[list[str]]],
+    config: TuneConfig,
+    index: dict[str, int],
+) -> list[dict[str, Any]]:
+    """One curve point per (scenario, ef_search) on the index in use."""
+    import numpy as np
+
+    # Fault the index into shared buffers so the first point isn't cold.
+    for q in queries:
+        _run_query(con, backend, scenarios[0], q, config.k, max(config.ef_search))
+
+    points = []
+    for s in scenarios:
+        for ef_search in config.ef_search:
+            recalls, latencies = [], []
+            for q, truth in zip(queries, exact[s.name]):
+                found, elapsed = _run_query(con, backend, s, q, config.k, ef_search)
+                latencies.append(elapsed * 1000)
+                if truth:
+                    recalls.append(len(set(found) & set(truth)) / len(truth))
+            point = {
+                "scenario": s.name,
+                "endpoint": s.endpoint,
+                "selectivity": round(selectivity[s.name], 5),
+                **index,
+                "ef_search": ef_search,
+                "recall": round(float(np.mean(recalls)), 4) if recalls else None,
+                "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+                "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+            }
+            print(_format_point(point), flush=True)
+            points.append(point)
+    return points
+
+
+def _format_point(p: dict[str, Any]) -> str:
+    recall = "-" if p["recall"] is None else f"{p['recall']:.3f}"
+    return (
+        f"m={p['m']:<3} efc={p['ef_construction']:<4} {p['scenario']:<20} "
+        f"sel {p['selectivity']:<8.4f} ef {p['ef_search']:<4} "
+        f"recall@k {recall:>6}  p50 {p['p50_ms']:>8.2f}  p95 {p['p95_ms']:>8.2f} ms"
+    )
+
+
+def cheapest_at_target(
+    points: list[dict[str, Any]], target: float
+) -> dict[str, Any] | None:
+    """The lowest-p50 point reaching ``target`` recall, or None."""
+    good = [p for p in points if p["recall"] is not None and p["recall"] >= target]
+    return min(good, key=lambda p: (p["p50_ms"], p["ef_search"]), default=None)
+
+
+def recommend(
+    points: list[dict[str, Any]], target: float
+) -> dict[str, list[dict[str, Any]]]:
+    """Per endpoint, ef_search bands by descending selectivity.
+
+    A scenario that never reaches ``target`` gets its highest-recall
+    point; one whose filter matched nothing is left out. Narrower filters never get a smaller ef_search than broader
+    ones, so a request between two measured selectivities is covered by
+    the more conservative of the two.
+    """
+    endpoints: dict[str, list[dict[str, Any]]] = {}
+    for endpoint in sorted({p["endpoint"] for p in points}):
+        per_scenario: dict[str, list[dict[str, Any]]] = {}
+        for p in points:
+            if p["endpoint"] == endpoint:
+                per_scenario.setdefault(p["scenario"], []).append(p)
+        picks = []
+        for scenario_points in per_scenario.values():
+            if all(p["recall"] is None for p in scenario_points):
+                continue
+            pick = cheapest_at_target(scenario_points, target)
+            if pick is None:
+                pick = max(
+                    scenario_points, key=lambda p: (p["recall"] or 0, -p["p50_ms"])
+                )
+                logger.warning(
+                    f"{pick['scenario']} never reaches recall {target}; "
+                    f"using ef_search {pick['ef_search']} (recall {pick['recall']})"
+                )
+            picks.append(pick)
+        picks.sort(key=lambda p: -p["selectivity"])
+        bands = []
+        floor = 0
+        for pick in picks:
+            floor = max(floor, pick["ef_search"])
+            bands.append(
+                {
+                    "min_selectivity": pick["selectivity"],
+                    "ef_search": floor,
+                    "scenario": pick["scenario"],
+                    "recall": pick["recall"],
+                    "p50_ms": pick["p50_ms"],
+                }
+            )
+        endpoints[endpoint] = bands
+    return endpoints
+
+
+def recommend_index(
+    points: list[dict[str, Any]], target: float
+) -> dict[str, int] | None:
+    """The (m, ef_construction) whose slowest scenario at ``target`` recall
+    is fastest, among those reaching it in every scenario (that matched
+    anything)."""
+    by_index: dict[tuple[int, int], list[dict[str, Any]]] = {}
+    for p in points:
+        by_index.setdefault((p["m"], p["ef_construction"]), []).append(p)
+    scored = []
+    for (m, efc), index_points in by_index.items():
+        worst = 0.0
+        for scenario in {
+            p["scenario"] for p in index_points if p["recall"] is not None
+        }:
+            pick = cheapest_at_target(
+                [p for p in index_points if p["scenario"] == scenario], target
+            )
+            if pick is None:
+                break
+            worst = max(worst, pick["p50_ms"])
+        else:
+            scored.append((worst, m, efc))
+    if not scored:
+        return None
+    _, m, efc = min(scored)
+    return {"m": m, "ef_construction": efc}
+
+
+def index_options(
+    con: psycopg.Connection[Any], backend: EmbeddingBackend
+) -> dict[str, int]:
+    """m and ef_construction of ``backend``'s HNSW index."""
+    index = index_for(con, backend)
+    if index is None:
+        return dict(DEFAULT_INDEX_PARAMS)
+    return {"m": index.m, "ef_construction": index.ef_construction}
+
+
+def _sweep_index_params(
+    con: psycopg.Connection[Any],
+    backend: EmbeddingBackend,
+    scenarios: list[Scenario],
+    selectivity: dict[str, float],
+    queries: list[tuple[str, Any]],
+    exact: dict[str, list[list[str]]],
+    config: TuneConfig,
+) -> list[dict[str, Any]]:
+    """Curves for each of ``config.index_params``, on a copy of the
+    embeddings so the live index and its readers are left alone.
+
+    The copy holds one vector column where the live table may hold
+    several, so the planner can cost it differently: compare these curves
+    with each other (list the live m:ef_construction too), not with the
+    live index's.
+    """
+    points: list[dict[str, Any]] = []
+    print("[tune] copying the embeddings into the hnsw_tuning schema...", flush=True)
+    for statement in COPY_EMBEDDINGS_DDL:
+        con.execute(backend.sql(statement))
+    try:
+        for m, efc in config.index_params:
+            started = time.monotonic()
+            con.execute(
+                backend.sql(
+                    COPY_INDEX_DDL,
+                    m=sql.Literal(m),
+                    ef_construction=sql.Literal(efc),
+                )
+            )
+            con.execute("ANALYZE hnsw_tuning.embedding")
+            print(
+                f"[tune] built m={m} ef_construction={efc} "
+                f"in {time.monotonic() - started:.1f}s",
+                flush=True,
+            )
+            con.execute(f"SET search_path = {TUNING_SCHEMA}, public")
+            try:
+                points += sweep(
+                    con,
+                    backend,
+                    scenarios,
+                    selectivity,
+                    queries,
+                    exact,
+                    config,
+                    {"m": m, "ef_construction": efc},
+                )
+            finally:
+                con.execute("RESET search_path")
+            con.execute(f"DROP INDEX {TUNING_SCHEMA}.hnsw_tuning_idx")
+    finally:
+        con.execute(f"DROP SCHEMA IF EXISTS {TUNING_SCHEMA} CASCADE")
+    return points
+
+
+def tune(database_url: str, config: TuneConfig) -> dict[str, Any]:
+    """Run the whole harness; returns the tuning document."""
+    from pgvector.psycopg import register_vector
+
+    backend = configured_backend()
+    with psycopg.connect(database_url, autocommit=True) as con:
+        register_vector(con)
+        corpus = corpus_profile(con, backend)
+        profile = Tuning({}, corpus["total"], corpus["sources"])
+        scenarios = default_scenarios(corpus, config.k)
+        selectivity = {
+            s.name: profile.selectivity(s.sources, s.time_window_days or OLDEST_DAYS)
+            for s in scenarios
+        }
+        queries = sample_queries(con, backend, config.queries, config.seed)
+        assert queries, "No embedded papers to sample queries from"
+        print(
+            f"[tune] {len(queries)} queries, {len(scenarios)} scenarios, "
+            f"exact top-{config.k} by {config.exact}...",
+            flush=True,
+        )
+        find_exact = (
+            exact_from_snapshot if config.exact == "snapshot" else exact_from_sql
+        )
+        exact = find_exact(con, backend, scenarios, queries, config.k)
+
+        live_index = index_options(con, backend)
+        points = sweep(
+            con, backend, scenarios, selectivity, queries, exact, config, live_index
+        )
+        index_points: list[dict[str, Any]] = []
+        if config.index_params:
+            index_points = _sweep_index_params(
+                con, backend, scenarios, selectivity, queries, exact, config
+            )
+
+    return {
+        "version": TUNING_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "model": backend.name,
+        "k": config.k,
+        "target_recall": config.target_recall,
+        "queries": len(queries),
+        "exact": config.exact,
+        "index": live_index,
+        "recommended_index": (
+            recommend_index(index_points, config.target_recall)
+            if index_points
+            else None
+        ),
+        "corpus": corpus,
+        "endpoints": recommend(points, config.target_recall),
+        "curves": points + index_points,
+    }
+
+
+def write_tuning(path: str, doc: dict[str, Any]) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(doc, f, indent=2)
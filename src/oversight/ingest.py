@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import queue
+import time
+import traceback
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any
+
+import psycopg
+
+from . import embed_queue
+from .Paper import Paper
+from .PaperDatabase import PaperDatabase, PaperRow
+from .utils import chunked_iterable, get_logger, tqdm
+
+# Bulk ingestion for `oversight consume`. Parsing a paper (JSON decoding,
+# author extraction, re-serialising the document) costs far more than
+# writing it, so it runs in a pool of worker processes, one per core:
+#
+#   workers   take files off a shared list, stream each one's top-level
+#             array element by element (iter_json_array) and put batches of
+#             ready-to-COPY PaperRows on a bounded queue
+#   writer    this process; coalesces batches up to ``batch_size`` papers
+#             and writes each with PaperDatabase.insert_papers, one
+#             transaction per batch, so the embedders (see embed_queue.py)
+#             start on a batch as soon as it commits
+#
+# The queue holds at most QUEUE_DEPTH batches per worker: when the database
+# falls behind, workers block instead of parsing the whole tree into
+# memory. Memory per worker is one batch plus one read chunk, however large
+# the file. A single huge file is still parsed by one worker; the pool
+# pays off across files, which is how data/ is laid out.
+#
+# Unlike the per-paper path this replaces, a consume commits as it goes:
+# if it fails halfway, the batches before the failure stay written, and
+# re-running it skips them.
+
+logger = get_logger()
+
+BATCH_SIZE = 1000
+QUEUE_DEPTH = 4
+READ_CHUNK = 1 << 20
+FORMATS = ("scraped", "openreview-api-v1", "openreview-api-v2")
+
+
+def iter_json_array(path: str, chunk_chars: int = READ_CHUNK) -> Iterator[Any]:
+    """The elements of the JSON array in ``path``, decoded one at a time
+    from ``chunk_chars`` reads, so the whole array is never in memory."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+
+        def more(at_least: int) -> None:
+            nonlocal buf, pos, eof
+            chunk = f.read(max(chunk_chars, at_least))
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+
+        def skip_ws() -> str:
+            """The next non-space character ("" at end of file)."""
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\n\r":
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return buf[pos : pos + 1]
+                more(0)
+
+        if skip_ws() != "[":
+            raise ValueError(f"{path}: expected a JSON array")
+        pos += 1
+        if skip_ws() == "]":
+            return
+        while True:
+            skip_ws()
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Element cut off by the end of the chunk. Growing the read
+                # with what's pending keeps re-decoding linear overall.
+                more(len(buf) - pos)
+                continue
+            if end == len(buf) and not eof:
+                # A number may continue in the next chunk; decode it again
+                more(0)
+                continue
+            yield value
+            pos = end
+            sep = skip_ws()
+            if sep == "]":
+                return
+            if sep != ",":
+                raise ValueError(
+                    f"{path}: expected ',' or ']' in array, got {sep or 'EOF'!r}"
+                )
+            pos += 1
+
+
+def json_files(path: str) -> list[str]:
+    """``path`` if it's a file, else every .json file under it, sorted."""
+    if not os.path.isdir(path):
+        return [path]
+    return sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(path)
+        for name in names
+        if name.endswith(".json")
+    )
+
+
+def parse_paper(item: dict[str, Any], fmt: str) -> Paper:
+    if fmt == "scraped":
+        return Paper.from_scraped_json(item)
+    api_version = 1 if fmt == "openreview-api-v1" else 2
+    return Paper.from_openreview_json(item, api_version)
+
+
+def _parse_files(
+    paths: multiprocessing.Queue[str | None],
+    out: multiprocessing.Queue[tuple[Any, ...]],
+    fmt: str,
+    batch_size: int,
+) -> None:
+    """Worker: parse files off ``paths`` until its sentinel, reporting each
+    batch, each finished file and a parse error (which stops it) on
+    ``out``; an ``("exit",)`` marks the end."""
+    while (path := paths.get()) is not None:
+        try:
+            count = 0
+            for items in chunked_iterable(iter_json_array(path), batch_size):
+                rows = [PaperRow.from_paper(parse_paper(item, fmt)) for item in items]
+                out.put(("batch", rows))
+                count += len(rows)
+            out.put(("file", path, count))
+        except Exception:  # noqa: BLE001
+            out.put(("error", path, traceback.format_exc()))
+            break
+    out.put(("exit",))
+
+
+@dataclass
+class IngestStats:
+    files: int = 0
+    papers: int = 0
+    updated: int = 0
+    new: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def papers_per_s(self) -> float:
+        return self.papers / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.papers:,} papers from {self.files:,} files in "
+            f"{self.seconds:.1f}s ({self.papers_per_s:,.0f} papers/s): "
+            f"{self.new:,} new, {self.updated:,} updated, "
+            f"{self.skipped:,} unchanged"
+        )
+
+
+def consume(
+    database_url: str,
+    path: str,
+    fmt: str = "scraped",
+    jobs: int | None = None,
+    batch_size: int = BATCH_SIZE,
+    priority: int = embed_queue.PRIORITY_CONSUME,
+) -> IngestStats:
+    """Upsert every paper in ``path`` (a JSON file, or a directory tree of
+    them) in ``fmt``, parsing with ``jobs`` worker processes (default: one
+    per core), and queue the new and changed ones for embedding."""
+    assert fmt in FORMATS, f"unknown format {fmt!r}"
+    files = json_files(path)
+    stats = IngestStats()
+    if not files:
+        return stats
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(files)))
+
+    # spawn rather than fork, as for projections: nothing the parent has
+    # imported or opened leaks into the workers.
+    ctx = multiprocessing.get_context("spawn")
+    paths: multiprocessing.Queue[str | None] = ctx.Queue()
+    for file in files:
+        paths.put(file)
+    for _ in range(jobs):
+        paths.put(None)
+    out: multiprocessing.Queue[tuple[Any, ...]] = ctx.Queue(maxsize=QUEUE_DEPTH * jobs)
+    workers = [
+        ctx.Process(
+            target=_parse_files, args=(paths, out, fmt, batch_size), daemon=True
+        )
+        for _ in range(jobs)
+    ]
+    start = time.monotonic()
+    for worker in workers:
+        worker.start()
+
+    try:
+        with psycopg.connect(database_url) as con:
+            db = PaperDatabase.from_connection(con)
+            pending: list[PaperRow] = []
+
+            def write() -> None:
+                updated, new, skipped = db.insert_papers(pending, priority)
+                con.commit()
+                stats.papers += len(pending)
+                stats.updated += updated
+                stats.new += new
+                stats.skipped += skipped
+                bar.update(len(pending))
+                pending.clear()
+
+            running = jobs
+            with tqdm(desc=f"Consuming {path}", unit=" papers") as bar:
+                while running:
+                    try:
+                        message = out.get(timeout=5)
+                    except queue.Empty:
+                        dead = [w for w in workers if w.exitcode not in (None, 0)]
+                        if dead:
+                            raise RuntimeError(
+                                f"parse worker died with exit code {dead[0].exitcode}"
+                            )
+                        continue
+                    kind = message[0]
+                    if kind == "batch":
+                        pending += message[1]
+                        if len(pending) >= batch_size:
+                            write()
+                    elif kind == "file":
+                        stats.files += 1
+                        bar.set_postfix(files=f"{stats.files}/{len(files)}")
+                    elif kind == "error":
+                        raise RuntimeError(
+                            f"Failed to parse {message[1]}:\n{message[2]}"
+                        )
+                    else:
+                        running -= 1
+                if pending:
+                    write()
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+
+    stats.seconds = time.monotonic() - start
+    logger.info(f"Consumed {stats}")
+    return stats
@@ -0,0 +1,371 @@
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Self
+
+import psycopg
+from psycopg.types.json import Jsonb
+
+from .utils import get_logger, progress_sink
+
+# Background jobs: long-running work (an arXiv sync is minutes of OAI-PMH
+# harvesting and embedding) that used to run inside the request thread of
+# POST /api/sync. The endpoint now inserts a row into `job` and returns 202;
+# `oversight worker` claims it, runs it with its progress bars reporting into
+# the row, and records the outcome, which GET /api/jobs/<id> serves.
+#
+# Single flight is enforced twice: the partial unique index on `job` allows
+# one queued-or-running job per kind, and the worker holds a per-kind
+# advisory lock while running one, so even a job failed as stale while its
+# worker was merely stuck can't overlap with its successor.
+
+logger = get_logger()
+
+NOTIFY_CHANNEL = "oversight_jobs"
+
+# How often a running job proves it's alive, and how long without that
+# before another worker marks it failed.
+HEARTBEAT_S = 30.0
+STALE_AFTER_S = 5 * 60.0
+
+# Progress writes are coalesced to at most one per this many seconds (a new
+# progress label is always written straight away).
+PROGRESS_FLUSH_S = 1.0
+
+# Mirrors db/init/005-jobs.sql, which only runs on fresh databases.
+JOBS_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS job (
+        id              bigserial    PRIMARY KEY,
+        kind            varchar      NOT NULL,
+        status          varchar      NOT NULL DEFAULT 'queued'
+                        CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+        params          jsonb        NOT NULL DEFAULT '{}',
+        progress_label  text,
+        progress_done   bigint,
+        progress_total  bigint,
+        error           text,
+        worker          text,
+        created_at      timestamptz  NOT NULL DEFAULT now(),
+        started_at      timestamptz,
+        heartbeat_at    timestamptz,
+        finished_at     timestamptz
+    )
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS job_active_kind_idx
+        ON job (kind) WHERE status IN ('queued', 'running')
+    """,
+    "CREATE INDEX IF NOT EXISTS job_queued_idx ON job (id) WHERE status = 'queued'",
+]
+
+JOB_COLUMNS = """
+    id, kind, status, params, progress_label, progress_done, progress_total,
+    error, created_at, started_at, finished_at
+"""
+
+ENQUEUE_SQL = f"""
+    INSERT INTO job (kind, params) VALUES (%s, %s)
+    ON CONFLICT (kind) WHERE status IN ('queued', 'running') DO NOTHING
+    RETURNING {JOB_COLUMNS}
+"""
+
+ACTIVE_JOB_SQL = f"""
+    SELECT {JOB_COLUMNS} FROM job
+    WHERE kind = %s AND status IN ('queued', 'running')
+"""
+
+JOB_BY_ID_SQL = f"SELECT {JOB_COLUMNS} FROM job WHERE id = %s"
+
+CLAIM_SQL = f"""
+    UPDATE job
+    SET status = 'running', started_at = now(), heartbeat_at = now(), worker = %s
+    WHERE id = (
+        SELECT id FROM job
+        WHERE status = 'queued'
+        ORDER BY id
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING {JOB_COLUMNS}
+"""
+
+ADVISORY_LOCK_SQL = (
+    "SELECT pg_try_advisory_lock(hashtext('oversight_job'), hashtext(%s))"
+)
+
+FAIL_STALE_SQL = """
+    UPDATE job
+    SET status = 'failed', finished_at = now(),
+        error = 'worker stopped sending heartbeats'
+    WHERE status = 'running'
+      AND heartbeat_at < now() - make_interval(secs => %s)
+    RETURNING id
+"""
+
+
+@dataclass
+class Job:
+    id: int
+    kind: str
+    status: str
+    params: dict[str, Any]
+    progress_label: str | None
+    progress_done: int | None
+    progress_total: int | None
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON body for GET /api/jobs/<id>."""
+
+        def iso(value: datetime | None) -> str | None:
+            return value.isoformat() if value is not None else None
+
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "params": self.params,
+            "progress": {
+                "label": self.progress_label,
+                "done": self.progress_done,
+                "total": self.progress_total,
+            },
+            "error": self.error,
+            "created_at": iso(self.created_at),
+            "started_at": iso(self.started_at),
+            "finished_at": iso(self.finished_at),
+        }
+
+
+def enqueue(
+    con: psycopg.Connection[Any], kind: str, params: dict[str, Any] | None = None
+) -> tuple[Job, bool]:
+    """Queue a ``kind`` job on an autocommit connection.
+
+    Returns ``(job, created)``; when a job of that kind is already queued
+    or running, that one comes back with ``created=False`` instead.
+    """
+    assert kind in JOB_HANDLERS, f"unknown job kind {kind!r}"
+    # Retried because the active job can finish between the two statements.
+    for _ in range(3):
+        row = con.execute(ENQUEUE_SQL, [kind, Jsonb(params or {})]).fetchone()
+        if row is not None:
+            con.execute(f"NOTIFY {NOTIFY_CHANNEL}")
+            return Job(*row), True
+        row = con.execute(ACTIVE_JOB_SQL, [kind]).fetchone()
+        if row is not None:
+            return Job(*row), False
+    raise RuntimeError(f"could not enqueue or find an active {kind!r} job")
+
+
+def get_job(con: psycopg.Connection[Any], job_id: int) -> Job | None:
+    row = con.execute(JOB_BY_ID_SQL, [job_id]).fetchone()
+    return Job(*row) if row is not None else None
+
+
+def ensure_schema(con: psycopg.Connection[Any]) -> None:
+    for statement in JOBS_DDL:
+        con.execute(statement)
+
+
+# --- handlers -------------------------------------------------------------
+
+
+def _run_sync(params: dict[str, Any]) -> None:
+    from .ArXivRepository import ArXivRepository
+
+    with ArXivRepository(
+        research_llm_model_name="google/gemini-2.5-flash",
+    ) as arxiv_repo:
+        arxiv_repo.sync()
+
+
+def _run_digest(params: dict[str, Any]) -> None:
+    from .ArXivRepository import ArXivRepository
+    from .ResearchListener import research_listener_group
+
+    with ArXivRepository(
+        research_llm_model_name="google/gemini-2.5-flash",
+    ) as arxiv_repo:
+        arxiv_repo.email_weekly_digest(research_listener_group)
+
+
+def _run_projections(params: dict[str, Any]) -> None:
+    """``params``: name (default pacmap_v1), sources, incremental, k; the
+    single-projection path of ``oversight projections``."""
+    from .atlas_snapshot import write_atlas_snapshot
+    from .projections import build_projection, place_unprojected
+
+    database_url = os.getenv("DATABASE_URL")
+    assert database_url is not None, "DATABASE_URL is not set"
+    name = params.get("name", "pacmap_v1")
+    if params.get("incremental"):
+        n_rows = place_unprojected(database_url, name, k=int(params.get("k", 10)))
+    else:
+        n_rows = build_projection(database_url, name, list(params.get("sources", [])))
+    if n_rows:
+        write_atlas_snapshot(database_url, name)
+
+
+def _run_backfill(params: dict[str, Any]) -> None:
+    """``params``: batch_size, max_per_minute; fills the shadow embedding
+    model's column (``oversight embeddings backfill``)."""
+    from .embedding_spaces import BACKFILL_BATCH, migrate
+
+    database_url = os.getenv("DATABASE_URL")
+    assert database_url is not None, "DATABASE_URL is not set"
+    max_per_minute = params.get("max_per_minute")
+    covered = migrate(
+        database_url,
+        batch_size=int(params.get("batch_size", BACKFILL_BATCH)),
+        max_per_minute=float(max_per_minute) if max_per_minute else None,
+    )
+    logger.info(str(covered))
+
+
+JOB_HANDLERS: dict[str, Callable[[dict[str, Any]], None]] = {
+    "sync": _run_sync,
+    "digest": _run_digest,
+    "projections": _run_projections,
+    "backfill": _run_backfill,
+}
+
+
+# --- worker ---------------------------------------------------------------
+
+
+class JobReporter:
+    """Writes one running job's progress, heartbeat and outcome.
+
+    Uses its own autocommit connection, so progress is visible while the
+    job's own transactions are still open, and holds the job kind's
+    advisory lock on it for the duration of the run.
+    """
+
+    def __init__(self, database_url: str, job: Job) -> None:
+        self.job = job
+        self.con = psycopg.connect(database_url, autocommit=True)
+        self._lock = threading.Lock()
+        self._pending: tuple[str, int, int | None] | None = None
+        self._label: str | None = None
+        self._flushed_at = 0.0
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(
+            target=self._beat, name=f"job-{job.id}-heartbeat", daemon=True
+        )
+
+    def __enter__(self) -> Self:
+        # Only waits if an earlier run of this kind is somehow still going;
+        # keeps heartbeating meanwhile so this job isn't failed as stale.
+        while not self.con.execute(ADVISORY_LOCK_SQL, [self.job.kind]).fetchone()[0]:
+            self._beat_once()
+            time.sleep(5)
+        self._heartbeat.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._stop.set()
+        if self._heartbeat.is_alive():
+            self._heartbeat.join()
+        self.con.close()  # also releases the advisory lock
+
+    def report(self, label: str, done: int, total: int | None) -> None:
+        """``progress_sink`` callback; cheap enough to call per tqdm refresh."""
+        with self._lock:
+            self._pending = (label, done, total)
+            due = time.monotonic() - self._flushed_at >= PROGRESS_FLUSH_S
+            if due or label != self._label:
+                self._flush()
+
+    def finish(self, error: str | None = None) -> None:
+        with self._lock:
+            self._flush()
+            self.con.execute(
+                """
+                UPDATE job SET status = %s, error = %s, finished_at = now()
+                WHERE id = %s
+                """,
+                ["failed" if error else "succeeded", error, self.job.id],
+            )
+
+    def _flush(self) -> None:
+        if self._pending is None:
+            return
+        label, done, total = self._pending
+        self.con.execute(
+            """
+            UPDATE job
+            SET progress_label = %s, progress_done = %s, progress_total = %s,
+                heartbeat_at = now()
+            WHERE id = %s
+            """,
+            [label, done, total, self.job.id],
+        )
+        self._pending = None
+        self._label = label
+        self._flushed_at = time.monotonic()
+
+    def _beat_once(self) -> None:
+        with self._lock:
+            self.con.execute(
+                "UPDATE job SET heartbeat_at = now() WHERE id = %s", [self.job.id]
+            )
+
+    def _beat(self) -> None:
+        while not self._stop.wait(HEARTBEAT_S):
+            self._beat_once()
+
+
+def run_job(database_url: str, job: Job) -> None:
+    logger.info(f"Running {job.kind} job {job.id}")
+    with JobReporter(database_url, job) as reporter:
+        token = progress_sink.set(reporter.report)
+        try:
+            JOB_HANDLERS[job.kind](job.params)
+        except Exception as e:
+            logger.exception(f"{job.kind} job {job.id} failed")
+            reporter.finish(error=f"{type(e).__name__}: {e}")
+        else:
+            logger.info(f"{job.kind} job {job.id} succeeded")
+            reporter.finish()
+        finally:
+            progress_sink.reset(token)
+
+
+def run_worker(database_url: str, once: bool = False, poll_s: float = 10.0) -> None:
+    """Claim and run queued jobs one at a time, forever.
+
+    Wakes on the NOTIFY sent by ``enqueue`` and otherwise polls every
+    ``poll_s``. Run several workers for throughput across kinds; jobs of
+    one kind still never overlap. With ``once``, exit when the queue is
+    empty.
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    con = psycopg.connect(database_url, autocommit=True)
+    ensure_schema(con)
+    con.execute(f"LISTEN {NOTIFY_CHANNEL}")
+    logger.info(f"Job worker {worker_id} started")
+    try:
+        while True:
+            for (job_id,) in con.execute(FAIL_STALE_SQL, [STALE_AFTER_S]).fetchall():
+                logger.warning(f"Job {job_id} stopped sending heartbeats; failed it")
+            row = con.execute(CLAIM_SQL, [worker_id]).fetchone()
+            if row is not None:
+                run_job(database_url, Job(*row))
+                continue
+            if once:
+                return
+            for _ in con.notifies(timeout=poll_s, stop_after=1):
+                pass
+    finally:
+        con.close()
@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import fields
+from typing import Any, TypeVar
+
+from . import slow_queries
+
+# Built-in request/span instrumentation, served at /api/metrics in the
+# Prometheus text exposition format (version 0.0.4).
+#
+# Off unless OVERSIGHT_METRICS=1. The switch is read once at import time:
+# when it's off, `timed`/`db_query` return the function they decorate
+# unchanged, `span` hands back a shared no-op context manager and neither
+# app installs the middleware, so a disabled build pays nothing per
+# request. When on, an observation is a perf_counter pair, a bisect over
+# the bucket bounds and a locked increment (about a microsecond).
+#
+# What is recorded:
+#   oversight_http_request_duration_seconds  per endpoint/method/status,
+#                                            to the last byte sent
+#   oversight_http_response_bytes_total      body bytes, including streamed
+#                                            NDJSON and snapshot files
+#   oversight_span_duration_seconds          per span: embed.* (query wait,
+#                                            provider call), db.* (each
+#                                            PaperDatabase read query) and
+#                                            serialize.*
+#   oversight_db_rows_total                  rows returned, per db.* span
+#   oversight_embed_*_total                  EmbeddingBatcher counters,
+#                                            including cache hits
+#
+# Metrics are per process: with `oversight serve --asgi --workers N` each
+# worker serves its own numbers, so scrape them individually.
+
+T = TypeVar("T")
+
+ENABLED = os.getenv("OVERSIGHT_METRICS", "").lower() in ("1", "true", "yes", "on")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds. Dense at the low end, where the neighbors/suggest budgets sit.
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)  # fmt: skip
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._series: dict[tuple[str, ...], list[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = sorted((k, (list(v[0]), v[1])) for k, v in self._series.items())
+        names = self.label_names
+        for labels, (counts, total) in snapshot:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, None), counts, strict=True):
+                cumulative += count
+                le = "+Inf" if bound is None else _number(bound)
+                yield (
+                    f"{self.name}_bucket{_labels(names, labels, f'le="{le}"')} "
+                    f"{cumulative}"
+                )
+            yield f"{self.name}_sum{_labels(names, labels)} {_number(total)}"
+            yield f"{self.name}_count{_labels(names, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: list[Counter | Histogram] = []
+        # Rendered at scrape time: name -> (help, read-the-current-value).
+        self._collected: dict[str, tuple[str, Callable[[], float]]] = {}
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, help: str, labels: tuple[str, ...] = ()
+    ) -> Histogram:
+        metric = Histogram(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def export_counters(self, prefix: str, stats: Any) -> None:
+        """Publish every field of the ``stats`` dataclass as the counter
+        ``<prefix>_<field>_total``, read live on each scrape. Exporting
+        the same prefix again (a rebuilt batcher) replaces the old source."""
+        for field in fields(stats):
+            self._collected[f"{prefix}_{field.name}_total"] = (
+                f"{type(stats).__name__}.{field.name}",
+                functools.partial(getattr, stats, field.name),
+            )
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, (help, read) in self._collected.items():
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+            lines.append(f"{name} {_number(read())}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "oversight_http_request_duration_seconds",
+    "API request latency, until the last body byte is sent.",
+    ("endpoint", "method", "status"),
+)
+RESPONSE_BYTES = REGISTRY.counter(
+    "oversight_http_response_bytes_total",
+    "Response body bytes sent, including streamed bodies.",
+    ("endpoint",),
+)
+SPAN_SECONDS = REGISTRY.histogram(
+    "oversight_span_duration_seconds",
+    "Time spent in one stage of a request (embed.*, db.*, serialize.*).",
+    ("span",),
+)
+DB_ROWS = REGISTRY.counter(
+    "oversight_db_rows_total",
+    "Rows returned by PaperDatabase read queries.",
+    ("span",),
+)
+
+_NOOP: AbstractContextManager[None] = nullcontext()
+
+
+@contextmanager
+def _timed_span(name: str) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        SPAN_SECONDS.observe(time.perf_counter() - t0, name)
+
+
+def span(name: str) -> AbstractContextManager[None]:
+    """Time a block into ``oversight_span_duration_seconds{span=name}``."""
+    return _timed_span(name) if ENABLED else _NOOP
+
+
+def count_rows(name: str, n: int) -> None:
+    if ENABLED:
+        DB_ROWS.inc(n, name)
+
+
+def timed(
+    name: str, rows: Callable[[Any], int] | None = None
+) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorate a function (sync or ``async``) as the span ``name``.
+
+    With ``rows``, also adds ``rows(result)`` to ``oversight_db_rows_total``.
+    A no-op when metrics are disabled.
+    """
+
+    def decorate(fn: Callable[..., T]) -> Callable[..., T]:
+        if not ENABLED:
+            return fn
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                t0 = time.perf_counter()
+                try:
+                    result = await fn(*args, **kwargs)
+                finally:
+                    SPAN_SECONDS.observe(time.perf_counter() - t0, name)
+                if rows is not None:
+                    DB_ROWS.inc(rows(result), name)
+                return result
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            t0 = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                SPAN_SECONDS.observe(time.perf_counter() - t0, name)
+            if rows is not None:
+                DB_ROWS.inc(rows(result), name)
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+def db_query(name: str, rows: Callable[[Any], int] = len) -> Callable[..., Any]:
+    """``timed`` for PaperDatabase read methods: span ``db.<name>``, rows
+    counted with ``len`` unless told otherwise. Also names the query for
+    slow-query capture (see slow_queries.named_query)."""
+
+    def decorate(fn: Callable[..., T]) -> Callable[..., T]:
+        return timed(f"db.{name}", rows=rows)(slow_queries.named_query(name)(fn))
+
+    return decorate
+
+
+def nested_len(result: list[list[Any]]) -> int:
+    return sum(len(rows) for rows in result)
+
+
+def observe_request(
+    endpoint: str, method: str, status: str, seconds: float, nbytes: int
+) -> None:
+    REQUEST_SECONDS.observe(seconds, endpoint, method, status)
+    RESPONSE_BYTES.inc(nbytes, endpoint)
+
+
+# --- middleware -------------------------------------------------------------
+
+# Set by flask_app before each request; the WSGI middleware only sees the
+# environ, and labelling by route (not raw path) keeps label sets bounded.
+ENDPOINT_ENVIRON_KEY = "oversight.endpoint"
+
+
+class _CountingBody:
+    """Pass a WSGI body through, counting bytes; report when it's closed."""
+
+    def __init__(self, body: Iterable[bytes], done: Callable[[int], None]) -> None:
+        self._body = body
+        self._done = done
+        self._bytes = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._body:
+            self._bytes += len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            close = getattr(self._body, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._done(self._bytes)
+
+
+class WSGIMetricsMiddleware:
+    """Request latency and response bytes for the Flask app."""
+
+    def __init__(self, app: Callable[..., Iterable[bytes]]) -> None:
+        self.app = app
+
+    def __call__(
+        self, environ: dict[str, Any], start_response: Callable[..., Any]
+    ) -> Iterable[bytes]:
+        t0 = time.perf_counter()
+        status = ["500"]
+
+        def _start_response(s: str, headers: Any, exc_info: Any = None) -> Any:
+            status[0] = s.split(" ", 1)[0]
+            return start_response(s, headers, exc_info)
+
+        def done(nbytes: int) -> None:
+            observe_request(
+                environ.get(ENDPOINT_ENVIRON_KEY, "unmatched"),
+                environ.get("REQUEST_METHOD", ""),
+                status[0],
+                time.perf_counter() - t0,
+                nbytes,
+            )
+
+        return _CountingBody(self.app(environ, _start_response), done)
+
+
+class ASGIMetricsMiddleware:
+    """Request latency and response bytes for the Starlette app.
+
+    The endpoint label comes from ``scope["endpoint"]``, which Starlette's
+    router fills in on the shared scope once a route matches.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        t0 = time.perf_counter()
+        status = 500
+        nbytes = 0
+
+        async def _send(message: dict[str, Any]) -> None:
+            nonlocal status, nbytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                nbytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            endpoint = getattr(scope.get("endpoint"), "__name__", "unmatched")
+            observe_request(
+                endpoint,
+                scope.get("method", ""),
+                str(status),
+                time.perf_counter() - t0,
+                nbytes,
+            )
@@ -0,0 +1,1128 @@
+from __future__ import annotations
+
+import hashlib
+import itertools
+import os
+import re
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import psycopg
+from pgvector.psycopg import register_vector
+from psycopg import sql
+
+from .embedding_backends import configured_backend
+from .embedding_snapshot import EmbeddingSnapshot
+from .utils import report_progress
+
+# Projections are fitted on the configured model's vectors
+# (OVERSIGHT_EMBEDDING_MODEL), read once at import like the worker
+# processes of build_projections will.
+BACKEND = configured_backend()
+DIM = BACKEND.dim
+ITERSIZE = 5000
+PCA_COMPONENTS = 50
+DEFAULT_MODEL_DIR = "data/projection_models"
+
+# Cast halfvec -> vector so pgvector-python decodes into np.float32
+# ndarray. The optional source filter mirrors the script's behaviour
+# (none by default = full corpus); literal SQL strings rather than an
+# f-string so the queries stay LiteralString-typed. ``{vec_col}`` is the
+# model's column, filled in by BACKEND.sql.
+COUNT_SQL_ALL = """
+    SELECT count(*)
+    FROM paper p
+    JOIN embedding e ON e.paper_id = p.paper_id
+    WHERE e.{vec_col} IS NOT NULL
+"""
+COUNT_SQL_SOURCES = """
+    SELECT count(*)
+    FROM paper p
+    JOIN embedding e ON e.paper_id = p.paper_id
+    WHERE e.{vec_col} IS NOT NULL
+      AND p.source = ANY(%s)
+"""
+STREAM_SQL_ALL = """
+    SELECT p.paper_id,
+           e.{vec_col}::vector AS emb
+    FROM paper p
+    JOIN embedding e ON e.paper_id = p.paper_id
+    WHERE e.{vec_col} IS NOT NULL
+"""
+STREAM_SQL_SOURCES = """
+    SELECT p.paper_id,
+           e.{vec_col}::vector AS emb
+    FROM paper p
+    JOIN embedding e ON e.paper_id = p.paper_id
+    WHERE e.{vec_col} IS NOT NULL
+      AND p.source = ANY(%s)
+"""
+# Embedded papers with no row yet in the given projection. The anti-join
+# probes the (paper_id, projection) primary key, so this stays cheap even
+# though the projection itself holds the whole corpus.
+UNPLACED_SQL_ALL = """
+    SELECT p.paper_id,
+           e.{vec_col}::vector AS emb
+    FROM paper p
+    JOIN embedding e ON e.paper_id = p.paper_id
+    WHERE e.{vec_col} IS NOT NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM paper_projection_2d pp
+          WHERE pp.paper_id = p.paper_id AND pp.projection = %s
+      )
+"""
+UNPLACED_SQL_SOURCES = """
+    SELECT p.paper_id,
+           e.{vec_col}::vector AS emb
+    FROM paper p
+    JOIN embedding e ON e.paper_id = p.paper_id
+    WHERE e.{vec_col} IS NOT NULL
+      AND p.source = ANY(%s)
+      AND NOT EXISTS (
+          SELECT 1 FROM paper_projection_2d pp
+          WHERE pp.paper_id = p.paper_id AND pp.projection = %s
+      )
+"""
+
+
+def model_dir() -> Path:
+    return Path(os.getenv("OVERSIGHT_PROJECTION_MODEL_DIR", DEFAULT_MODEL_DIR))
+
+
+@dataclass
+class ProjectionModel:
+    """Everything needed to place new papers into an existing layout.
+
+    ``pca_mean`` / ``pca_components`` are the fitted PCA→50 transform;
+    ``paper_ids`` / ``x50`` / ``x2`` are every placed paper's PCA-50 and
+    2-D coordinates, row-aligned. ``sources`` is the source filter the
+    projection was built with (empty = full corpus).
+    """
+
+    name: str
+    sources: list[str]
+    pca_mean: np.ndarray
+    pca_components: np.ndarray
+    paper_ids: np.ndarray
+    x50: np.ndarray
+    x2: np.ndarray
+
+    @staticmethod
+    def path_for(name: str) -> Path:
+        return model_dir() / f"{name}.npz"
+
+    def save(self) -> Path:
+        path = self.path_for(self.name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # np.savez appends .npz to names that lack it, so the temp file
+        # keeps the suffix and is swapped in atomically afterwards.
+        tmp = path.with_name(f"{path.stem}.tmp.npz")
+        np.savez(
+            tmp,
+            sources=np.array(self.sources, dtype=str),
+            pca_mean=self.pca_mean,
+            pca_components=self.pca_components,
+            paper_ids=self.paper_ids,
+            x50=self.x50,
+            x2=self.x2,
+        )
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, name: str) -> ProjectionModel | None:
+        path = cls.path_for(name)
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                name=name,
+                sources=[str(s) for s in data["sources"]],
+                pca_mean=data["pca_mean"],
+                pca_components=data["pca_components"],
+                paper_ids=data["paper_ids"],
+                x50=data["x50"],
+                x2=data["x2"],
+            )
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        """Apply the fitted PCA to already L2-normalised rows."""
+        return ((X - self.pca_mean) @ self.pca_components.T).astype(np.float32)
+
+    def place(self, x50_new: np.ndarray, k: int) -> np.ndarray:
+        """Position new rows at the inverse-distance-weighted mean of the
+        2-D coords of their ``k`` nearest placed neighbors in PCA-50 space.
+
+        PaCMAP has no out-of-sample transform; a kNN interpolation keeps
+        new papers inside the cluster their neighbors define, which is
+        what the atlas needs until the next full refit.
+        """
+        from sklearn.neighbors import NearestNeighbors
+
+        k = min(k, len(self.x50))
+        nn = NearestNeighbors(n_neighbors=k, algorithm="brute").fit(self.x50)
+        dist, idx = nn.kneighbors(x50_new)
+        weights = 1.0 / np.maximum(dist, 1e-6)
+        weights /= weights.sum(axis=1, keepdims=True)
+        return np.einsum("nk,nkd->nd", weights, self.x2[idx]).astype(np.float32)
+
+
+def _source_params(sources: list[str]) -> list[Any]:
+    return [sources] if sources else []
+
+
+def count_embeddings(con: psycopg.Connection[Any], sources: list[str]) -> int:
+    with con.cursor() as cur:
+        if sources:
+            cur.execute(BACKEND.sql(COUNT_SQL_SOURCES), _source_params(sources))
+        else:
+            cur.execute(BACKEND.sql(COUNT_SQL_ALL))
+        row = cur.fetchone()
+    return int(row[0]) if row is not None else 0
+
+
+def stream_embeddings(
+    con: psycopg.Connection[Any], sources: list[str], n_rows: int
+) -> tuple[list[str], np.ndarray]:
+    """Stream ``n_rows`` embeddings through a server-side cursor into a
+    pre-allocated float32 ``(n_rows, DIM)`` array (~6.4 GB at 524k rows).
+    """
+    X = np.empty((n_rows, DIM), dtype=np.float32)
+    paper_ids: list[str] = [""] * n_rows
+
+    t_db = time.time()
+    with con.cursor(name="proj_stream") as cur:
+        cur.itersize = ITERSIZE
+        if sources:
+            cur.execute(BACKEND.sql(STREAM_SQL_SOURCES), _source_params(sources))
+        else:
+            cur.execute(BACKEND.sql(STREAM_SQL_ALL))
+        i = 0
+        for pid, emb in cur:
+            paper_ids[i] = pid
+            X[i] = emb
+            i += 1
+            if i % 50000 == 0:
+                elapsed = time.time() - t_db
+                rate = i / max(elapsed, 1e-6)
+                eta = (n_rows - i) / max(rate, 1e-6)
+                print(
+                    f"  streamed {i}/{n_rows} rate={rate:.0f}/s "
+                    f"elapsed={elapsed:.1f}s eta={eta:.0f}s",
+                    flush=True,
+                )
+    assert i == n_rows, f"streamed {i} but expected {n_rows}"
+    return paper_ids, X
+
+
+def l2_normalize_inplace(X: np.ndarray) -> None:
+    """L2-normalise rows in place to avoid a 6 GB copy at full-corpus scale."""
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    zero_mask = (norms == 0).flatten()
+    if zero_mask.any():
+        print(
+            f"  WARNING: {zero_mask.sum()} zero-norm rows; setting to 1.",
+            flush=True,
+        )
+        norms[zero_mask] = 1.0
+    np.divide(X, norms, out=X)
+
+
+def upsert_coords(
+    database_url: str, name: str, paper_ids: list[str], X2: np.ndarray
+) -> None:
+    n_rows = len(paper_ids)
+    with psycopg.connect(database_url) as con:
+        # autocommit=False so a crash mid-load doesn't leave the
+        # projection half-overwritten — the table flips atomically.
+        con.autocommit = False
+        with con.cursor() as cur:
+            batch_size = 5000
+            for i in range(0, n_rows, batch_size):
+                end = min(i + batch_size, n_rows)
+                rows = [
+                    (paper_ids[j], name, float(X2[j, 0]), float(X2[j, 1]))
+                    for j in range(i, end)
+                ]
+                cur.executemany(
+                    """
+                    INSERT INTO paper_projection_2d (paper_id, projection, x, y)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (paper_id, projection)
+                    DO UPDATE SET
+                        x = EXCLUDED.x,
+                        y = EXCLUDED.y,
+                        created_at = CURRENT_TIMESTAMP
+                    """,
+                    rows,
+                )
+                if (i // batch_size) % 4 == 0:
+                    print(f"  ...upserted {end:,}/{n_rows:,}")
+        con.commit()
+
+
+# paper_projection_2d is LIST-partitioned on projection (see
+# db/init/002-paper-atlas.sql), one partition per projection. A full refit
+# COPYs into a standalone staging table, builds its indexes and FK there,
+# then swaps it in for the old partition with a DETACH + ATTACH, so the
+# parent's (projection, x, y) index never accumulates dead tuples and
+# readers see either the old projection or the new one, never a mix.
+TABLE = "paper_projection_2d"
+# Mirrors db/init/002-paper-atlas.sql, which only runs on fresh databases;
+# ensure_partitioned() uses it to convert a pre-partitioning table.
+PARTITIONED_TABLE_DDL = """
+    CREATE TABLE paper_projection_2d (
+        paper_id    varchar      NOT NULL REFERENCES paper(paper_id) ON DELETE CASCADE,
+        projection  varchar      NOT NULL,
+        x           real         NOT NULL,
+        y           real         NOT NULL,
+        created_at  timestamp    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (paper_id, projection)
+    ) PARTITION BY LIST (projection)
+"""
+# Bounds how long the swap waits behind in-flight /api/atlas reads of the
+# old partition before giving up (and leaving the old projection live).
+SWAP_LOCK_TIMEOUT = "30s"
+
+
+def partition_name(name: str) -> str:
+    """Table name of the partition holding projection ``name``.
+
+    Projection names are free-form, so keep a readable slug and add a
+    short hash to keep distinct names (``a-b`` vs ``a_b``) apart. Short
+    enough that the ``_stage_*`` index names stay under NAMEDATALEN.
+    """
+    slug = re.sub(r"[^a-z0-9_]", "_", name.lower())[:24]
+    digest = hashlib.sha1(name.encode()).hexdigest()[:8]
+    return f"pp2d_{slug}_{digest}"
+
+
+def ensure_partitioned(con: psycopg.Connection[Any]) -> None:
+    """Convert a plain (pre-partitioning) paper_projection_2d in place.
+
+    One transaction: the old table is renamed aside, the partitioned
+    parent is created, each existing projection gets its partition and
+    its rows, and the old table is dropped. No-op once partitioned. An
+    advisory lock keeps parallel ``--spec`` workers from racing it.
+    """
+    with con.transaction():
+        con.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [TABLE])
+        relkind = con.execute(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE]
+        ).fetchone()
+        if relkind is None or relkind[0] == "p":
+            return
+        print(f"[projections] converting {TABLE} to a partitioned table...", flush=True)
+        con.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_legacy")
+        con.execute(f"ALTER INDEX {TABLE}_pkey RENAME TO {TABLE}_legacy_pkey")
+        con.execute(
+            f"ALTER INDEX IF EXISTS {TABLE}_proj_xy_idx "
+            f"RENAME TO {TABLE}_legacy_proj_xy_idx"
+        )
+        con.execute(PARTITIONED_TABLE_DDL)
+        con.execute(f"CREATE INDEX {TABLE}_proj_xy_idx ON {TABLE} (projection, x, y)")
+        names = con.execute(
+            f"SELECT DISTINCT projection FROM {TABLE}_legacy"
+        ).fetchall()
+        for (name,) in names:
+            con.execute(
+                sql.SQL("CREATE TABLE {} PARTITION OF {} FOR VALUES IN ({})").format(
+                    sql.Identifier(partition_name(name)),
+                    sql.Identifier(TABLE),
+                    sql.Literal(name),
+                )
+            )
+        con.execute(
+            f"""
+            INSERT INTO {TABLE} (paper_id, projection, x, y, created_at)
+            SELECT paper_id, projection, x, y, created_at FROM {TABLE}_legacy
+            """
+        )
+        con.execute(f"DROP TABLE {TABLE}_legacy")
+    print(f"[projections] partitioned {len(names)} projections", flush=True)
+
+
+def swap_projection(
+    database_url: str, name: str, paper_ids: list[str], X2: np.ndarray
+) -> None:
+    """Replace projection ``name`` wholesale with the given coords.
+
+    Unlike ``upsert_coords`` this also drops papers that are no longer in
+    the projection, and the only time spent holding locks readers care
+    about is the final DETACH/ATTACH, independent of the projection size.
+    """
+    part = partition_name(name)
+    stage_name = f"{part}_stage"
+    table_id, part_id, stage_id = (
+        sql.Identifier(TABLE),
+        sql.Identifier(part),
+        sql.Identifier(stage_name),
+    )
+    # Staged index names lose their _stage suffix once swapped in.
+    index_renames = [
+        (f"{stage_name}_pkey", f"{part}_pkey"),
+        (f"{stage_name}_proj_xy_idx", f"{part}_proj_xy_idx"),
+    ]
+    with psycopg.connect(database_url, autocommit=True) as con:
+        ensure_partitioned(con)
+
+        # Built outside the swap transaction: nothing reads the staging
+        # table, so none of this blocks /api/atlas.
+        con.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(stage_id))
+        con.execute(
+            sql.SQL("CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS)").format(
+                stage_id, table_id
+            )
+        )
+        with (
+            con.cursor() as cur,
+            cur.copy(
+                sql.SQL(
+                    "COPY {} (paper_id, projection, x, y) FROM STDIN (FORMAT BINARY)"
+                ).format(stage_id)
+            ) as copy,
+        ):
+            copy.set_types(["varchar", "varchar", "float4", "float4"])
+            for pid, (x, y) in zip(paper_ids, X2.tolist(), strict=True):
+                copy.write_row((pid, name, x, y))
+        # ATTACH adopts an existing index / FK that matches the parent's
+        # definition instead of building its own under the lock, and the
+        # CHECK proves the partition bound so it skips the validation scan.
+        con.execute(
+            sql.SQL(
+                "ALTER TABLE {} ADD CONSTRAINT {} PRIMARY KEY (paper_id, projection)"
+            ).format(stage_id, sql.Identifier(f"{stage_name}_pkey"))
+        )
+        con.execute(
+            sql.SQL("CREATE INDEX {} ON {} (projection, x, y)").format(
+                sql.Identifier(f"{stage_name}_proj_xy_idx"), stage_id
+            )
+        )
+        con.execute(
+            sql.SQL(
+                "ALTER TABLE {} ADD CONSTRAINT {} FOREIGN KEY (paper_id) "
+                "REFERENCES paper(paper_id) ON DELETE CASCADE"
+            ).format(stage_id, sql.Identifier(f"{stage_name}_paper_id_fkey"))
+        )
+        con.execute(
+            sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} CHECK (projection = {})").format(
+                stage_id, sql.Identifier(f"{stage_name}_bound"), sql.Literal(name)
+            )
+        )
+        con.execute(sql.SQL("ANALYZE {}").format(stage_id))
+
+        with con.transaction():
+            con.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+            attached = con.execute(
+                """
+                SELECT 1 FROM pg_inherits
+                WHERE inhparent = to_regclass(%s) AND inhrelid = to_regclass(%s)
+                """,
+                [TABLE, part],
+            ).fetchone()
+            if attached is not None:
+                con.execute(
+                    sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(
+                        table_id, part_id
+                    )
+                )
+            con.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(part_id))
+            con.execute(
+                sql.SQL("ALTER TABLE {} RENAME TO {}").format(stage_id, part_id)
+            )
+            for old, new in index_renames:
+                con.execute(
+                    sql.SQL("ALTER INDEX {} RENAME TO {}").format(
+                        sql.Identifier(old), sql.Identifier(new)
+                    )
+                )
+            con.execute(
+                sql.SQL("ALTER TABLE {} RENAME CONSTRAINT {} TO {}").format(
+                    part_id,
+                    sql.Identifier(f"{stage_name}_paper_id_fkey"),
+                    sql.Identifier(f"{part}_paper_id_fkey"),
+                )
+            )
+            con.execute(
+                sql.SQL("ALTER TABLE {} ATTACH PARTITION {} FOR VALUES IN ({})").format(
+                    table_id, part_id, sql.Literal(name)
+                )
+            )
+            con.execute(
+                sql.SQL("ALTER TABLE {} DROP CONSTRAINT {}").format(
+                    part_id, sql.Identifier(f"{stage_name}_bound")
+                )
+            )
+
+
+def _read_peak_rss_mb() -> float:
+    """Peak RSS since the last ``_reset_peak_rss`` (VmHWM), in MB.
+
+    Falls back to the process-lifetime ``ru_maxrss`` where /proc isn't
+    available, which still bounds the stage from above.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _reset_peak_rss() -> None:
+    # Writing 5 to clear_refs resets VmHWM to the current RSS (Linux >= 4.0),
+    # which turns the high-water mark into a per-stage measurement.
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+# Parallel builds rebind this per worker so interleaved output stays readable.
+_log_prefix = "[projections]"
+
+
+@contextmanager
+def stage(label: str) -> Iterator[None]:
+    """Print wall time and peak RSS for one pipeline stage."""
+    print(f"{_log_prefix} {label}...", flush=True)
+    report_progress(label)
+    _reset_peak_rss()
+    t0 = time.time()
+    yield
+    print(
+        f"{_log_prefix} {label} done in {time.time() - t0:.1f}s "
+        f"(peak_rss={_read_peak_rss_mb():,.0f} MB)",
+        flush=True,
+    )
+
+
+def stream_embeddings_to_file(
+    con: psycopg.Connection[Any],
+    sources: list[str],
+    n_rows: int,
+    path: Path,
+    dtype: np.dtype[Any],
+    chunk_size: int,
+) -> list[str]:
+    """Out-of-core variant of ``stream_embeddings``.
+
+    Rows are L2-normalised a chunk at a time and appended to ``path`` as a
+    raw ``(n_rows, DIM)`` array of ``dtype``, so only one chunk is ever
+    resident. Plain buffered writes rather than a writable memmap: dirty
+    mapped pages count towards RSS until the kernel flushes them.
+    """
+    paper_ids: list[str] = [""] * n_rows
+    buf = np.empty((chunk_size, DIM), dtype=np.float32)
+
+    t_db = time.time()
+    i = 0
+    with open(path, "wb") as out, con.cursor(name="proj_stream") as cur:
+        cur.itersize = ITERSIZE
+        if sources:
+            cur.execute(BACKEND.sql(STREAM_SQL_SOURCES), _source_params(sources))
+        else:
+            cur.execute(BACKEND.sql(STREAM_SQL_ALL))
+        filled = 0
+        for pid, emb in cur:
+            paper_ids[i] = pid
+            buf[filled] = emb
+            filled += 1
+            i += 1
+            if filled == chunk_size:
+                l2_normalize_inplace(buf)
+                out.write(buf.astype(dtype, copy=False).tobytes())
+                filled = 0
+            if i % 50000 == 0:
+                elapsed = time.time() - t_db
+                rate = i / max(elapsed, 1e-6)
+                eta = (n_rows - i) / max(rate, 1e-6)
+                print(
+                    f"  streamed {i}/{n_rows} rate={rate:.0f}/s "
+                    f"elapsed={elapsed:.1f}s eta={eta:.0f}s",
+                    flush=True,
+                )
+        if filled:
+            tail = buf[:filled]
+            l2_normalize_inplace(tail)
+            out.write(tail.astype(dtype, copy=False).tobytes())
+    assert i == n_rows, f"streamed {i} but expected {n_rows}"
+    return paper_ids
+
+
+def iter_chunks(
+    path: Path,
+    n_rows: int,
+    dtype: np.dtype[Any],
+    chunk_size: int,
+    rows: np.ndarray | None = None,
+    normalize: bool = False,
+) -> Iterator[np.ndarray]:
+    """Yield float32 copies of consecutive row chunks of a raw embedding file.
+
+    ``path`` holds ``n_rows`` rows of ``dtype``; ``rows`` optionally selects
+    an ascending subset of them. Each chunk maps only its own byte range and
+    drops the mapping before the next one, so page-cache pages never
+    accumulate in this process's RSS. A short tail is folded into the
+    previous chunk because IncrementalPCA needs at least ``n_components``
+    rows per ``partial_fit``.
+    """
+    n_selected = n_rows if rows is None else len(rows)
+    bounds = list(range(0, n_selected, chunk_size)) + [n_selected]
+    if len(bounds) > 2 and bounds[-1] - bounds[-2] < PCA_COMPONENTS:
+        del bounds[-2]
+    row_bytes = DIM * np.dtype(dtype).itemsize
+    for start, end in itertools.pairwise(bounds):
+        if rows is None:
+            first, last = start, end
+        else:
+            first, last = int(rows[start]), int(rows[end - 1]) + 1
+        mm = np.memmap(
+            path,
+            dtype=dtype,
+            mode="r",
+            offset=first * row_bytes,
+            shape=(last - first, DIM),
+        )
+        if rows is None:
+            chunk = np.array(mm, dtype=np.float32)
+        else:
+            chunk = mm[rows[start:end] - first].astype(np.float32)
+        del mm
+        if normalize:
+            l2_normalize_inplace(chunk)
+        yield chunk
+
+
+def check_chunk_size(chunk_size: int) -> None:
+    """Every chunk is a ``partial_fit`` batch, and IncrementalPCA needs at
+    least ``n_components`` rows in each; iter_chunks only folds the tail."""
+    if chunk_size < PCA_COMPONENTS:
+        raise ValueError(
+            f"chunk_size must be at least {PCA_COMPONENTS} (the PCA "
+            f"components), got {chunk_size}"
+        )
+
+
+def _fit_pca_in_memory(X: np.ndarray) -> tuple[Any, np.ndarray]:
+    from sklearn.decomposition import PCA
+
+    with stage(f"PCA→{PCA_COMPONENTS}"):
+        pca = PCA(n_components=PCA_COMPONENTS, random_state=42)
+        X50 = pca.fit_transform(X).astype(np.float32)
+    return pca, X50
+
+
+def _fit_pca_out_of_core(
+    chunks: Callable[[], Iterator[np.ndarray]], n_rows: int
+) -> tuple[Any, np.ndarray]:
+    """Two passes over ``chunks()``: IncrementalPCA fit, then transform."""
+    from sklearn.decomposition import IncrementalPCA
+
+    with stage(f"IncrementalPCA→{PCA_COMPONENTS} fit"):
+        pca = IncrementalPCA(n_components=PCA_COMPONENTS)
+        for chunk in chunks():
+            pca.partial_fit(chunk)
+
+    with stage(f"IncrementalPCA→{PCA_COMPONENTS} transform"):
+        X50 = np.empty((n_rows, PCA_COMPONENTS), dtype=np.float32)
+        start = 0
+        for chunk in chunks():
+            X50[start : start + len(chunk)] = pca.transform(chunk)
+            start += len(chunk)
+    return pca, X50
+
+
+def _load_and_reduce_in_memory(
+    con: psycopg.Connection[Any], sources: list[str], n_rows: int
+) -> tuple[list[str], Any, np.ndarray]:
+    with stage("streaming embeddings"):
+        paper_ids, X = stream_embeddings(con, sources, n_rows)
+    con.close()
+
+    with stage("L2-normalising in place"):
+        l2_normalize_inplace(X)
+
+    pca, X50 = _fit_pca_in_memory(X)
+    return paper_ids, pca, X50
+
+
+def _load_and_reduce_out_of_core(
+    con: psycopg.Connection[Any],
+    sources: list[str],
+    n_rows: int,
+    dtype: np.dtype[Any],
+    chunk_size: int,
+    scratch_dir: str | None,
+) -> tuple[list[str], Any, np.ndarray]:
+    fd, scratch = tempfile.mkstemp(
+        prefix="oversight-proj-", suffix=".bin", dir=scratch_dir
+    )
+    os.close(fd)
+    path = Path(scratch)
+    try:
+        print(f"[projections] scratch file: {path}", flush=True)
+        with stage(
+            f"streaming + L2-normalising embeddings "
+            f"({np.dtype(dtype).name}, chunk={chunk_size:,})"
+        ):
+            paper_ids = stream_embeddings_to_file(
+                con, sources, n_rows, path, dtype, chunk_size
+            )
+        con.close()
+
+        pca, X50 = _fit_pca_out_of_core(
+            lambda: iter_chunks(path, n_rows, dtype, chunk_size), n_rows
+        )
+    finally:
+        path.unlink(missing_ok=True)
+    return paper_ids, pca, X50
+
+
+def select_snapshot_rows(
+    database_url: str, snapshot: EmbeddingSnapshot, sources: list[str]
+) -> tuple[list[str], np.ndarray]:
+    """Paper ids and ascending snapshot row indices matching ``sources``.
+
+    Only the (small) id list of matching papers comes from Postgres; the
+    vectors themselves are read from the snapshot.
+    """
+    if not sources:
+        return list(snapshot.paper_ids), np.arange(snapshot.rows)
+    with psycopg.connect(database_url) as con:
+        matching = {
+            pid
+            for (pid,) in con.execute(
+                "SELECT paper_id FROM paper WHERE source = ANY(%s)", [sources]
+            ).fetchall()
+        }
+    rows = np.array(
+        [i for i, pid in enumerate(snapshot.paper_ids) if pid in matching],
+        dtype=np.int64,
+    )
+    return [snapshot.paper_ids[i] for i in rows], rows
+
+
+def _reduce_rows(
+    path: Path,
+    n_rows: int,
+    dtype: np.dtype[Any],
+    rows: np.ndarray | None,
+    normalize: bool,
+    streaming: bool,
+    chunk_size: int,
+    label: str,
+) -> tuple[Any, np.ndarray]:
+    """PCA→50 over (a subset of) a raw embedding file, in memory or out of core."""
+    n_selected = n_rows if rows is None else len(rows)
+
+    def chunks() -> Iterator[np.ndarray]:
+        return iter_chunks(
+            path, n_rows, dtype, chunk_size, rows=rows, normalize=normalize
+        )
+
+    if streaming:
+        return _fit_pca_out_of_core(chunks, n_selected)
+
+    with stage(f"loading + L2-normalising {label}"):
+        X = np.empty((n_selected, DIM), dtype=np.float32)
+        start = 0
+        for chunk in chunks():
+            X[start : start + len(chunk)] = chunk
+            start += len(chunk)
+    return _fit_pca_in_memory(X)
+
+
+def _check_snapshot(snapshot: EmbeddingSnapshot) -> None:
+    if snapshot.column != BACKEND.column:
+        raise ValueError(
+            f"the embedding snapshot holds {snapshot.column}, but "
+            f"{BACKEND.name} stores {BACKEND.column}; run `oversight snapshot`"
+        )
+
+
+def _load_and_reduce_from_snapshot(
+    snapshot: EmbeddingSnapshot,
+    rows: np.ndarray,
+    streaming: bool,
+    chunk_size: int,
+) -> tuple[Any, np.ndarray]:
+    return _reduce_rows(
+        snapshot.embeddings_path,
+        snapshot.rows,
+        snapshot.embeddings.dtype,
+        rows,
+        normalize=True,
+        streaming=streaming,
+        chunk_size=chunk_size,
+        label=f"snapshot v{snapshot.version}",
+    )
+
+
+def build_projection(
+    database_url: str,
+    name: str,
+    sources: list[str],
+    streaming: bool = False,
+    dtype: str = "float32",
+    chunk_size: int = 20_000,
+    scratch_dir: str | None = None,
+    snapshot: EmbeddingSnapshot | None = None,
+) -> int:
+    """Full refit: stream, normalise, PCA→50, PaCMAP→2, upsert, and persist
+    the fitted model for later ``place_unprojected`` runs. Returns the
+    number of projected papers.
+
+    ``streaming=True`` keeps the raw embeddings on disk (optionally as
+    float16) and fits IncrementalPCA chunk by chunk, so peak RSS scales
+    with ``chunk_size`` rather than the corpus; only the (N, 50) PCA output
+    and PaCMAP's own working set are held in memory.
+
+    With ``snapshot`` the vectors are read from the on-disk embedding
+    snapshot (see embedding_snapshot.py) instead of streamed from Postgres.
+    """
+    check_chunk_size(chunk_size)
+    if snapshot is not None:
+        _check_snapshot(snapshot)
+        paper_ids, rows = select_snapshot_rows(database_url, snapshot, sources)
+        n_rows = len(paper_ids)
+        print(
+            f"[projections] {n_rows} rows from embedding snapshot "
+            f"v{snapshot.version} (projection={name!r})",
+            flush=True,
+        )
+        if n_rows == 0:
+            print("[projections] no embeddings; nothing to project.")
+            return 0
+        pca, X50 = _load_and_reduce_from_snapshot(snapshot, rows, streaming, chunk_size)
+        return _finish_projection(database_url, name, sources, paper_ids, pca, X50)
+
+    print(f"[projections] connecting to DB (projection={name!r})...", flush=True)
+    con = psycopg.connect(database_url)
+    register_vector(con)
+
+    n_rows = count_embeddings(con, sources)
+    print(f"[projections] rows to fetch: {n_rows}", flush=True)
+    if n_rows == 0:
+        print("[projections] no embeddings; nothing to project.")
+        con.close()
+        return 0
+
+    # PCA → 50 then PaCMAP → 2. PaCMAP from 50-d is much faster than from
+    # raw 3072-d and PCA explains nearly all the variance after L2 norm.
+    if streaming:
+        paper_ids, pca, X50 = _load_and_reduce_out_of_core(
+            con, sources, n_rows, np.dtype(dtype), chunk_size, scratch_dir
+        )
+    else:
+        paper_ids, pca, X50 = _load_and_reduce_in_memory(con, sources, n_rows)
+    return _finish_projection(database_url, name, sources, paper_ids, pca, X50)
+
+
+def _finish_projection(
+    database_url: str,
+    name: str,
+    sources: list[str],
+    paper_ids: list[str],
+    pca: Any,
+    X50: np.ndarray,
+) -> int:
+    """PaCMAP→2 over the PCA output, load the coords and persist the model."""
+    import pacmap
+
+    n_rows = len(paper_ids)
+    print(
+        f"{_log_prefix} explained_variance_ratio_sum="
+        f"{pca.explained_variance_ratio_.sum():.4f}",
+        flush=True,
+    )
+
+    with stage("PaCMAP→2"):
+        reducer = pacmap.PaCMAP(
+            n_components=2,
+            n_neighbors=None,
+            MN_ratio=0.5,
+            FP_ratio=2.0,
+            random_state=42,
+            verbose=True,
+        )
+        X2 = reducer.fit_transform(X50, init="pca").astype(np.float32)
+
+    with stage(f"loading {n_rows} coords into projection={name!r}"):
+        swap_projection(database_url, name, paper_ids, X2)
+
+    model_path = ProjectionModel(
+        name=name,
+        sources=sources,
+        pca_mean=pca.mean_.astype(np.float32),
+        pca_components=pca.components_.astype(np.float32),
+        paper_ids=np.array(paper_ids, dtype=str),
+        x50=X50,
+        x2=X2,
+    ).save()
+    print(f"{_log_prefix} saved fitted model to {model_path}", flush=True)
+    return n_rows
+
+
+def place_unprojected(database_url: str, name: str, k: int = 10) -> int:
+    """Incremental mode: place embedded papers that are missing from
+    ``name`` using the model persisted by the last full refit. Returns the
+    number of newly placed papers.
+    """
+    model = ProjectionModel.load(name)
+    if model is None:
+        raise FileNotFoundError(
+            f"No fitted model for projection {name!r} at "
+            f"{ProjectionModel.path_for(name)}; run a full "
+            f"`oversight projections --name {name}` first."
+        )
+
+    con = psycopg.connect(database_url)
+    register_vector(con)
+    with con.cursor() as cur:
+        if model.sources:
+            cur.execute(BACKEND.sql(UNPLACED_SQL_SOURCES), [model.sources, name])
+        else:
+            cur.execute(BACKEND.sql(UNPLACED_SQL_ALL), [name])
+        rows = cur.fetchall()
+    con.close()
+
+    print(f"[projections] {len(rows)} papers missing from {name!r}", flush=True)
+    if not rows:
+        return 0
+
+    paper_ids = [pid for pid, _ in rows]
+    X = np.stack([np.asarray(emb, dtype=np.float32) for _, emb in rows])
+    del rows
+    l2_normalize_inplace(X)
+    x50_new = model.transform(X)
+    del X
+
+    t_place = time.time()
+    x2_new = model.place(x50_new, k)
+    print(
+        f"[projections] placed {len(paper_ids)} papers (k={k}) in "
+        f"{time.time() - t_place:.2f}s",
+        flush=True,
+    )
+
+    upsert_coords(database_url, name, paper_ids, x2_new)
+
+    # Newly placed papers become neighbors for the next incremental run,
+    # so the model keeps mirroring the table between full refits.
+    model.paper_ids = np.concatenate([model.paper_ids, np.array(paper_ids, dtype=str)])
+    model.x50 = np.concatenate([model.x50, x50_new])
+    model.x2 = np.concatenate([model.x2, x2_new])
+    model.save()
+    return len(paper_ids)
+
+
+@dataclass(frozen=True)
+class ProjectionSpec:
+    """One projection to build: a name plus an optional source filter."""
+
+    name: str
+    sources: list[str]
+
+    @classmethod
+    def parse(cls, raw: str) -> ProjectionSpec:
+        """Parse ``NAME`` (full corpus) or ``NAME=SRC1,SRC2``."""
+        name, _, sources_raw = raw.partition("=")
+        name = name.strip()
+        if not name:
+            raise ValueError(f"projection spec {raw!r} has no name")
+        sources = [s.strip() for s in sources_raw.split(",") if s.strip()]
+        return cls(name=name, sources=sources)
+
+
+def union_sources(specs: list[ProjectionSpec]) -> list[str]:
+    """The sources to load for all of ``specs``: every one they name, or
+    none (the full corpus) if any of them is unfiltered."""
+    if any(not spec.sources for spec in specs):
+        return []
+    return sorted({src for spec in specs for src in spec.sources})
+
+
+def spec_rows(spec: ProjectionSpec, row_sources: list[str | None]) -> np.ndarray:
+    """Ascending indices of the shared rows (whose sources are
+    ``row_sources``) that ``spec`` projects."""
+    wanted = set(spec.sources)
+    return np.array(
+        [i for i, src in enumerate(row_sources) if not wanted or src in wanted],
+        dtype=np.int64,
+    )
+
+
+def _build_spec_worker(
+    database_url: str,
+    spec: ProjectionSpec,
+    path: Path,
+    n_rows: int,
+    dtype: str,
+    normalized: bool,
+    rows: np.ndarray,
+    paper_ids: list[str],
+    chunk_size: int,
+    threads: int,
+    write_snapshot: bool,
+) -> tuple[str, int, float]:
+    """Build one projection in a worker process from the shared embedding file.
+
+    The file is only ever mapped read-only, a chunk at a time, and PCA is
+    always fitted out of core: every worker faults in the same page-cache
+    pages and holds ``chunk_size`` rows plus its (N, 50) PCA output,
+    instead of its own float32 copy of the corpus. BLAS and numba are
+    capped to ``threads`` so N workers don't each spin up one thread per
+    core.
+    """
+    global _log_prefix
+    _log_prefix = f"[projections:{spec.name}]"
+    os.environ["NUMBA_NUM_THREADS"] = str(threads)
+    from threadpoolctl import threadpool_limits
+
+    t0 = time.time()
+    with threadpool_limits(limits=threads):
+        pca, X50 = _fit_pca_out_of_core(
+            lambda: iter_chunks(
+                path,
+                n_rows,
+                np.dtype(dtype),
+                chunk_size,
+                rows=rows,
+                normalize=not normalized,
+            ),
+            len(rows),
+        )
+        n = _finish_projection(
+            database_url, spec.name, spec.sources, paper_ids, pca, X50
+        )
+    if write_snapshot:
+        from .atlas_snapshot import write_atlas_snapshot
+
+        write_atlas_snapshot(database_url, spec.name)
+    return spec.name, n, time.time() - t0
+
+
+def build_projections(
+    database_url: str,
+    specs: list[ProjectionSpec],
+    dtype: str = "float32",
+    chunk_size: int = 20_000,
+    scratch_dir: str | None = None,
+    snapshot: EmbeddingSnapshot | None = None,
+    jobs: int | None = None,
+    write_snapshots: bool = True,
+) -> dict[str, int]:
+    """Build several projections from a single embedding load.
+
+    Embeddings for the union of the specs' sources are loaded once — the
+    embedding snapshot file as-is, or a normalised scratch file streamed
+    from Postgres — and each spec is fitted in its own worker process that
+    maps that file read-only and fits PCA out of core, ``chunk_size`` rows
+    at a time, so concurrent workers never each hold a copy of the corpus.
+    Each worker loads its coords in its own transaction, so every
+    projection flips atomically and independently. Returns
+    ``{name: rows}``.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    check_chunk_size(chunk_size)
+    names = [spec.name for spec in specs]
+    assert len(set(names)) == len(names), f"duplicate projection names: {names}"
+    union = union_sources(specs)
+
+    scratch: Path | None = None
+    if snapshot is not None:
+        _check_snapshot(snapshot)
+        path, n_rows = snapshot.embeddings_path, snapshot.rows
+        file_dtype, normalized = snapshot.embeddings.dtype.str, False
+        all_ids = snapshot.paper_ids
+        print(
+            f"[projections] sharing embedding snapshot v{snapshot.version} "
+            f"({n_rows:,} rows) across {len(specs)} projections",
+            flush=True,
+        )
+    else:
+        con = psycopg.connect(database_url)
+        register_vector(con)
+        n_rows = count_embeddings(con, union)
+        if n_rows == 0:
+            print("[projections] no embeddings; nothing to project.")
+            con.close()
+            return {spec.name: 0 for spec in specs}
+        fd, scratch_name = tempfile.mkstemp(
+            prefix="oversight-proj-", suffix=".bin", dir=scratch_dir
+        )
+        os.close(fd)
+        scratch = Path(scratch_name)
+        path, file_dtype, normalized = scratch, np.dtype(dtype).str, True
+        print(f"[projections] scratch file: {path}", flush=True)
+        with stage(
+            f"streaming {n_rows:,} embeddings once for {len(specs)} projections"
+        ):
+            all_ids = stream_embeddings_to_file(
+                con, union, n_rows, path, np.dtype(dtype), chunk_size
+            )
+        con.close()
+
+    try:
+        with psycopg.connect(database_url) as con:
+            source_of = dict(
+                con.execute("SELECT paper_id, source FROM paper").fetchall()
+            )
+        row_sources = [source_of.get(pid) for pid in all_ids]
+        del source_of
+
+        jobs = jobs or len(specs)
+        threads = max(1, (os.cpu_count() or 1) // jobs)
+        results: dict[str, int] = {}
+        # spawn rather than fork: the parent has touched BLAS/numba thread
+        # pools and psycopg, none of which are fork-safe.
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=ctx) as pool:
+            futures = []
+            for spec in specs:
+                rows = spec_rows(spec, row_sources)
+                if len(rows) == 0:
+                    print(f"[projections] {spec.name!r}: no rows; skipping")
+                    results[spec.name] = 0
+                    continue
+                futures.append(
+                    pool.submit(
+                        _build_spec_worker,
+                        database_url,
+                        spec,
+                        path,
+                        n_rows,
+                        file_dtype,
+                        normalized,
+                        rows,
+                        [all_ids[i] for i in rows],
+                        chunk_size,
+                        threads,
+                        write_snapshots,
+                    )
+                )
+            for future in as_completed(futures):
+                name, n, elapsed = future.result()
+                results[name] = n
+                print(
+                    f"[projections] {name!r} finished: {n:,} rows in {elapsed:.1f}s",
+                    flush=True,
+                )
+    finally:
+        if scratch is not None:
+            scratch.unlink(missing_ok=True)
+    return results
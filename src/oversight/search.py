@@ -30,13 +30,13 @@ def main() -> None:
     # TODO: Make support many different embedding models + experiment with different embedding models. Add multiple named embeddings for each document.
     # TODO: Experiment with better ways of doing the actual similarity search, like what queries I should use.
     # TODO: Merge this repo with my conference scraper
-    # TODO: Add a way of doing a pass on existing documents and appending a new kind of embedding
+    # Re-embedding existing documents with a new model (a shadow column per model): see embedding_spaces.py
     # TODO: Add more conferences (MLSys, HPCA, ISCA), now I can realistically process all of this information
     # TODO: Add AI conferences (NeurIPS, ICML, ICLR, etc.)
     # TODO: Run some kind of cronjob that processes data feeds and alerts me of new relevant information, storing any information that was relevant
     # TODO: Add additional data sources (e.g. arxiv, email feeds, blogs)
     # TODO: Experiment with feeding whole papers in
-    # TODO: See if I can do a multi-keyword search (an AND-based cosine similarity)
+    # Multi-keyword (AND-based cosine similarity) search: see PaperRepository.get_composite_related_papers
     # TODO: Set up agents that help me to scrape this data
 
     search_engine = ConferenceSearchEngine(
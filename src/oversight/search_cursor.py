@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from dataclasses import asdict, dataclass, field
+
+# Opaque continuation tokens for /api/search.
+#
+# A token is base64url(JSON payload) + "." + base64url(HMAC-SHA256). The
+# payload carries everything needed to fetch the next page without the
+# client resending (or being able to tamper with) the search: the query
+# text — which doubles as the key into EmbeddingBatcher's vector cache, so
+# the next page normally skips the embedding call — the filters, and the
+# (distance, paper_id) of the last row served, which becomes the keyset
+# predicate in PaperDatabase.newest_papers_query.
+#
+# OVERSIGHT_CURSOR_SECRET must be set wherever more than one API process
+# serves the same clients — `oversight serve --asgi --workers N` refuses to
+# start without it — and docker-compose.yml requires it. Without it each
+# process signs with a random key and tokens stop verifying after a restart
+# (clients see a 400 and start the search over).
+
+CURSOR_VERSION = 1
+CURSOR_TTL_S = 24 * 3600
+
+_secret: bytes = (
+    os.environ["OVERSIGHT_CURSOR_SECRET"].encode()
+    if os.getenv("OVERSIGHT_CURSOR_SECRET")
+    else secrets.token_bytes(32)
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class SearchCursor:
+    text: str
+    model: str
+    sources: list[str]
+    time_window_days: int
+    limit: int
+    ef_search: int
+    after_distance: float
+    after_id: str
+    issued_at: int = 0
+    categories: list[str] = field(default_factory=list)
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(_secret, payload, hashlib.sha256).digest()
+
+
+def encode_cursor(cursor: SearchCursor) -> str:
+    body = asdict(cursor)
+    body["v"] = CURSOR_VERSION
+    body["issued_at"] = int(time.time())
+    payload = json.dumps(body, separators=(",", ":"), sort_keys=True).encode()
+    return f"{_b64(payload)}.{_b64(_sign(payload))}"
+
+
+def decode_cursor(token: str) -> SearchCursor:
+    """Verify and unpack ``token``; raises InvalidCursor on any mismatch."""
+    try:
+        payload_b64, sig_b64 = token.split(".")
+        payload = _unb64(payload_b64)
+        signature = _unb64(sig_b64)
+    except (ValueError, TypeError):
+        raise InvalidCursor("cursor is malformed") from None
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise InvalidCursor("cursor is invalid or expired") from None
+
+    body = json.loads(payload)
+    if body.pop("v", None) != CURSOR_VERSION:
+        raise InvalidCursor("cursor is invalid or expired")
+    cursor = SearchCursor(**body)
+    if time.time() - cursor.issued_at > CURSOR_TTL_S:
+        raise InvalidCursor("cursor is invalid or expired")
+    return cursor
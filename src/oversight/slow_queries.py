@@ -0,0 +1,386 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import queue
+import re
+import threading
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+import psycopg
+from psycopg import sql
+from psycopg.types.json import Jsonb
+
+from .utils import get_logger
+
+# Slow-query capture for the read path.
+#
+# PaperDatabase's read methods are named (metrics.db_query names them via
+# `named_query`), and connections opened for them get a cursor factory that
+# times every statement run inside a named call. A statement slower than
+# its threshold is handed to a background thread, which replays it on its
+# own connection under EXPLAIN (ANALYZE, BUFFERS) — after the session
+# settings (SET hnsw.ef_search ...) the call ran first, inside a
+# transaction that is rolled back — and writes the plan to slow_query_log.
+# The request that tripped the threshold only pays for a queue put.
+#
+# That catches the planner traps documented in find_neighbors and
+# get_newest_papers (a filter or self-join that turns the HNSW scan into a
+# multi-second sequential one) as soon as they start happening.
+#
+# Parameters never reach the table: numbers are kept (limits and ef_search
+# shape the plan), everything else is reduced to its type and length, and
+# quoted literals are scrubbed from the plan text.
+#
+# OVERSIGHT_SLOW_QUERY_MS configures it: a default threshold and/or
+# per-name ones, e.g. "250,find_neighbors=80,suggest=30". Unset disables
+# capture entirely; names without a threshold are not timed. Statements
+# sent in pipeline mode (get_newest_papers_many) return before the server
+# runs them, so they never trip the threshold.
+
+logger = get_logger()
+
+T = TypeVar("T")
+
+# Captures per query name are at least this far apart, so a regression
+# produces a few plans rather than one EXPLAIN ANALYZE per request.
+CAPTURE_COOLDOWN_S = float(os.getenv("OVERSIGHT_SLOW_QUERY_COOLDOWN_S", "60"))
+# Pending captures beyond this are dropped rather than queued.
+MAX_PENDING_CAPTURES = 32
+# The replay is cut off after this many times the query's threshold.
+EXPLAIN_TIMEOUT_FACTOR = 20
+
+# Mirrors db/init/006-slow-query-log.sql, which only runs on fresh
+# databases; the capture thread applies it before its first insert.
+SLOW_QUERY_LOG_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS slow_query_log (
+        id              bigserial         PRIMARY KEY,
+        name            varchar           NOT NULL,
+        duration_ms     double precision  NOT NULL,
+        threshold_ms    double precision  NOT NULL,
+        query           text              NOT NULL,
+        params          jsonb             NOT NULL DEFAULT '[]',
+        settings        text[]            NOT NULL DEFAULT '{}',
+        plan            text,
+        error           text,
+        captured_at     timestamptz       NOT NULL DEFAULT now()
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS slow_query_log_name_idx
+        ON slow_query_log (name, captured_at DESC)
+    """,
+]
+
+INSERT_SQL = """
+    INSERT INTO slow_query_log
+        (name, duration_ms, threshold_ms, query, params, settings, plan, error)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+RECENT_SQL = """
+    SELECT name, duration_ms, threshold_ms, query, params, settings, plan,
+           error, captured_at
+    FROM slow_query_log
+    WHERE %(name)s::varchar IS NULL OR name = %(name)s
+    ORDER BY captured_at DESC
+    LIMIT %(limit)s
+"""
+
+
+def parse_thresholds(spec: str) -> tuple[float | None, dict[str, float]]:
+    """``"250,find_neighbors=80"`` -> ``(250.0, {"find_neighbors": 80.0})``."""
+    default: float | None = None
+    per_name: dict[str, float] = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, value = item.rpartition("=")
+        if sep:
+            per_name[name.strip()] = float(value)
+        else:
+            default = float(value)
+    return default, per_name
+
+
+DEFAULT_THRESHOLD_MS, THRESHOLDS_MS = parse_thresholds(
+    os.getenv("OVERSIGHT_SLOW_QUERY_MS", "")
+)
+ENABLED = DEFAULT_THRESHOLD_MS is not None or bool(THRESHOLDS_MS)
+
+
+def threshold_ms(name: str) -> float | None:
+    return THRESHOLDS_MS.get(name, DEFAULT_THRESHOLD_MS)
+
+
+@dataclass
+class _NamedCall:
+    name: str
+    threshold_s: float
+    # Every (query, params) run so far in this call; the SETs among them
+    # are replayed before the EXPLAIN.
+    statements: list[tuple[Any, Any]] = field(default_factory=list)
+
+
+_current: ContextVar[_NamedCall | None] = ContextVar("slow_query_call", default=None)
+
+
+def named_query(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Time the statements ``fn`` runs against ``name``'s threshold.
+
+    Returns ``fn`` unchanged when capture is disabled or ``name`` has no
+    threshold.
+    """
+
+    def decorate(fn: Callable[..., T]) -> Callable[..., T]:
+        threshold = threshold_ms(name)
+        if threshold is None:
+            return fn
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                token = _current.set(_NamedCall(name, threshold / 1000))
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    _current.reset(token)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            token = _current.set(_NamedCall(name, threshold / 1000))
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _current.reset(token)
+
+        return wrapper
+
+    return decorate
+
+
+def redact_params(params: Any) -> Any:
+    """JSON-safe stand-in for query parameters: numbers and booleans are
+    kept, anything else becomes its type (and length, where it has one)."""
+    if params is None:
+        return []
+    if isinstance(params, dict):
+        return {k: _redact(v) for k, v in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [_redact(v) for v in params]
+    return _redact(params)
+
+
+def _redact(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    kind = type(value).__name__
+    try:
+        return f"<{kind} len={len(value)}>"
+    except TypeError:
+        return f"<{kind}>"
+
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+
+
+def scrub_plan(plan: str) -> str:
+    """Replace quoted literals (the bound values, inlined by the planner)
+    in EXPLAIN output with ``'…'``; casts like ``'…'::vector`` stay."""
+    return _LITERAL_RE.sub("'…'", plan)
+
+
+def _observe(query: Any, params: Any, elapsed: float) -> None:
+    call = _current.get()
+    if call is None:
+        return
+    if elapsed >= call.threshold_s:
+        _capturer().submit(
+            _Capture(
+                call.name,
+                elapsed,
+                call.threshold_s,
+                list(call.statements),
+                query,
+                params,
+            )
+        )
+    call.statements.append((query, params))
+
+
+class TimedCursor(psycopg.Cursor[Any]):
+    """Cursor factory for connections serving named read queries."""
+
+    def execute(self, query: Any, params: Any = None, **kwargs: Any) -> Any:
+        if _current.get() is None:
+            return super().execute(query, params, **kwargs)
+        t0 = time.perf_counter()
+        result = super().execute(query, params, **kwargs)
+        _observe(query, params, time.perf_counter() - t0)
+        return result
+
+
+class AsyncTimedCursor(psycopg.AsyncCursor[Any]):
+    """``TimedCursor`` for the ASGI server's pooled connections."""
+
+    async def execute(self, query: Any, params: Any = None, **kwargs: Any) -> Any:
+        if _current.get() is None:
+            return await super().execute(query, params, **kwargs)
+        t0 = time.perf_counter()
+        result = await super().execute(query, params, **kwargs)
+        _observe(query, params, time.perf_counter() - t0)
+        return result
+
+
+def instrument(con: psycopg.Connection[Any]) -> None:
+    """Time named queries on ``con`` (a no-op when capture is disabled)."""
+    if ENABLED:
+        con.cursor_factory = TimedCursor
+
+
+async def instrument_async(con: psycopg.AsyncConnection[Any]) -> None:
+    """``instrument`` as an AsyncConnectionPool ``configure`` step."""
+    if ENABLED:
+        con.cursor_factory = AsyncTimedCursor
+
+
+# --- capture ------------------------------------------------------------------
+
+
+@dataclass
+class _Capture:
+    name: str
+    elapsed_s: float
+    threshold_s: float
+    earlier: list[tuple[Any, Any]]
+    query: Any
+    params: Any
+
+
+class _Capturer:
+    """Background thread that EXPLAINs and logs slow statements."""
+
+    def __init__(self, database_url: str) -> None:
+        self.database_url = database_url
+        self._queue: queue.Queue[_Capture] = queue.Queue(MAX_PENDING_CAPTURES)
+        self._last_capture: dict[str, float] = {}
+        self._thread = threading.Thread(
+            target=self._run, name="slow-query-capture", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, capture: _Capture) -> None:
+        try:
+            self._queue.put_nowait(capture)
+        except queue.Full:
+            pass
+
+    def _due(self, capture: _Capture, query_text: str) -> bool:
+        """Whether to EXPLAIN ``capture``: SELECTs only (a slow SET is just
+        a setting for the next statement), at most once per cooldown."""
+        if not query_text.lstrip().upper().startswith(("SELECT", "WITH")):
+            return False
+        logger.warning(
+            f"Slow query {capture.name}: {capture.elapsed_s * 1000:.0f} ms "
+            f"(threshold {capture.threshold_s * 1000:.0f} ms)"
+        )
+        now = time.monotonic()
+        last = self._last_capture.get(capture.name)
+        if last is not None and now - last < CAPTURE_COOLDOWN_S:
+            return False
+        self._last_capture[capture.name] = now
+        return True
+
+    def _run(self) -> None:
+        from pgvector.psycopg import register_vector
+
+        con = psycopg.connect(self.database_url, autocommit=True)
+        register_vector(con)
+        for statement in SLOW_QUERY_LOG_DDL:
+            con.execute(statement)
+        while True:
+            capture = self._queue.get()
+            try:
+                if con.closed:
+                    con = psycopg.connect(self.database_url, autocommit=True)
+                    register_vector(con)
+                query_text = _as_string(capture.query, con)
+                if self._due(capture, query_text):
+                    self._record(con, capture, query_text)
+            except psycopg.Error:
+                logger.exception(f"Could not record slow query {capture.name}")
+
+    def _record(
+        self, con: psycopg.Connection[Any], capture: _Capture, query_text: str
+    ) -> None:
+        replay = [
+            (text, params)
+            for text, params in ((_as_string(q, con), p) for q, p in capture.earlier)
+            if text.lstrip().upper().startswith("SET ")
+        ]
+        plan: str | None = None
+        error: str | None = None
+        timeout_ms = int(capture.threshold_s * 1000 * EXPLAIN_TIMEOUT_FACTOR)
+        try:
+            # Rolled back, so the replayed SETs don't outlive the capture.
+            with con.transaction(force_rollback=True):
+                con.execute(
+                    "SELECT set_config('statement_timeout', %s, true)",
+                    [str(max(timeout_ms, 1000))],
+                )
+                for text, params in replay:
+                    con.execute(sql.SQL(text), params)
+                rows = con.execute(
+                    sql.SQL("EXPLAIN (ANALYZE, BUFFERS) {}").format(
+                        sql.SQL(query_text)
+                    ),
+                    capture.params,
+                ).fetchall()
+            plan = scrub_plan("\n".join(row[0] for row in rows))
+        except psycopg.Error as e:
+            error = f"{type(e).__name__}: {e}".strip()
+        con.execute(
+            INSERT_SQL,
+            [
+                capture.name,
+                capture.elapsed_s * 1000,
+                capture.threshold_s * 1000,
+                query_text,
+                Jsonb(redact_params(capture.params)),
+                [text for text, _ in replay],
+                plan,
+                error,
+            ],
+        )
+
+
+def _as_string(query: Any, con: psycopg.Connection[Any]) -> str:
+    if isinstance(query, sql.Composable):
+        return query.as_string(con)
+    if isinstance(query, bytes):
+        return query.decode()
+    return str(query)
+
+
+_capturer_lock = threading.Lock()
+_capturer_instance: _Capturer | None = None
+
+
+def _capturer() -> _Capturer:
+    global _capturer_instance
+    with _capturer_lock:
+        if _capturer_instance is None:
+            database_url = os.getenv("DATABASE_URL")
+            assert database_url is not None, "DATABASE_URL is not set"
+            _capturer_instance = _Capturer(database_url)
+        return _capturer_instance
@@ -2,11 +2,43 @@ from __future__ import annotations
 
 import logging
 import itertools
-from typing import Iterator, TypeVar
-from collections.abc import Iterable
+from contextvars import ContextVar
+from typing import Any, Iterator, TypeVar
+from collections.abc import Callable, Iterable
+
+from tqdm import tqdm as _tqdm
 
 T = TypeVar("T")
 
+# Where progress bars report to while a background job runs: set by the
+# job worker (see jobs.py) to a callback taking (label, done, total), and
+# unset everywhere else. Lets GET /api/jobs/<id> show how far a sync has got
+# without threading a reporter through every loop.
+progress_sink: ContextVar[Callable[[str, int, int | None], None] | None] = ContextVar(
+    "progress_sink", default=None
+)
+
+
+def report_progress(label: str, done: int = 0, total: int | None = None) -> None:
+    """Forward a progress update to the running job, if any."""
+    sink = progress_sink.get()
+    if sink is not None:
+        sink(label, done, total)
+
+
+class tqdm(_tqdm):
+    """``tqdm.tqdm`` that also reports to ``progress_sink``.
+
+    Hooks ``display``, which tqdm already rate-limits (``mininterval``), so
+    iteration stays on tqdm's fast path and the sink sees at most a few
+    updates a second per bar.
+    """
+
+    def display(self, msg: str | None = None, pos: int | None = None) -> Any:
+        shown = super().display(msg, pos)
+        report_progress(self.desc or "", int(self.n), self.total)
+        return shown
+
 
 def get_logger() -> logging.Logger:
     logging.basicConfig(
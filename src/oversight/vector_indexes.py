@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import dataclasses
+import math
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import psycopg
+from psycopg import sql
+
+from .embedding_backends import EmbeddingBackend
+from .utils import get_logger
+
+# Lifecycle of the HNSW indexes on ``embedding`` (`oversight index ...`):
+#
+#   status   every HNSW index with its build parameters, size and how much
+#            of it sits in shared buffers, against shared_buffers and
+#            effective_cache_size. Once the indexes outgrow shared_buffers
+#            searches start reading graph pages from the OS cache, and
+#            once they outgrow RAM from disk: latency degrades long before
+#            anything errors. --check exits non-zero as soon as they no
+#            longer fit in shared_buffers, for cron/alerting.
+#   rebuild  REINDEX CONCURRENTLY (or, to change m / ef_construction, a
+#            concurrent build under a temporary name that then replaces
+#            the old index), with maintenance_work_mem sized to hold the
+#            whole graph and parallel workers. Searches and writes carry on
+#            throughout.
+#   prewarm  pg_prewarm every HNSW index into shared buffers, e.g. right
+#            after a Postgres restart, so the first searches don't pay for
+#            cold graph pages. With pg_prewarm in shared_preload_libraries
+#            (both docker-compose files) the autoprewarm worker also
+#            restores the buffer contents on its own after every restart.
+#
+# Indexes are found in the catalog rather than by EmbeddingBackend's naming
+# scheme: Gemini's index predates it.
+#
+# pg_prewarm and pg_buffercache ship with Postgres' contrib modules (the
+# pgvector image has them). db/init only runs on fresh volumes, so
+# ensure_extensions also creates them; without them prewarm refuses and
+# status leaves residency out.
+
+logger = get_logger()
+
+# Parallel HNSW builds keep the graph in dynamic shared memory, i.e.
+# /dev/shm in the container: docker-compose.db.yml gives it 16 GB.
+MAX_BUILD_MEMORY_MB = 8192
+MIN_BUILD_MEMORY_MB = 64
+
+# pgvector's defaults, for an index built without WITH (...).
+DEFAULT_INDEX_PARAMS = {"m": 16, "ef_construction": 64}
+
+INDEX_EXTENSIONS_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_prewarm",
+    "CREATE EXTENSION IF NOT EXISTS pg_buffercache",
+]
+
+HNSW_INDEXES_SQL = """
+    SELECT c.relname, a.attname, opc.opcname, i.indisvalid, c.reloptions,
+           pg_relation_size(c.oid)
+    FROM pg_index AS i
+    JOIN pg_class AS c ON c.oid = i.indexrelid
+    JOIN pg_am AS am ON am.oid = c.relam
+    JOIN pg_attribute AS a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+    JOIN pg_opclass AS opc ON opc.oid = i.indclass[0]
+    WHERE i.indrelid = 'embedding'::regclass
+      AND am.amname = 'hnsw'
+    ORDER BY c.relname
+"""
+
+# Buffers of each relation of the current database held in shared buffers.
+RESIDENT_SQL = """
+    SELECT c.relname, count(*) * current_setting('block_size')::bigint
+    FROM pg_buffercache AS b
+    JOIN pg_class AS c ON b.relfilenode = pg_relation_filenode(c.oid)
+    WHERE b.reldatabase = (SELECT oid FROM pg_database
+                           WHERE datname = current_database())
+      AND c.relname = ANY(%s)
+    GROUP BY c.relname
+"""
+
+MEMORY_SETTINGS_SQL = """
+    SELECT name, setting::bigint * coalesce(pg_size_bytes(unit), 1)
+    FROM pg_settings
+    WHERE name IN ('shared_buffers', 'effective_cache_size')
+"""
+
+# Row estimate, vector type and dimension (the typmod) of a column.
+BUILD_SIZE_SQL = """
+    SELECT greatest(c.reltuples, 0), t.typname, a.atttypmod
+    FROM pg_class AS c
+    JOIN pg_attribute AS a ON a.attrelid = c.oid AND a.attname = %s
+    JOIN pg_type AS t ON t.oid = a.atttypid
+    WHERE c.oid = 'embedding'::regclass
+"""
+
+EXTENSION_INSTALLED_SQL = "SELECT 1 FROM pg_extension WHERE extname = %s"
+
+REBUILD_INDEX_DDL = """
+    CREATE INDEX CONCURRENTLY {new_index} ON embedding
+    USING hnsw ({column} {opclass})
+    WITH (m = {m}, ef_construction = {ef_construction})
+"""
+
+
+@dataclass(frozen=True)
+class HnswIndex:
+    name: str
+    column: str
+    opclass: str
+    valid: bool
+    m: int
+    ef_construction: int
+    size: int  # bytes
+    resident: int | None = None  # bytes in shared buffers; None: unknown
+
+
+@dataclass(frozen=True)
+class IndexStatus:
+    indexes: list[HnswIndex]
+    shared_buffers: int
+    effective_cache_size: int
+    autoprewarm: bool
+
+    @property
+    def total(self) -> int:
+        return sum(ix.size for ix in self.indexes if ix.valid)
+
+    @property
+    def fits_shared_buffers(self) -> bool:
+        return self.total <= self.shared_buffers
+
+    @property
+    def fits_cache(self) -> bool:
+        return self.total <= self.effective_cache_size
+
+    def report(self) -> str:
+        lines = []
+        for ix in self.indexes:
+            state = "" if ix.valid else " INVALID (interrupted build)"
+            resident = (
+                ""
+                if ix.resident is None
+                else f", {_percent(ix.resident, ix.size)} in shared buffers"
+            )
+            lines.append(
+                f"{ix.name} on {ix.column}: m={ix.m} "
+                f"ef_construction={ix.ef_construction}, {_size(ix.size)}"
+                f"{resident}{state}"
+            )
+        if not self.indexes:
+            lines.append("No HNSW indexes on embedding.")
+        elif self.indexes[0].resident is None:
+            lines.append(
+                "Residency unknown: pg_buffercache isn't installed or readable."
+            )
+        lines.append(
+            f"Valid HNSW indexes: {_size(self.total)}; "
+            f"shared_buffers {_size(self.shared_buffers)} "
+            f"({_percent(self.total, self.shared_buffers)} used by them), "
+            f"effective_cache_size {_size(self.effective_cache_size)}"
+        )
+        if not self.fits_cache:
+            lines.append(
+                "WARNING: the indexes exceed effective_cache_size; searches "
+                "will read graph pages from disk."
+            )
+        elif not self.fits_shared_buffers:
+            lines.append(
+                "WARNING: the indexes exceed shared_buffers; searches read "
+                "graph pages through the OS cache. Raise shared_buffers "
+                "before they outgrow RAM."
+            )
+        autoprewarm = "on" if self.autoprewarm else "off (pg_prewarm not preloaded)"
+        lines.append(f"autoprewarm after restart: {autoprewarm}")
+        return "\n".join(lines)
+
+
+def _size(n: int) -> str:
+    return f"{n / 2**30:.2f} GB" if n >= 2**30 else f"{n / 2**20:.1f} MB"
+
+
+def _percent(part: int, whole: int) -> str:
+    return f"{100 * part / whole:.1f}%" if whole else "-"
+
+
+def _options(reloptions: list[str] | None) -> dict[str, int]:
+    options = dict(DEFAULT_INDEX_PARAMS)
+    for option in reloptions or []:
+        key, _, value = option.partition("=")
+        if key in options:
+            options[key] = int(value)
+    return options
+
+
+def ensure_extensions(con: psycopg.Connection[Any]) -> None:
+    """Create pg_prewarm / pg_buffercache where the server has them."""
+    for statement in INDEX_EXTENSIONS_DDL:
+        try:
+            with con.transaction():
+                con.execute(statement)
+        except psycopg.Error as e:
+            logger.warning(f"{statement}: {e.diag.message_primary}")
+
+
+def _installed(con: psycopg.Connection[Any], extension: str) -> bool:
+    return con.execute(EXTENSION_INSTALLED_SQL, [extension]).fetchone() is not None
+
+
+def hnsw_indexes(con: psycopg.Connection[Any]) -> list[HnswIndex]:
+    return [
+        HnswIndex(name, column, opclass, valid, **_options(reloptions), size=size)
+        for name, column, opclass, valid, reloptions, size in con.execute(
+            HNSW_INDEXES_SQL
+        ).fetchall()
+    ]
+
+
+def index_for(
+    con: psycopg.Connection[Any], backend: EmbeddingBackend
+) -> HnswIndex | None:
+    """The valid HNSW index on ``backend``'s column, whatever its name."""
+    for ix in hnsw_indexes(con):
+        if ix.column == backend.column and ix.valid:
+            return ix
+    return None
+
+
+def status(con: psycopg.Connection[Any]) -> IndexStatus:
+    indexes = hnsw_indexes(con)
+    if _installed(con, "pg_buffercache"):
+        try:
+            with con.transaction():
+                resident = dict(
+                    con.execute(RESIDENT_SQL, [[ix.name for ix in indexes]]).fetchall()
+                )
+        except psycopg.errors.InsufficientPrivilege as e:
+            # pg_buffercache needs pg_monitor (or superuser).
+            logger.warning(f"Can't read pg_buffercache: {e}")
+        else:
+            indexes = [
+                dataclasses.replace(ix, resident=resident.get(ix.name, 0))
+                for ix in indexes
+            ]
+    settings = dict(con.execute(MEMORY_SETTINGS_SQL).fetchall())
+    preload = con.execute("SHOW shared_preload_libraries").fetchone()[0]
+    return IndexStatus(
+        indexes=indexes,
+        shared_buffers=settings["shared_buffers"],
+        effective_cache_size=settings["effective_cache_size"],
+        autoprewarm="pg_prewarm" in preload,
+    )
+
+
+def build_memory_mb(con: psycopg.Connection[Any], column: str, m: int) -> int:
+    """maintenance_work_mem for building an HNSW index on ``column``: the
+    graph should fit, or the build slows down severalfold once it spills.
+
+    Rough, and from the catalog rather than a scan of the table: per row
+    (the planner's estimate), the vector plus 2 * m layer-0 neighbour
+    slots (6-byte item pointers) and tuple overhead, with a 25% margin.
+    """
+    rows, type_name, dim = con.execute(BUILD_SIZE_SQL, [column]).fetchone()
+    vector_bytes = 8 + dim * (2 if type_name == "halfvec" else 4)
+    estimate = rows * (vector_bytes + 2 * m * 6 + 64) * 1.25
+    return max(
+        MIN_BUILD_MEMORY_MB, min(MAX_BUILD_MEMORY_MB, math.ceil(estimate / 2**20))
+    )
+
+
+def configure_build(
+    con: psycopg.Connection[Any],
+    column: str,
+    m: int = 16,
+    maintenance_work_mem_mb: int | None = None,
+    parallel_workers: int | None = None,
+) -> None:
+    """Session settings for an HNSW build on ``column``: memory for the
+    whole graph, and every parallel worker the server allows unless
+    ``parallel_workers`` says otherwise."""
+    mb = maintenance_work_mem_mb or build_memory_mb(con, column, m)
+    if parallel_workers is None:
+        parallel_workers = int(con.execute("SHOW max_parallel_workers").fetchone()[0])
+    con.execute(sql.SQL("SET maintenance_work_mem = {}").format(sql.Literal(f"{mb}MB")))
+    con.execute(
+        sql.SQL("SET max_parallel_maintenance_workers = {}").format(
+            sql.Literal(parallel_workers)
+        )
+    )
+    logger.info(
+        f"Building with maintenance_work_mem={mb}MB, "
+        f"max_parallel_maintenance_workers={parallel_workers}"
+    )
+
+
+def _drop_leftovers(con: psycopg.Connection[Any], name: str) -> None:
+    """Drop the invalid copies an interrupted rebuild of ``name`` left."""
+    for ix in hnsw_indexes(con):
+        if not ix.valid and ix.name in (f"{name}_ccnew", f"{name}_rebuild"):
+            logger.warning(f"Dropping invalid index {ix.name}")
+            con.execute(
+                sql.SQL("DROP INDEX CONCURRENTLY {}").format(sql.Identifier(ix.name))
+            )
+
+
+def rebuild(
+    database_url: str,
+    name: str,
+    m: int | None = None,
+    ef_construction: int | None = None,
+    maintenance_work_mem_mb: int | None = None,
+    parallel_workers: int | None = None,
+) -> HnswIndex:
+    """Rebuild the HNSW index ``name`` without blocking reads or writes.
+
+    Same parameters: REINDEX CONCURRENTLY. New ``m`` / ``ef_construction``
+    (e.g. from `oversight tune-hnsw`): build ``<name>_rebuild`` next to it,
+    drop the old index and take over its name. Either way the old index
+    serves searches until the new one is ready.
+    """
+    with psycopg.connect(database_url, autocommit=True) as con:
+        _drop_leftovers(con, name)
+        by_name = {ix.name: ix for ix in hnsw_indexes(con)}
+        assert name in by_name, (
+            f"No HNSW index {name} on embedding; `oversight index status` lists them"
+        )
+        old = by_name[name]
+        m = m or old.m
+        ef_construction = ef_construction or old.ef_construction
+        configure_build(con, old.column, m, maintenance_work_mem_mb, parallel_workers)
+
+        started = time.monotonic()
+        if (m, ef_construction) == (old.m, old.ef_construction):
+            con.execute(
+                sql.SQL("REINDEX INDEX CONCURRENTLY {}").format(sql.Identifier(name))
+            )
+        else:
+            new = f"{name}_rebuild"
+            con.execute(
+                sql.SQL(REBUILD_INDEX_DDL).format(
+                    new_index=sql.Identifier(new),
+                    column=sql.Identifier(old.column),
+                    opclass=sql.Identifier(old.opclass),
+                    m=sql.Literal(m),
+                    ef_construction=sql.Literal(ef_construction),
+                )
+            )
+            con.execute(
+                sql.SQL("DROP INDEX CONCURRENTLY {}").format(sql.Identifier(name))
+            )
+            con.execute(
+                sql.SQL("ALTER INDEX {} RENAME TO {}").format(
+                    sql.Identifier(new), sql.Identifier(name)
+                )
+            )
+        logger.info(f"Rebuilt {name} in {time.monotonic() - started:.1f}s")
+        return {ix.name: ix for ix in hnsw_indexes(con)}[name]
+
+
+def prewarm(database_url: str) -> list[tuple[HnswIndex, int]]:
+    """Load every valid HNSW index into shared buffers; returns each index
+    with the blocks read."""
+    with psycopg.connect(database_url, autocommit=True) as con:
+        ensure_extensions(con)
+        if not _installed(con, "pg_prewarm"):
+            raise SystemExit("pg_prewarm is not available on this server")
+        warmed = []
+        for ix in hnsw_indexes(con):
+            if not ix.valid:
+                continue
+            started = time.monotonic()
+            (blocks,) = con.execute(
+                "SELECT pg_prewarm(%s::regclass)", [ix.name]
+            ).fetchone()
+            logger.info(
+                f"Prewarmed {ix.name}: {blocks} blocks in "
+                f"{time.monotonic() - started:.1f}s"
+            )
+            warmed.append((ix, blocks))
+        return warmed
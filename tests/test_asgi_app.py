@@ -0,0 +1,107 @@
+"""The ASGI app answers like the Flask app on routes that need no database.
+
+The client is used without its context manager so the lifespan (which
+opens the connection pool) never runs; every request here is answered
+from validation or from an on-disk atlas snapshot before a connection
+would be checked out.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from starlette.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight.asgi_app import app  # noqa: E402
+from oversight.flask_app import app as flask_app  # noqa: E402
+
+VERSION = "20260101T000000000000"
+GZIP_ETAG = f'"pacmap_test-{VERSION}-gzip"'
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "pacmap_test"
+    directory.mkdir()
+    body = json.dumps({"projection": "pacmap_test", "count": 1, "points": []}).encode()
+    for fmt in ("json", "ndjson"):
+        (directory / f"{VERSION}.{fmt}").write_bytes(body)
+        (directory / f"{VERSION}.{fmt}.gz").write_bytes(gzip.compress(body))
+    (directory / "current.json").write_text(
+        json.dumps(
+            {
+                "projection": "pacmap_test",
+                "version": VERSION,
+                "created_at": "2026-01-01T00:00:00",
+                "count": 1,
+                "bbox": [0.0, 0.0, 0.0, 0.0],
+            }
+        )
+    )
+    monkeypatch.setenv("OVERSIGHT_ATLAS_SNAPSHOT_DIR", str(tmp_path))
+    return directory
+
+
+def test_health(client):
+    resp = client.get("/api/health")
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "ok"}
+
+
+@pytest.mark.parametrize(
+    ("method", "url", "body"),
+    [
+        ("GET", "/api/search?text=", None),
+        ("POST", "/api/search", {"text": "x", "limit": "many"}),
+        ("POST", "/api/search", {"text": "x", "ef_search": []}),
+        ("POST", "/api/search:batch", {"queries": []}),
+        ("POST", "/api/search:batch", {"queries": [{"text": "x"}] * 33}),
+        ("POST", "/api/search:batch", {"queries": [{"text": "x"}, {"text": " "}]}),
+        ("POST", "/api/search:batch", {"queries": ["x"]}),
+        ("POST", "/api/search:composite", {}),
+        ("POST", "/api/search:composite", {"texts": ["a"], "mode": "max"}),
+        ("POST", "/api/search:composite", {"texts": [{"text": "a", "weight": 0}]}),
+        ("GET", "/api/suggest?q=graph&limit=0", None),
+        ("GET", "/api/suggest?q=graph&limit=some", None),
+        ("GET", "/api/papers/p1/neighbors?k=0", None),
+        ("GET", "/api/papers/p1/neighbors?mutual=maybe", None),
+        ("GET", "/api/atlas", None),
+        ("GET", "/api/atlas?projection=p&format=csv", None),
+        ("GET", "/api/atlas?projection=p&viewport=1,2,3", None),
+    ],
+)
+def test_validation_errors_match_flask(client, method, url, body):
+    resp = client.request(method, url, json=body)
+    expected = flask_app.test_client().open(url, method=method, json=body)
+    assert resp.status_code == expected.status_code == 400
+    assert resp.json() == expected.get_json()
+
+
+def test_snapshot_served_with_etag_and_encoding(client, snapshot_dir):
+    resp = client.get(
+        "/api/atlas?projection=pacmap_test", headers={"Accept-Encoding": "gzip"}
+    )
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] == GZIP_ETAG
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert resp.json()["projection"] == "pacmap_test"
+
+
+def test_snapshot_revalidates_to_304(client, snapshot_dir):
+    resp = client.get(
+        "/api/atlas?projection=pacmap_test",
+        headers={"If-None-Match": GZIP_ETAG, "Accept-Encoding": "gzip"},
+    )
+    assert resp.status_code == 304
+    assert resp.headers["ETag"] == GZIP_ETAG
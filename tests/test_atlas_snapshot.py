@@ -0,0 +1,107 @@
+"""Serving behaviour of the precompressed ``/api/atlas`` snapshots.
+
+Builds a snapshot directory by hand (no database needed) and checks
+content negotiation and ETag revalidation through the Flask test client.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import brotli
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight.flask_app import app  # noqa: E402
+
+VERSION = "20260101T000000000000"
+ETAG = f'"pacmap_test-{VERSION}-identity"'
+BR_ETAG = f'"pacmap_test-{VERSION}-br"'
+GZIP_ETAG = f'"pacmap_test-{VERSION}-gzip"'
+PAYLOAD = {
+    "projection": "pacmap_test",
+    "count": 1,
+    "points": [{"paper_id": "p1", "title": "T", "source": "arxiv", "x": 1.0, "y": 2.0}],
+}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    directory = tmp_path / "pacmap_test"
+    directory.mkdir()
+    body = json.dumps(PAYLOAD).encode()
+    for fmt in ("json", "ndjson"):
+        (directory / f"{VERSION}.{fmt}").write_bytes(body)
+        (directory / f"{VERSION}.{fmt}.gz").write_bytes(gzip.compress(body))
+        (directory / f"{VERSION}.{fmt}.br").write_bytes(brotli.compress(body))
+    (directory / "current.json").write_text(
+        json.dumps(
+            {
+                "projection": "pacmap_test",
+                "version": VERSION,
+                "created_at": "2026-01-01T00:00:00",
+                "count": 1,
+                "bbox": [1.0, 2.0, 1.0, 2.0],
+            }
+        )
+    )
+    monkeypatch.setenv("OVERSIGHT_ATLAS_SNAPSHOT_DIR", str(tmp_path))
+    app.config["TESTING"] = True
+    return app.test_client()
+
+
+def test_prefers_brotli(client):
+    resp = client.get(
+        "/api/atlas?projection=pacmap_test", headers={"Accept-Encoding": "gzip, br"}
+    )
+    assert resp.status_code == 200
+    assert resp.headers["Content-Encoding"] == "br"
+    assert resp.headers["ETag"] == BR_ETAG
+    assert resp.headers["Vary"] == "Accept-Encoding"
+    assert json.loads(brotli.decompress(resp.data)) == PAYLOAD
+
+
+def test_falls_back_to_gzip_then_identity(client):
+    resp = client.get(
+        "/api/atlas?projection=pacmap_test",
+        headers={"Accept-Encoding": "gzip, br;q=0"},
+    )
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert resp.headers["ETag"] == GZIP_ETAG
+    assert json.loads(gzip.decompress(resp.data)) == PAYLOAD
+
+    resp = client.get("/api/atlas?projection=pacmap_test")
+    assert "Content-Encoding" not in resp.headers
+    assert resp.headers["ETag"] == ETAG
+    assert resp.get_json() == PAYLOAD
+
+
+def test_conditional_request_returns_304(client):
+    resp = client.get(
+        "/api/atlas?projection=pacmap_test&format=ndjson",
+        headers={"If-None-Match": ETAG},
+    )
+    assert resp.status_code == 304
+    assert resp.data == b""
+    assert resp.headers["ETag"] == ETAG
+
+
+def test_etag_is_per_encoding(client):
+    # A cache holding the identity bytes must not be told they are the br
+    # representation, and vice versa.
+    resp = client.get(
+        "/api/atlas?projection=pacmap_test",
+        headers={"If-None-Match": ETAG, "Accept-Encoding": "br"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] == BR_ETAG
+
+    resp = client.get(
+        "/api/atlas?projection=pacmap_test",
+        headers={"If-None-Match": BR_ETAG, "Accept-Encoding": "br"},
+    )
+    assert resp.status_code == 304
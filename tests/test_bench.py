@@ -0,0 +1,90 @@
+"""`oversight bench`: corpus generation, summaries and baseline comparison
+(no database or server needed)."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight import bench  # noqa: E402
+
+
+def test_corpus_is_deterministic():
+    a = bench.synthetic_papers(300, seed=1)
+    assert a == bench.synthetic_papers(300, seed=1)
+    assert a != bench.synthetic_papers(300, seed=2)
+    assert all(p.paper_id.startswith(bench.PAPER_PREFIX) for p in a)
+    assert {p.source for p in a} <= set(bench.SOURCE_WEIGHTS)
+    assert max(p.update_date for p in a) <= bench.CORPUS_END
+
+
+def test_embedding_slices_match_and_are_unit_length():
+    whole = bench.synthetic_embeddings(50, 3, 0, 50, dim=64)
+    assert whole.dtype == np.float16 and whole.shape == (50, 64)
+    np.testing.assert_array_equal(
+        whole[20:30], bench.synthetic_embeddings(50, 3, 20, 30, dim=64)
+    )
+    norms = np.linalg.norm(whole.astype(np.float32), axis=1)
+    np.testing.assert_allclose(norms, 1.0, atol=1e-2)
+
+
+def test_summarize():
+    row = bench.summarize("detail", 4, [i / 1000 for i in range(1, 101)], 2, 2.0)
+    assert row["requests"] == 102 and row["errors"] == 2
+    assert (row["p50_ms"], row["p95_ms"], row["p99_ms"]) == (51.0, 95.0, 99.0)
+    assert row["throughput_rps"] == 50.0
+    assert bench.summarize("detail", 1, [], 5, 1.0)["p95_ms"] is None
+
+
+def _run(**results: tuple[float | None, float, int]) -> dict:
+    return {
+        "version": bench.RESULTS_VERSION,
+        "config": {"papers": 1000, "seed": 0, "server": "asgi"},
+        "results": [
+            {
+                "scenario": scenario,
+                "concurrency": 8,
+                "p95_ms": p95,
+                "throughput_rps": rps,
+                "errors": errors,
+            }
+            for scenario, (p95, rps, errors) in results.items()
+        ],
+    }
+
+
+def test_compare_flags_regressions():
+    baseline = _run(
+        search=(20.0, 400.0, 0),
+        detail=(1.0, 2000.0, 0),
+        atlas_json=(100.0, 50.0, 0),
+        neighbors=(10.0, 500.0, 0),
+    )
+    current = _run(
+        search=(30.0, 390.0, 0),  # p95 +50%
+        detail=(1.8, 1900.0, 0),  # +80%, but under min_delta_ms
+        atlas_json=(105.0, 30.0, 0),  # throughput -40%
+        neighbors=(None, 0.0, 200),  # now failing
+    )
+    regressions = bench.compare_results(baseline, current)
+    assert len(regressions) == 4
+    assert regressions[0].startswith("search c=8: p95 20.0 -> 30.0 ms")
+    assert regressions[1].startswith("atlas_json c=8: throughput")
+    assert regressions[3] == "neighbors c=8: 200 errors (baseline had none)"
+    assert bench.compare_results(baseline, baseline) == []
+
+
+def test_compare_refuses_a_different_corpus():
+    other = _run()
+    other["config"]["papers"] = 50_000
+    with pytest.raises(ValueError, match="not comparable"):
+        bench.compare_results(_run(), other)
+    other = _run()
+    other["config"]["model"] = "fake/hash-384"
+    with pytest.raises(ValueError, match="model="):
+        bench.compare_results(_run(), other)
@@ -0,0 +1,94 @@
+"""Parsing and query building for /api/search:composite (no database needed)."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight.api_common import (  # noqa: E402
+    MAX_COMPOSITE_VECTORS,
+    BadRequest,
+    composite_vectors,
+    parse_composite_search,
+)
+from oversight.embedding_backends import GEMINI, get_backend  # noqa: E402
+from oversight.PaperDatabase import (  # noqa: E402
+    composite_papers_params,
+    composite_papers_query,
+    weighted_centroid,
+)
+
+
+def test_texts_and_papers_take_bare_strings_or_weights():
+    params = parse_composite_search(
+        {
+            "texts": [" graphs ", {"text": "compilers", "weight": 2}],
+            "papers": [{"paper_id": "p1", "weight": 0.5}],
+            "mode": "mean",
+        }
+    )
+    assert params.texts == [("graphs", 1.0), ("compilers", 2.0)]
+    assert params.paper_ids == [("p1", 0.5)]
+    assert params.weights == [1.0, 2.0, 0.5]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {},
+        {"texts": "graphs"},
+        {"texts": [3]},
+        {"texts": [{"text": "a", "weight": -1}]},
+        {"papers": [{"weight": 1}]},
+        {"texts": ["a"] * (MAX_COMPOSITE_VECTORS + 1)},
+        {"texts": ["a"], "mode": "max"},
+    ],
+)
+def test_invalid_bodies(body):
+    with pytest.raises(BadRequest):
+        parse_composite_search(body)
+
+
+def test_seeds_without_embeddings_are_rejected():
+    params = parse_composite_search({"texts": ["a"], "papers": ["p1", "p2"]})
+    assert composite_vectors(params, ["t"], {"p1": "e1", "p2": "e2"}) == [
+        "t",
+        "e1",
+        "e2",
+    ]
+    with pytest.raises(BadRequest, match="p2"):
+        composite_vectors(params, ["t"], {"p1": "e1"})
+
+
+def test_centroid_is_weighted_and_normalised():
+    centroid = weighted_centroid([[1.0, 0.0], [0.0, 1.0]], [3.0, 1.0])
+    np.testing.assert_allclose(centroid, np.array([3.0, 1.0]) / np.sqrt(10))
+
+
+def test_mean_weights_are_normalised_and_centroid_collapses_vectors():
+    vectors = [[1.0, 0.0], [0.0, 1.0]]
+    mean = composite_papers_params(vectors, [3.0, 1.0], "mean", None, 10, [])
+    assert (mean["w0"], mean["w1"]) == (0.75, 0.25)
+    assert "centroid" in mean
+
+    centroid = composite_papers_params(vectors, [1.0, 1.0], "centroid", None, 10, [])
+    assert "v1" not in centroid
+
+
+@pytest.mark.parametrize(("mode", "passes"), [("min", 3), ("mean", 3), ("centroid", 1)])
+def test_one_index_pass_per_vector(mode, passes):
+    n_vectors = 1 if mode == "centroid" else 2
+    query = composite_papers_query(GEMINI, n_vectors, [], mode).as_string(None)
+    assert query.count("LIMIT %(pool)s") == passes
+
+
+def test_query_uses_the_models_column_and_type():
+    backend = get_backend("fake/hash-8")
+    query = composite_papers_query(backend, 2, [], "mean").as_string(None)
+    assert '"embedding_fake_hash_8" <=> %(v0)s::halfvec(8)' in query
+    assert "gemini" not in query and "3072" not in query
@@ -0,0 +1,253 @@
+"""Embedding work queue: which papers get queued (no database needed) and,
+when DATABASE_URL points at a reachable database with the paper schema,
+claiming, completing, a paper changing mid-embed, retry backoff and
+re-listed arXiv papers moving into the embedded categories."""
+
+from __future__ import annotations
+
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight import embed_queue  # noqa: E402
+from oversight.embedding_backends import get_backend  # noqa: E402
+from oversight.Paper import Paper  # noqa: E402
+from oversight.PaperDatabase import PaperDatabase  # noqa: E402
+
+BACKEND = get_backend("fake/hash-8")
+
+
+def paper(
+    source: str,
+    categories: set[str] | None = None,
+    paper_id: str = "test/embed-queue",
+) -> Paper:
+    return Paper(
+        paper_id,
+        {},
+        datetime(2025, 1, 1),
+        "An abstract",
+        "A title",
+        categories=categories,
+        source=source,
+        link="https://example.org",
+    )
+
+
+def test_should_embed():
+    db = PaperDatabase(BACKEND)
+    assert db.should_embed(paper("ICML"))
+    assert db.should_embed(paper("arxiv", {"cs:cs:LG", "stat:stat:ML"}))
+    assert not db.should_embed(paper("arxiv", {"cs:cs:CV"}))
+    assert not db.should_embed(paper("arxiv"))
+
+
+def test_queue_state_str():
+    oldest = datetime(2025, 1, 2, 3, 4, tzinfo=timezone.utc)
+    assert str(embed_queue.QueueState("m", "ready", 1200, oldest, 0)) == (
+        "m: 1,200 ready, oldest enqueued 2025-01-02 03:04"
+    )
+    assert str(embed_queue.QueueState("m", "failed", 3, oldest, 5)).endswith(
+        "after 5 attempts"
+    )
+
+
+class FakeModel:
+    """Stands in for EmbeddingModel; changes the paper's abstract while
+    "embedding" it when told to."""
+
+    backend = BACKEND
+
+    def __init__(self, con=None, new_abstract=None):
+        self.con, self.new_abstract = con, new_abstract
+        self.texts: list[str] = []
+
+    def embed_documents_rate_limited(self, texts):
+        self.texts += texts
+        if self.new_abstract is not None:
+            self.con.execute(
+                "UPDATE paper SET abstract = %s WHERE paper_id = 'test/embed-queue'",
+                [self.new_abstract],
+            )
+            embed_queue.enqueue(
+                self.con, "test/embed-queue", self.new_abstract, [BACKEND.name]
+            )
+        return [[1.0] + [0.0] * (BACKEND.dim - 1) for _ in texts]
+
+
+class FailingModel:
+    backend = BACKEND
+
+    def embed_documents_rate_limited(self, texts):
+        raise RuntimeError("provider unavailable")
+
+
+def _db_available() -> bool:
+    if not os.getenv("DATABASE_URL"):
+        return False
+    import psycopg
+
+    try:
+        with psycopg.connect(os.environ["DATABASE_URL"], connect_timeout=2) as con:
+            return con.execute("SELECT to_regclass('paper')").fetchone()[0] is not None
+    except Exception:
+        return False
+
+
+@pytest.fixture
+def con():
+    if not _db_available():
+        pytest.skip("DATABASE_URL not set, not reachable or without papers")
+    import psycopg
+    from pgvector.psycopg import register_vector
+
+    with psycopg.connect(os.environ["DATABASE_URL"]) as con:
+        register_vector(con)
+        embed_queue.ensure_schema(con)
+        PaperDatabase.from_connection(con, BACKEND).ensure_embedding_column(index=False)
+        con.execute(
+            """
+            INSERT INTO paper (paper_id, document, abstract, title, source,
+                               update_date, link)
+            VALUES ('test/embed-queue', '{}', 'first', 't', 'TEST',
+                    '2025-01-01', 'x')
+            """
+        )
+        con.commit()
+        try:
+            yield con
+        finally:
+            con.rollback()
+            con.execute("DELETE FROM embedding WHERE paper_id = 'test/embed-queue'")
+            con.execute("DELETE FROM paper WHERE paper_id = 'test/embed-queue'")
+            con.commit()
+
+
+def _queued(con):
+    return con.execute(
+        "SELECT state, text_hash = md5(%s) FROM embed_queue "
+        "WHERE paper_id = 'test/embed-queue' AND model = %s",
+        ["second", BACKEND.name],
+    ).fetchone()
+
+
+def _embedded(con) -> bool:
+    row = con.execute(
+        BACKEND.sql(
+            "SELECT {vec_col} IS NOT NULL FROM embedding "
+            "WHERE paper_id = 'test/embed-queue'"
+        )
+    ).fetchone()
+    return row is not None and row[0]
+
+
+def test_changed_abstract_stays_queued(con):
+    embed_queue.enqueue(con, "test/embed-queue", "first", [BACKEND.name], 100)
+    con.commit()
+
+    # The abstract changes while the first one is being embedded: that
+    # vector is dropped and the row stays queued for the new text.
+    changing = FakeModel(con, new_abstract="second")
+    assert embed_queue.embed_batch(con, changing, batch_size=1) == 1
+    assert changing.texts == ["first"]
+    assert _queued(con) == ("ready", True)
+    assert not _embedded(con)
+
+    model = FakeModel()
+    assert embed_queue.embed_batch(con, model, batch_size=1) == 1
+    assert model.texts == ["second"]
+    assert _queued(con) is None
+    assert _embedded(con)
+
+
+def test_failed_batch_backs_off(con):
+    embed_queue.enqueue(con, "test/embed-queue", "first", [BACKEND.name], 100)
+    con.commit()
+
+    assert embed_queue.embed_batch(con, FailingModel(), batch_size=1) == 1
+    state, attempts, delay = con.execute(
+        "SELECT state, attempts, extract(epoch FROM available_at - now()) "
+        "FROM embed_queue WHERE paper_id = 'test/embed-queue' AND model = %s",
+        [BACKEND.name],
+    ).fetchone()
+    con.commit()
+    assert (state, attempts) == ("ready", 1)
+    assert delay > embed_queue.BACKOFF_S / 2
+
+    # Not handed out again until the backoff is over
+    model = FakeModel()
+    assert embed_queue.embed_batch(con, model, batch_size=1) == 0
+    assert embed_queue.drain(con, model) == 0
+    con.execute(
+        "UPDATE embed_queue SET available_at = now() "
+        "WHERE paper_id = 'test/embed-queue'"
+    )
+    con.commit()
+    assert embed_queue.embed_batch(con, model, batch_size=1) == 1
+    assert model.texts == ["first"]
+    assert _embedded(con)
+
+
+def test_ensure_schema_leaves_the_callers_transaction_open(con):
+    con.execute("UPDATE paper SET abstract = 'x' WHERE paper_id = 'test/embed-queue'")
+    embed_queue.ensure_schema(con)
+    con.rollback()
+    abstract = con.execute(
+        "SELECT abstract FROM paper WHERE paper_id = 'test/embed-queue'"
+    ).fetchone()[0]
+    assert abstract == "first"
+
+
+RELISTED = "test/embed-queue-arxiv"
+
+
+def _relisted_queued(con) -> bool:
+    return (
+        con.execute(
+            "SELECT 1 FROM embed_queue WHERE paper_id = %s AND model = %s",
+            [RELISTED, BACKEND.name],
+        ).fetchone()
+        is not None
+    )
+
+
+def test_relisted_into_embedded_categories_is_queued(con):
+    from oversight.PaperDatabase import PaperRow
+
+    db = PaperDatabase.from_connection(con, BACKEND)
+
+    def relisted(*categories: str) -> Paper:
+        return paper("arxiv", set(categories), RELISTED)
+
+    try:
+        assert db.insert_paper(relisted("cs:cs:CV"), priority=100) == (0, 1, 0)
+        assert not _relisted_queued(con)
+        # Re-listed under cs.LG too, same version: only categories change
+        assert db.insert_paper(relisted("cs:cs:CV", "cs:cs:LG"), 100) == (0, 0, 1)
+        assert _relisted_queued(con)
+
+        con.execute("DELETE FROM embed_queue WHERE paper_id = %s", [RELISTED])
+        rows = [PaperRow.from_paper(relisted("cs:cs:CV"))]
+        assert db.insert_papers(rows, 100) == (0, 0, 1)
+        assert not _relisted_queued(con)
+        rows = [PaperRow.from_paper(relisted("cs:cs:LG"))]
+        assert db.insert_papers(rows, 100) == (0, 0, 1)
+        assert _relisted_queued(con)
+        con.commit()
+
+        # Once it has a vector, moving out and back in doesn't queue it again
+        assert embed_queue.embed_batch(con, FakeModel(), batch_size=1) == 1
+        assert not _relisted_queued(con)
+        db.insert_paper(relisted("cs:cs:CV"), 100)
+        db.insert_paper(relisted("cs:cs:LG"), 100)
+        assert not _relisted_queued(con)
+    finally:
+        con.rollback()
+        for table in ("embed_queue", "embedding", "paper"):
+            con.execute(f"DELETE FROM {table} WHERE paper_id = %s", [RELISTED])
+        con.commit()
@@ -0,0 +1,53 @@
+"""Embedding backends: model lookup, per-model SQL and the deterministic
+hash embedder (no database or network needed)."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight.embedding_backends import (  # noqa: E402
+    GEMINI,
+    GEMINI_COLUMN,
+    get_backend,
+)
+
+
+def test_backends():
+    assert get_backend("models/gemini-embedding-001") is GEMINI
+    # Gemini's dimension, but never its column
+    fake = get_backend("fake/hash-3072")
+    assert (fake.dim, fake.column) == (3072, "embedding_fake_hash_3072")
+    assert fake.column != GEMINI_COLUMN
+    small = get_backend("fake/hash-8")
+    assert (small.kind, small.dim, small.column) == ("hash", 8, "embedding_fake_hash_8")
+    assert small.max_requests_per_minute is None
+    local = get_backend("local/bge-small-en-v1.5")
+    assert (local.dim, local.column) == (384, "embedding_bge_small_en_v1_5")
+    with pytest.raises(ValueError, match="not supported"):
+        get_backend("local/not-a-model")
+
+
+def test_sql_is_filled_in_per_model():
+    template = "SELECT {vec_col}::{vec_type} FROM embedding -- {vec_index}"
+    assert get_backend("fake/hash-8").sql(template).as_string(None) == (
+        'SELECT "embedding_fake_hash_8"::halfvec(8) FROM embedding'
+        ' -- "embedding_fake_hash_8_hnsw_idx"'
+    )
+    assert GEMINI.sql(template) is GEMINI.sql(template)
+
+
+def test_hash_embedder_is_deterministic(monkeypatch):
+    monkeypatch.setenv("OVERSIGHT_FAKE_EMBEDDING_LATENCY_MS", "0")
+    from oversight.EmbeddingModel import EmbeddingModel
+
+    model = EmbeddingModel("fake/hash-8")
+    a, b, a_again = model.embed_documents_rate_limited(["a", "b", "a"])
+    assert len(a) == 8 and a == a_again and a != b
+    assert np.linalg.norm(a) == pytest.approx(1.0)
+    assert model.embed_query("a") == a
@@ -0,0 +1,129 @@
+"""Query-embedding coalescing with the fake hash model (no network needed)."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight.EmbeddingBatcher import EmbeddingBatcher  # noqa: E402
+from oversight.EmbeddingModel import EmbeddingModel  # noqa: E402
+
+
+@pytest.fixture
+def model(monkeypatch):
+    monkeypatch.setenv("OVERSIGHT_FAKE_EMBEDDING_LATENCY_MS", "50")
+    return EmbeddingModel("fake/hash-3072")
+
+
+def _embed_concurrently(batcher: EmbeddingBatcher, texts: list[str]) -> list:
+    results: list = [None] * len(texts)
+    barrier = threading.Barrier(len(texts))
+
+    def run(i: int) -> None:
+        barrier.wait()
+        results[i] = batcher.embed_query(texts[i])
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(texts))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_texts_share_one_call(model):
+    batcher = EmbeddingBatcher(model, window_ms=20, max_batch=32)
+    texts = [f"query {i}" for i in range(16)]
+    vectors = _embed_concurrently(batcher, texts)
+    batcher.close()
+
+    assert batcher.stats.provider_calls == 1
+    # Fanned back out in the right order: each caller gets its own vector.
+    np.testing.assert_allclose(vectors, [model.model._vector(t) for t in texts])
+
+
+def test_identical_texts_are_embedded_once(model):
+    batcher = EmbeddingBatcher(model, window_ms=20)
+    vectors = _embed_concurrently(batcher, ["same"] * 8 + ["other"])
+    batcher.close()
+
+    assert batcher.stats.texts_embedded == 2
+    assert batcher.stats.deduplicated == 7
+    assert all(v is vectors[0] for v in vectors[:8])
+
+
+def test_max_batch_splits_calls(model):
+    batcher = EmbeddingBatcher(model, window_ms=200, max_batch=4)
+    _embed_concurrently(batcher, [f"q{i}" for i in range(8)])
+    batcher.close()
+
+    assert batcher.stats.provider_calls == 2
+
+
+def test_provider_errors_reach_every_waiter(model, monkeypatch):
+    def boom(texts):
+        raise RuntimeError("quota exceeded")
+
+    monkeypatch.setattr(model, "embed_queries", boom)
+    batcher = EmbeddingBatcher(model, window_ms=5)
+    futures = [batcher.submit("a"), batcher.submit("b")]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="quota exceeded"):
+            future.result(timeout=5)
+    # The failed texts are no longer pending, so a retry goes out again.
+    monkeypatch.undo()
+    np.testing.assert_allclose(batcher.embed_query("a"), model.model._vector("a"))
+    batcher.close()
+
+
+def test_recent_vectors_are_cached(model):
+    batcher = EmbeddingBatcher(model, window_ms=1, cache_size=2)
+    first = batcher.embed_query("a")
+    assert batcher.embed_query("a") is first
+    batcher.embed_query("b")
+    batcher.embed_query("c")  # evicts "a"
+    batcher.embed_query("a")
+    batcher.close()
+
+    assert batcher.stats.cache_hits == 1
+    assert batcher.stats.provider_calls == 4
+
+
+def test_async_callers(model):
+    batcher = EmbeddingBatcher(model, window_ms=20)
+
+    async def main() -> list:
+        return await asyncio.gather(*(batcher.aembed_query(f"t{i}") for i in range(5)))
+
+    vectors = asyncio.run(main())
+    batcher.close()
+    assert len(vectors) == 5
+    assert batcher.stats.provider_calls == 1
+
+
+def test_loop_bound_batches_await_the_async_provider(model, monkeypatch):
+    def blocking(texts):
+        raise AssertionError("a loop-bound batcher must not block a thread")
+
+    monkeypatch.setattr(model, "embed_queries", blocking)
+
+    async def main() -> tuple[list, EmbeddingBatcher]:
+        batcher = EmbeddingBatcher(model, window_ms=20, loop=asyncio.get_running_loop())
+        texts = [f"t{i}" for i in range(5)]
+        vectors = await asyncio.gather(*(batcher.aembed_query(t) for t in texts))
+        assert not any(t.name.startswith("embed-batch_") for t in threading.enumerate())
+        await asyncio.to_thread(batcher.close)
+        return vectors, batcher
+
+    vectors, batcher = asyncio.run(main())
+    assert batcher.stats.provider_calls == 1
+    np.testing.assert_allclose(
+        vectors, [model.model._vector(f"t{i}") for i in range(5)]
+    )
@@ -0,0 +1,67 @@
+"""Loader side of the on-disk embedding snapshot (no database needed)."""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight.embedding_snapshot import EmbeddingSnapshot  # noqa: E402
+
+DIM = 8
+
+
+def _write_snapshot(
+    directory: Path, vectors: np.ndarray, ids: list[str], rows: int
+) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / "embeddings.f16").write_bytes(vectors.astype("<f2").tobytes())
+    (directory / "paper_ids.txt").write_text("".join(f"{pid}\n" for pid in ids))
+    (directory / "manifest.json").write_text(
+        json.dumps({"version": 1, "rows": rows, "dim": DIM, "column": "embedding_test"})
+    )
+
+
+def test_missing_snapshot_opens_as_none(tmp_path):
+    assert EmbeddingSnapshot.open(tmp_path / "nope") is None
+
+
+def test_vectors_for_preserves_request_order(tmp_path):
+    vectors = np.eye(4, DIM, dtype=np.float32)
+    _write_snapshot(tmp_path, vectors, ["a", "b", "c", "d"], rows=4)
+
+    snapshot = EmbeddingSnapshot.open(tmp_path)
+    assert snapshot is not None
+    assert snapshot.embeddings.shape == (4, DIM)
+
+    ids, rows = snapshot.vectors_for(["c", "missing", "a"])
+    assert ids == ["c", "a"]
+    assert rows.dtype == np.float32
+    np.testing.assert_array_equal(rows, vectors[[2, 0]])
+
+
+def test_rows_past_manifest_are_invisible(tmp_path):
+    # An append that crashed before the manifest flip leaves extra data
+    # behind; readers must only see what the manifest advertises.
+    vectors = np.ones((3, DIM), dtype=np.float32)
+    _write_snapshot(tmp_path, vectors, ["a", "b", "c"], rows=2)
+
+    snapshot = EmbeddingSnapshot.open(tmp_path)
+    assert snapshot is not None
+    assert snapshot.paper_ids == ["a", "b"]
+    assert snapshot.index_of("c") is None
+
+
+def test_sample_pairwise_similarities_are_cosines(tmp_path):
+    vectors = np.tile(np.arange(1, DIM + 1, dtype=np.float32), (10, 1))
+    _write_snapshot(tmp_path, vectors, [str(i) for i in range(10)], rows=10)
+
+    snapshot = EmbeddingSnapshot.open(tmp_path)
+    assert snapshot is not None
+    sims = snapshot.sample_pairwise_similarities(4, seed=0)
+    assert len(sims) == 4
+    assert all(abs(s - 1.0) < 1e-3 for s in sims)
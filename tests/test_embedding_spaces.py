@@ -0,0 +1,91 @@
+"""Embedding model migration: coverage, when search flips to the shadow
+model, and which space a request may pin (no database needed)."""
+
+from __future__ import annotations
+
+import contextlib
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight import embedding_spaces  # noqa: E402
+from oversight.api_common import (  # noqa: E402
+    BadRequest,
+    batch_backend,
+    parse_search,
+    search_backend,
+)
+from oversight.embedding_backends import GEMINI, get_backend  # noqa: E402
+from oversight.embedding_spaces import Coverage, SearchSpaces  # noqa: E402
+
+SHADOW = get_backend("fake/hash-8")
+
+
+def test_coverage():
+    assert str(Coverage("m", 250, 1000, False)) == (
+        "m: 250 of 1,000 papers (25.0%), HNSW index not built"
+    )
+    assert not Coverage("m", 1000, 1000, False).complete
+    assert not Coverage("m", 999, 1000, True).complete
+    assert Coverage("m", 1000, 1000, True).complete
+
+
+@pytest.fixture
+def coverages(monkeypatch):
+    """Coverage results the next checks will see, in order."""
+    results: list[Coverage] = []
+    monkeypatch.setattr(
+        embedding_spaces.psycopg,
+        "connect",
+        lambda *args, **kwargs: contextlib.nullcontext(),
+    )
+    monkeypatch.setattr(
+        embedding_spaces, "coverage", lambda con, primary, shadow: results.pop(0)
+    )
+    return results
+
+
+def test_search_flips_to_the_shadow_once_complete(coverages):
+    spaces = SearchSpaces("postgresql://", GEMINI, SHADOW, check_interval_s=0)
+    coverages += [
+        Coverage(SHADOW.name, 999, 1000, True),
+        Coverage(SHADOW.name, 1000, 1000, True),
+    ]
+    spaces.check()
+    assert spaces.serving is GEMINI
+    with pytest.raises(embedding_spaces.SpaceUnavailable, match="backfilled"):
+        spaces.backend(SHADOW.name)
+
+    spaces.check()
+    assert spaces.serving is SHADOW
+    # Sticky: no more checks, and the primary stays available when pinned.
+    assert not spaces.check_due()
+    assert spaces.backend(GEMINI.name) is GEMINI
+
+
+def test_no_shadow_never_checks():
+    spaces = SearchSpaces("postgresql://", GEMINI, None, check_interval_s=0)
+    assert not spaces.check_due()
+    assert spaces.backend(None) is GEMINI
+
+
+def test_requests_pin_a_space(coverages):
+    spaces = SearchSpaces("postgresql://", GEMINI, SHADOW)
+    params = parse_search({"text": "x", "model": SHADOW.name})
+    assert params.model == SHADOW.name
+    with pytest.raises(BadRequest, match="still being backfilled"):
+        search_backend(spaces, params.model)
+    with pytest.raises(BadRequest, match="not available"):
+        search_backend(spaces, "local/all-MiniLM-L6-v2")
+    with pytest.raises(BadRequest, match="model must be a string"):
+        parse_search({"text": "x", "model": 3})
+
+    spaces.shadow_ready = True
+    batch = [parse_search({"text": "a"}), parse_search({"text": "b"})]
+    assert batch_backend(spaces, batch) is SHADOW
+    batch.append(parse_search({"text": "c", "model": GEMINI.name}))
+    with pytest.raises(BadRequest, match="same model"):
+        batch_backend(spaces, batch)
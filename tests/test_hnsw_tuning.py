@@ -0,0 +1,121 @@
+"""HNSW tuning: picking ef_search from recall/latency curves and looking it
+up per request (no database needed)."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight import hnsw_tuning  # noqa: E402
+from oversight.api_common import parse_search  # noqa: E402
+from oversight.hnsw_tuning import (  # noqa: E402
+    Tuning,
+    recommend,
+    recommend_index,
+    tuned_ef_search,
+    write_tuning,
+)
+
+
+def point(scenario, selectivity, ef_search, recall, p50_ms, m=16, efc=64):
+    return {
+        "scenario": scenario,
+        "endpoint": "search",
+        "selectivity": selectivity,
+        "m": m,
+        "ef_construction": efc,
+        "ef_search": ef_search,
+        "recall": recall,
+        "p50_ms": p50_ms,
+        "p95_ms": 2 * p50_ms,
+    }
+
+
+CURVES = [
+    point("all", 1.0, 20, 0.90, 1.0),
+    point("all", 1.0, 40, 0.96, 1.5),
+    point("all", 1.0, 80, 0.99, 2.5),
+    point("arxiv", 0.6, 20, 0.80, 1.0),
+    point("arxiv", 0.6, 40, 0.94, 1.6),
+    point("arxiv", 0.6, 80, 0.97, 2.6),
+    # Narrow enough that ef 20 is *slower* (the scan runs dry and falls
+    # back), and never quite reaching the target.
+    point("only_CC", 0.01, 20, 0.50, 9.0),
+    point("only_CC", 0.01, 40, 0.70, 4.0),
+    point("only_CC", 0.01, 80, 0.90, 5.0),
+    # A filter nothing matched.
+    point("last_30d", 0.0, 20, None, 0.5),
+]
+
+
+def test_recommend_bands():
+    bands = recommend(CURVES, target=0.95)["search"]
+    assert [(b["scenario"], b["min_selectivity"], b["ef_search"]) for b in bands] == [
+        ("all", 1.0, 40),
+        ("arxiv", 0.6, 80),
+        ("only_CC", 0.01, 80),
+    ]
+
+
+def test_recommend_index():
+    # A denser graph: faster everywhere and only_CC gets there at ef 80.
+    bigger = [
+        {**p, "m": 24, "ef_construction": 128, "p50_ms": p["p50_ms"] / 2}
+        for p in CURVES
+    ]
+    bigger[8]["recall"] = 0.96
+    assert recommend_index(CURVES, 0.95) is None  # only_CC never gets there
+    assert recommend_index(CURVES + bigger, 0.95) == {"m": 24, "ef_construction": 128}
+
+
+def test_selectivity_and_lookup():
+    # Buckets: <7, <30, <90, <365, <1095, <3650 days, older.
+    tuning = Tuning(
+        bands={"search": [(1.0, 40), (0.5, 80), (0.01, 160)]},
+        total=1000,
+        sources={"arxiv": [0, 0, 0, 600, 0, 0, 0], "CC": [0, 0, 0, 0, 0, 0, 400]},
+    )
+    assert tuning.selectivity(None, 36500) == 1.0
+    assert tuning.selectivity(["arxiv", "PLDI"], 36500) == 0.6
+    # Half-way through the 90..365 day bucket.
+    assert tuning.selectivity(["arxiv"], 90 + 275 // 2) == pytest.approx(0.3, abs=0.01)
+
+    assert tuning.ef_search("search", 1.0) == 40
+    assert tuning.ef_search("search", 0.6) == 80  # between bands: the larger
+    assert tuning.ef_search("search", 0.001) == 160  # below every band
+    assert tuning.ef_search("neighbors", 1.0) is None
+
+
+def test_api_uses_the_tuning_file(tmp_path, monkeypatch):
+    path = tmp_path / "hnsw_tuning.json"
+    monkeypatch.setenv("OVERSIGHT_HNSW_TUNING_FILE", str(path))
+    assert tuned_ef_search("neighbors", 80) == 80  # no file yet
+
+    write_tuning(
+        str(path),
+        {
+            "version": hnsw_tuning.TUNING_VERSION,
+            "corpus": {
+                "total": 100,
+                "sources": {"arxiv": [0, 0, 0, 0, 0, 0, 90], "CC": [0] * 6 + [10]},
+            },
+            "endpoints": {
+                "neighbors": [{"min_selectivity": 1.0, "ef_search": 60}],
+                "search": [
+                    {"min_selectivity": 0.5, "ef_search": 30},
+                    {"min_selectivity": 0.1, "ef_search": 120},
+                ],
+            },
+        },
+    )
+    hnsw_tuning._load_tuning.cache_clear()
+    assert tuned_ef_search("neighbors", 80) == 60
+    assert parse_search({"text": "x"}).ef_search == 30
+    assert parse_search({"text": "x", "sources": {"CC": True}}).ef_search == 120
+    # An explicit ef_search always wins.
+    assert parse_search({"text": "x", "ef_search": 200}).ef_search == 200
+    hnsw_tuning._load_tuning.cache_clear()
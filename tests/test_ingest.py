@@ -0,0 +1,147 @@
+"""Bulk ingestion: the streaming JSON reader and parsing into rows (no
+database needed) and, when DATABASE_URL points at a reachable database
+with the paper schema, a parallel consume and re-consume."""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight.ingest import consume, iter_json_array, json_files  # noqa: E402
+from oversight.Paper import Paper  # noqa: E402
+from oversight.PaperDatabase import PaperRow  # noqa: E402
+
+ITEMS = [
+    {"title": 'Brackets ] and [ and \\"quotes\\"', "n": [1, 2.5, -3e2]},
+    "a string, with a comma",
+    12345678901234567890,
+    {"nested": {"deep": [[], {}, None, True, False]}, "text": "café ☃"},
+    0,
+]
+
+
+@pytest.mark.parametrize("chunk_chars", [1, 3, 7, 1 << 20])
+def test_iter_json_array(tmp_path, chunk_chars):
+    path = tmp_path / "items.json"
+    path.write_text(json.dumps(ITEMS, indent=2))
+    assert list(iter_json_array(str(path), chunk_chars)) == ITEMS
+
+    path.write_text(" [ ] ")
+    assert list(iter_json_array(str(path), chunk_chars)) == []
+
+
+def test_iter_json_array_rejects(tmp_path):
+    path = tmp_path / "bad.json"
+    for text in ['{"a": 1}', "[1, 2", "[1 2]", '[{"a": }]']:
+        path.write_text(text)
+        with pytest.raises(ValueError):
+            list(iter_json_array(str(path), 2))
+
+
+def scraped(paper_id: str, date: str = "2024-06-01", **extra) -> dict:
+    return {
+        "paper_id": paper_id,
+        "title": f"Title of {paper_id}",
+        "abstract": f"Abstract of {paper_id}",
+        "date": date,
+        "link": f"https://example.org/{paper_id}",
+        "conference_name": "TESTCONF",
+        "authors": "Ada Lovelace (Analytical Engines Ltd)",
+        **extra,
+    }
+
+
+def test_json_files(tmp_path):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    for name in ["a/b/2024.json", "a/2023.json", "a/notes.md", "top.json"]:
+        (tmp_path / name).write_text("[]")
+    assert json_files(str(tmp_path)) == [
+        str(tmp_path / name) for name in ["a/2023.json", "a/b/2024.json", "top.json"]
+    ]
+    assert json_files(str(tmp_path / "top.json")) == [str(tmp_path / "top.json")]
+
+
+def test_paper_row():
+    row = PaperRow.from_paper(Paper.from_scraped_json(scraped("test/row")))
+    assert (row.paper_id, row.source, str(row.update_date)) == (
+        "test/row",
+        "TESTCONF",
+        "2024-06-01",
+    )
+    assert json.loads(row.document)["parsed_authors"] == row.authors
+    assert row.categories is None
+
+
+def test_remove_null_bytes():
+    clean = {"content": {"title": "ok", "authors": ["a", "b"]}}
+    assert Paper.remove_null_bytes(clean) is clean
+    assert Paper.remove_null_bytes({"t": ["x\x00y", {"z": "\x00"}]}) == {
+        "t": ["xy", {"z": ""}]
+    }
+
+
+def _db_available() -> bool:
+    if not os.getenv("DATABASE_URL"):
+        return False
+    import psycopg
+
+    try:
+        with psycopg.connect(os.environ["DATABASE_URL"], connect_timeout=2) as con:
+            return con.execute("SELECT to_regclass('paper')").fetchone()[0] is not None
+    except Exception:
+        return False
+
+
+@pytest.fixture
+def database_url():
+    if not _db_available():
+        pytest.skip("DATABASE_URL not set, not reachable or without papers")
+    import psycopg
+
+    yield os.environ["DATABASE_URL"]
+    with psycopg.connect(os.environ["DATABASE_URL"]) as con:
+        con.execute("DELETE FROM paper WHERE paper_id LIKE 'test/ingest/%'")
+
+
+def test_consume(tmp_path, database_url):
+    import psycopg
+
+    (tmp_path / "conf").mkdir()
+    for year in range(3):
+        papers = [scraped(f"test/ingest/{year}-{i}") for i in range(25)]
+        (tmp_path / "conf" / f"{year}.json").write_text(json.dumps(papers))
+    # Listed twice: the newer record wins
+    (tmp_path / "dup.json").write_text(
+        json.dumps([scraped("test/ingest/0-0", "2024-07-01")])
+    )
+
+    stats = consume(database_url, str(tmp_path), jobs=2, batch_size=10)
+    # Which of the two records of 0-0 is written first depends on the workers
+    assert (stats.files, stats.papers, stats.new) == (4, 76, 75)
+    assert stats.updated + stats.skipped == 1
+
+    (tmp_path / "dup.json").write_text(
+        json.dumps([scraped("test/ingest/0-1", "2024-08-01")])
+    )
+    stats = consume(database_url, str(tmp_path), jobs=2)
+    assert (stats.new, stats.updated, stats.skipped) == (0, 1, 75)
+
+    with psycopg.connect(database_url) as con:
+        dates = dict(
+            con.execute(
+                "SELECT paper_id, update_date::text FROM paper "
+                "WHERE paper_id IN ('test/ingest/0-0', 'test/ingest/0-1')"
+            ).fetchall()
+        )
+        queued = con.execute(
+            "SELECT count(DISTINCT paper_id) FROM embed_queue "
+            "WHERE paper_id LIKE 'test/ingest/%'"
+        ).fetchone()[0]
+    assert dates == {"test/ingest/0-0": "2024-07-01", "test/ingest/0-1": "2024-08-01"}
+    assert queued == 75
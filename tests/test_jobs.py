@@ -0,0 +1,107 @@
+"""Background jobs: progress reporting (no database needed) and, when
+DATABASE_URL points at a reachable database, single-flight enqueueing and a
+worker run with a stand-in handler."""
+
+from __future__ import annotations
+
+import io
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight import jobs  # noqa: E402
+from oversight.utils import progress_sink, report_progress, tqdm  # noqa: E402
+
+
+def _collect() -> tuple[list, object]:
+    updates: list = []
+    return updates, progress_sink.set(lambda *update: updates.append(update))
+
+
+def test_tqdm_reports_to_sink():
+    updates, token = _collect()
+    try:
+        for _ in tqdm(range(5), desc="Embedding", file=io.StringIO(), mininterval=0):
+            pass
+    finally:
+        progress_sink.reset(token)
+
+    assert updates[0] == ("Embedding", 0, 5)
+    assert updates[-1] == ("Embedding", 5, 5)
+
+
+def test_no_sink_is_a_no_op():
+    report_progress("nothing listening", 1, 2)
+    assert list(tqdm(range(3), file=io.StringIO())) == [0, 1, 2]
+
+
+def test_job_to_dict():
+    created = datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    job = jobs.Job(
+        7, "sync", "running", {}, "Embedding", 40, 100, None, created, created, None
+    )
+    body = job.to_dict()
+    assert body["progress"] == {"label": "Embedding", "done": 40, "total": 100}
+    assert body["created_at"] == "2025-01-02T03:04:05+00:00"
+    assert body["finished_at"] is None
+
+
+def _db_available() -> bool:
+    if not os.getenv("DATABASE_URL"):
+        return False
+    import psycopg
+
+    try:
+        with psycopg.connect(os.environ["DATABASE_URL"], connect_timeout=2):
+            return True
+    except Exception:
+        return False
+
+
+@pytest.fixture
+def con(monkeypatch):
+    if not _db_available():
+        pytest.skip("DATABASE_URL not set or not reachable")
+    import psycopg
+
+    ran: list = []
+
+    def fake_sync(params):
+        for _ in tqdm(range(3), desc="Harvesting", file=io.StringIO(), mininterval=0):
+            pass
+        ran.append(params)
+
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "sync", fake_sync)
+    with psycopg.connect(os.environ["DATABASE_URL"], autocommit=True) as con:
+        jobs.ensure_schema(con)
+        # Leave no queued sync behind that a real worker would pick up.
+        con.execute("DELETE FROM job WHERE kind = 'sync' AND status = 'queued'")
+        con.ran = ran
+        yield con
+
+
+def test_enqueue_is_single_flight_and_worker_runs_it(con):
+    first, created = jobs.enqueue(con, "sync", {"n": 1})
+    second, created_again = jobs.enqueue(con, "sync", {"n": 2})
+    assert created and not created_again
+    assert second.id == first.id
+
+    jobs.run_worker(os.environ["DATABASE_URL"], once=True)
+
+    done = jobs.get_job(con, first.id)
+    assert con.ran == [{"n": 1}]
+    assert done.status == "succeeded"
+    assert (done.progress_label, done.progress_done, done.progress_total) == (
+        "Harvesting",
+        3,
+        3,
+    )
+    # The finished job no longer blocks the next one.
+    third, created = jobs.enqueue(con, "sync")
+    assert created and third.id != first.id
+    con.execute("DELETE FROM job WHERE id = %s", [third.id])
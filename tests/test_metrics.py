@@ -0,0 +1,122 @@
+"""Metrics registry, span decorators and /api/metrics (no database needed)."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+from oversight import metrics  # noqa: E402
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    hist = metrics.Histogram("t_seconds", "test", ("span",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        hist.observe(value, "db.x")
+    lines = list(hist.render())
+    assert 't_seconds_bucket{span="db.x",le="0.1"} 2' in lines
+    assert 't_seconds_bucket{span="db.x",le="1"} 3' in lines
+    assert 't_seconds_bucket{span="db.x",le="+Inf"} 4' in lines
+    assert 't_seconds_count{span="db.x"} 4' in lines
+    assert 't_seconds_sum{span="db.x"} 3.65' in lines
+
+
+def test_label_values_are_escaped():
+    counter = metrics.Counter("t_total", "test", ("endpoint",))
+    counter.inc(2, 'a"b\\c')
+    assert list(counter.render())[-1] == 't_total{endpoint="a\\"b\\\\c"} 2'
+
+
+def test_export_counters_reads_live_and_replaces():
+    @dataclass
+    class Stats:
+        cache_hits: int = 0
+
+    registry = metrics.Registry()
+    old, new = Stats(), Stats()
+    registry.export_counters("t", old)
+    registry.export_counters("t", new)
+    new.cache_hits = 3
+    samples = [ln for ln in registry.render().splitlines() if ln.startswith("t_")]
+    assert samples == ["t_cache_hits_total 3"]
+
+
+def test_timed_is_free_when_disabled(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+
+    def fn() -> int:
+        return 1
+
+    assert metrics.timed("x")(fn) is fn
+    assert metrics.span("x") is metrics.span("y")
+
+
+def test_timed_records_sync_and_async_spans(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    hist = metrics.Histogram("t_seconds", "test", ("span",))
+    rows = metrics.Counter("t_rows", "test", ("span",))
+    monkeypatch.setattr(metrics, "SPAN_SECONDS", hist)
+    monkeypatch.setattr(metrics, "DB_ROWS", rows)
+
+    @metrics.db_query("sync_query")
+    def fetch() -> list[int]:
+        return [1, 2, 3]
+
+    @metrics.db_query("async_query", rows=metrics.nested_len)
+    async def afetch() -> list[list[int]]:
+        return [[1], [2, 3]]
+
+    assert fetch() == [1, 2, 3]
+    assert asyncio.run(afetch()) == [[1], [2, 3]]
+    rendered = "\n".join([*hist.render(), *rows.render()])
+    assert 't_seconds_count{span="db.sync_query"} 1' in rendered
+    assert 't_seconds_count{span="db.async_query"} 1' in rendered
+    assert 't_rows{span="db.sync_query"} 3' in rendered
+    assert 't_rows{span="db.async_query"} 3' in rendered
+
+
+# The switch is read at import, so the enabled app runs in a fresh process.
+ENABLED_APP = """
+from oversight.flask_app import app
+client = app.test_client()
+for path in ("/api/health", "/api/health", "/nowhere"):
+    client.get(path).close()
+response = client.get("/api/metrics")
+print(response.content_type)
+print(response.get_data(as_text=True))
+"""
+
+
+def test_flask_metrics_endpoint():
+    env = {**os.environ, "OVERSIGHT_METRICS": "1", "PYTHONPATH": str(SRC)}
+    env.pop("DATABASE_URL", None)
+    out = subprocess.run(
+        [sys.executable, "-c", ENABLED_APP],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert out.startswith("text/plain; version=0.0.4")
+    assert (
+        'oversight_http_request_duration_seconds_count{endpoint="health",'
+        'method="GET",status="200"} 2'
+    ) in out
+    assert 'endpoint="unmatched",method="GET",status="404"' in out
+    assert 'oversight_http_response_bytes_total{endpoint="health"}' in out
+
+
+@pytest.mark.skipif(metrics.ENABLED, reason="OVERSIGHT_METRICS is set")
+def test_metrics_endpoint_404_when_disabled():
+    from oversight.flask_app import app
+
+    response = app.test_client().get("/api/metrics")
+    assert response.status_code == 404
@@ -0,0 +1,75 @@
+"""Paper's lazy document and authors, and null-byte stripping (no database
+needed)."""
+
+from __future__ import annotations
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight import Paper as paper_module  # noqa: E402
+from oversight.AuthorExtractor import AuthorInfo  # noqa: E402
+from oversight.Paper import Paper  # noqa: E402
+
+DOCUMENT = {"authors": "Ada Lovelace (Analytical Engines Ltd)"}
+
+
+def counting_extractor(monkeypatch) -> list[dict]:
+    calls: list[dict] = []
+
+    def extract(document, source):
+        calls.append(document)
+        return AuthorInfo(["Ada Lovelace"], ["Analytical Engines Ltd"])
+
+    monkeypatch.setattr(paper_module, "extract_authors", extract)
+    return calls
+
+
+def paper(**kwargs) -> Paper:
+    return Paper(
+        "test/paper",
+        paper_date=datetime(2025, 1, 1),
+        abstract="An abstract",
+        title="A title",
+        source="SOSP",
+        **kwargs,
+    )
+
+
+def test_loader_runs_on_first_access_only(monkeypatch):
+    extracted = counting_extractor(monkeypatch)
+    loads: list[int] = []
+
+    def load():
+        loads.append(1)
+        return dict(DOCUMENT)
+
+    p = paper(document=None, document_loader=load)
+    assert loads == [] and extracted == []
+
+    # What insert_paper does: the document once, then its authors, which
+    # were parsed during that same load
+    assert p.document == DOCUMENT
+    assert p.authors == ["Ada Lovelace"]
+    assert p.institutions == ["Analytical Engines Ltd"]
+    assert len(loads) == 1 and len(extracted) == 1
+
+
+def test_authors_parsed_once(monkeypatch):
+    extracted = counting_extractor(monkeypatch)
+    p = paper(document=dict(DOCUMENT))
+    assert extracted == []
+    assert p.authors == ["Ada Lovelace"]
+    assert p.authors == ["Ada Lovelace"]
+    assert p.institutions == ["Analytical Engines Ltd"]
+    assert extracted == [DOCUMENT]
+
+
+def test_remove_null_bytes():
+    note = {"content": {"title": "A\x00B", "tags": ["x\x00", 1, None]}}
+    assert Paper.remove_null_bytes(note) == {
+        "content": {"title": "AB", "tags": ["x", 1, None]}
+    }
+    assert Paper.remove_null_bytes("a\x00b") == "ab"
@@ -0,0 +1,67 @@
+"""arXiv category filters on /api/search: parsing, the SQL they become and
+surviving a cursor (no database needed)."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight.api_common import (  # noqa: E402
+    BadRequest,
+    next_search_cursor,
+    parse_search,
+    search_body_from_args,
+)
+from oversight.PaperDatabase import arxiv_category  # noqa: E402
+from oversight.PaperRepository import PaperRepository  # noqa: E402
+
+
+def test_arxiv_category():
+    assert arxiv_category("cs.LG") == "cs:cs:LG"
+    assert arxiv_category("stat.ML") == "stat:stat:ML"
+    assert arxiv_category("cs:cs:PL") == "cs:cs:PL"
+
+
+def test_parse_categories():
+    params = parse_search({"text": "x", "categories": ["cs.PL", "cs:cs:LO", "cs.PL"]})
+    assert params.categories == ["cs:cs:LO", "cs:cs:PL"]
+    # Categories only apply to arXiv, so on their own they select it.
+    assert params.sources == ["arxiv"]
+    both = parse_search(
+        {"text": "x", "categories": ["cs.PL"], "sources": {"arxiv": True, "POPL": True}}
+    )
+    assert both.sources == ["arxiv", "POPL"]
+
+    with pytest.raises(BadRequest, match="select the arxiv source"):
+        parse_search({"text": "x", "categories": ["cs.PL"], "sources": {"POPL": True}})
+    with pytest.raises(BadRequest, match="list of arXiv categories"):
+        parse_search({"text": "x", "categories": "cs.PL"})
+
+    body = search_body_from_args({"text": "x", "categories": "cs.PL,cs.LO"})
+    assert parse_search(body).categories == ["cs:cs:LO", "cs:cs:PL"]
+
+
+def test_filter_sql():
+    def render(sources, categories=None):
+        return PaperRepository.build_filter_sql(sources, categories).as_string(None)
+
+    assert render(["arxiv", "POPL"]) == "ps.source IN ('arxiv', 'POPL')"
+    assert render(["arxiv"], ["cs:cs:PL"]) == (
+        "(ps.source = 'arxiv' AND ps.categories && '{cs:cs:PL}'::text[])"
+    )
+    assert render(["arxiv", "POPL"], ["cs:cs:PL"]) == (
+        "(ps.source = 'POPL' OR "
+        "(ps.source = 'arxiv' AND ps.categories && '{cs:cs:PL}'::text[]))"
+    )
+
+
+def test_cursor_keeps_categories():
+    params = parse_search({"text": "x", "limit": 1, "categories": ["cs.PL"]})
+    token = next_search_cursor(
+        params, [("a", "T", "", "arxiv", "", None, [], [], None, 0.2)]
+    )
+    assert parse_search({"cursor": token}).categories == ["cs:cs:PL"]
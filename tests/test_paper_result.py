@@ -0,0 +1,42 @@
+"""Hydration of slim search-result rows (no database needed)."""
+
+from __future__ import annotations
+
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight.Paper import PaperResult  # noqa: E402
+
+VLDB_DOCUMENT = {"authors": [{"Name": "Ada Lovelace", "Affiliation": "Cambridge"}]}
+
+
+def _row(authors, institutions, legacy_document, similarity=0.25):
+    return (
+        "p1",
+        "Title",
+        "Abstract",
+        "VLDB",
+        "https://example.org/p1",
+        date(2026, 1, 2),
+        authors,
+        institutions,
+        legacy_document,
+        similarity,
+    )
+
+
+def test_stored_authors_are_used_as_is():
+    paper, similarity = PaperResult.from_row(_row(["Grace Hopper"], ["Yale"], None))
+    assert similarity == 0.25
+    assert paper.authors == ["Grace Hopper"]
+    assert paper.institutions == ["Yale"]
+    assert paper.paper_date == date(2026, 1, 2)
+
+
+def test_pre_backfill_rows_parse_the_document():
+    paper, _ = PaperResult.from_row(_row(None, None, VLDB_DOCUMENT))
+    assert paper.authors == ["Ada Lovelace"]
+    assert paper.institutions == ["Cambridge"]
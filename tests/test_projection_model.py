@@ -0,0 +1,61 @@
+"""Incremental projection model: out-of-sample placement and the .npz
+round-trip (no database needed)."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight.projections import ProjectionModel  # noqa: E402
+
+
+def model(name: str = "pacmap_test") -> ProjectionModel:
+    rng = np.random.default_rng(0)
+    return ProjectionModel(
+        name=name,
+        sources=["ICML", "NeurIPS"],
+        pca_mean=rng.normal(size=8).astype(np.float32),
+        pca_components=rng.normal(size=(4, 8)).astype(np.float32),
+        paper_ids=np.array([f"p{i}" for i in range(20)]),
+        x50=rng.normal(size=(20, 4)).astype(np.float32),
+        x2=rng.normal(size=(20, 2)).astype(np.float32),
+    )
+
+
+def test_place_on_a_stored_row_returns_its_coords():
+    m = model()
+    # The zero distance to itself dominates the inverse-distance weights
+    placed = m.place(m.x50[[3, 11]], k=5)
+    np.testing.assert_allclose(placed, m.x2[[3, 11]], atol=1e-4)
+
+
+def test_place_interpolates_between_neighbors():
+    m = model()
+    midpoint = (m.x50[[0]] + m.x50[[1]]) / 2
+    m.x50 = m.x50[:2]
+    m.x2 = m.x2[:2]
+    placed = m.place(midpoint, k=10)  # k is capped at the placed rows
+    np.testing.assert_allclose(placed[0], m.x2.mean(axis=0), atol=1e-5)
+
+
+def test_save_load_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setenv("OVERSIGHT_PROJECTION_MODEL_DIR", str(tmp_path))
+    assert ProjectionModel.load("pacmap_test") is None
+
+    m = model()
+    assert m.save() == tmp_path / "pacmap_test.npz"
+    assert not list(tmp_path.glob("*.tmp.npz"))
+
+    loaded = ProjectionModel.load("pacmap_test")
+    assert loaded is not None
+    assert loaded.name == "pacmap_test"
+    assert loaded.sources == ["ICML", "NeurIPS"]
+    for field in ("pca_mean", "pca_components", "paper_ids", "x50", "x2"):
+        np.testing.assert_array_equal(getattr(loaded, field), getattr(m, field))
+    np.testing.assert_allclose(
+        loaded.transform(m.pca_mean[None, :]), np.zeros((1, 4)), atol=1e-6
+    )
@@ -0,0 +1,323 @@
+"""Out-of-core projection building: the scratch-file round-trip,
+IncrementalPCA against in-memory PCA, the --spec plumbing and partition
+names (no database needed) and, when DATABASE_URL points at a reachable
+database with papers, converting and swapping atlas partitions."""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight import projections  # noqa: E402
+
+DIM = 64
+
+
+@pytest.fixture(autouse=True)
+def small_dim(monkeypatch):
+    monkeypatch.setattr(projections, "DIM", DIM)
+
+
+def embeddings(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    # Most of the variance in a 20-d subspace, like real embeddings
+    X = rng.normal(size=(n, 20)) @ rng.normal(size=(20, DIM))
+    return (X + 0.05 * rng.normal(size=(n, DIM))).astype(np.float32)
+
+
+def normalized(X: np.ndarray) -> np.ndarray:
+    return X / np.linalg.norm(X, axis=1, keepdims=True)
+
+
+class FakeCursor:
+    """The named cursor stream_embeddings_to_file reads from."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        pass
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self, name=None):
+        return FakeCursor(self.rows)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float16])
+def test_stream_to_file_round_trips(tmp_path, dtype):
+    X = embeddings(130)
+    path = tmp_path / "scratch.bin"
+    con = FakeConnection([(f"p{i}", x) for i, x in enumerate(X)])
+    paper_ids = projections.stream_embeddings_to_file(
+        con, [], len(X), path, np.dtype(dtype), chunk_size=60
+    )
+    assert paper_ids == [f"p{i}" for i in range(130)]
+    assert path.stat().st_size == 130 * DIM * np.dtype(dtype).itemsize
+
+    chunks = list(projections.iter_chunks(path, 130, np.dtype(dtype), 60))
+    # The 10-row tail is folded into the chunk before it
+    assert [len(c) for c in chunks] == [60, 70]
+    assert all(c.dtype == np.float32 for c in chunks)
+    atol = 1e-6 if dtype == np.float32 else 1e-3
+    np.testing.assert_allclose(np.concatenate(chunks), normalized(X), atol=atol)
+
+
+def test_iter_chunks_rows_and_normalize(tmp_path):
+    X = embeddings(300)
+    path = tmp_path / "raw.bin"
+    X.tofile(path)
+
+    rows = np.arange(3, 300, 3)  # 99 rows: 60 + a 39-row tail, folded
+    chunks = list(
+        projections.iter_chunks(
+            path, 300, np.dtype(np.float32), 60, rows=rows, normalize=True
+        )
+    )
+    assert [len(c) for c in chunks] == [99]
+    np.testing.assert_allclose(chunks[0], normalized(X[rows]), atol=1e-6)
+
+    chunks = list(projections.iter_chunks(path, 300, np.dtype(np.float32), 100))
+    assert [len(c) for c in chunks] == [100, 100, 100]
+    np.testing.assert_array_equal(np.concatenate(chunks), X)
+
+
+def test_out_of_core_pca_matches_in_memory(tmp_path):
+    X = normalized(embeddings(600))
+    path = tmp_path / "normalized.bin"
+    X.tofile(path)
+
+    pca, X50 = projections._fit_pca_in_memory(X.copy())
+    ipca, X50_ooc = projections._fit_pca_out_of_core(
+        lambda: projections.iter_chunks(path, 600, np.dtype(np.float32), 150), 600
+    )
+    assert X50_ooc.shape == X50.shape == (600, projections.PCA_COMPONENTS)
+    np.testing.assert_allclose(ipca.mean_, pca.mean_, atol=1e-5)
+    # The components that carry the variance agree up to sign, and PaCMAP
+    # sees the same geometry: pairwise distances in the 50-d output match
+    alignment = np.abs((ipca.components_[:20] * pca.components_[:20]).sum(axis=1))
+    np.testing.assert_allclose(alignment, 1.0, atol=1e-4)
+
+    def distances(Y: np.ndarray) -> np.ndarray:
+        return np.linalg.norm(Y[:, None] - Y[None], axis=2)
+
+    np.testing.assert_allclose(distances(X50_ooc), distances(X50), atol=1e-3)
+
+
+def test_chunk_size_below_pca_components_is_rejected():
+    with pytest.raises(ValueError, match="at least 50"):
+        projections.build_projection("postgresql://unused", "p", [], chunk_size=10)
+
+
+def test_projection_spec_parse():
+    Spec = projections.ProjectionSpec
+    assert Spec.parse("all") == Spec("all", [])
+    assert Spec.parse(" pl = ICFP, POPL,,PLDI ") == Spec("pl", ["ICFP", "POPL", "PLDI"])
+    assert Spec.parse("ml=") == Spec("ml", [])
+    with pytest.raises(ValueError):
+        Spec.parse("=ICFP")
+
+
+def test_union_sources():
+    Spec = projections.ProjectionSpec
+    pl, ml = Spec("pl", ["POPL", "ICFP"]), Spec("ml", ["ICML", "POPL"])
+    assert projections.union_sources([pl, ml]) == ["ICFP", "ICML", "POPL"]
+    # One unfiltered spec needs the whole corpus
+    assert projections.union_sources([pl, Spec("all", [])]) == []
+
+
+def test_spec_rows():
+    Spec = projections.ProjectionSpec
+    row_sources = ["POPL", "ICML", None, "ICFP", "POPL"]
+    rows = projections.spec_rows(Spec("pl", ["POPL", "ICFP"]), row_sources)
+    assert rows.tolist() == [0, 3, 4]
+    assert rows.dtype == np.int64
+    all_rows = projections.spec_rows(Spec("all", []), row_sources)
+    assert all_rows.tolist() == list(range(5))
+    assert len(projections.spec_rows(Spec("none", ["SOSP"]), row_sources)) == 0
+
+
+def test_spec_worker_fits_pca_out_of_core(tmp_path, monkeypatch):
+    X = normalized(embeddings(400))
+    path = tmp_path / "shared.bin"
+    X.tofile(path)
+    rows = np.arange(0, 400, 2)
+    fitted = {}
+
+    def in_memory(X):
+        raise AssertionError("spec workers must not load their rows in memory")
+
+    def finish(database_url, name, sources, paper_ids, pca, X50):
+        fitted.update(paper_ids=paper_ids, X50=X50)
+        return len(paper_ids)
+
+    monkeypatch.setattr(projections, "_fit_pca_in_memory", in_memory)
+    monkeypatch.setattr(projections, "_finish_projection", finish)
+    name, n, _ = projections._build_spec_worker(
+        "postgresql://unused",
+        projections.ProjectionSpec("even", []),
+        path,
+        400,
+        np.dtype(np.float32).str,
+        True,
+        rows,
+        [f"p{i}" for i in rows],
+        60,
+        1,
+        False,
+    )
+    assert (name, n) == ("even", 200)
+    assert fitted["X50"].shape == (200, projections.PCA_COMPONENTS)
+
+
+def test_partition_name():
+    assert projections.partition_name("pacmap_v1").startswith("pacmap_v1_", 5)
+    assert projections.partition_name("a-b") != projections.partition_name("a_b")
+    assert projections.partition_name("PaCMAP v1") == projections.partition_name(
+        "PaCMAP v1"
+    )
+    for name in ["x", "pacmap_pl_" * 20, "ünïcode ✓ " * 10]:
+        part = projections.partition_name(name)
+        assert re.fullmatch(r"pp2d_[a-z0-9_]+_[0-9a-f]{8}", part)
+        for suffix in ("_stage_proj_xy_idx", "_stage_paper_id_fkey", "_stage_bound"):
+            assert len((part + suffix).encode()) <= 63
+
+
+def _db_available() -> bool:
+    if not os.getenv("DATABASE_URL"):
+        return False
+    import psycopg
+
+    try:
+        with psycopg.connect(os.environ["DATABASE_URL"], connect_timeout=2) as con:
+            return con.execute("SELECT count(*) FROM paper").fetchone()[0] >= 30
+    except Exception:
+        return False
+
+
+SCHEMA = "test_projections"
+
+# paper_projection_2d as it was before partitioning
+LEGACY_DDL = """
+    CREATE TABLE paper_projection_2d (
+        paper_id    varchar      NOT NULL REFERENCES public.paper(paper_id)
+                                 ON DELETE CASCADE,
+        projection  varchar      NOT NULL,
+        x           real         NOT NULL,
+        y           real         NOT NULL,
+        created_at  timestamp    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (paper_id, projection)
+    );
+    CREATE INDEX paper_projection_2d_proj_xy_idx
+        ON paper_projection_2d (projection, x, y);
+"""
+
+
+@pytest.fixture
+def database_url():
+    """DATABASE_URL with a scratch schema first on the search_path, so the
+    atlas table the test converts and swaps is its own."""
+    if not _db_available():
+        pytest.skip("DATABASE_URL not set, not reachable or without papers")
+    import psycopg
+    from psycopg.conninfo import make_conninfo
+
+    with psycopg.connect(os.environ["DATABASE_URL"], autocommit=True) as con:
+        con.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        con.execute(f"CREATE SCHEMA {SCHEMA}")
+    try:
+        yield make_conninfo(
+            os.environ["DATABASE_URL"], options=f"-c search_path={SCHEMA},public"
+        )
+    finally:
+        with psycopg.connect(os.environ["DATABASE_URL"], autocommit=True) as con:
+            con.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+
+
+def test_swap_converts_legacy_table_and_never_empties(database_url):
+    import psycopg
+
+    with psycopg.connect(database_url, autocommit=True) as con:
+        paper_ids = [
+            pid
+            for (pid,) in con.execute(
+                "SELECT paper_id FROM paper ORDER BY paper_id LIMIT 30"
+            ).fetchall()
+        ]
+        con.execute(LEGACY_DDL)
+        with con.cursor() as cur:
+            cur.executemany(
+                "INSERT INTO paper_projection_2d (paper_id, projection, x, y) "
+                "VALUES (%s, %s, 0, 0)",
+                [(pid, "t") for pid in paper_ids[:10]]
+                + [(pid, "other") for pid in paper_ids[:5]],
+            )
+
+    seen: list[int] = []
+    done = threading.Event()
+
+    def read() -> None:
+        with psycopg.connect(database_url, autocommit=True) as con:
+            while not done.is_set():
+                seen.append(
+                    con.execute(
+                        "SELECT count(*) FROM paper_projection_2d "
+                        "WHERE projection = 't'"
+                    ).fetchone()[0]
+                )
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        first, second = paper_ids[:20], paper_ids[10:]
+        projections.swap_projection(
+            database_url, "t", first, np.zeros((len(first), 2), dtype=np.float32)
+        )
+        projections.swap_projection(
+            database_url, "t", second, np.ones((len(second), 2), dtype=np.float32)
+        )
+    finally:
+        done.set()
+        reader.join()
+
+    # Readers saw the legacy rows, then each swapped-in projection whole
+    assert seen and set(seen) <= {10, 20}
+    with psycopg.connect(database_url, autocommit=True) as con:
+        assert con.execute(
+            "SELECT relkind FROM pg_class WHERE oid = 'paper_projection_2d'::regclass"
+        ).fetchone() == ("p",)
+        rows = con.execute(
+            "SELECT projection, count(*), min(x), max(x) FROM paper_projection_2d "
+            "GROUP BY 1 ORDER BY 1"
+        ).fetchall()
+        assert rows == [("other", 5, 0.0, 0.0), ("t", 20, 1.0, 1.0)]
+        part = projections.partition_name("t")
+        relations = {
+            name
+            for (name,) in con.execute(
+                "SELECT relname FROM pg_class WHERE relnamespace = %s::regnamespace",
+                [SCHEMA],
+            ).fetchall()
+        }
+        assert {part, f"{part}_pkey", f"{part}_proj_xy_idx"} <= relations
+        assert not any("stage" in name or "legacy" in name for name in relations)
@@ -0,0 +1,119 @@
+"""/api/search continuation tokens (no database needed)."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight import search_cursor  # noqa: E402
+from oversight.api_common import (  # noqa: E402
+    BadRequest,
+    next_search_cursor,
+    parse_search,
+)
+
+
+def _row(paper_id: str, distance: float) -> tuple:
+    return (paper_id, "Title", "", "arxiv", "", None, [], [], None, distance)
+
+
+def test_cursor_round_trips_the_search():
+    params = parse_search({"text": " graphs ", "limit": 2, "sources": {"POPL": True}})
+    token = next_search_cursor(params, [_row("a", 0.1), _row("b", 0.25)])
+    assert token is not None
+
+    resumed = parse_search({"cursor": token, "text": "ignored", "limit": 50})
+    assert resumed.text == "graphs"
+    assert resumed.limit == 2
+    assert resumed.sources == ["POPL"]
+    assert resumed.after == (0.25, "b")
+
+
+def test_short_page_has_no_next_cursor():
+    params = parse_search({"text": "graphs", "limit": 3})
+    assert next_search_cursor(params, [_row("a", 0.1)]) is None
+
+
+def test_tampered_cursor_is_rejected():
+    params = parse_search({"text": "graphs", "limit": 1})
+    token = next_search_cursor(params, [_row("a", 0.1)])
+    payload, signature = token.split(".")
+    forged = search_cursor._b64(
+        search_cursor._unb64(payload).replace(b"graphs", b"GRAPHS")
+    )
+    with pytest.raises(BadRequest, match="invalid"):
+        parse_search({"cursor": f"{forged}.{signature}"})
+    with pytest.raises(BadRequest, match="malformed"):
+        parse_search({"cursor": "not-a-cursor"})
+
+
+def test_cursor_from_another_embedder_is_rejected(monkeypatch):
+    params = parse_search({"text": "graphs", "limit": 1})
+    token = next_search_cursor(params, [_row("a", 0.1)])
+    monkeypatch.setenv("OVERSIGHT_EMBEDDING_MODEL", "fake/hash-3072")
+    with pytest.raises(BadRequest):
+        parse_search({"cursor": token})
+
+
+def test_expired_cursor_is_rejected(monkeypatch):
+    params = parse_search({"text": "graphs", "limit": 1})
+    token = next_search_cursor(params, [_row("a", 0.1)])
+    monkeypatch.setattr(search_cursor, "CURSOR_TTL_S", -1)
+    with pytest.raises(BadRequest, match="expired"):
+        parse_search({"cursor": token})
+
+
+def test_batch_scopes_iterative_scan_to_cursor_pages():
+    from oversight.embedding_backends import GEMINI
+    from oversight.PaperDatabase import (
+        ITERATIVE_SCAN_SQL,
+        PLAIN_SCAN_SQL,
+        KnnSearch,
+        knn_search_statements,
+    )
+
+    searches = [
+        KnnSearch([0.0], None, [], after=None),
+        KnnSearch([0.0], None, [], after=(0.2, "a")),
+        KnnSearch([0.0], None, [], after=(0.3, "b")),
+        KnnSearch([0.0], None, [], after=None),
+    ]
+    statements = knn_search_statements(GEMINI, searches)
+    scans = [q for q, _ in statements if q in (ITERATIVE_SCAN_SQL, PLAIN_SCAN_SQL)]
+    assert scans == [ITERATIVE_SCAN_SQL, PLAIN_SCAN_SQL]
+    assert sum(params is not None for _, params in statements) == len(searches)
+
+
+def test_batch_scopes_exact_scan_to_exact_searches():
+    from oversight.embedding_backends import GEMINI
+    from oversight.PaperDatabase import (
+        EXACT_SCAN_SQL,
+        INDEX_SCAN_SQL,
+        KnnSearch,
+        knn_search_statements,
+    )
+
+    searches = [
+        KnnSearch([0.0], None, [], exact=True),
+        KnnSearch([0.0], None, [], exact=True),
+        KnnSearch([0.0], None, []),
+    ]
+    statements = knn_search_statements(GEMINI, searches)
+    scans = [q for q, _ in statements if q in (EXACT_SCAN_SQL, INDEX_SCAN_SQL)]
+    assert scans == [EXACT_SCAN_SQL, INDEX_SCAN_SQL]
+    assert statements[0][0] == EXACT_SCAN_SQL
+
+
+def test_serve_refuses_workers_without_a_shared_secret(monkeypatch):
+    import argparse
+
+    from oversight import cli
+
+    monkeypatch.delenv("OVERSIGHT_CURSOR_SECRET", raising=False)
+    args = argparse.Namespace(port=8000, asgi=True, workers=4, debug=False)
+    with pytest.raises(AssertionError, match="OVERSIGHT_CURSOR_SECRET"):
+        cli.cmd_serve(args)
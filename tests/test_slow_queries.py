@@ -0,0 +1,104 @@
+"""Slow-query capture: threshold parsing and redaction (no database needed)
+and, when DATABASE_URL points at a reachable database, an end-to-end
+capture of a named query's plan."""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight import slow_queries  # noqa: E402
+
+
+def test_parse_thresholds():
+    assert slow_queries.parse_thresholds("") == (None, {})
+    assert slow_queries.parse_thresholds("250, find_neighbors=80,suggest=2.5") == (
+        250.0,
+        {"find_neighbors": 80.0, "suggest": 2.5},
+    )
+
+
+def test_params_are_redacted():
+    params = {"q": [0.1] * 3072, "limit": 10, "oldest": "2025-01-01", "x": None}
+    assert slow_queries.redact_params(params) == {
+        "q": "<list len=3072>",
+        "limit": 10,
+        "oldest": "<str len=10>",
+        "x": None,
+    }
+    assert slow_queries.redact_params(["paper/1", 21, True]) == [
+        "<str len=7>",
+        21,
+        True,
+    ]
+
+
+def test_plan_literals_are_scrubbed():
+    plan = "Index Cond: ((paper_id)::text = 'it''s secret'::text)"
+    assert slow_queries.scrub_plan(plan) == "Index Cond: ((paper_id)::text = '…'::text)"
+
+
+def test_unthresholded_names_are_not_wrapped(monkeypatch):
+    monkeypatch.setattr(slow_queries, "DEFAULT_THRESHOLD_MS", None)
+    monkeypatch.setattr(slow_queries, "THRESHOLDS_MS", {"find_neighbors": 50.0})
+
+    def fn() -> None:
+        pass
+
+    assert slow_queries.named_query("suggest")(fn) is fn
+    assert slow_queries.named_query("find_neighbors")(fn) is not fn
+
+
+def _db_available() -> bool:
+    if not os.getenv("DATABASE_URL"):
+        return False
+    import psycopg
+
+    try:
+        with psycopg.connect(os.environ["DATABASE_URL"], connect_timeout=2):
+            return True
+    except Exception:
+        return False
+
+
+@pytest.mark.skipif(not _db_available(), reason="DATABASE_URL not set or not reachable")
+def test_slow_named_query_is_explained(monkeypatch):
+    import psycopg
+
+    monkeypatch.setattr(slow_queries, "ENABLED", True)
+    monkeypatch.setattr(slow_queries, "THRESHOLDS_MS", {"test_slow_query": 1.0})
+
+    @slow_queries.named_query("test_slow_query")
+    def slow(con: psycopg.Connection) -> None:
+        con.execute("SET work_mem = '8MB'")
+        con.execute("SELECT pg_sleep(0.01), %s::text", ["do not log me"]).fetchall()
+
+    with psycopg.connect(os.environ["DATABASE_URL"], autocommit=True) as con:
+        slow_queries.instrument(con)
+        slow(con)
+        row = None
+        for _ in range(50):
+            time.sleep(0.1)
+            try:
+                row = con.execute(
+                    "SELECT params, settings, plan, duration_ms FROM slow_query_log"
+                    " WHERE name = 'test_slow_query'"
+                ).fetchone()
+            except psycopg.errors.UndefinedTable:
+                continue
+            if row is not None:
+                break
+        con.execute("DELETE FROM slow_query_log WHERE name = 'test_slow_query'")
+
+    assert row is not None
+    params, settings, plan, duration_ms = row
+    assert params == ["<str len=13>"]
+    assert settings == ["SET work_mem = '8MB'"]
+    assert "actual time" in plan and "do not log me" not in plan
+    assert duration_ms >= 10
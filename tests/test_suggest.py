@@ -0,0 +1,54 @@
+"""/api/suggest input handling (no database needed)."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight.api_common import MAX_SUGGEST_CHARS, parse_suggest_args  # noqa: E402
+from oversight.PaperDatabase import merge_suggestions, prefix_tsquery  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("Lamport", "lamport:*"),
+        ("time, clocks & the ord", "time & clocks & the & ord:*"),
+        ("GPT-4 o'brien", "gpt & 4 & o & brien:*"),
+        ("snake_case", "snake & case:*"),
+        ("!!: &|", None),
+    ],
+)
+def test_prefix_tsquery(text, expected):
+    assert prefix_tsquery(text) == expected
+
+
+def test_suggest_args():
+    assert parse_suggest_args({"q": "  attention  "}) == ("attention", 8)
+    q, _ = parse_suggest_args({"q": "x" * 1000, "limit": "3"})
+    assert len(q) == MAX_SUGGEST_CHARS
+
+
+def test_prefix_matches_come_first_and_papers_once():
+    rows = [
+        ("a", "", None, None, None, "prefix", 0.1),
+        ("b", "", None, None, None, "prefix", 0.2),
+        ("a", "", None, None, None, "fuzzy", 0.1),
+        ("c", "", None, None, None, "fuzzy", 0.3),
+    ]
+    assert [r[0] for r in merge_suggestions(rows, 10)] == ["a", "b", "c"]
+    assert [r[0] for r in merge_suggestions(rows, 2)] == ["a", "b"]
+
+
+def test_empty_input_needs_no_database():
+    from starlette.testclient import TestClient
+
+    from oversight.asgi_app import app
+    from oversight.flask_app import app as flask_app
+
+    assert TestClient(app).get("/api/suggest?q=").json() == {"suggestions": []}
+    assert flask_app.test_client().get("/api/suggest").get_json() == {"suggestions": []}
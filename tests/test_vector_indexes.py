@@ -0,0 +1,51 @@
+"""HNSW index status: build parameters and the fit-in-memory report (no
+database needed)."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from oversight.vector_indexes import HnswIndex, IndexStatus, _options  # noqa: E402
+
+GB = 2**30
+
+
+def index(name, size, resident=None, valid=True):
+    return HnswIndex(
+        name, "embedding_x", "halfvec_cosine_ops", valid, 16, 64, size, resident
+    )
+
+
+def test_options():
+    assert _options(None) == {"m": 16, "ef_construction": 64}
+    assert _options(["m=24", "ef_construction=128"]) == {
+        "m": 24,
+        "ef_construction": 128,
+    }
+
+
+def test_report():
+    status = IndexStatus(
+        [index("a_idx", 6 * GB, 3 * GB), index("b_idx", GB, valid=False)],
+        shared_buffers=8 * GB,
+        effective_cache_size=24 * GB,
+        autoprewarm=True,
+    )
+    # The invalid leftover doesn't count against memory.
+    assert status.total == 6 * GB and status.fits_shared_buffers
+    report = status.report()
+    assert "a_idx on embedding_x: m=16 ef_construction=64, 6.00 GB, 50.0% in" in report
+    assert "b_idx on embedding_x: m=16 ef_construction=64, 1.00 GB INVALID" in report
+    assert "WARNING" not in report
+    assert "autoprewarm after restart: on" in report
+
+    grown = IndexStatus([index("a_idx", 12 * GB)], 8 * GB, 24 * GB, False)
+    assert not grown.fits_shared_buffers and grown.fits_cache
+    assert "exceed shared_buffers" in grown.report()
+    assert "Residency unknown" in grown.report()
+
+    spilled = IndexStatus([index("a_idx", 30 * GB, 0)], 8 * GB, 24 * GB, False)
+    assert "exceed effective_cache_size" in spilled.report()